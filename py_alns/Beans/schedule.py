@@ -9,6 +9,7 @@ from py_alns.Beans.voyage import Voyage
 from py_alns.Beans.visit import Visit
 from py_alns.utils.utils import daily_visits_from_departure_scenarios
 from py_alns.utils.distance_manager import DistanceManager
+from py_alns.utils.route_cache import RouteCache
 import time
 import pandas as pd
 from copy import deepcopy, copy
@@ -29,12 +30,19 @@ class Schedule:
     MAX_INST_PER_VOYAGE = 5
     MAX_ATTEMPTS_TO_INIT = 10
 
-    def __init__(self, vessels: List[Vessel], installations: List[Installation], base: Base, schedule=None):
+    def __init__(self, vessels: List[Vessel], installations: List[Installation], base: Base, schedule=None,
+                 route_cache=None):
+        """
+        :param route_cache: route optimization cache shared by schedules of the same instance. New cache is created
+            if not passed. Copies of the schedule share the cache of the original.
+        :type route_cache: RouteCache
+        """
         self.vessels = vessels
         self.schedule = {}
         self.installations = installations
         self.base = base
-        self.distance_manager = DistanceManager(base, installations)
+        self.distance_manager = DistanceManager.for_instance(base, installations)
+        self.route_cache = route_cache if route_cache is not None else RouteCache()
         self.feasible = False
         if not schedule:
             self.generate_init_schedule()
@@ -43,7 +51,8 @@ class Schedule:
             self.feasible = self._check_feasibility()
             if not self.feasible:
                 raise AttributeError('Passed schedule is not feasible')
-        self.total_cost = self.calc_total_cost()
+            self._reset_tracking()
+        self.update_cost()
 
     def shallow_copy(self, ):
         """
@@ -51,23 +60,66 @@ class Schedule:
         :return:
         :rtype: Schedule
         """
+        # Pending changes are applied once here instead of in both schedules
+        self._refresh_dirty_voyages()
         new_object = copy(self)
         new_object.schedule = {inst: [voyage.__deepcopy__() for voyage in voyages]
                                for inst, voyages in self.schedule.items()}
+        new_object._copy_tracking(self)
         return new_object
 
+    def snapshot(self):
+        """
+        Compact picklable representation of the voyages, see from_snapshot.
+        :return: tuple of (vessel_idx, start_day, route installations indices, end_time) for all voyages
+        :rtype: tuple[tuple[int, int, tuple[int], float]]
+        """
+        return tuple((vessel.idx, voyage.start_day, tuple(inst.idx for inst in voyage.route), voyage.end_time)
+                     for vessel, voyages in self.schedule.items() for voyage in voyages)
+
+    @classmethod
+    def from_snapshot(cls, vessels, installations, base, snapshot, route_cache=None):
+        """
+        Restores schedule from snapshot without optimizing routes again. Feasibility is not required.
+        :param snapshot: result of Schedule.snapshot
+        :rtype: Schedule
+        """
+        sch = cls.__new__(cls)
+        sch.vessels = vessels
+        sch.installations = installations
+        sch.base = base
+        sch.distance_manager = DistanceManager.for_instance(base, installations)
+        sch.route_cache = route_cache if route_cache is not None else RouteCache()
+        sch.schedule = {v: [] for v in vessels}
+        vessels_by_idx = {v.idx: v for v in vessels}
+        insts_by_idx = {inst.idx: inst for inst in installations}
+        for vessel_idx, start_day, route, end_time in snapshot:
+            vessel = vessels_by_idx[vessel_idx]
+            voyage = Voyage(base, sch.distance_manager, start_day, sch.route_cache)
+            voyage.vessel = vessel
+            for inst_idx in route:
+                voyage.add_inst(insts_by_idx[inst_idx])
+            voyage.end_time = end_time
+            voyage.update_edges()
+            sch.schedule[vessel].append(voyage)
+        sch._reset_tracking()
+        sch.update()
+        return sch
+
     def generate_init_schedule(self):
         extra_vessels = 0
         attempt_count = 0
         while not self.feasible:
             self.schedule = {v: [] for v in self.vessels}
+            self._reset_tracking()
             for _ in range(self.MAX_ATTEMPTS_TO_INIT):
                 daily_visits = daily_visits_from_departure_scenarios(self.installations, DAYS)
                 for day, day_visits in enumerate(daily_visits):
                     n_voyages = int(np.ceil(len(day_visits) / self.MAX_INST_PER_VOYAGE) + extra_vessels)
                     voyages = [Voyage(self.base,
                                       self.distance_manager,
-                                      day) for _ in range(n_voyages)]
+                                      day,
+                                      self.route_cache) for _ in range(n_voyages)]
                     for inst in day_visits:
                         voyage = random.choice(voyages)
                         voyage.add_inst(inst)
@@ -113,6 +165,7 @@ class Schedule:
         voyage.vessel = vessel
         voyage.improve_full_enum()
         self.schedule[vessel].append(voyage)
+        self._register_voyage(voyage, vessel)
 
     def _get_free_vessels(self, day):
         """
@@ -220,11 +273,12 @@ class Schedule:
         :return:
         :rtype: Voyage
         """
-        try :
-            voyage = self.schedule[voyage.vessel][self.schedule[voyage.vessel].index(voyage)]
-        except Exception as e:
+        if voyage.vessel is None:
             return None
-        return voyage
+        for the_voyage in self._day_voyages.get((voyage.vessel.idx, voyage.start_day), ()):
+            if the_voyage.route == voyage.route:
+                return the_voyage
+        return None
 
     def find_voyage_on_day(self, vessel, day):
         """
@@ -236,10 +290,8 @@ class Schedule:
         :return:
         :rtype: Voyage
         """
-        for voyage in self.schedule[vessel]:
-            if voyage.start_day == day:
-                return voyage
-        return None
+        day_voyages = self._day_voyages.get((vessel.idx, day))
+        return day_voyages[0] if day_voyages else None
 
     def remove_visits_from_voyage(self, insts, voyage):
         if not isinstance(insts, list):
@@ -264,9 +316,13 @@ class Schedule:
 
     def remove_voyage(self, voyage):
         try:
-            self.schedule[voyage.vessel].remove(voyage)
+            vessel_voyages = self.schedule[voyage.vessel]
+            # Voyage equal to the passed one is removed, it is not necessarily the same object
+            removed_voyage = vessel_voyages.pop(vessel_voyages.index(voyage))
         except Exception as e:
             logger.error(f'Some error occurred while removing voyage from schedule: {e}, voyage-{voyage}')
+        else:
+            self._unregister_voyage(removed_voyage)
         if voyage.is_empty():
             del voyage
 
@@ -277,12 +333,8 @@ class Schedule:
         :return:
         :rtype: list[Voyage]
         """
-        voyages = []
-        for vessel, vessel_voyages in self.schedule.items():
-            for voyage in vessel_voyages:
-                if inst in voyage.route:
-                    voyages.append(voyage)
-        return voyages
+        self._refresh_inst_index()
+        return list(self._inst_voyages.get(inst, {}).values())
 
     def check_for_replacement_overlap(self, new_voyage, old_voyage):
         for voyage in self.schedule[old_voyage.vessel]:
@@ -317,7 +369,7 @@ class Schedule:
     def add_empty_voyages(self, vessel):
         for day in range(DAYS):
             # NOTE: Creating new instance - costly operation
-            voyage = Voyage(self.base, self.distance_manager, day)
+            voyage = Voyage(self.base, self.distance_manager, day, self.route_cache)
             voyage.end_time = voyage.start_time
             self.insert_voyage(voyage, vessel)
 
@@ -332,11 +384,13 @@ class Schedule:
         if can_insert:
             voyage.vessel = vessel
             self.schedule[vessel].append(voyage)
+            self._register_voyage(voyage, vessel)
             return True
         return False
 
     def append_voyage(self, voyage):
         self.schedule[voyage.vessel].append(voyage)
+        self._register_voyage(voyage, voyage.vessel)
 
     def insert_idle_vessel_and_add_empty_voyages(self):
         for vessel in self.vessels:
@@ -369,15 +423,146 @@ class Schedule:
         print(demand_visits)
 
     def update_feasibility(self):
-        self.feasible = self._check_feasibility()
+        self._refresh_dirty_voyages()
+        self.feasible = self._capacity_violations == 0 and self._demand_mismatches == 0
 
     def update_cost(self):
-        self.total_cost = self.calc_total_cost()
+        self._refresh_dirty_voyages()
+        self.total_cost = self._total_fixed_cost + self._variable_cost_cents / 100
 
     def update(self):
+        """
+        Updates feasibility and total cost. Only voyages changed since the last update are recalculated, the result
+        is the same as of full recalculation with _check_feasibility and calc_total_cost.
+        """
         self.update_feasibility()
         self.update_cost()
 
+    def _reset_tracking(self):
+        """
+        Rebuilds per-voyage costs, demand coverage counters, vessel usage counts and voyage indexes from scratch.
+        """
+        # id(voyage) -> [voyage, vessel, (variable_cost_cents, insts, load_is_feasible) or None if not calculated,
+        #                installations of the voyage in _inst_voyages]
+        self._voyage_entries = {}
+        # (vessel_idx, start_day) -> voyages in the order of the vessel's voyage list
+        self._day_voyages = {}
+        # inst -> {id(voyage): voyage} for voyages visiting the installation, updated from changed voyages on lookup
+        self._inst_voyages = {inst: {} for inst in self.installations}
+        # id(voyage) -> voyage changed since the last update of the costs / of the installation index
+        self._dirty_voyages = {}
+        self._index_dirty_voyages = {}
+        self._visit_counts = {inst: 0 for inst in self.installations}
+        self._demand_mismatches = sum(1 for inst in self.installations if inst.visit_frequency != 0)
+        self._capacity_violations = 0
+        self._variable_cost_cents = 0
+        self._vessel_usage = {vessel: 0 for vessel in self.vessels}
+        self._total_fixed_cost = 0
+        for vessel, voyages in self.schedule.items():
+            for voyage in voyages:
+                self._register_voyage(voyage, vessel)
+        self._refresh_dirty_voyages()
+
+    def _copy_tracking(self, other):
+        """
+        Copies tracking state of other schedule, which voyages were copied into this schedule in the same order.
+        Other schedule must have no pending changes (see _refresh_dirty_voyages).
+        """
+        self._voyage_entries = {}
+        self._dirty_voyages = {}
+        self._index_dirty_voyages = {}
+        self._day_voyages = {}
+        self._inst_voyages = {inst: {} for inst in self.installations}
+        for voyages, other_voyages in zip(self.schedule.values(), other.schedule.values()):
+            for voyage, other_voyage in zip(voyages, other_voyages):
+                _, vessel, contribution, indexed_insts = other._voyage_entries[id(other_voyage)]
+                self._voyage_entries[id(voyage)] = [voyage, vessel, contribution, indexed_insts]
+                self._day_voyages.setdefault((vessel.idx, voyage.start_day), []).append(voyage)
+                for inst in indexed_insts:
+                    self._inst_voyages[inst][id(voyage)] = voyage
+                voyage.dirty_voyages = self._dirty_voyages
+                voyage.index_dirty_voyages = self._index_dirty_voyages
+        self._visit_counts = dict(other._visit_counts)
+        self._vessel_usage = dict(other._vessel_usage)
+
+    def _register_voyage(self, voyage, vessel):
+        self._voyage_entries[id(voyage)] = [voyage, vessel, None, ()]
+        self._day_voyages.setdefault((vessel.idx, voyage.start_day), []).append(voyage)
+        voyage.dirty_voyages = self._dirty_voyages
+        voyage.index_dirty_voyages = self._index_dirty_voyages
+        voyage.mark_dirty()
+        self._vessel_usage[vessel] += 1
+        if self._vessel_usage[vessel] == 1:
+            self._total_fixed_cost += vessel.cost
+
+    def _unregister_voyage(self, voyage):
+        entry = self._voyage_entries.pop(id(voyage), None)
+        if entry is None:
+            return
+        _, vessel, contribution, indexed_insts = entry
+        if contribution is not None:
+            self._apply_contribution(contribution, -1)
+        for inst in indexed_insts:
+            self._inst_voyages[inst].pop(id(voyage), None)
+        day_key = (vessel.idx, voyage.start_day)
+        day_voyages = [v for v in self._day_voyages[day_key] if v is not voyage]
+        if day_voyages:
+            self._day_voyages[day_key] = day_voyages
+        else:
+            del self._day_voyages[day_key]
+        self._dirty_voyages.pop(id(voyage), None)
+        self._index_dirty_voyages.pop(id(voyage), None)
+        voyage.dirty_voyages = None
+        voyage.index_dirty_voyages = None
+        self._vessel_usage[vessel] -= 1
+        if self._vessel_usage[vessel] == 0:
+            self._total_fixed_cost -= vessel.cost
+
+    def _refresh_inst_index(self):
+        """
+        Updates installation index for voyages changed since the last index update. Their costs are recalculated
+        separately by the next update.
+        """
+        for voyage_id, voyage in self._index_dirty_voyages.items():
+            entry = self._voyage_entries.get(voyage_id)
+            if entry is None:
+                continue
+            route = tuple(voyage.route)
+            if route == entry[3]:
+                continue
+            for inst in entry[3]:
+                self._inst_voyages[inst].pop(voyage_id, None)
+            for inst in route:
+                self._inst_voyages[inst][voyage_id] = voyage
+            entry[3] = route
+        self._index_dirty_voyages.clear()
+
+    def _refresh_dirty_voyages(self):
+        self._refresh_inst_index()
+        for voyage_id, voyage in self._dirty_voyages.items():
+            entry = self._voyage_entries.get(voyage_id)
+            if entry is None:
+                continue
+            if entry[2] is not None:
+                self._apply_contribution(entry[2], -1)
+            entry[2] = (int(round(voyage.calc_variable_cost() * 100)),
+                        tuple(voyage.route),
+                        voyage.check_load_feasibility())
+            self._apply_contribution(entry[2], 1)
+        self._dirty_voyages.clear()
+
+    def _apply_contribution(self, contribution, sign):
+        variable_cost_cents, insts, load_is_feasible = contribution
+        self._variable_cost_cents += sign * variable_cost_cents
+        if not load_is_feasible:
+            self._capacity_violations += sign
+        for inst in insts:
+            was_covered = self._visit_counts[inst] == inst.visit_frequency
+            self._visit_counts[inst] += sign
+            is_covered = self._visit_counts[inst] == inst.visit_frequency
+            if was_covered != is_covered:
+                self._demand_mismatches += 1 if was_covered else -1
+
     def drop_empty_voyages(self):
         """
         Removes empty voyages from schedule
@@ -459,7 +644,9 @@ class Schedule:
         """
         voyages_to_move = self.schedule[origin_v]
         for voyage in voyages_to_move:
+            self._unregister_voyage(voyage)
             voyage.vessel = target_v
+            self._register_voyage(voyage, target_v)
         self.schedule[target_v].extend(voyages_to_move)
         self.schedule[origin_v] = []
 
@@ -3,6 +3,7 @@ import pandas as pd
 
 from py_alns.Beans.vessel import Vessel
 from py_alns.Beans.node import Installation, Base, Node
+from py_alns.utils.route_evaluator import evaluate_routes, permutation_indices
 from typing import Type, Optional
 from itertools import permutations
 
@@ -13,9 +14,11 @@ DEPARTURE_TIME = 16
 
 
 class Voyage:
+    # Shorter routes are faster to enumerate one permutation at a time than to evaluate with NumPy
+    MIN_ROUTE_LENGTH_TO_VECTORIZE = 4
 
     def __init__(self,
-                 base: Base, distance_manager, start_day: int):
+                 base: Base, distance_manager, start_day: int, route_cache=None):
         self.vessel: Optional[Vessel] = None
         self.route: list[Installation] = []  # Initialize as empty list
         self.edges = []
@@ -25,6 +28,11 @@ class Voyage:
         self.end_time = self.start_time
         self.base = base
         self.distance_manager = distance_manager
+        self.route_cache = route_cache
+        # Registries of changed voyages of the schedule owning this voyage, for its costs (see Schedule.update) and
+        # for its installation index (see Schedule.find_voyages_containing_visit)
+        self.dirty_voyages = None
+        self.index_dirty_voyages = None
         # self.variable_cost = 0
 
     def __hash__(self):
@@ -45,7 +53,7 @@ class Voyage:
         return f'{vessel_idx}:{self.start_day}'
 
     def __deepcopy__(self):
-        copy = type(self)(self.base, self.distance_manager, self.start_day)
+        copy = type(self)(self.base, self.distance_manager, self.start_day, self.route_cache)
         copy.vessel = self.vessel
         copy.route = [r for r in self.route] if self.route is not None else []
         copy.end_time = self.end_time
@@ -112,18 +120,22 @@ class Voyage:
         # NOTE: added equal sign to check if voyages start at the same time, may be rounding problem
         return (s2 <= e1) & (s1 <= e2)
 
+    def mark_dirty(self):
+        """
+        Reports change of the route, timing or vessel to the schedule owning the voyage.
+        """
+        if self.dirty_voyages is not None:
+            self.dirty_voyages[id(self)] = self
+        if self.index_dirty_voyages is not None:
+            self.index_dirty_voyages[id(self)] = self
+
     def is_on_the_route(self, inst: Installation):
         return inst in (self.route or [])
 
     def earliest_end_time(self, speed):
         if not self.route:
             return self.start_time
-        perm_routes = permutations(self.route)
-        min_end_time = np.inf
-        for route in perm_routes:
-            end_time = self.calc_voyage_end_time(list(route), speed=speed)
-            if end_time < min_end_time:
-                min_end_time = end_time
+        _, min_end_time = self.find_best_route(speed=speed)
         return min_end_time
 
     def assign_vessel(self, vessel: Vessel):
@@ -133,24 +145,65 @@ class Voyage:
             self.improve_full_enum()
         else:
             self.vessel = vessel
+        self.mark_dirty()
 
     def improve_full_enum(self):
         if not self.route:
             self.edges = self.make_edges([])
             return
-        perm_routes = permutations(self.route)
-        min_end_time = np.inf
-        best_route = None
-        for route in perm_routes:
-            end_time = self.calc_voyage_end_time(list(route))
-            if end_time < min_end_time:
-                min_end_time = end_time
-                best_route = list(route)
-        if best_route is not None:
-            self.route = best_route
-        self.edges = self.make_edges(best_route or [])
+        best_route, min_end_time = self.find_best_route()
+        self.route = list(best_route)
+        self.edges = self.make_edges(self.route)
         # maybe make update method to avoid 'forgetting' to update essential parameters
         self.end_time = min_end_time
+        self.mark_dirty()
+
+    def find_best_route(self, speed=None):
+        """
+        Finds the order of installations with the earliest voyage end time. Result is taken from the route cache if
+        the same installations were already optimized for this start day and speed.
+
+        :param speed: vessel speed, defaults to speed of the assigned vessel
+        :type speed: float
+        :return: tuple (best_route, end_time)
+        :rtype: tuple[tuple[Installation], float]
+        """
+        if speed is None:
+            if self.vessel is None:
+                raise AttributeError('Voyage is not assigned to a vessel')
+            speed = self.vessel.speed
+        if self.route_cache is None:
+            return self._enumerate_best_route(speed)
+        key = self.route_cache.make_key(self.route, self.start_day, speed)
+        best = self.route_cache.get(key)
+        if best is None:
+            best = self._enumerate_best_route(speed)
+            self.route_cache.put(key, best)
+        return best
+
+    def _enumerate_best_route(self, speed):
+        # Permutations are enumerated in canonical order so the result does not depend on the current route order
+        # and cached results are identical to the computed ones.
+        canonical_route = sorted(self.route, key=lambda inst: inst.idx)
+        if len(canonical_route) < self.MIN_ROUTE_LENGTH_TO_VECTORIZE:
+            min_end_time = np.inf
+            best_route = None
+            for route in permutations(canonical_route):
+                end_time = self.calc_voyage_end_time(list(route), speed=speed)
+                if end_time < min_end_time:
+                    min_end_time = end_time
+                    best_route = route
+            return best_route, min_end_time
+        perms = permutation_indices(len(canonical_route))
+        route_idx = np.array(self.distance_manager.route_indices(canonical_route)[1:-1], dtype=np.intp)
+        tw_start, tw_end, service_times = self.distance_manager.time_window_arrays()
+        _, _, end_times = evaluate_routes(route_idx[perms],
+                                          self.distance_manager.travel_time_matrix(speed),
+                                          tw_start, tw_end, service_times,
+                                          self.start_time)
+        best = int(np.argmin(end_times))
+        best_route = tuple(canonical_route[i] for i in perms[best])
+        return best_route, end_times[best]
 
     def calc_voyage_end_time(self, route, speed=None):
         """
@@ -164,11 +217,10 @@ class Voyage:
                 raise AttributeError('Voyage is not assigned to a vessel')
             speed = self.vessel.speed
         end_time = self.start_time
-        edges = self.make_edges(route)
-        for edge in edges[:-1]:
-            to_node = edge[1]
-            dist = edge[2]
-            arrival_cum_time = end_time + (dist / speed)
+        route_idx = self.distance_manager.route_indices(route)
+        travel_times = self.distance_manager.travel_time_matrix(speed)
+        for from_idx, to_idx, to_node in zip(route_idx[:-2], route_idx[1:-1], route):
+            arrival_cum_time = end_time + travel_times[from_idx, to_idx]
             arrival_day = arrival_cum_time // HOURS
             arrival_time = arrival_cum_time % HOURS
             if arrival_time < to_node.adjTW[0]:
@@ -179,7 +231,7 @@ class Voyage:
                 start_service_time = arrival_cum_time
 
             end_time = start_service_time + to_node.service_time
-        end_time = end_time + edges[-1][2] / speed
+        end_time = end_time + travel_times[route_idx[-2], route_idx[-1]]
         return end_time
 
     def total_wait_time(self):
@@ -191,8 +243,9 @@ class Voyage:
     def total_sailing_time(self):
         if self.vessel is None:
             raise ValueError("Vessel not assigned")
-        edges = self.make_edges(self.route or [])
-        return sum([e[2]/self.vessel.speed for e in edges])
+        route_idx = self.distance_manager.route_indices(self.route or [])
+        travel_times = self.distance_manager.travel_time_matrix(self.vessel.speed)
+        return sum([travel_times[i, j] for i, j in zip(route_idx[:-1], route_idx[1:])])
 
     def total_service_time(self):
         return sum([i.service_time for i in (self.route or [])])
@@ -218,6 +271,7 @@ class Voyage:
             self.route = []
         self.route.append(new_inst)
         self.deck_load += new_inst.deck_demand
+        self.mark_dirty()
 
     # rename to remove inst from route
     def remove_inst(self, installation: Installation):
@@ -230,6 +284,7 @@ class Voyage:
             raise ValueError("Route is empty")
         self.route.remove(installation)
         self.deck_load -= installation.deck_demand
+        self.mark_dirty()
 
     def insert_visit(self, inst):
         if inst in self.route:
@@ -256,9 +311,11 @@ class Voyage:
         :rtype: list[(Installation, Installation, float)]
         """
         route_with_base = [self.base] + route + [self.base]
-        edges = zip(route_with_base[:-1], route_with_base[1:])
-        return [(from_node, to_node, self.distance_manager.distance(from_node.name, to_node.name))
-                for (from_node, to_node) in edges]
+        route_idx = self.distance_manager.route_indices(route)
+        distances = self.distance_manager.distance_matrix
+        return [(from_node, to_node, distances[from_idx, to_idx])
+                for (from_node, to_node, from_idx, to_idx)
+                in zip(route_with_base[:-1], route_with_base[1:], route_idx[:-1], route_idx[1:])]
 
     def is_empty(self):
         return not self.route or len(self.route) < 1
@@ -5,8 +5,16 @@ from py_alns.alns.repair_operator import *
 from py_alns.alns.improve_operator import *
 from config.config_utils import get_config
 import logging
+import random
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from py_alns.utils.utils import format_td
+from py_alns.utils.route_cache import RouteCache
+from py_alns.utils.tracer import make_tracer
+
+restart_workers = int(get_config()['alns.restarts']['workers'])
+trace_enabled = get_config()['alns.trace'].getboolean('enabled')
+trace_capacity = int(get_config()['alns.trace']['capacity'])
 
 
 def calculate_operator_probabilities(weights):
@@ -29,7 +37,7 @@ def select_operator(operators, probabilities):
 
 class ALNS:
     def __init__(self, installations, base, vessels,
-                 operator_selection_type="Standard") -> None:
+                 operator_selection_type="Standard", seed=None, tracer=None) -> None:
         self.installations = installations
         self.base = base
         self.vessels = vessels
@@ -41,6 +49,9 @@ class ALNS:
         self.cooling_parameter = float(get_config()['alns']['cooling_parameter'])
         self.cooling_rate = 1 - self.cooling_parameter / self.num_iterations
         self.operator_selection_type = operator_selection_type
+        self.seed = seed
+        self.tracer = tracer if tracer is not None else make_tracer(trace_enabled, trace_capacity)
+        self.route_cache = RouteCache(maxsize=int(get_config()['alns.route_cache']['maxsize']))
         self._temperature = None
         self._init_logging()
         self._init_algorithm()
@@ -76,87 +87,165 @@ class ALNS:
             self.rewards = [1, 0.5, 0]
 
 
-    def run(self):
+    def run(self, workers=None):
+        """
+        Runs ALNS with restarts and returns the best solution found.
+
+        :param workers: number of processes to run restarts in, [alns.restarts] workers if not given
+        :type workers: int
+        :return: best solution over all restarts
+        :rtype: Schedule
+        """
+        best_solution, _ = self.run_with_restarts(workers)
+        return best_solution
+
+    def run_with_restarts(self, workers=None):
+        """
+        Runs num_restarts independent restarts, sequentially or in a process pool. Every restart seeds random and
+        numpy.random with its own seed, so a restart gives the same result in both modes and the global best is the
+        same for the same seeds. Among restarts with equal cost the one with the lowest index is the best.
+
+        :param workers: number of processes to run restarts in, [alns.restarts] workers if not given
+        :type workers: int
+        :return: tuple (best_solution, summaries), summaries are dicts with restart index, seed, initial and best
+            cost, feasibility and run time of each restart
+        :rtype: tuple[Schedule, list[dict]]
+        """
+        if workers is None:
+            workers = restart_workers
         self.logger.info("Starting ALNS run")
         start_time = datetime.now()
+        seeds = self.restart_seeds()
+        if workers > 1 and self.num_restarts > 1:
+            self.logger.info(f"Running {self.num_restarts} restarts in {workers} processes")
+            with ProcessPoolExecutor(max_workers=min(workers, self.num_restarts)) as pool:
+                results = []
+                for s_star, summary, tracer in pool.map(self._run_restart_in_worker, range(self.num_restarts), seeds):
+                    self.tracer.merge(tracer)
+                    results.append((s_star, summary))
+        else:
+            results = [self._run_restart(i, seed) for i, seed in enumerate(seeds)]
         best_cost = np.inf
         best_solution = None
-        for i in range(self.num_restarts):
-            self.logger.info(f"Restart {i+1}/{self.num_restarts}")
-            s_0 = self.initial_solution()
-            s_star = s_0.shallow_copy()
-            s = s_0.shallow_copy()
-            _temperature_init = s_0.total_cost
-            self._temperature = _temperature_init
-            for j in range(self.num_iterations):
-                iteration_start_time = datetime.now()
-                self._temperature = self._temperature * self.cooling_rate
-                s_1 = s.shallow_copy()
-                iteration_start_cost = s_1.total_cost
-                self.logger.debug(f"Iteration {j+1} starting")
-                restoration_start_time = datetime.now()
-                destroy_operator, d_id = select_operator(self.destroy_operators, self.destroy_operator_probabilities)
-                repair_operator, r_id = select_operator(self.repair_operators, self.repair_operator_probabilities)
-                inst_pool = destroy_operator(s_1)
-                s_1.insert_idle_vessel_and_add_empty_voyages()
-                pool_empty = repair_operator(inst_pool, s_1)
-                s_1.drop_empty_voyages()
-                s_1.update()
-                operators_cumm_time = timedelta(0)
-                operators_cumm_time += datetime.now() - restoration_start_time
-                self.logger.debug(f"[Restoration] time:{format_td(datetime.now() - restoration_start_time)}, "
-                                  f"stage cost change: {s_1.total_cost - iteration_start_cost:0.2f}, "
-                                  f"pool empty: {pool_empty}, feasible: {s_1.feasible}")
-                improve_start_cost = s_1.total_cost
-                if pool_empty and s_1.feasible:
-                    is_improved = True
-                    while is_improved:
-                        for improve_operator in self.improve_operators_sequence:
-                            operator_start_cost = s_1.total_cost
-                            improve_operator_start_time = datetime.now()
-                            s_1 = improve_operator(s_1)
-                            operators_cumm_time += datetime.now() - improve_operator_start_time
-                            self.logger.debug(f"[Improve] {improve_operator.__name__:30} "
-                                              f"time:{format_td(datetime.now() - improve_operator_start_time)}, "
-                                              f"cost change: {s_1.total_cost - operator_start_cost:>6.2f}")
-                        else:
-                            is_improved = False
-                    self.logger.debug(f"[Improve] stage cost change: {s_1.total_cost - improve_start_cost:0.2f}")
-
-                    if j < self.aggressive_search_factor * self.num_iterations:
-                        if s_1.total_cost < s_star.total_cost:
-                            s_star = s_1.shallow_copy()
-                            s = s_1
-                            self.logger.debug(f"[Best] found cost: {s_star.total_cost:0.2f}")
-                        elif s_1.total_cost < s.total_cost:
-                            s = s_1
-                            self.logger.debug(f"[New] cost: {s.total_cost:0.2f}")
-                        elif self.accept(s, s_1):
-                            s = s_1
-                            self.logger.debug(f"[Annealing] cost: {s.total_cost:0.2f}")
-                    elif s_1.total_cost < s_star.total_cost:
-                        s_star = s_1.shallow_copy()
-                        s = s_1
-                        self.logger.debug(f"[Best] found cost: {s_star.total_cost:0.2f}")
-                    else:
-                        s = s_star
-                        self.logger.debug(f"Continue with best solution: {s_star.total_cost:0.2f}")
-                    iteration_end_time = datetime.now()
-                    self.logger.debug(f"Iteration {j+1} ends, total_time: {format_td(iteration_end_time-iteration_start_time)}," +
-                                      f"added time: {format_td(iteration_end_time - iteration_start_time - operators_cumm_time)}")
-            self.logger.info('*'*50)
-            self.logger.info('Restart completed, best solution found:')
-            self.logger.info(f"Total cost: {s_star.total_cost:0.2f}")
+        summaries = []
+        for s_star, summary in results:
+            summaries.append(summary)
             if s_star.total_cost < best_cost:
                 best_cost = s_star.total_cost
-                best_solution = s_star.shallow_copy()
+                best_solution = s_star
         end_time = datetime.now()
         self.logger.info(f"ALNS run completed in {format_td(end_time - start_time)}")
         self.logger.info(f"Best solution found: {best_cost:0.2f}")
-        return best_solution
+        self.logger.info(f"Route cache: {self.route_cache.stats()}")
+        if self.tracer.enabled:
+            self.logger.info(f"Time by stage: {self.tracer.stage_summary()}")
+        return best_solution, summaries
+
+    def restart_seeds(self):
+        """
+        :return: seed of every restart, derived from self.seed or drawn from numpy.random if it is not set
+        :rtype: list[int]
+        """
+        base_seed = self.seed if self.seed is not None else int(np.random.randint(2 ** 31 - 1))
+        return [base_seed + i for i in range(self.num_restarts)]
+
+    def _run_restart_in_worker(self, i, seed):
+        """
+        Runs one restart in a worker process with its own empty tracer, which is returned to be merged into the
+        tracer of the main process.
+
+        :return: tuple (best_solution, summary, tracer)
+        """
+        self.tracer = self.tracer.empty_copy()
+        s_star, summary = self._run_restart(i, seed)
+        return s_star, summary, self.tracer
+
+    def _run_restart(self, i, seed):
+        """
+        Runs one restart of ALNS.
+
+        :param i: restart index
+        :type i: int
+        :param seed: seed for random and numpy.random
+        :type seed: int
+        :return: tuple (best_solution, summary)
+        :rtype: tuple[Schedule, dict]
+        """
+        self.logger.info(f"Restart {i+1}/{self.num_restarts}, seed {seed}")
+        restart_start_time = datetime.now()
+        random.seed(seed)
+        np.random.seed(seed)
+        s_0 = self.initial_solution()
+        s_star = s_0.shallow_copy()
+        s = s_0.shallow_copy()
+        _temperature_init = s_0.total_cost
+        self._temperature = _temperature_init
+        tracer = self.tracer
+        for j in range(self.num_iterations):
+            tracer.set_iteration(i, j)
+            self._temperature = self._temperature * self.cooling_rate
+            s_1 = s.shallow_copy()
+            iteration_start_cost = s_1.total_cost
+            destroy_operator, d_id = select_operator(self.destroy_operators, self.destroy_operator_probabilities)
+            repair_operator, r_id = select_operator(self.repair_operators, self.repair_operator_probabilities)
+            operator_start_time = tracer.clock()
+            inst_pool = destroy_operator(s_1)
+            if tracer.enabled:
+                s_1.update()
+                tracer.record('destroy', destroy_operator.__name__, operator_start_time,
+                              s_1.total_cost - iteration_start_cost)
+                operator_start_time = tracer.clock()
+            repair_start_cost = s_1.total_cost
+            s_1.insert_idle_vessel_and_add_empty_voyages()
+            pool_empty = repair_operator(inst_pool, s_1)
+            s_1.drop_empty_voyages()
+            s_1.update()
+            tracer.record('repair', repair_operator.__name__, operator_start_time, s_1.total_cost - repair_start_cost)
+            if pool_empty and s_1.feasible:
+                is_improved = True
+                while is_improved:
+                    for improve_operator in self.improve_operators_sequence:
+                        operator_start_cost = s_1.total_cost
+                        operator_start_time = tracer.clock()
+                        s_1 = improve_operator(s_1)
+                        tracer.record('improve', improve_operator.__name__, operator_start_time,
+                                      s_1.total_cost - operator_start_cost)
+                    else:
+                        is_improved = False
+
+                if j < self.aggressive_search_factor * self.num_iterations:
+                    if s_1.total_cost < s_star.total_cost:
+                        s_star = s_1.shallow_copy()
+                        s = s_1
+                        self.logger.debug(f"[Best] found cost: {s_star.total_cost:0.2f}")
+                    elif s_1.total_cost < s.total_cost:
+                        s = s_1
+                        self.logger.debug(f"[New] cost: {s.total_cost:0.2f}")
+                    elif self.accept(s, s_1):
+                        s = s_1
+                        self.logger.debug(f"[Annealing] cost: {s.total_cost:0.2f}")
+                elif s_1.total_cost < s_star.total_cost:
+                    s_star = s_1.shallow_copy()
+                    s = s_1
+                    self.logger.debug(f"[Best] found cost: {s_star.total_cost:0.2f}")
+                else:
+                    s = s_star
+                    self.logger.debug(f"Continue with best solution: {s_star.total_cost:0.2f}")
+        self.logger.info('*'*50)
+        self.logger.info('Restart completed, best solution found:')
+        self.logger.info(f"Total cost: {s_star.total_cost:0.2f}")
+        summary = {
+            'restart': i,
+            'seed': seed,
+            'initial_cost': float(s_0.total_cost),
+            'best_cost': float(s_star.total_cost),
+            'feasible': bool(s_star.feasible),
+            'time': (datetime.now() - restart_start_time).total_seconds(),
+        }
+        return s_star, summary
 
     def initial_solution(self):
-        sch = Schedule(self.installations, self.vessels, self.base)
+        sch = Schedule(self.vessels, self.installations, self.base, route_cache=self.route_cache)
         return sch
 
     def accept(self, s, s_1):
@@ -2,10 +2,15 @@ from py_alns.alns.repair_operator import *
 import numpy as np
 from itertools import permutations, combinations
 from py_alns.alns.destroy_operator import *
+from py_alns.alns.relocation_table import RelocationCostTable
+from py_alns.alns.parallel_swap import best_swap_parallel
+from config.config_utils import get_config
 from py_alns.Beans.schedule import Schedule
 import random
 
 DAYS = 7
+swap_workers = int(get_config()['alns.swap']['workers'])
+swap_chunk_size = int(get_config()['alns.swap']['chunk_size'])
 
 
 def fleet_size_reduction(schedule):
@@ -176,7 +181,8 @@ def deep_greedy_relocation(schedule):
     # relocation_added_costs = relocation_added_costs_from_insertion_and_removal(insertion_added_costs,
     #                                                                            removal_added_costs)
 
-    relocation_added_costs = added_costs_for_visits_relocation(curr_schedule)
+    # Relocation costs are kept between iterations, only costs touched by the applied relocation are recalculated
+    relocation_table = RelocationCostTable(curr_schedule)
 
     is_improved = True
     # Теперь в цикле сначала делается релокейшн. Если улучшилось и физибл, то обновляется расписание и обновляются
@@ -197,13 +203,14 @@ def deep_greedy_relocation(schedule):
         # I guess it is duplicating logic of added cost == inf. I think this way is faster than adding dummy added cost
         # with inf cost everytime.
         # I first put it to the init of is_improved place, but error occured in this cyle. So, I moved it here.
-        if len(relocation_added_costs) < 1:
+        best_relocation = relocation_table.best_relocation()
+        if best_relocation is None:
             is_improved = False
             break
         count += 1
         sch = curr_schedule.shallow_copy()
         # Best relocation
-        inst_to_move, from_voyage, to_voyage, acost = relocation_added_costs[0]
+        inst_to_move, from_voyage, to_voyage, acost = best_relocation
         # NOTE: It happens quite often, hands off.
         if acost == np.inf:
             is_improved = False
@@ -226,7 +233,7 @@ def deep_greedy_relocation(schedule):
             # removal_added_costs = added_costs_for_visits_removal(all_visits, curr_schedule)
             # relocation_added_costs = relocation_added_costs_from_insertion_and_removal(insertion_added_costs,
             #                                                                            removal_added_costs)
-            relocation_added_costs = added_costs_for_visits_relocation(curr_schedule)
+            relocation_table.update(curr_schedule, inst_to_move, from_voyage, to_voyage)
         else:
             is_improved = False
     # NOTE: for some reason it was in the if below
@@ -283,36 +290,38 @@ def deep_greedy_swap(schedule):
     return curr_schedule if curr_schedule.feasible else schedule
 
 
-def deep_greedy_swap_plain(schedule):
+def deep_greedy_swap_plain(schedule, workers=None):
+    """
+    Applies the best improving swap of two visits until no swap improves the schedule.
+    :param schedule: Schedule to be improved.
+    :type schedule: Schedule
+    :param workers: number of processes evaluating swaps, defaults to [alns.swap] workers from settings.
+        With 1 worker swaps are evaluated in the current process. Result does not depend on the number of workers.
+    :type workers: int
+    :return:
+    """
+    if workers is None:
+        workers = swap_workers
     is_improved = True
     curr_schedule = schedule.shallow_copy()  # Make an initial shallow copy of the schedule
 
     while is_improved:
-        best_swap = None
-        best_swap_cost_reduction = 0  # Track the best possible reduction in cost
-        all_visits = curr_schedule.visits_list_plain()  # Get all visits in plain representation
-        all_swaps = combinations(all_visits, 2)  # Generate all pairwise combinations of visits
-
-        # IMPROVE: Consider parallelizing swap evaluations for large visit sets.
-        for swap in all_swaps:
-            # swap is a pair of tuples (inst, vessel, start_day)
-            # Skip invalid swaps (same instance, or same vessel and start day)
-            if swap[0][0].idx == swap[1][0].idx or (swap[0][1] == swap[1][1] and swap[0][2] == swap[1][2]):
-                continue
+        # Pairs of visits in plain representation (inst, vessel, start_day). Pairs that cannot be swapped or
+        # cannot give feasible schedule (same instance, same voyage, deck capacity, departure spread) are skipped.
+        all_swaps = plain_swap_candidates(curr_schedule)
 
-            # Perform a shallow copy of the current schedule before testing the swap
-            sch = curr_schedule.shallow_copy()
-
-            # Perform the swap using tuple representation and update the schedule
-            sch.swap_visits_tuple_repr(swap[0], swap[1])
-            sch.update()
-
-            # Check if the swap produces a feasible solution and reduces cost
-            if sch.feasible:
-                cost_reduction = sch.total_cost - curr_schedule.total_cost
+        if workers > 1:
+            best_swap, best_swap_cost_reduction = best_swap_parallel(curr_schedule, all_swaps, workers,
+                                                                     swap_chunk_size)
+        else:
+            best_swap = None
+            best_swap_cost_reduction = 0  # Track the best possible reduction in cost
+            for swap in all_swaps:
+                # Perform the swap on a copy of the schedule and check if it is feasible and reduces cost
+                cost_reduction = plain_swap_cost_reduction(curr_schedule, swap[0], swap[1])
 
                 # If the swap provides the best cost reduction so far, store it
-                if cost_reduction < best_swap_cost_reduction and cost_reduction < 0:
+                if cost_reduction is not None and cost_reduction < best_swap_cost_reduction and cost_reduction < 0:
                     best_swap = swap
                     best_swap_cost_reduction = cost_reduction
 
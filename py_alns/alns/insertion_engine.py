@@ -0,0 +1,204 @@
+import heapq
+from itertools import count
+
+import numpy as np
+
+from py_alns.alns.mutation_service import insertion_added_cost, is_insertion_feasible, is_departure_spread_ok
+
+
+class InsertionCostEngine:
+    """
+    Keeps added costs of inserting pool installations into schedule voyages for repair operators.
+
+    Every pool entry has its own heap of (added_cost, seq, voyage_pos). After an insertion only the costs that can
+    change are recalculated: insertions into voyages of the same vessel for all entries, and departure spread for
+    other entries of the inserted installation. Outdated heap items are dropped lazily when they reach the top.
+    Pending entries are ranked in a top-level heap per selection rule (see _PendingRanking), so a step looks only at
+    the entries whose least added costs changed. Ties are resolved in the same order as by sorting the added cost
+    lists in mutation_service.
+    """
+
+    def __init__(self, inst_pool, sch):
+        """
+        :param inst_pool: installations to be inserted, may contain the same installation several times
+        :type inst_pool: list[Installation]
+        :param sch: schedule to insert into
+        :type sch: Schedule
+        """
+        self.sch = sch
+        self.insts = list(inst_pool)
+        self.voyages = sch.flattened_voyages()
+        self._seq = count()
+        # Current (added_cost, seq) for each pool entry and voyage position. Heap item is valid if it matches.
+        self._costs = []
+        self._heaps = []
+        for inst in self.insts:
+            costs = [(self._added_cost(inst, voyage), next(self._seq)) for voyage in self.voyages]
+            heap = [(cost, seq, j) for j, (cost, seq) in enumerate(costs)]
+            heapq.heapify(heap)
+            self._costs.append(costs)
+            self._heaps.append(heap)
+        self.pending = list(range(len(self.insts)))
+        # (rule, k) -> _PendingRanking, created on first use
+        self._rankings = {}
+
+    def _added_cost(self, inst, voyage):
+        if is_insertion_feasible(self.sch, inst, voyage):
+            return insertion_added_cost(self.sch, inst, voyage)
+        return np.inf
+
+    def _smallest(self, entry, k=1):
+        """
+        :return: up to k valid heap items with the least added cost
+        :rtype: list[tuple[float, int, int]]
+        """
+        heap = self._heaps[entry]
+        costs = self._costs[entry]
+        valid = []
+        while heap and len(valid) < k:
+            item = heapq.heappop(heap)
+            if costs[item[2]] == item[:2]:
+                valid.append(item)
+        for item in valid:
+            heapq.heappush(heap, item)
+        return valid
+
+    def _ranking(self, rule, k, key):
+        ranking = self._rankings.get((rule, k))
+        if ranking is None:
+            ranking = _PendingRanking(self, k, key)
+            self._rankings[(rule, k)] = ranking
+        return ranking
+
+    def best_insertion(self):
+        """
+        Finds pending entry with the least added cost. Among equal costs the first entry in pool order is taken.
+
+        :return: tuple (entry, voyage_pos, added_cost) or None if no feasible insertion left
+        :rtype: tuple[int, int, float] | None
+        """
+        return self._ranking('best', 1, lambda smallest: smallest[0][0]).top()
+
+    def regret_insertion(self, k):
+        """
+        Finds pending entry with the largest k-regret, i.e. the least difference between the best and the k-th best
+        added cost.
+
+        :param k: regret order
+        :type k: int
+        :return: tuple (entry, voyage_pos, added_cost) or None if no feasible insertion left
+        :rtype: tuple[int, int, float] | None
+        """
+        if self.pending and len(self.voyages) == 1:
+            # NOTE: not necessary to check for feasibility here, it is probably not possible
+            # and case covered by setting added_cost to np.inf
+            raise ValueError('Only one voyage available for insertion')
+        return self._ranking('regret', k, lambda smallest: smallest[0][0] - smallest[-1][0]).top()
+
+    def insert(self, entry, voyage_pos):
+        """
+        Inserts pool entry into the voyage and updates affected added costs.
+        """
+        inst = self.insts[entry]
+        target_voyage = self.voyages[voyage_pos]
+        target_voyage.insert_visit(inst)
+        self.pending.remove(entry)
+        for ranking in self._rankings.values():
+            ranking.discard(entry)
+        same_vessel = [j for j, voyage in enumerate(self.voyages) if voyage.vessel == target_voyage.vessel]
+        same_vessel_set = set(same_vessel)
+        for other in self.pending:
+            other_inst = self.insts[other]
+            costs = self._costs[other]
+            heap = self._heaps[other]
+            changed = []
+            if other_inst == inst:
+                for j, voyage in enumerate(self.voyages):
+                    if j in same_vessel_set or costs[j][0] == np.inf:
+                        continue
+                    if not is_departure_spread_ok(self.sch, other_inst, None, voyage):
+                        costs[j] = (np.inf, costs[j][1])
+                        changed.append((np.inf, costs[j][1], j))
+            # Recalculated costs go after unchanged ones of the same value, keeping their previous relative order
+            for j in sorted(same_vessel, key=lambda j: costs[j]):
+                costs[j] = (self._added_cost(other_inst, self.voyages[j]), next(self._seq))
+                changed.append((costs[j][0], costs[j][1], j))
+            for item in changed:
+                heapq.heappush(heap, item)
+            for ranking in self._rankings.values():
+                if ranking.is_affected(other, changed):
+                    ranking.refresh(other)
+
+
+class _PendingRanking:
+    """
+    Top-level heap of pending entries of an InsertionCostEngine, keyed by a function of the k least added costs of
+    each entry. Items are (key, entry, version); an item is outdated once the entry is inserted or its key is
+    recalculated, and is dropped lazily when it reaches the top. Among equal keys the first entry in pool order wins.
+    """
+
+    def __init__(self, engine, k, key):
+        """
+        :param engine: engine owning the pool entries
+        :type engine: InsertionCostEngine
+        :param k: number of least added costs the key is computed from
+        :type k: int
+        :param key: key of an entry from its k least heap items (added_cost, seq, voyage_pos), least is taken first
+        :type key: callable
+        """
+        self._engine = engine
+        self._k = k
+        self._key = key
+        # Entry -> heap items its current key was computed from
+        self._smallest = {}
+        self._versions = {}
+        self._heap = []
+        for entry in engine.pending:
+            self.refresh(entry)
+
+    def refresh(self, entry):
+        """
+        Recalculates the key of a pending entry. Entries without a feasible insertion are left out.
+        """
+        smallest = self._engine._smallest(entry, self._k)
+        version = self._versions.get(entry, -1) + 1
+        self._versions[entry] = version
+        self._smallest[entry] = smallest
+        if smallest and smallest[0][0] < np.inf:
+            heapq.heappush(self._heap, (self._key(smallest), entry, version))
+
+    def discard(self, entry):
+        self._versions[entry] = self._versions.get(entry, -1) + 1
+        self._smallest.pop(entry, None)
+
+    def is_affected(self, entry, changed):
+        """
+        :param changed: heap items (added_cost, seq, voyage_pos) recalculated for the entry
+        :type changed: list[tuple[float, int, int]]
+        :return: True if the k least added costs of the entry may differ from the ones its key was computed from
+        :rtype: bool
+        """
+        smallest = self._smallest[entry]
+        if not smallest:
+            return bool(changed)
+        positions = {item[2] for item in smallest}
+        # Every voyage position has an item, so a shorter list than k already holds all of them
+        threshold = smallest[-1][:2] if len(smallest) == self._k else None
+        for item in changed:
+            if item[2] in positions or (threshold is not None and item[:2] < threshold):
+                return True
+        return False
+
+    def top(self):
+        """
+        :return: tuple (entry, voyage_pos, added_cost) of the entry with the least key, or None if no pending entry
+            has a feasible insertion
+        :rtype: tuple[int, int, float] | None
+        """
+        while self._heap:
+            _, entry, version = self._heap[0]
+            if self._versions[entry] == version:
+                best = self._smallest[entry][0]
+                return entry, best[2], best[0]
+            heapq.heappop(self._heap)
+        return None
@@ -298,6 +298,61 @@ def added_costs_for_visits_relocation(sch):
     return relocation_added_costs
 
 
+def plain_swap_candidates(sch):
+    """
+    Pairs of visits worth evaluating for swap, in the order of combinations(sch.visits_list_plain(), 2). Visits are
+    represented as tuples (inst, vessel, start_day). Swaps that change nothing (same installation, same voyage or
+    installation already visited by the other voyage), overload a deck or break departure spread are left out.
+    :param sch:
+    :type sch: Schedule
+    :return:
+    :rtype: list[tuple[tuple[Installation, Vessel, int], tuple[Installation, Vessel, int]]]
+    """
+    voyages = {(vessel, voyage.start_day): voyage
+               for vessel, vessel_voyages in sch.schedule.items() for voyage in vessel_voyages}
+    visit_days = {}
+    for (vessel, day), voyage in voyages.items():
+        for inst in voyage.route:
+            visit_days.setdefault(inst, []).append((vessel, day))
+
+    def inst_fits(inst, origin_key, target_key, target_voyage, removed_inst):
+        if target_voyage.deck_load - removed_inst.deck_demand + inst.deck_demand > target_key[0].deck_capacity:
+            return False
+        for visit_key in visit_days[inst]:
+            if visit_key != origin_key and abs(visit_key[1] - target_key[1]) <= inst.departure_spread:
+                return False
+        return True
+
+    candidates = []
+    for visit1, visit2 in combinations(sch.visits_list_plain(), 2):
+        inst1, inst2 = visit1[0], visit2[0]
+        key1, key2 = visit1[1:], visit2[1:]
+        if inst1.idx == inst2.idx or key1 == key2:
+            continue
+        voyage1, voyage2 = voyages[key1], voyages[key2]
+        if voyage1.is_on_the_route(inst2) or voyage2.is_on_the_route(inst1):
+            continue
+        if inst_fits(inst1, key1, key2, voyage2, inst2) and inst_fits(inst2, key2, key1, voyage1, inst1):
+            candidates.append((visit1, visit2))
+    return candidates
+
+
+def plain_swap_cost_reduction(sch, visit1, visit2):
+    """
+    Evaluates swap of visits in plain representation (inst, vessel, start_day) on a copy of the schedule.
+    :param sch:
+    :type sch: Schedule
+    :return: change of total cost or None if schedule after the swap is infeasible
+    :rtype: float|None
+    """
+    new_sch = sch.shallow_copy()
+    new_sch.swap_visits_tuple_repr(visit1, visit2)
+    new_sch.update()
+    if not new_sch.feasible:
+        return None
+    return new_sch.total_cost - sch.total_cost
+
+
 def swap_added_costs(sch):
     """
     Calculates added cost matrix of swapping visits in the schedule sch.
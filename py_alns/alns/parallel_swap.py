@@ -0,0 +1,104 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+
+from py_alns.Beans.schedule import Schedule
+from py_alns.alns.mutation_service import plain_swap_cost_reduction
+from py_alns.utils.distance_manager import DistanceManager
+from py_alns.utils.route_cache import RouteCache
+
+_pool = None
+_pool_key = None
+
+# State of a worker process: instance data, its own route cache and the last restored schedule
+_worker = {}
+
+
+def _init_worker(vessels, installations, base):
+    _worker['vessels'] = vessels
+    _worker['installations'] = installations
+    _worker['base'] = base
+    _worker['vessels_by_idx'] = {v.idx: v for v in vessels}
+    _worker['insts_by_idx'] = {inst.idx: inst for inst in installations}
+    _worker['route_cache'] = RouteCache()
+    _worker['snapshot'] = None
+    _worker['schedule'] = None
+
+
+def _worker_schedule(snapshot):
+    if _worker['snapshot'] != snapshot:
+        _worker['schedule'] = Schedule.from_snapshot(_worker['vessels'], _worker['installations'], _worker['base'],
+                                                     snapshot, route_cache=_worker['route_cache'])
+        _worker['snapshot'] = snapshot
+    return _worker['schedule']
+
+
+def _evaluate_chunk(snapshot, chunk):
+    """
+    :param snapshot: Schedule.snapshot of the schedule to evaluate swaps in
+    :param chunk: list of (position, visit1, visit2), visits are tuples (inst_idx, vessel_idx, start_day)
+    :return: tuple (cost_reduction, position) of the best improving swap in the chunk or None
+    """
+    sch = _worker_schedule(snapshot)
+    insts_by_idx = _worker['insts_by_idx']
+    vessels_by_idx = _worker['vessels_by_idx']
+    best = None
+    for position, visit1, visit2 in chunk:
+        cost_reduction = plain_swap_cost_reduction(
+            sch,
+            (insts_by_idx[visit1[0]], vessels_by_idx[visit1[1]], visit1[2]),
+            (insts_by_idx[visit2[0]], vessels_by_idx[visit2[1]], visit2[2]))
+        if cost_reduction is not None and cost_reduction < 0 and (best is None or cost_reduction < best[0]):
+            best = (cost_reduction, position)
+    return best
+
+
+def _get_pool(workers, sch):
+    global _pool, _pool_key
+    key = (workers, DistanceManager.instance_key(sch.base, sch.installations),
+           tuple(v.idx for v in sch.vessels))
+    if _pool is None or _pool_key != key:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(sch.vessels, sch.installations, sch.base))
+        _pool_key = key
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_key
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
+    _pool_key = None
+
+
+atexit.register(shutdown_pool)
+
+
+def best_swap_parallel(sch, candidates, workers, chunk_size):
+    """
+    Evaluates swap candidates in a process pool. Result is the same as of evaluating them one by one in order:
+    the swap with the largest cost reduction, the first one among equal reductions.
+
+    :param sch: schedule to evaluate swaps in
+    :type sch: Schedule
+    :param candidates: pairs of visits in plain representation (inst, vessel, start_day)
+    :param workers: number of worker processes
+    :type workers: int
+    :param chunk_size: number of swaps sent to a worker in one task
+    :type chunk_size: int
+    :return: tuple (swap, cost_reduction) or (None, 0) if no swap reduces cost
+    """
+    compact = [(position, (v1[0].idx, v1[1].idx, v1[2]), (v2[0].idx, v2[1].idx, v2[2]))
+               for position, (v1, v2) in enumerate(candidates)]
+    chunks = [compact[i:i + chunk_size] for i in range(0, len(compact), chunk_size)]
+    if not chunks:
+        return None, 0
+    snapshot = sch.snapshot()
+    pool = _get_pool(workers, sch)
+    results = [result for result in pool.map(_evaluate_chunk, [snapshot] * len(chunks), chunks)
+               if result is not None]
+    if not results:
+        return None, 0
+    cost_reduction, position = min(results)
+    return candidates[position], cost_reduction
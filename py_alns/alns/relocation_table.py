@@ -0,0 +1,128 @@
+from itertools import combinations
+
+import numpy as np
+
+from py_alns.alns.mutation_service import removal_added_cost, is_relocation_feasible
+
+
+def _voyage_key(voyage):
+    # Vessel has at most one voyage per start day, so the key survives schedule copies
+    return voyage.vessel.idx, voyage.start_day
+
+
+class RelocationCostTable:
+    """
+    Relocation added costs of the schedule, kept between relocations in deep_greedy_relocation.
+
+    Relocation cost is removal cost from the origin voyage plus insertion cost into the target voyage. The parts that
+    need a route optimization are memoized per (installation, voyage) and depend on the route of that voyage only:
+    the removal cost and the voyage with the installation inserted. Overlap with other voyages of the vessel and idle
+    vessel cost are checked against the current schedule when the insertion cost is assembled. The feasible
+    relocations are kept per (origin, target) pair of voyages. After a relocation the route parts of the origin and
+    target voyages are dropped, and the pairs are assembled again where the result can change: pairs with the origin
+    or target voyage, targets on their vessels and origins visiting the relocated installation (departure spread).
+    """
+
+    def __init__(self, sch):
+        """
+        :param sch: schedule to relocate visits in
+        :type sch: Schedule
+        """
+        self.sch = sch
+        self._removal_costs = {}
+        # (inst.idx, voyage key) -> (voyage with the installation inserted, its variable cost, variable cost before)
+        self._insertions = {}
+        # (origin key, target key) -> [(inst, added_cost)] of feasible relocations, in the order of the origin route
+        self._pair_costs = {}
+
+    def removal_cost(self, inst, voyage):
+        key = (inst.idx, _voyage_key(voyage))
+        cost = self._removal_costs.get(key)
+        if cost is None:
+            cost = removal_added_cost(inst, voyage)
+            self._removal_costs[key] = cost
+        return cost
+
+    def insertion_cost(self, inst, voyage):
+        """
+        Same as mutation_service.insertion_added_cost, with the inserted voyage memoized.
+        """
+        if inst in voyage.route:
+            return np.inf
+        key = (inst.idx, _voyage_key(voyage))
+        insertion = self._insertions.get(key)
+        if insertion is None:
+            new_voyage = voyage.__deepcopy__()
+            new_voyage.add_inst(inst)
+            new_voyage.improve_full_enum()
+            insertion = (new_voyage, new_voyage.calc_variable_cost(), voyage.calc_variable_cost())
+            self._insertions[key] = insertion
+        new_voyage, new_cost, old_cost = insertion
+        if self.sch.check_for_replacement_overlap(new_voyage, voyage):
+            return np.inf
+        if self.sch.is_vessel_idle(voyage.vessel):
+            new_cost = new_cost + voyage.vessel.cost
+        return new_cost - old_cost
+
+    def _pair_relocations(self, origin, target):
+        relocations = []
+        for inst in origin.route:
+            if is_relocation_feasible(self.sch, inst, origin, target):
+                relocations.append((inst, self.removal_cost(inst, origin) + self.insertion_cost(inst, target)))
+        return relocations
+
+    def relocation_costs(self):
+        """
+        Added costs of all feasible relocations, in the order of mutation_service.added_costs_for_visits_relocation.
+
+        :return: list of tuples (inst, origin, target, added_cost)
+        :rtype: list[tuple[Installation, Voyage, Voyage, float]]
+        """
+        relocation_added_costs = []
+        for (origin, target) in combinations(self.sch.flattened_voyages(), 2):
+            pair = (_voyage_key(origin), _voyage_key(target))
+            relocations = self._pair_costs.get(pair)
+            if relocations is None:
+                relocations = self._pair_relocations(origin, target)
+                self._pair_costs[pair] = relocations
+            relocation_added_costs.extend((inst, origin, target, cost) for inst, cost in relocations)
+        return relocation_added_costs
+
+    def best_relocation(self):
+        """
+        :return: feasible relocation with the least added cost, first one among equal costs, or None if there is no
+            feasible relocation
+        :rtype: tuple[Installation, Voyage, Voyage, float] | None
+        """
+        best = None
+        min_added_cost = np.inf
+        for relocation in self.relocation_costs():
+            if best is None or relocation[3] < min_added_cost:
+                best = relocation
+                min_added_cost = relocation[3]
+        return best
+
+    def update(self, sch, inst, origin, target):
+        """
+        Drops costs affected by relocation of inst from origin to target voyage.
+
+        :param sch: schedule after the relocation
+        :type sch: Schedule
+        :param inst: relocated installation
+        :type inst: Installation
+        :param origin: origin voyage of the relocation
+        :type origin: Voyage
+        :param target: target voyage of the relocation
+        :type target: Voyage
+        """
+        self.sch = sch
+        touched_voyages = {_voyage_key(origin), _voyage_key(target)}
+        touched_vessels = {origin.vessel.idx, target.vessel.idx}
+        self._removal_costs = {key: cost for key, cost in self._removal_costs.items()
+                               if key[1] not in touched_voyages}
+        self._insertions = {key: insertion for key, insertion in self._insertions.items()
+                            if key[1] not in touched_voyages}
+        inst_voyages = {_voyage_key(voyage) for voyage in sch.find_voyages_containing_visit(inst)}
+        self._pair_costs = {pair: relocations for pair, relocations in self._pair_costs.items()
+                            if pair[0] not in touched_voyages and pair[1] not in touched_voyages
+                            and pair[1][0] not in touched_vessels and pair[0] not in inst_voyages}
@@ -1,4 +1,5 @@
 from py_alns.alns.mutation_service import *
+from py_alns.alns.insertion_engine import InsertionCostEngine
 import numpy as np
 
 
@@ -10,22 +11,15 @@ def deep_greedy_insertion(inst_pool, sch):
     :param sch:
     :return:
     """
-    # TODO: Check for duplicates of visits in visit_pool and duplicate them in added costs
     if not inst_pool:
         return True
-    inst_added_costs = added_costs_for_visits_insertion(inst_pool, sch)
-    # for inst, added_costs in inst_added_costs:
-    #     print(inst, added_costs)
-    # print('---')
-    while len(inst_added_costs) > 0:
-        min_idx = min_insertion_added_cost_index(inst_added_costs)
-        inst = inst_added_costs[min_idx][0]
-        voyage = inst_added_costs[min_idx][1][0][0]
-        min_cost = inst_added_costs[min_idx][1][0][1]
-        if min_cost == np.inf:
+    engine = InsertionCostEngine(inst_pool, sch)
+    while engine.pending:
+        best = engine.best_insertion()
+        if best is None:
             return False
-        voyage.insert_visit(inst)
-        inst_added_costs = update_insertion_added_costs(inst_added_costs, min_idx, sch)
+        entry, voyage_pos, _ = best
+        engine.insert(entry, voyage_pos)
     return True
 
 
@@ -39,18 +33,11 @@ def k_regret_insertion(inst_pool, sch, k=2):
     """
     if not inst_pool:
         return True
-    inst_added_costs = added_costs_for_visits_insertion(inst_pool, sch)
-    # for inst, added_costs in inst_added_costs:
-    #     print(inst, added_costs)
-    # print('---')
-    while len(inst_added_costs) > 0:
-        min_idx = min_kregret_insertion_added_cost_index(inst_added_costs, k)
-        inst = inst_added_costs[min_idx][0]
-        voyage = inst_added_costs[min_idx][1][0][0]
-        min_cost = inst_added_costs[min_idx][1][0][1]
-        if min_cost == np.inf:
+    engine = InsertionCostEngine(inst_pool, sch)
+    while engine.pending:
+        best = engine.regret_insertion(k)
+        if best is None:
             return False
-        voyage.insert_visit(inst)
-        inst_added_costs = update_insertion_added_costs(inst_added_costs, min_idx, sch)
+        entry, voyage_pos, _ = best
+        engine.insert(entry, voyage_pos)
     return True
-
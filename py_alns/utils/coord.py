@@ -1,5 +1,5 @@
 import numpy as np
-from haversine import haversine, Unit
+from haversine import haversine, haversine_vector, Unit
 
 
 class Coord:
@@ -53,6 +53,27 @@ class Coord:
             raise ValueError('Wrong unit string')
         return distance
 
+    @staticmethod
+    def geo_distance_matrix(coords, unit='nmi'):
+        """
+        Calculate geodesic distances between all pairs of points in one vectorized pass.
+
+        :param coords: sequence of coordinates (lat, lon) in decimal degrees.
+        :type coords: list[tuple[float, float]] | np.ndarray
+        :param unit: unit name from ['nmi', 'km'], defaults to 'nmi'.
+        :type unit: str
+        :return: square matrix of distances in selected units.
+        :rtype: np.ndarray
+        """
+        coords = np.asarray(coords, dtype=float)
+        if unit == 'nmi':
+            distances = haversine_vector(coords, coords, unit=Unit.NAUTICAL_MILES, comb=True)
+        elif unit == 'km':
+            distances = haversine_vector(coords, coords, unit=Unit.KILOMETERS, comb=True)
+        else:
+            raise ValueError('Wrong unit string')
+        return distances
+
     def geo_distance_to_coord(self, other, unit='nmi'):
         """
         Calculate geodesic distance to other point.
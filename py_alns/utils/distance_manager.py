@@ -1,7 +1,20 @@
+from collections import OrderedDict
+
 import numpy as np
+from py_alns.utils.coord import Coord
 
 
 class DistanceManager:
+    """
+    Distance matrix of the instance nodes. Base is always node 0, installations follow in the order they are passed.
+
+    Matrices are read-only and shared: use DistanceManager.for_instance to get the process-wide manager of the
+    instance instead of building a new matrix for every schedule. Only the MAX_SHARED_INSTANCES most recently used
+    managers are kept.
+    """
+    MAX_SHARED_INSTANCES = 8
+    _shared = OrderedDict()
+
     def __init__(self,
                  base,
                  insts):
@@ -10,6 +23,45 @@ class DistanceManager:
         self.nodes = [base] + self.insts
         self.mapping = self.name_mapping()
         self.distance_matrix = self.calc_distance_matrix()
+        self._travel_time_matrices = {}
+        self._time_window_arrays = None
+
+    @classmethod
+    def for_instance(cls, base, insts):
+        """
+        Returns distance manager shared by all schedules and voyages of the instance in this process.
+
+        :param base: base of the instance
+        :type base: Base
+        :param insts: installations of the instance
+        :type insts: list[Installation]
+        :rtype: DistanceManager
+        """
+        key = cls.instance_key(base, insts)
+        manager = cls._shared.get(key)
+        if manager is None:
+            manager = cls(base, insts)
+            cls._shared[key] = manager
+            if len(cls._shared) > cls.MAX_SHARED_INSTANCES:
+                cls._shared.popitem(last=False)
+        cls._shared.move_to_end(key)
+        return manager
+
+    @staticmethod
+    def instance_key(base, insts):
+        """
+        Key of the node data the manager caches: names and coordinates for the distances, adjusted time windows,
+        service times and deck demands for the time window arrays.
+
+        :rtype: tuple
+        """
+        return tuple((node.name, node.location.coord, tuple(node.adjTW), node.service_time,
+                      getattr(node, 'deck_demand', None))
+                     for node in [base] + list(insts))
+
+    @classmethod
+    def clear_shared(cls):
+        cls._shared.clear()
 
     def name_mapping(self):
         mapping = {}
@@ -18,9 +70,65 @@ class DistanceManager:
         return mapping
 
     def calc_distance_matrix(self):
-        locations = [node.location for node in self.nodes]
-        distances = [[i.geo_distance_to_coord(j) for j in locations] for i in locations]
-        return np.array(distances)
+        distances = Coord.geo_distance_matrix([node.location.coord for node in self.nodes])
+        distances.setflags(write=False)
+        return distances
 
     def distance(self, from_node, to_node):
-        return self.distance_matrix[self.mapping[from_node], self.mapping[to_node]]
\ No newline at end of file
+        return self.distance_matrix[self.mapping[from_node], self.mapping[to_node]]
+
+    def node_index(self, node):
+        """
+        :param node: base or installation
+        :type node: Node
+        :return: index of the node in the distance matrix
+        :rtype: int
+        """
+        return self.mapping[node.name]
+
+    def route_indices(self, route):
+        """
+        Indices of the closed route base -> route -> base.
+
+        :param route: installations in visiting order
+        :type route: list[Installation]
+        :rtype: list[int]
+        """
+        return [0] + [self.mapping[inst.name] for inst in route] + [0]
+
+    def distance_by_idx(self, from_idx, to_idx):
+        return self.distance_matrix[from_idx, to_idx]
+
+    def travel_time_matrix(self, speed):
+        """
+        Sailing time matrix for the speed. Matrices are cached per speed.
+
+        :param speed: vessel speed
+        :type speed: float
+        :rtype: np.ndarray
+        """
+        travel_times = self._travel_time_matrices.get(speed)
+        if travel_times is None:
+            travel_times = self.distance_matrix / speed
+            travel_times.setflags(write=False)
+            self._travel_time_matrices[speed] = travel_times
+        return travel_times
+
+    def travel_time_by_idx(self, from_idx, to_idx, speed):
+        return self.travel_time_matrix(speed)[from_idx, to_idx]
+
+    def time_window_arrays(self):
+        """
+        Adjusted time windows (adjTW) and service times of the nodes, indexed as the distance matrix.
+
+        :return: tuple (tw_start, tw_end, service_times)
+        :rtype: tuple[np.ndarray, np.ndarray, np.ndarray]
+        """
+        if self._time_window_arrays is None:
+            tw_start = np.array([node.adjTW[0] for node in self.nodes], dtype=float)
+            tw_end = np.array([node.adjTW[1] for node in self.nodes], dtype=float)
+            service_times = np.array([node.service_time for node in self.nodes], dtype=float)
+            for array in (tw_start, tw_end, service_times):
+                array.setflags(write=False)
+            self._time_window_arrays = tw_start, tw_end, service_times
+        return self._time_window_arrays
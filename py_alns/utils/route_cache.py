@@ -0,0 +1,95 @@
+from collections import OrderedDict
+
+
+class RouteCache:
+    """
+    Bounded LRU memo of voyage route optimization results.
+
+    Maps (installation set, start day, vessel speed) to the best visiting order and the resulting end time, so
+    Voyage does not have to enumerate route permutations again for a route it has already optimized. One cache is
+    meant to be shared by every Schedule (and its copies) built for the same problem instance.
+    """
+    DEFAULT_MAXSIZE = 50000
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        """
+        :param maxsize: maximum number of stored routes, 0 disables caching.
+        :type maxsize: int
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(route, start_day, speed):
+        """
+        Builds cache key for the route. Order of installations in the route does not matter.
+
+        :param route: installations visited in the voyage
+        :type route: list[Installation]
+        :param start_day: day of the voyage departure
+        :type start_day: int
+        :param speed: vessel speed
+        :type speed: float
+        :return: cache key
+        :rtype: tuple
+        """
+        return frozenset(inst.idx for inst in route), start_day, speed
+
+    def get(self, key):
+        """
+        :param key: key built with make_key
+        :return: tuple (best_route, end_time) or None if the route is not cached
+        :rtype: tuple[tuple[Installation], float] | None
+        """
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        :param key: key built with make_key
+        :param value: tuple (best_route, end_time)
+        :type value: tuple[tuple[Installation], float]
+        """
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        :return: cache counters
+        :rtype: dict
+        """
+        return {'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hit_rate()}
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f'RouteCache(size={len(self._data)}/{self.maxsize}, hits={self.hits}, misses={self.misses})'
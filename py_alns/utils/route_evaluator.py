@@ -0,0 +1,68 @@
+from itertools import permutations
+
+import numpy as np
+
+HOURS = 24
+
+_permutation_indices = {}
+
+
+def permutation_indices(n):
+    """
+    All permutations of range(n) as 2-D array, in itertools.permutations order. Arrays are cached per n.
+
+    :param n: route length
+    :type n: int
+    :return: array of shape (n!, n)
+    :rtype: np.ndarray
+    """
+    perms = _permutation_indices.get(n)
+    if perms is None:
+        perms = np.array(list(permutations(range(n))), dtype=np.intp).reshape(-1, n)
+        perms.setflags(write=False)
+        _permutation_indices[n] = perms
+    return perms
+
+
+def evaluate_routes(routes, travel_times, tw_start, tw_end, service_times, start_time):
+    """
+    Evaluates many routes of the same voyage at once. Routes start and end at the base (node 0). Arrivals outside of
+    the daily time window wait for the window to open, same as Voyage.calc_voyage_end_time.
+
+    :param routes: node indices of the routes without the base, shape (n_routes, route_length)
+    :type routes: np.ndarray
+    :param travel_times: sailing time matrix between nodes for the vessel speed
+    :type travel_times: np.ndarray
+    :param tw_start: start of the adjusted time window (adjTW) for each node
+    :type tw_start: np.ndarray
+    :param tw_end: end of the adjusted time window (adjTW) for each node
+    :type tw_end: np.ndarray
+    :param service_times: service time for each node
+    :type service_times: np.ndarray
+    :param start_time: departure time of the voyage
+    :type start_time: float
+    :return: arrival times and wait times of shape (n_routes, route_length), end times of shape (n_routes,)
+    :rtype: tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    n_routes, route_length = routes.shape
+    arrival_times = np.empty((n_routes, route_length))
+    wait_times = np.empty((n_routes, route_length))
+    end_times = np.full(n_routes, start_time, dtype=float)
+    from_nodes = np.zeros(n_routes, dtype=np.intp)
+    for k in range(route_length):
+        to_nodes = routes[:, k]
+        arrival_cum_time = end_times + travel_times[from_nodes, to_nodes]
+        arrival_day = arrival_cum_time // HOURS
+        arrival_time = arrival_cum_time % HOURS
+        node_tw_start = tw_start[to_nodes]
+        start_service_time = np.where(arrival_time < node_tw_start,
+                                      arrival_day * HOURS + node_tw_start,
+                                      np.where(arrival_time > tw_end[to_nodes],
+                                               (arrival_day + 1) * HOURS + node_tw_start,
+                                               arrival_cum_time))
+        arrival_times[:, k] = arrival_cum_time
+        wait_times[:, k] = start_service_time - arrival_cum_time
+        end_times = start_service_time + service_times[to_nodes]
+        from_nodes = to_nodes
+    end_times = end_times + travel_times[from_nodes, 0]
+    return arrival_times, wait_times, end_times
@@ -0,0 +1,177 @@
+import csv
+import json
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+
+class NullTracer:
+    """
+    Tracer that records nothing. Used when tracing is disabled, so the ALNS loop pays only for no-op method calls.
+    """
+    enabled = False
+
+    def set_iteration(self, restart, iteration):
+        pass
+
+    def clock(self):
+        return 0.0
+
+    def record(self, stage, operator, start, cost_delta=None):
+        pass
+
+    def empty_copy(self):
+        return self
+
+    def merge(self, other):
+        pass
+
+    def summary(self):
+        return {}
+
+    def stage_summary(self):
+        return {}
+
+
+class Tracer(NullTracer):
+    """
+    In-memory trace of operator calls in the ALNS loop.
+
+    Every call is recorded as an event (restart, iteration, stage, operator, duration, cost_delta) into a ring buffer
+    keeping the last `capacity` events. Call counts, cumulative durations and cost deltas per operator are kept for
+    all calls, duration percentiles are calculated from the events still in the buffer.
+    """
+    enabled = True
+    DEFAULT_CAPACITY = 100000
+    FIELDS = ('restart', 'iteration', 'stage', 'operator', 'duration', 'cost_delta')
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """
+        :param capacity: maximum number of events kept in the ring buffer
+        :type capacity: int
+        """
+        self.capacity = capacity
+        self.events = deque(maxlen=capacity)
+        # (stage, operator) -> [count, total_duration, total_cost_delta]
+        self.totals = {}
+        self.restart = None
+        self.iteration = None
+
+    def set_iteration(self, restart, iteration):
+        self.restart = restart
+        self.iteration = iteration
+
+    def clock(self):
+        return perf_counter()
+
+    def record(self, stage, operator, start, cost_delta=None):
+        """
+        :param stage: loop stage, e.g. 'destroy', 'repair' or 'improve'
+        :type stage: str
+        :param operator: operator name
+        :type operator: str
+        :param start: value of clock() taken before the operator call
+        :type start: float
+        :param cost_delta: change of schedule cost made by the operator
+        :type cost_delta: float
+        """
+        duration = perf_counter() - start
+        if cost_delta is not None:
+            cost_delta = float(cost_delta)
+        self.events.append((self.restart, self.iteration, stage, operator, duration, cost_delta))
+        totals = self.totals.get((stage, operator))
+        if totals is None:
+            totals = self.totals[(stage, operator)] = [0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += duration
+        if cost_delta is not None:
+            totals[2] += cost_delta
+
+    def empty_copy(self):
+        return Tracer(self.capacity)
+
+    def merge(self, other):
+        """
+        Adds events and totals of another tracer, e.g. one filled in a restart worker process.
+
+        :type other: Tracer
+        """
+        self.events.extend(other.events)
+        for key, (count, duration, cost_delta) in other.totals.items():
+            totals = self.totals.setdefault(key, [0, 0.0, 0.0])
+            totals[0] += count
+            totals[1] += duration
+            totals[2] += cost_delta
+
+    def summary(self):
+        """
+        :return: statistics per operator keyed by 'stage/operator': call count, total, mean and percentile
+            durations in seconds, total and mean cost delta
+        :rtype: dict[str, dict]
+        """
+        durations = {}
+        for event in self.events:
+            durations.setdefault((event[2], event[3]), []).append(event[4])
+        summary = {}
+        for (stage, operator), (count, total_duration, total_cost_delta) in self.totals.items():
+            stats = {'stage': stage,
+                     'operator': operator,
+                     'count': count,
+                     'total_time': total_duration,
+                     'mean_time': total_duration / count,
+                     'total_cost_delta': total_cost_delta,
+                     'mean_cost_delta': total_cost_delta / count}
+            buffered = durations.get((stage, operator))
+            for q in self.PERCENTILES:
+                stats[f'p{q}_time'] = float(np.percentile(buffered, q)) if buffered else None
+            summary[f'{stage}/{operator}'] = stats
+        return summary
+
+    def stage_summary(self):
+        """
+        :return: call count, total time and share of the traced time per stage, most expensive stage first
+        :rtype: dict[str, dict]
+        """
+        stages = {}
+        for (stage, _), (count, total_duration, _) in self.totals.items():
+            stats = stages.setdefault(stage, {'count': 0, 'total_time': 0.0})
+            stats['count'] += count
+            stats['total_time'] += total_duration
+        traced_time = sum(stats['total_time'] for stats in stages.values())
+        for stats in stages.values():
+            stats['share'] = stats['total_time'] / traced_time if traced_time else 0.0
+        return dict(sorted(stages.items(), key=lambda item: -item[1]['total_time']))
+
+    def dump_json(self, path):
+        """
+        Writes stage and operator statistics and buffered events to a JSON file.
+        """
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump({'stages': self.stage_summary(),
+                       'operators': self.summary(),
+                       'events': [dict(zip(self.FIELDS, event)) for event in self.events]}, fh, indent=2)
+
+    def dump_csv(self, path):
+        """
+        Writes buffered events to a CSV file, one row per operator call.
+        """
+        with open(path, 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(self.FIELDS)
+            writer.writerows(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __repr__(self):
+        return f'Tracer(events={len(self.events)}/{self.capacity}, operators={len(self.totals)})'
+
+
+def make_tracer(enabled, capacity=Tracer.DEFAULT_CAPACITY):
+    """
+    :return: Tracer if tracing is enabled, NullTracer otherwise
+    :rtype: NullTracer
+    """
+    return Tracer(capacity) if enabled else NullTracer()
@@ -506,13 +506,15 @@ class ALNSEnvironment(gym.Env):
         *,
         problem_instance: Optional[str] = None,
         seed: Optional[int] = None,
+        threads: int = 1,
     ) -> Dict[str, Any]:
         """
         Run the Rust ALNS engine in full-pass restart mode.
 
         This is a convenience wrapper around ``RustALNSInterface.run_with_restarts``
         for evaluation/benchmark scenarios where the full search is executed inside
-        Rust rather than step-by-step via Gym actions.
+        Rust rather than step-by-step via Gym actions. ``threads`` restarts run at a
+        time (0 uses all cores); the result does not depend on it.
         """
         restart_count = int(restarts) if restarts is not None else int(self.num_episodes)
         restart_count = max(1, restart_count)
@@ -530,7 +532,7 @@ class ALNSEnvironment(gym.Env):
             algorithm_mode=self.algorithm_mode,
         )
 
-        return self.alns.run_with_restarts(restarts=restart_count)
+        return self.alns.run_with_restarts(restarts=restart_count, threads=threads)
 
     def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict[str, Any]]:
         """
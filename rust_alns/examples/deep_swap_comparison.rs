@@ -0,0 +1,129 @@
+//! Compares DeepSwap with the clone-based swap search it replaced.
+//!
+//! Usage:
+//!     cargo run --release --example deep_swap_comparison -- [INSTANCE ...]
+//!
+//! An instance is `SMALL_1` or a directory holding installations.csv, vessels.csv and base.csv.
+//! For every instance the initial solution is improved by both searches; the report shows their
+//! run times on this machine and whether they reached the same solution. No timings are recorded
+//! in the repository.
+
+use rand::rngs::StdRng;
+use rand::SeedableRng;
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+use rust_alns_py::operators::improvement::deep_swap::DeepSwap;
+use rust_alns_py::operators::traits::ImprovementOperator;
+use rust_alns_py::structs::context::Context;
+use rust_alns_py::structs::solution::Solution;
+use std::time::Instant;
+
+const SEED: u64 = 7;
+
+/// Best feasible swap found by evaluating every pair of visits on a clone of the whole solution.
+fn clone_based_best_swap(solution: &Solution, context: &Context) -> Option<Solution> {
+    let current_cost = solution.cost_with_context(context);
+    let mut best: Option<(f64, Solution)> = None;
+    let visits = solution.all_visits();
+    for (idx_a, visit_a) in visits.iter().enumerate() {
+        let Some(origin_voyage_a) = visit_a.assigned_voyage_id else {
+            continue;
+        };
+        for visit_b in visits.iter().skip(idx_a + 1) {
+            let Some(origin_voyage_b) = visit_b.assigned_voyage_id else {
+                continue;
+            };
+            if visit_a.installation_id() == visit_b.installation_id() {
+                continue;
+            }
+            let mut candidate = solution.clone();
+            candidate.unassign_visits(&[visit_a.id(), visit_b.id()]);
+            candidate.ensure_schedule_is_updated();
+            if !candidate.visit_insertion_is_possible(context, visit_a.id(), origin_voyage_b)
+                || !candidate.visit_insertion_is_possible(context, visit_b.id(), origin_voyage_a)
+                || candidate
+                    .greedy_insert_visit(visit_a.id(), origin_voyage_b, context)
+                    .is_err()
+                || candidate
+                    .greedy_insert_visit(visit_b.id(), origin_voyage_a, context)
+                    .is_err()
+            {
+                continue;
+            }
+            candidate.ensure_consistency_updated(context);
+            if !candidate.is_fully_feasible(context) {
+                continue;
+            }
+            let delta = candidate.cost_with_context(context) - current_cost;
+            if delta < -f64::EPSILON && best.as_ref().map_or(true, |(d, _)| delta < *d) {
+                best = Some((delta, candidate));
+            }
+        }
+    }
+    best.map(|(_, candidate)| candidate)
+}
+
+fn routes(solution: &Solution) -> Vec<(usize, Vec<usize>)> {
+    let mut routes: Vec<_> = solution
+        .voyages
+        .iter()
+        .map(|voyage| {
+            let voyage = voyage.borrow();
+            (voyage.id, voyage.visit_ids.clone())
+        })
+        .collect();
+    routes.sort();
+    routes
+}
+
+fn main() -> Result<(), String> {
+    let mut instances: Vec<String> = std::env::args().skip(1).collect();
+    if instances.is_empty() {
+        instances.push("SMALL_1".to_string());
+    }
+
+    println!(
+        "{:<40} {:>7} {:>12} {:>12} {:>9} {:>6}",
+        "instance", "visits", "clones [s]", "delta [s]", "ratio", "same"
+    );
+    for instance in &instances {
+        let engine = ALNSEngine::new_from_instance(
+            instance,
+            SEED,
+            100.0,
+            0.9,
+            10,
+            0.85,
+            1,
+            ALNSAlgorithmMode::Baseline,
+        )?;
+        let context = &engine.context;
+        let mut initial = engine.current_solution.clone();
+        initial.ensure_consistency_updated(context);
+
+        let start = Instant::now();
+        let mut expected = initial.clone();
+        while let Some(next) = clone_based_best_swap(&expected, context) {
+            expected = next;
+        }
+        let clone_time = start.elapsed().as_secs_f64();
+
+        let start = Instant::now();
+        let mut improved = initial.clone();
+        let mut rng = StdRng::seed_from_u64(SEED);
+        DeepSwap::default().apply(&mut improved, context, &mut rng);
+        improved.ensure_consistency_updated(context);
+        let delta_time = start.elapsed().as_secs_f64();
+
+        let same = routes(&improved) == routes(&expected);
+        println!(
+            "{:<40} {:>7} {:>12.3} {:>12.3} {:>8.1}x {:>6}",
+            instance,
+            initial.visit_count(),
+            clone_time,
+            delta_time,
+            clone_time / delta_time.max(f64::EPSILON),
+            same
+        );
+    }
+    Ok(())
+}
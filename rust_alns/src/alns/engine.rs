@@ -7,11 +7,15 @@ use crate::operators::improvement::voyage_number_reduction::VoyageNumberReductio
 use crate::operators::registry::OperatorRegistry;
 use crate::structs::context::Context;
 use crate::structs::solution::Solution;
+use crate::structs::transaction::{SolutionDelta, Transaction};
 use rand::rngs::StdRng;
 use rand::{Rng, SeedableRng};
-use std::collections::{HashMap, HashSet};
+use std::borrow::Cow;
+use std::collections::{BTreeMap, HashSet};
 use std::f64::{INFINITY, NEG_INFINITY};
 use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::sync::Arc;
 
 /// High-level algorithm variants for the ALNS engine
 #[derive(Clone, Copy, Debug, PartialEq, Eq)]
@@ -129,16 +133,109 @@ pub struct ALNSEngineSnapshot {
     pub algorithm_mode: ALNSAlgorithmMode,
 }
 
+/// Undo entries kept for the best solution before it is stored as a full copy.
+const MAX_BEST_DELTA_TRANSACTIONS: usize = 4096;
+
+/// Best solution found so far.
+enum BestSolution {
+    /// Full copy of the best solution.
+    Stored(Solution),
+    /// Undo entries taking `current_solution` back to the best solution.
+    /// Empty while the current solution is the best one.
+    Delta(SolutionDelta),
+}
+
+/// Best restart found by a thread of `run_with_restarts`.
+struct RestartBest {
+    restart_index: usize,
+    cost: f64,
+    solution: Solution,
+    metrics: ALNSMetrics,
+}
+
+impl RestartBest {
+    /// Whether `self` replaces `other` as the best restart: lower cost, ties go to the lower
+    /// restart index, as in a serial run over the restarts.
+    fn beats(&self, other: &Option<RestartBest>) -> bool {
+        match other {
+            None => true,
+            Some(other) => {
+                self.cost < other.cost
+                    || (self.cost == other.cost && self.restart_index < other.restart_index)
+            }
+        }
+    }
+}
+
+/// Restarts run by one thread of `run_with_restarts_on_threads`.
+#[derive(Default)]
+struct RestartWorkerResult {
+    summaries: Vec<ALNSRestartSummary>,
+    best: Option<RestartBest>,
+    /// State of the worker engine after the last restart, if the thread ran it
+    last_restart_state: Option<ALNSEngineSnapshot>,
+}
+
+/// What a restart thread needs to build its own engine: the shared context and the settings of
+/// the engine running the restarts.
+struct RestartWorker {
+    context: Arc<Context>,
+    initial_solution: Solution,
+    alns_context: ALNSContext,
+    max_iterations: usize,
+    theta: f64,
+    weight_update_interval: usize,
+    aggressive_search_factor: f64,
+    base_seed: u64,
+    initial_temperature: f64,
+    algorithm_mode: ALNSAlgorithmMode,
+}
+
+impl RestartWorker {
+    /// Engine with its own operators and search state; `reset_for_restart` sets up the search.
+    fn into_engine(self) -> ALNSEngine {
+        let mut operator_registry = OperatorRegistry::new();
+        ALNSEngine::setup_operators(&mut operator_registry);
+        let (destroy_operator_labels, repair_operator_labels, improvement_operator_labels) =
+            ALNSEngine::get_operator_info();
+        let initial_cost = self.initial_solution.total_cost;
+        ALNSEngine {
+            context: self.context,
+            alns_context: self.alns_context,
+            operator_registry,
+            destroy_operator_labels,
+            repair_operator_labels,
+            improvement_operator_labels,
+            current_solution: self.initial_solution.clone(),
+            best: BestSolution::Delta(SolutionDelta::new(&self.initial_solution)),
+            initial_solution: self.initial_solution,
+            rng: StdRng::seed_from_u64(self.base_seed),
+            iteration: 0,
+            max_iterations: self.max_iterations,
+            temperature: self.initial_temperature,
+            theta: self.theta,
+            weight_update_interval: self.weight_update_interval,
+            aggressive_search_factor: self.aggressive_search_factor,
+            stagnation_count: 0,
+            initial_cost,
+            base_seed: self.base_seed,
+            initial_temperature: self.initial_temperature,
+            algorithm_mode: self.algorithm_mode,
+        }
+    }
+}
+
 /// Unified ALNS Engine - canonical implementation for all interfaces
 pub struct ALNSEngine {
-    pub context: Context,
+    /// Problem instance, shared read-only with the worker engines of parallel restarts
+    pub context: Arc<Context>,
     pub alns_context: ALNSContext,
     pub operator_registry: OperatorRegistry,
     pub destroy_operator_labels: Vec<String>,
     pub repair_operator_labels: Vec<String>,
     pub improvement_operator_labels: Vec<String>,
     pub current_solution: Solution,
-    pub best_solution: Solution,
+    best: BestSolution, // see best_solution()
     pub initial_solution: Solution,
     pub rng: StdRng,
     pub iteration: usize,
@@ -278,10 +375,7 @@ impl ALNSEngine {
             data.base.clone(),
         );
         let tsp_solver = crate::utils::tsp_solver::TSPSolver::new_from_problem_data(&problem_data);
-        let context = Context {
-            problem: problem_data,
-            tsp_solver,
-        };
+        let context = Context::new(problem_data, tsp_solver);
 
         let mut rng = StdRng::seed_from_u64(seed);
         let mut initial_solution =
@@ -316,14 +410,14 @@ impl ALNSEngine {
         let aggressive_search_factor = aggressive_search_factor.clamp(0.0, 1.0);
 
         Ok(Self {
-            context,
+            context: Arc::new(context),
             alns_context,
             operator_registry,
             destroy_operator_labels,
             repair_operator_labels,
             improvement_operator_labels,
             current_solution: initial_solution.clone(),
-            best_solution: initial_solution.clone(),
+            best: BestSolution::Delta(SolutionDelta::new(&initial_solution)),
             initial_solution,
             rng: StdRng::seed_from_u64(seed),
             iteration: 0,
@@ -344,7 +438,7 @@ impl ALNSEngine {
     pub fn create_snapshot(&self) -> ALNSEngineSnapshot {
         ALNSEngineSnapshot {
             current_solution: self.current_solution.clone(),
-            best_solution: self.best_solution.clone(),
+            best_solution: self.best_solution().into_owned(),
             initial_solution: self.initial_solution.clone(),
             alns_context: self.alns_context.clone(),
             rng: self.rng.clone(),
@@ -365,7 +459,7 @@ impl ALNSEngine {
     /// Restore the engine state from a previously captured snapshot.
     pub fn apply_snapshot(&mut self, snapshot: &ALNSEngineSnapshot) {
         self.current_solution = snapshot.current_solution.clone();
-        self.best_solution = snapshot.best_solution.clone();
+        self.best = BestSolution::Stored(snapshot.best_solution.clone());
         self.initial_solution = snapshot.initial_solution.clone();
         self.alns_context = snapshot.alns_context.clone();
         self.rng = snapshot.rng.clone();
@@ -382,10 +476,64 @@ impl ALNSEngine {
         self.algorithm_mode = snapshot.algorithm_mode;
     }
 
-    fn create_default_metrics(&self) -> ALNSMetrics {
+    /// Best solution found so far. It is copied only if the search has moved away from it.
+    pub fn best_solution(&self) -> Cow<'_, Solution> {
+        match &self.best {
+            BestSolution::Stored(solution) => Cow::Borrowed(solution),
+            BestSolution::Delta(delta) if delta.is_empty() => Cow::Borrowed(&self.current_solution),
+            BestSolution::Delta(delta) => {
+                let mut solution = self.current_solution.clone();
+                delta.clone().revert(&mut solution);
+                Cow::Owned(solution)
+            }
+        }
+    }
+
+    pub fn best_cost(&self) -> f64 {
+        match &self.best {
+            BestSolution::Stored(solution) => solution.total_cost,
+            BestSolution::Delta(delta) => delta.total_cost(),
+        }
+    }
+
+    /// Makes the current solution the best one without copying it.
+    fn mark_current_as_best(&mut self) {
+        self.best = BestSolution::Delta(SolutionDelta::new(&self.current_solution));
+    }
+
+    /// Keeps the best solution reachable after a transaction of the current solution was committed.
+    fn track_best_after_commit(&mut self, committed: Vec<Transaction>) {
+        let delta_too_long = match &mut self.best {
+            BestSolution::Delta(delta) => {
+                delta.extend(committed);
+                delta.len() > MAX_BEST_DELTA_TRANSACTIONS
+            }
+            BestSolution::Stored(_) => false,
+        };
+        if delta_too_long {
+            let best = self.best_solution().into_owned();
+            self.best = BestSolution::Stored(best);
+        }
+    }
+
+    /// Replaces the current solution with the best one.
+    fn restore_best(&mut self) {
+        let best = std::mem::replace(
+            &mut self.best,
+            BestSolution::Delta(SolutionDelta::new(&self.current_solution)),
+        );
+        match best {
+            BestSolution::Delta(delta) => delta.revert(&mut self.current_solution),
+            BestSolution::Stored(solution) => self.current_solution = solution,
+        }
+        self.mark_current_as_best();
+    }
+
+    fn create_default_metrics(&mut self) -> ALNSMetrics {
+        let is_feasible = self.current_solution.is_fully_feasible(&self.context);
         ALNSMetrics {
             total_cost: self.current_solution.total_cost,
-            best_cost: self.best_solution.total_cost,
+            best_cost: self.best_cost(),
             accepted: false,
             is_new_best: false,
             is_better_than_current: false,
@@ -414,10 +562,7 @@ impl ALNSEngine {
             iteration: 0,
             initial_cost: self.initial_cost,
             is_complete: self.current_solution.is_complete_solution(),
-            is_feasible: self
-                .current_solution
-                .clone()
-                .is_fully_feasible(&self.context),
+            is_feasible,
             num_voyages: 0,
             num_empty_voyages: 0,
             num_vessels_used: 0,
@@ -463,9 +608,9 @@ impl ALNSEngine {
         };
 
         self.initial_cost = initial_solution.total_cost;
-        self.initial_solution = initial_solution.clone();
         self.current_solution = initial_solution.clone();
-        self.best_solution = initial_solution;
+        self.initial_solution = initial_solution;
+        self.mark_current_as_best();
         self.iteration = 0;
         self.temperature = self.initial_temperature;
         self.stagnation_count = 0;
@@ -510,10 +655,10 @@ impl ALNSEngine {
             crate::operators::repair::k_regret_insertion::KRegretInsertion { k: 3 },
         ));
 
-        registry.add_improvement_operator(Box::new(VoyageNumberReduction));
+        registry.add_improvement_operator(Box::new(VoyageNumberReduction::default()));
         registry.add_improvement_operator(Box::new(FleetAndCostReduction));
         registry.add_improvement_operator(Box::new(DeepRelocation));
-        registry.add_improvement_operator(Box::new(DeepSwap));
+        registry.add_improvement_operator(Box::new(DeepSwap::default()));
     }
 
     /// Get operator information for external interfaces
@@ -645,36 +790,38 @@ impl ALNSEngine {
         let destroy_operator_type_id = 0;
         let repair_operator_type_id = 1;
 
-        let mut candidate_solution = self.current_solution.clone();
+        // The candidate is built in place: operators change the current solution inside a transaction,
+        // which is committed or rolled back by the acceptance decision.
+        self.current_solution.begin_transaction();
 
         // Track per-step cost baselines for logging/analysis.
-        let cost_before_destroy = candidate_solution.total_cost;
+        let cost_before_destroy = self.current_solution.total_cost;
 
         // Apply destroy and repair operators
         // TODO: expose destroy_removed_requests + fraction_removed to Python result
-        destroy_op.apply(&mut candidate_solution, &self.context, &mut self.rng);
-        candidate_solution.ensure_consistency_updated(&self.context);
-        candidate_solution.add_idle_vessel_and_add_empty_voyages(&self.context);
-        candidate_solution.update_total_cost(&self.context);
-        let cost_after_destroy = candidate_solution.total_cost;
+        destroy_op.apply(&mut self.current_solution, &self.context, &mut self.rng);
+        self.current_solution.ensure_consistency_updated(&self.context);
+        self.current_solution.add_idle_vessel_and_add_empty_voyages(&self.context);
+        self.current_solution.update_total_cost(&self.context);
+        let cost_after_destroy = self.current_solution.total_cost;
 
-        repair_op.apply(&mut candidate_solution, &self.context, &mut self.rng);
-        candidate_solution.ensure_consistency_updated(&self.context);
-        candidate_solution.update_total_cost(&self.context);
-        let cost_after_repair = candidate_solution.total_cost;
+        repair_op.apply(&mut self.current_solution, &self.context, &mut self.rng);
+        self.current_solution.ensure_consistency_updated(&self.context);
+        self.current_solution.update_total_cost(&self.context);
+        let cost_after_repair = self.current_solution.total_cost;
 
         // Capture cost after destroy+repair and track each improvement operator separately
-        let mut previous_improvement_cost = candidate_solution.total_cost;
+        let mut previous_improvement_cost = self.current_solution.total_cost;
 
         let mut improvement_costs = Vec::with_capacity(improvement_sequence.len());
         let mut improvement_step_metrics = Vec::with_capacity(improvement_sequence.len());
         for &idx in improvement_sequence {
             let improvement_op = self.operator_registry.get_improvement_operator(idx);
             let cost_before = previous_improvement_cost;
-            improvement_op.apply(&mut candidate_solution, &self.context, &mut self.rng);
-            candidate_solution.ensure_consistency_updated(&self.context);
-            candidate_solution.update_total_cost(&self.context);
-            let cost_after = candidate_solution.total_cost;
+            improvement_op.apply(&mut self.current_solution, &self.context, &mut self.rng);
+            self.current_solution.ensure_consistency_updated(&self.context);
+            self.current_solution.update_total_cost(&self.context);
+            let cost_after = self.current_solution.total_cost;
             improvement_costs.push(cost_after);
 
             let operator_name = self
@@ -695,11 +842,11 @@ impl ALNSEngine {
         }
 
         // Final cost update (redundant if improvements were applied, but safe)
-        candidate_solution.update_total_cost(&self.context);
+        self.current_solution.update_total_cost(&self.context);
 
-        let candidate_cost = candidate_solution.total_cost;
-        let current_cost = self.current_solution.total_cost;
-        let best_cost = self.best_solution.total_cost;
+        let candidate_cost = self.current_solution.total_cost;
+        let current_cost = cost_before_destroy;
+        let best_cost = self.best_cost();
 
         // Acceptance decision
         let accept = acceptance::accept(
@@ -714,25 +861,29 @@ impl ALNSEngine {
         let mut is_better_than_current = false;
 
         if candidate_cost < best_cost {
-            self.best_solution = candidate_solution.clone();
-            self.current_solution = candidate_solution;
+            self.current_solution.commit_transaction();
+            self.mark_current_as_best();
             accepted = true;
             is_new_best = true;
             is_better_than_current = true;
             self.stagnation_count = 0;
         } else if in_aggressive_phase {
-            self.current_solution = self.best_solution.clone();
+            self.current_solution.rollback_transaction();
+            self.restore_best();
             self.stagnation_count += 1;
         } else if candidate_cost < current_cost {
-            self.current_solution = candidate_solution;
+            let committed = self.current_solution.commit_transaction();
+            self.track_best_after_commit(committed);
             accepted = true;
             is_better_than_current = true;
             self.stagnation_count = 0;
         } else if accept {
-            self.current_solution = candidate_solution;
+            let committed = self.current_solution.commit_transaction();
+            self.track_best_after_commit(committed);
             accepted = true;
             self.stagnation_count += 1;
         } else {
+            self.current_solution.rollback_transaction();
             self.stagnation_count += 1;
         }
 
@@ -784,7 +935,7 @@ impl ALNSEngine {
             "Iter {:3}: cost={:.4}, best={:.4}, temp={:6.1}, destroy={}, repair={}, impr={}, accepted={}, elapsed={}ms",
             iteration + 1,
             candidate_cost,
-            self.best_solution.total_cost,
+            self.best_cost(),
             self.temperature,
             destroy_operator_idx,
             repair_operator_idx,
@@ -796,11 +947,9 @@ impl ALNSEngine {
         log::debug!("Iteration {} completed in {}ms", iteration + 1, elapsed_ms);
 
         // Calculate solution metrics
+        let is_feasible = self.current_solution.is_fully_feasible(&self.context);
+        let best_cost = self.best_cost();
         let current_solution = &self.current_solution;
-        let best_solution = &self.best_solution;
-
-        let mut temp_solution = current_solution.clone();
-        let is_feasible = temp_solution.is_fully_feasible(&self.context);
         let is_complete = current_solution.is_complete_solution();
 
         let structure_metrics = compute_solution_structure_metrics(current_solution, &self.context);
@@ -842,7 +991,7 @@ impl ALNSEngine {
 
         Ok(ALNSMetrics {
             total_cost: current_solution.total_cost,
-            best_cost: best_solution.total_cost,
+            best_cost,
             accepted,
             is_new_best,
             is_better_than_current,
@@ -956,17 +1105,17 @@ impl ALNSEngine {
         let improvement_operator_type = Some("improvement".to_string());
         let improvement_operator_type_id = Some(2);
 
-        let mut candidate_solution = self.current_solution.clone();
+        let current_cost = self.current_solution.total_cost;
+        self.current_solution.begin_transaction();
         let improvement_op = self
             .operator_registry
             .get_improvement_operator(improvement_operator_idx);
-        improvement_op.apply(&mut candidate_solution, &self.context, &mut self.rng);
-        candidate_solution.ensure_consistency_updated(&self.context);
-        candidate_solution.update_total_cost(&self.context);
+        improvement_op.apply(&mut self.current_solution, &self.context, &mut self.rng);
+        self.current_solution.ensure_consistency_updated(&self.context);
+        self.current_solution.update_total_cost(&self.context);
 
-        let candidate_cost = candidate_solution.total_cost;
-        let current_cost = self.current_solution.total_cost;
-        let best_cost = self.best_solution.total_cost;
+        let candidate_cost = self.current_solution.total_cost;
+        let best_cost = self.best_cost();
 
         let accept = acceptance::accept(
             current_cost,
@@ -981,25 +1130,29 @@ impl ALNSEngine {
         let mut is_better_than_current = false;
 
         if candidate_cost < best_cost {
-            self.best_solution = candidate_solution.clone();
-            self.current_solution = candidate_solution;
+            self.current_solution.commit_transaction();
+            self.mark_current_as_best();
             accepted = true;
             is_new_best = true;
             is_better_than_current = true;
             self.stagnation_count = 0;
         } else if in_aggressive_phase {
-            self.current_solution = self.best_solution.clone();
+            self.current_solution.rollback_transaction();
+            self.restore_best();
             self.stagnation_count += 1;
         } else if candidate_cost < current_cost {
-            self.current_solution = candidate_solution;
+            let committed = self.current_solution.commit_transaction();
+            self.track_best_after_commit(committed);
             accepted = true;
             is_better_than_current = true;
             self.stagnation_count = 0;
         } else if accept {
-            self.current_solution = candidate_solution;
+            let committed = self.current_solution.commit_transaction();
+            self.track_best_after_commit(committed);
             accepted = true;
             self.stagnation_count += 1;
         } else {
+            self.current_solution.rollback_transaction();
             self.stagnation_count += 1;
         }
 
@@ -1019,18 +1172,16 @@ impl ALNSEngine {
             "Iter {:3} (improvement): cost={:.4}, best={:.4}, temp={:6.1}, improvement={}, accepted={}, elapsed={}ms",
             iteration + 1,
             candidate_cost,
-            self.best_solution.total_cost,
+            self.best_cost(),
             self.temperature,
             improvement_operator_idx,
             accepted,
             elapsed_ms
         );
 
+        let is_feasible = self.current_solution.is_fully_feasible(&self.context);
+        let best_cost = self.best_cost();
         let current_solution = &self.current_solution;
-        let best_solution = &self.best_solution;
-
-        let mut temp_solution = current_solution.clone();
-        let is_feasible = temp_solution.is_fully_feasible(&self.context);
         let is_complete = current_solution.is_complete_solution();
 
         let structure_metrics = compute_solution_structure_metrics(current_solution, &self.context);
@@ -1072,7 +1223,7 @@ impl ALNSEngine {
 
         Ok(ALNSMetrics {
             total_cost: current_solution.total_cost,
-            best_cost: best_solution.total_cost,
+            best_cost,
             accepted,
             is_new_best,
             is_better_than_current,
@@ -1154,81 +1305,192 @@ impl ALNSEngine {
     /// using deterministic seed schedule `base_seed + restart_index`.
     /// Only the best-found solution across all restarts is retained as global best.
     pub fn run_with_restarts(&mut self, restarts: usize) -> ALNSRunWithRestartsResult {
-        let restart_count = restarts.max(1);
-        let mut restart_summaries = Vec::with_capacity(restart_count);
+        self.run_with_restarts_on_threads(restarts, 1)
+    }
 
-        let mut global_best_solution: Option<Solution> = None;
-        let mut global_best_cost = INFINITY;
+    /// `run_with_restarts` with the restarts split between `threads` threads, 0 uses all cores.
+    ///
+    /// Every thread runs its restarts on its own engine sharing the instance data of `context`,
+    /// taking the next restart index when it finishes one. The operators of these engines run on a
+    /// single thread each. Results are the same as with one thread: summaries come back in restart
+    /// order, the global best is the first restart with the lowest best cost, and the engine is
+    /// left in the state of the last restart with the global best as its current solution.
+    pub fn run_with_restarts_on_threads(
+        &mut self,
+        restarts: usize,
+        threads: usize,
+    ) -> ALNSRunWithRestartsResult {
+        let restart_count = restarts.max(1);
+        let threads = crate::utils::parallel::resolve_threads(threads).min(restart_count);
         let mut global_metrics = self.create_default_metrics();
 
-        for restart_idx in 0..restart_count {
-            let restart_seed = self.base_seed.wrapping_add(restart_idx as u64);
-            self.reset_for_restart(restart_seed);
+        let (restart_summaries, global_best) = if threads <= 1 {
+            let mut restart_summaries = Vec::with_capacity(restart_count);
+            let mut global_best = None;
+            for restart_idx in 0..restart_count {
+                self.run_and_record_restart(restart_idx, &mut restart_summaries, &mut global_best);
+            }
+            (restart_summaries, global_best)
+        } else {
+            self.run_restarts_on_workers(restart_count, threads)
+        };
 
-            let restart_start = std::time::Instant::now();
-            let restart_initial_cost = self.initial_cost;
-            let mut last_metrics = self.create_default_metrics();
-            let mut iterations_completed = 0usize;
+        if let Some(best) = global_best {
+            self.current_solution = best.solution;
+            self.mark_current_as_best();
+            self.alns_context.best_cost = self.best_cost();
+            global_metrics = best.metrics;
+            global_metrics.best_cost = self.best_cost();
+            global_metrics.total_cost = self.best_cost();
+        }
 
-            for iter in 0..self.max_iterations {
-                let destroy_idx = self.alns_context.pick_destroy_operator_idx();
-                let repair_idx = self.alns_context.pick_repair_operator_idx();
+        ALNSRunWithRestartsResult {
+            global_metrics,
+            restart_summaries,
+        }
+    }
 
-                match self.run_iteration(ALNSRunMode::Explicit(destroy_idx, repair_idx), iter, None) {
-                    Ok(metrics) => {
-                        last_metrics = metrics;
-                        iterations_completed = iter + 1;
-                    }
-                    Err(e) => {
-                        log::error!(
-                            "Error in restart {} iteration {}: {}",
-                            restart_idx,
-                            iter,
-                            e
-                        );
-                        break;
-                    }
+    /// Runs restarts `0..restart_count` on `threads` worker engines.
+    ///
+    /// Returns the summaries in restart order and the best restart over all threads. The engine
+    /// takes over the state of the worker after the last restart, as if it had run them itself.
+    fn run_restarts_on_workers(
+        &mut self,
+        restart_count: usize,
+        threads: usize,
+    ) -> (Vec<ALNSRestartSummary>, Option<RestartBest>) {
+        // Restarts already run in parallel, so their operators don't start threads of their own
+        let context = Arc::new(Context {
+            threads: 1,
+            ..(*self.context).clone()
+        });
+        let workers: Vec<RestartWorker> = (0..threads)
+            .map(|_| self.restart_worker(Arc::clone(&context)))
+            .collect();
+        let next_restart = AtomicUsize::new(0);
+        let results: Vec<RestartWorkerResult> = std::thread::scope(|scope| {
+            let handles: Vec<_> = workers
+                .into_iter()
+                .map(|worker| {
+                    let next_restart = &next_restart;
+                    scope.spawn(move || {
+                        let mut engine = worker.into_engine();
+                        let mut result = RestartWorkerResult::default();
+                        loop {
+                            let restart_idx = next_restart.fetch_add(1, Ordering::Relaxed);
+                            if restart_idx >= restart_count {
+                                break;
+                            }
+                            engine.run_and_record_restart(
+                                restart_idx,
+                                &mut result.summaries,
+                                &mut result.best,
+                            );
+                            if restart_idx + 1 == restart_count {
+                                result.last_restart_state = Some(engine.create_snapshot());
+                            }
+                        }
+                        result
+                    })
+                })
+                .collect();
+            handles
+                .into_iter()
+                .map(|handle| handle.join().expect("restart thread panicked"))
+                .collect()
+        });
+
+        let mut restart_summaries = Vec::with_capacity(restart_count);
+        let mut global_best = None;
+        for result in results {
+            restart_summaries.extend(result.summaries);
+            if let Some(best) = result.best {
+                if best.beats(&global_best) {
+                    global_best = Some(best);
                 }
             }
+            if let Some(state) = result.last_restart_state {
+                self.apply_snapshot(&state);
+            }
+        }
+        restart_summaries.sort_by_key(|summary| summary.restart_index);
+        (restart_summaries, global_best)
+    }
 
-            let restart_best_cost = self.best_solution.total_cost;
-            let restart_final_cost = self.current_solution.total_cost;
-            let restart_elapsed_ms = restart_start.elapsed().as_millis();
-            let best_improvement_pct = if restart_initial_cost.abs() > f64::EPSILON {
-                (restart_initial_cost - restart_best_cost) / restart_initial_cost * 100.0
-            } else {
-                0.0
-            };
+    fn restart_worker(&self, context: Arc<Context>) -> RestartWorker {
+        RestartWorker {
+            context,
+            initial_solution: self.initial_solution.clone(),
+            alns_context: self.alns_context.clone(),
+            max_iterations: self.max_iterations,
+            theta: self.theta,
+            weight_update_interval: self.weight_update_interval,
+            aggressive_search_factor: self.aggressive_search_factor,
+            base_seed: self.base_seed,
+            initial_temperature: self.initial_temperature,
+            algorithm_mode: self.algorithm_mode,
+        }
+    }
 
-            restart_summaries.push(ALNSRestartSummary {
-                restart_index: restart_idx,
-                seed: restart_seed,
-                initial_cost: restart_initial_cost,
-                best_cost: restart_best_cost,
-                final_cost: restart_final_cost,
-                iterations_completed,
-                elapsed_ms: restart_elapsed_ms,
-                best_improvement_pct,
-            });
+    /// Runs one restart, appends its summary and keeps its best solution if it beats `best`.
+    fn run_and_record_restart(
+        &mut self,
+        restart_idx: usize,
+        restart_summaries: &mut Vec<ALNSRestartSummary>,
+        best: &mut Option<RestartBest>,
+    ) {
+        let restart_seed = self.base_seed.wrapping_add(restart_idx as u64);
+        self.reset_for_restart(restart_seed);
+
+        let restart_start = std::time::Instant::now();
+        let restart_initial_cost = self.initial_cost;
+        let mut last_metrics = self.create_default_metrics();
+        let mut iterations_completed = 0usize;
 
-            if restart_best_cost < global_best_cost {
-                global_best_cost = restart_best_cost;
-                global_best_solution = Some(self.best_solution.clone());
-                global_metrics = last_metrics;
+        for iter in 0..self.max_iterations {
+            let destroy_idx = self.alns_context.pick_destroy_operator_idx();
+            let repair_idx = self.alns_context.pick_repair_operator_idx();
+
+            match self.run_iteration(ALNSRunMode::Explicit(destroy_idx, repair_idx), iter, None) {
+                Ok(metrics) => {
+                    last_metrics = metrics;
+                    iterations_completed = iter + 1;
+                }
+                Err(e) => {
+                    log::error!("Error in restart {} iteration {}: {}", restart_idx, iter, e);
+                    break;
+                }
             }
         }
 
-        if let Some(best_solution) = global_best_solution {
-            self.best_solution = best_solution.clone();
-            self.current_solution = best_solution;
-            self.alns_context.best_cost = self.best_solution.total_cost;
-            global_metrics.best_cost = self.best_solution.total_cost;
-            global_metrics.total_cost = self.best_solution.total_cost;
-        }
+        let restart_best_cost = self.best_cost();
+        let restart_final_cost = self.current_solution.total_cost;
+        let restart_elapsed_ms = restart_start.elapsed().as_millis();
+        let best_improvement_pct = if restart_initial_cost.abs() > f64::EPSILON {
+            (restart_initial_cost - restart_best_cost) / restart_initial_cost * 100.0
+        } else {
+            0.0
+        };
 
-        ALNSRunWithRestartsResult {
-            global_metrics,
-            restart_summaries,
+        restart_summaries.push(ALNSRestartSummary {
+            restart_index: restart_idx,
+            seed: restart_seed,
+            initial_cost: restart_initial_cost,
+            best_cost: restart_best_cost,
+            final_cost: restart_final_cost,
+            iterations_completed,
+            elapsed_ms: restart_elapsed_ms,
+            best_improvement_pct,
+        });
+
+        // Restarts of one engine run in increasing order, so the first lowest cost stays
+        if restart_best_cost < best.as_ref().map_or(INFINITY, |best| best.cost) {
+            *best = Some(RestartBest {
+                restart_index: restart_idx,
+                cost: restart_best_cost,
+                solution: self.best_solution().into_owned(),
+                metrics: last_metrics,
+            });
         }
     }
 
@@ -1266,8 +1528,9 @@ pub(crate) fn compute_solution_structure_metrics(
     let mut non_empty_voyages = 0usize;
     let mut total_visits = 0usize;
     let mut vessels_used: HashSet<usize> = HashSet::new();
-    let mut vessel_load_totals: HashMap<usize, (f64, usize)> = HashMap::new();
-    let mut vessel_time_totals: HashMap<usize, f64> = HashMap::new();
+    // Ordered by vessel, so the utilization averages don't depend on the hash order
+    let mut vessel_load_totals: BTreeMap<usize, (f64, usize)> = BTreeMap::new();
+    let mut vessel_time_totals: BTreeMap<usize, f64> = BTreeMap::new();
 
     for voyage_cell in &solution.voyages {
         let voyage = voyage_cell.borrow();
@@ -1389,3 +1652,50 @@ pub fn enable_console_logging() -> Result<(), String> {
         .try_init()
         .map_err(|e| format!("Logger already initialized or configuration error: {}", e))
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::structs::solution::tests::{assert_same_state, destroy, repair_and_improve};
+
+    #[test]
+    fn best_solution_is_rebuilt_from_delta() {
+        let mut engine = ALNSEngine::new_from_instance(
+            "SMALL_1",
+            7,
+            100.0,
+            0.9,
+            10,
+            0.85,
+            1,
+            ALNSAlgorithmMode::Baseline,
+        )
+        .expect("Failed to initialize engine");
+        let context = Arc::clone(&engine.context);
+        engine.current_solution.ensure_consistency_updated(&context);
+        engine.mark_current_as_best();
+        let best = engine.current_solution.clone();
+
+        let mut rng = StdRng::seed_from_u64(4);
+        for _ in 0..3 {
+            // An accepted move, kept in the delta
+            engine.current_solution.begin_transaction();
+            destroy(&mut engine.current_solution, &context, &mut rng);
+            repair_and_improve(&mut engine.current_solution, &context, &mut rng);
+            let committed = engine.current_solution.commit_transaction();
+            engine.track_best_after_commit(committed);
+            // A rejected move, not in the delta
+            engine.current_solution.begin_transaction();
+            destroy(&mut engine.current_solution, &context, &mut rng);
+            engine.current_solution.rollback_transaction();
+        }
+
+        assert!(matches!(&engine.best, BestSolution::Delta(delta) if !delta.is_empty()));
+        assert_eq!(engine.best_cost(), best.total_cost);
+        assert_same_state(&engine.best_solution(), &best);
+
+        engine.restore_best();
+        assert_same_state(&engine.current_solution, &best);
+        assert!(matches!(&engine.best, BestSolution::Delta(delta) if delta.is_empty()));
+    }
+}
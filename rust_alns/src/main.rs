@@ -35,10 +35,7 @@ fn run_alns_with_logging(seed: u64) -> Result<(), Box<dyn std::error::Error>> {
         data.base.clone(),
     );
     let tsp_solver = utils::tsp_solver::TSPSolver::new_from_problem_data(&problem_data);
-    let context = structs::context::Context {
-        problem: problem_data,
-        tsp_solver,
-    };
+    let context = structs::context::Context::new(problem_data, tsp_solver);
     let mut rng = StdRng::seed_from_u64(seed);
     let initial_solution =
         operators::initial_solution::construct_initial_solution(&context, &mut rng);
@@ -140,10 +137,7 @@ fn test_main(seed: u64) -> Result<(), Box<dyn std::error::Error>> {
         data.base.clone(),
     );
     let tsp_solver = TSPSolver::new_from_problem_data(&problem_data);
-    let context = Context {
-        problem: problem_data,
-        tsp_solver,
-    };
+    let context = Context::new(problem_data, tsp_solver);
     // Use deterministic RNG with a fixed seed
     let mut rng = StdRng::seed_from_u64(seed);
     let mut solution = construct_initial_solution(&context, &mut rng);
@@ -267,10 +261,7 @@ fn test_feasibility_over_seeds() -> Result<(), Box<dyn std::error::Error>> {
         data.base.clone(),
     );
     let tsp_solver = utils::tsp_solver::TSPSolver::new_from_problem_data(&problem_data);
-    let context = structs::context::Context {
-        problem: problem_data,
-        tsp_solver,
-    };
+    let context = structs::context::Context::new(problem_data, tsp_solver);
 
     let mut incomplete_initial = 0;
     let mut incomplete_initial_complete = 0;
@@ -398,10 +389,7 @@ fn test_voyage_number_reduction_over_seeds() -> Result<(), Box<dyn std::error::E
         data.base.clone(),
     );
     let tsp_solver = utils::tsp_solver::TSPSolver::new_from_problem_data(&problem_data);
-    let context = structs::context::Context {
-        problem: problem_data,
-        tsp_solver,
-    };
+    let context = structs::context::Context::new(problem_data, tsp_solver);
     let mut reduced_seeds = Vec::new();
     let total_seeds = 100;
     for seed in 0..total_seeds {
@@ -413,7 +401,7 @@ fn test_voyage_number_reduction_over_seeds() -> Result<(), Box<dyn std::error::E
             .iter()
             .filter(|v| !v.borrow().visit_ids.is_empty())
             .count();
-        let op = VoyageNumberReduction;
+        let op = VoyageNumberReduction::default();
         op.apply(&mut solution, &context, &mut rng);
         let after = solution
             .voyages
@@ -449,10 +437,7 @@ fn test_voyage_number_reduction_dump(seed: u64) -> Result<(), Box<dyn std::error
         data.base.clone(),
     );
     let tsp_solver = utils::tsp_solver::TSPSolver::new_from_problem_data(&problem_data);
-    let context = structs::context::Context {
-        problem: problem_data,
-        tsp_solver,
-    };
+    let context = structs::context::Context::new(problem_data, tsp_solver);
     let mut rng = StdRng::seed_from_u64(seed);
     let mut solution = operators::initial_solution::construct_initial_solution(&context, &mut rng);
     dump_solution(
@@ -461,7 +446,7 @@ fn test_voyage_number_reduction_dump(seed: u64) -> Result<(), Box<dyn std::error
         &format!("../output/voyage_reduction_init_seed{}.json", seed),
         &context,
     )?;
-    let op = VoyageNumberReduction;
+    let op = VoyageNumberReduction::default();
     op.apply(&mut solution, &context, &mut rng);
     dump_solution(
         &solution,
@@ -530,7 +515,7 @@ fn test_alns_engine_iterations() -> Result<(), Box<dyn std::error::Error>> {
         }
     }
 
-    println!("Final best cost: {:.4}", engine.best_solution.total_cost);
+    println!("Final best cost: {:.4}", engine.best_cost());
 
     // Export solution
     engine.export_solution("output/unified_engine_solution.json");
@@ -24,7 +24,7 @@ impl DestroyOperator for RandomVisitRemovalInVoyages {
         indices.shuffle(rng);
         // Select a subset of voyages to affect
         for &i in indices.iter().take(num_to_affect) {
-            let voyage = solution.voyages[i].borrow_mut();
+            let voyage = solution.voyages[i].borrow();
             let n_visits = voyage.visit_ids.len();
             let frac = self.xi_min + rng.gen::<f64>() * (self.xi_max - self.xi_min);
             let to_remove = ((frac * n_visits as f64).round() as usize).min(n_visits);
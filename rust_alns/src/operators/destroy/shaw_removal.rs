@@ -36,42 +36,32 @@ impl DestroyOperator for ShawRemoval {
         debug!(target: "operator::destroy", "[ShawRemoval] Candidates: {:?}", all_visit_ids);
         // Randomly select a seed visit
         let mut removed_visit_ids = Vec::new();
-        let mut candidates: Vec<usize> = all_visit_ids.clone();
+        let mut candidates: Vec<Candidate> = all_visit_ids
+            .iter()
+            .enumerate()
+            .map(|(order, &visit_id)| Candidate::new(order, visit_id, solution))
+            .collect();
         let seed_idx = rng.gen_range(0..candidates.len());
-        let seed = candidates.remove(seed_idx);
-        debug!(target: "operator::destroy", "[ShawRemoval] Seed visit: {}", seed);
-        removed_visit_ids.push(seed);
+        let mut last_removed = candidates.remove(seed_idx);
+        debug!(target: "operator::destroy", "[ShawRemoval] Seed visit: {}", last_removed.visit_id);
+        removed_visit_ids.push(last_removed.visit_id);
         // Iteratively select most related visits
         let mut iteration = 0;
         while removed_visit_ids.len() < to_remove && !candidates.is_empty() {
-            // For each candidate, compute min relatedness to any already removed
-            let mut relatedness: Vec<(usize, f64)> = candidates
-                .iter()
-                .map(|&j| {
-                    let r = removed_visit_ids
-                        .iter()
-                        .map(|&i| {
-                            shaw_relatedness(
-                                i, j, solution, context, self.alpha, self.beta, self.phi,
-                            )
-                        })
-                        .fold(f64::INFINITY, f64::min);
-                    (j, r)
-                })
-                .collect();
-            // Sort by relatedness (lower is more related)
-            relatedness.sort_by(|a, b| a.1.partial_cmp(&b.1).unwrap_or(std::cmp::Ordering::Equal));
-            // p-deterministic selection
-            let r: f64 = rng.gen_range(0.0..1.0);
-            let idx = ((r.powf(self.p)) * (relatedness.len() as f64)).floor() as usize;
-            let idx = idx.min(relatedness.len() - 1);
-            let (selected, rel_val) = relatedness.remove(idx);
-            debug!(target: "operator::destroy", "[ShawRemoval] Iteration {}: Removing visit {} (relatedness={:.2})", iteration, selected, rel_val);
-            // Remove from candidates and add to removed
-            if let Some(pos) = candidates.iter().position(|&x| x == selected) {
-                candidates.remove(pos);
+            // Min relatedness to any already removed visit, only the last removed one can lower it
+            for candidate in candidates.iter_mut() {
+                let r = self.relatedness(&last_removed, candidate, context);
+                candidate.relatedness = candidate.relatedness.min(r);
             }
-            removed_visit_ids.push(selected);
+            // p-deterministic selection of the idx-th most related (lower is more related) candidate
+            let r: f64 = rng.gen_range(0.0..1.0);
+            let idx = ((r.powf(self.p)) * (candidates.len() as f64)).floor() as usize;
+            let idx = idx.min(candidates.len() - 1);
+            candidates.select_nth_unstable_by(idx, Candidate::cmp_relatedness);
+            let selected = candidates.swap_remove(idx);
+            debug!(target: "operator::destroy", "[ShawRemoval] Iteration {}: Removing visit {} (relatedness={:.2})", iteration, selected.visit_id, selected.relatedness);
+            removed_visit_ids.push(selected.visit_id);
+            last_removed = selected;
             iteration += 1;
         }
         debug!(target: "operator::destroy", "[ShawRemoval] Removed visits: {:?}", removed_visit_ids);
@@ -82,31 +72,45 @@ impl DestroyOperator for ShawRemoval {
     }
 }
 
-// Helper: compute relatedness between two visits
-fn shaw_relatedness(
-    i: usize,
-    j: usize,
-    solution: &Solution,
-    context: &Context,
-    alpha: f64,
-    beta: f64,
-    phi: f64,
-) -> f64 {
-    // Get visits
-    let visit_i = solution.visit(i).expect("Invalid visit id i");
-    let visit_j = solution.visit(j).expect("Invalid visit id j");
-    // Get installation ids
-    let inst_i = visit_i.installation_id();
-    let inst_j = visit_j.installation_id();
-    // Travel time between installations (use distance as proxy, assuming unit speed)
-    let t_ij = context.problem.distance_manager.distance(inst_i, inst_j);
-    // Arrival times (if available, else 0.0)
-    // Use departure_day as a proxy for arrival time
-    let t_i = visit_i.departure_day.unwrap_or(0) as f64;
-    let t_j = visit_j.departure_day.unwrap_or(0) as f64;
-    // Delivery load (deck demand)
-    let q_i = visit_i.demand() as f64;
-    let q_j = visit_j.demand() as f64;
+impl ShawRemoval {
+    /// Relatedness of two visits, lower is more related.
+    ///
+    /// Travel and load terms come from the installation pairs precomputed in the context.
+    fn relatedness(&self, i: &Candidate, j: &Candidate, context: &Context) -> f64 {
+        let terms = &context.relatedness;
+        // Use departure_day as a proxy for arrival time
+        self.alpha * terms.travel(i.installation_id, j.installation_id)
+            + self.beta * (i.day - j.day).abs()
+            + self.phi * terms.load(i.installation_id, j.installation_id)
+    }
+}
+
+/// Visit that can still be removed, with its min relatedness to the removed visits.
+struct Candidate {
+    /// Position among the visits of the solution, breaks ties like a stable sort would
+    order: usize,
+    visit_id: usize,
+    installation_id: usize,
+    day: f64,
+    relatedness: f64,
+}
 
-    alpha * t_ij + beta * ((t_i - t_j) as f64).abs() + phi * ((q_i - q_j) as f64).abs()
+impl Candidate {
+    fn new(order: usize, visit_id: usize, solution: &Solution) -> Self {
+        let visit = solution.visit(visit_id).expect("Invalid visit id");
+        Self {
+            order,
+            visit_id,
+            installation_id: visit.installation_id(),
+            day: visit.departure_day.unwrap_or(0) as f64,
+            relatedness: f64::INFINITY,
+        }
+    }
+
+    fn cmp_relatedness(a: &Self, b: &Self) -> std::cmp::Ordering {
+        a.relatedness
+            .partial_cmp(&b.relatedness)
+            .unwrap_or(std::cmp::Ordering::Equal)
+            .then(a.order.cmp(&b.order))
+    }
 }
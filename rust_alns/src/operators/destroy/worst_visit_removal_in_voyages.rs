@@ -25,35 +25,87 @@ impl DestroyOperator for WorstVisitRemovalInVoyages {
         }
         let frac = self.xi_min + rng.gen_range(0.0..1.0) * (self.xi_max - self.xi_min);
         let to_remove = ((frac * n_visits as f64).round() as usize).min(n_visits);
+        // Removal savings of all visits, most expensive first
+        let mut savings: Vec<RemovalSaving> = Vec::with_capacity(n_visits);
+        for position in 0..solution.voyages.len() {
+            savings.extend(RemovalSaving::of_voyage(solution, position, context));
+        }
+        savings.sort_by(RemovalSaving::by_saving);
         let mut removed_visit_ids = Vec::new();
         for _ in 0..to_remove {
-            // 1. Collect all current visits and their removal costs
-            let mut all_visits = Vec::new();
-            for voyage in &solution.voyages {
-                let voyage = voyage.borrow();
-                for &visit_id in &voyage.visit_ids {
-                    let cost_with = solution.cost_with_context(context);
-                    let cost_without = solution.cost_without_visit_full(visit_id, context);
-                    let removal_cost = cost_with - cost_without;
-                    all_visits.push((visit_id, removal_cost));
-                }
-            }
-            if all_visits.is_empty() {
+            if savings.is_empty() {
                 break;
             }
-            // Sort by removal cost, descending
-            all_visits.sort_by(|a, b| b.1.partial_cmp(&a.1).unwrap_or(std::cmp::Ordering::Equal));
             // Select index using p-deterministic selection
             let r: f64 = rng.gen_range(0.0..1.0);
-            let idx = ((r.powf(self.p)) * (all_visits.len() as f64)).floor() as usize;
-            let idx = idx.min(all_visits.len() - 1);
-            let (visit_id, removal_cost) = all_visits.remove(idx);
-            removed_visit_ids.push(visit_id);
+            let idx = ((r.powf(self.p)) * (savings.len() as f64)).floor() as usize;
+            let idx = idx.min(savings.len() - 1);
+            let removed = savings.remove(idx);
+            debug!(target: "operator::destroy", "[WorstVisitRemovalInVoyages] Removing visit {} (saving={:.2})", removed.visit_id, removed.saving);
+            removed_visit_ids.push(removed.visit_id);
             // Remove the visit immediately
-            solution.unassign_visits(&[visit_id]);
+            solution.unassign_visits(&[removed.visit_id]);
             solution.schedule.set_need_update(true);
+
+            // Only the savings in the changed voyage are affected, unless the voyage is now empty:
+            // then the fixed cost of its vessel may depend on the other voyages of the vessel.
+            let (voyage_emptied, vessel_id) = {
+                let voyage = solution.voyages[removed.voyage_position].borrow();
+                (voyage.is_empty(), voyage.vessel_id)
+            };
+            let affected: Vec<usize> = (0..solution.voyages.len())
+                .filter(|&position| {
+                    position == removed.voyage_position
+                        || (voyage_emptied
+                            && vessel_id.is_some()
+                            && solution.voyages[position].borrow().vessel_id == vessel_id)
+                })
+                .collect();
+            savings.retain(|saving| !affected.contains(&saving.voyage_position));
+            for &position in &affected {
+                for saving in RemovalSaving::of_voyage(solution, position, context) {
+                    let at = savings.partition_point(|other| {
+                        RemovalSaving::by_saving(other, &saving) == std::cmp::Ordering::Less
+                    });
+                    savings.insert(at, saving);
+                }
+            }
         }
         removed_visit_ids.sort_unstable();
         info!(target: "operator::destroy", "[WorstVisitRemovalInVoyages] Completed");
     }
 }
+
+/// Cost saved by removing a visit from its voyage.
+struct RemovalSaving {
+    saving: f64,
+    voyage_position: usize,
+    /// Position of the visit in its voyage
+    visit_position: usize,
+    visit_id: usize,
+}
+
+impl RemovalSaving {
+    fn of_voyage(solution: &Solution, voyage_position: usize, context: &Context) -> Vec<Self> {
+        let voyage_id = solution.voyages[voyage_position].borrow().id;
+        solution
+            .voyage_removal_cost_deltas(voyage_id, context)
+            .into_iter()
+            .enumerate()
+            .map(|(visit_position, (visit_id, delta))| Self {
+                saving: -delta,
+                voyage_position,
+                visit_position,
+                visit_id,
+            })
+            .collect()
+    }
+
+    /// Largest saving first, ties in route order.
+    fn by_saving(a: &Self, b: &Self) -> std::cmp::Ordering {
+        b.saving
+            .partial_cmp(&a.saving)
+            .unwrap_or(std::cmp::Ordering::Equal)
+            .then((a.voyage_position, a.visit_position).cmp(&(b.voyage_position, b.visit_position)))
+    }
+}
@@ -1,5 +1,8 @@
+use super::move_evaluation::{MoveEvaluator, RouteCache, WorkerRouteCache};
 use crate::operators::traits::ImprovementOperator;
-use crate::structs::{context::Context, solution::Solution};
+use crate::structs::solution::{Solution, SolutionView};
+use crate::structs::{context::Context, visit::Visit};
+use crate::utils::parallel;
 use log::{debug, error, info, warn};
 use rand::RngCore;
 
@@ -7,66 +10,142 @@ use rand::RngCore;
 pub struct DeepRelocation;
 
 impl DeepRelocation {
-	fn find_best_relocation(
+	/// Improving relocations as (visit, origin voyage, target voyage, Δcost), best first.
+	///
+	/// A relocation changes only its origin and target voyages, so it is evaluated on those two with
+	/// cached routes and local checks of capacity, departure spread and vessel overlap. Moves with equal
+	/// Δ keep the order of visits and voyages. The full feasibility check is left to `apply_relocation`.
+	///
+	/// With the `parallel` feature the visits are split between threads; the moves found are the same.
+	fn find_improving_relocations(
 		solution: &Solution,
 		context: &Context,
-	) -> Option<(usize, usize, usize, f64)> {
-		let mut working_solution = solution.clone();
-		working_solution.ensure_consistency_updated(context);
-		let current_cost = working_solution.cost_with_context(context);
-		let mut best_move: Option<(usize, usize, usize, f64)> = None;
+		cache: &mut RouteCache,
+	) -> Vec<(usize, usize, usize, f64)> {
+		let shared_cache: &RouteCache = cache;
+		let results = solution.with_view(|view| {
+			let evaluator = MoveEvaluator::new(view, context);
+			parallel::map_chunks(view.all_visits(), context.num_threads(), |visits| {
+				let mut worker_cache = WorkerRouteCache::new(shared_cache);
+				let mut moves = Vec::new();
+				for visit in visits {
+					Self::relocations_of_visit(
+						view,
+						context,
+						&evaluator,
+						&mut worker_cache,
+						visit,
+						&mut moves,
+					);
+				}
+				(moves, worker_cache.into_local())
+			})
+		});
+
+		let mut moves = Vec::new();
+		for (worker_moves, worker_cache) in results {
+			moves.extend(worker_moves);
+			cache.merge(worker_cache);
+		}
+		// Stable sort: among equal deltas the first move found wins
+		moves.sort_by(|a, b| a.3.partial_cmp(&b.3).unwrap());
+		moves
+	}
+
+	/// Adds the improving relocations of one visit to `moves`, in the order of the target voyages.
+	fn relocations_of_visit(
+		view: &SolutionView,
+		context: &Context,
+		evaluator: &MoveEvaluator,
+		cache: &mut WorkerRouteCache,
+		visit: &Visit,
+		moves: &mut Vec<(usize, usize, usize, f64)>,
+	) {
+		if !visit.is_assigned {
+			return;
+		}
+		let visit_id = visit.id();
+		let origin_voyage = match visit.assigned_voyage_id {
+			Some(id) => id,
+			None => return,
+		};
+		let Some(origin) = view.voyage(origin_voyage) else {
+			return;
+		};
+		let Some(origin_vessel) = origin.vessel_id else {
+			return;
+		};
+
+		let origin_timing = cache.timing(origin, Some(visit_id), None, context);
+		let origin_end = (!origin_timing.is_empty()).then_some(origin_timing.end_time);
+		let origin_delta =
+			evaluator.changed_voyage_cost(view, origin_vessel, origin_timing, context)
+				- evaluator.voyage_cost(origin_voyage);
+		let origin_usage_change = if origin_end.is_none() { -1 } else { 0 };
 
-		for visit in working_solution.all_visits() {
-			if !visit.is_assigned {
+		for &target in &view.voyages {
+			if target.id == origin_voyage {
 				continue;
 			}
-			let visit_id = visit.id();
-			let origin_voyage = match visit.assigned_voyage_id {
-				Some(id) => id,
-				None => continue,
+			if !view.visit_insertion_is_possible_into(context, visit_id, target, &[visit_id]) {
+				continue;
+			}
+			let Some(target_vessel) = target.vessel_id else {
+				continue;
 			};
-
-			for voyage_cell in &working_solution.voyages {
-				let voyage = voyage_cell.borrow();
-				let target_voyage_id = voyage.id;
-				if target_voyage_id == origin_voyage {
-					continue;
-				}
-				if voyage.is_empty() {
-					// Allow relocation into empty voyages; keep iteration going.
-				}
-				drop(voyage);
-
-				let mut candidate = working_solution.clone();
-				candidate.unassign_visits(&[visit_id]);
-				candidate.ensure_schedule_is_updated();
-				if !candidate.visit_insertion_is_possible(context, visit_id, target_voyage_id) {
-					continue;
-				}
-				if candidate
-					.greedy_insert_visit(visit_id, target_voyage_id, context)
-					.is_err()
-				{
-					continue;
-				}
-				candidate.ensure_consistency_updated(context);
-				if !candidate.is_fully_feasible(context) {
-					continue;
-				}
-				let candidate_cost = candidate.cost_with_context(context);
-				let delta = candidate_cost - current_cost;
-				if delta < -f64::EPSILON
-					&& best_move
-						.as_ref()
-						.map(|(_, _, _, best_delta)| delta < *best_delta)
-						.unwrap_or(true)
-				{
-					best_move = Some((visit_id, origin_voyage, target_voyage_id, delta));
-				}
+			let target_timing = cache.timing(target, None, Some(visit_id), context);
+			if evaluator.overlaps(&[
+				(origin_voyage, origin_vessel, origin_end),
+				(target.id, target_vessel, Some(target_timing.end_time)),
+			]) {
+				continue;
+			}
+			// The fixed costs change only if a vessel starts or stops sailing, which depends on both voyages
+			let target_usage_change = if target.is_empty() { 1 } else { 0 };
+			let delta = origin_delta
+				+ evaluator.changed_voyage_cost(view, target_vessel, target_timing, context)
+				- evaluator.voyage_cost(target.id)
+				+ evaluator.usage_cost_change(
+					&[
+						(origin_vessel, origin_usage_change),
+						(target_vessel, target_usage_change),
+					],
+					context,
+				);
+			if delta < -f64::EPSILON {
+				moves.push((visit_id, origin_voyage, target.id, delta));
 			}
 		}
+	}
 
-		best_move
+	/// Applies a relocation and checks the full feasibility of the result.
+	fn apply_relocation(
+		solution: &mut Solution,
+		context: &Context,
+		visit_id: usize,
+		target_voyage: usize,
+	) -> bool {
+		solution.unassign_visits(&[visit_id]);
+		solution.ensure_schedule_is_updated();
+		if !solution.visit_insertion_is_possible(context, visit_id, target_voyage) {
+			debug!(
+				target: "operator::improvement",
+				"[DeepRelocation] Insertion of visit {} into voyage {} deemed infeasible",
+				visit_id,
+				target_voyage
+			);
+			return false;
+		}
+		if let Err(err) = solution.greedy_insert_visit(visit_id, target_voyage, context) {
+			debug!(
+				target: "operator::improvement",
+				"[DeepRelocation] Failed to apply relocation: {}",
+				err
+			);
+			return false;
+		}
+		solution.ensure_consistency_updated(context);
+		solution.is_fully_feasible(context)
 	}
 }
 
@@ -74,14 +153,12 @@ impl ImprovementOperator for DeepRelocation {
 	fn apply(&self, solution: &mut Solution, context: &Context, _rng: &mut dyn RngCore) {
 		info!(target: "operator::improvement", "[DeepRelocation] Invoked");
 		solution.ensure_consistency_updated(context);
-		let original_solution = solution.clone();
-		let mut original_feasibility_probe = original_solution.clone();
-		let original_was_feasible = original_feasibility_probe.is_fully_feasible(context);
+		let original_was_feasible = solution.is_fully_feasible(context);
+		// Changes of the whole operator call are reverted if it ends up infeasible
+		solution.begin_transaction();
 
+		let mut cache = RouteCache::new();
 		loop {
-			// Save state before attempting move to enable clean rollback
-			let iteration_start_solution = solution.clone();
-			
 			let baseline_cost = solution.cost_with_context(context);
 			debug!(
 				target: "operator::improvement",
@@ -89,14 +166,37 @@ impl ImprovementOperator for DeepRelocation {
 				baseline_cost
 			);
 
-			let best_move = Self::find_best_relocation(solution, context);
-			let Some((visit_id, origin_voyage, target_voyage, delta)) = best_move else {
+			// Take the best move that passes the full feasibility check and lowers the cost
+			let mut applied_move = None;
+			for &(visit_id, origin_voyage, target_voyage, delta) in
+				&Self::find_improving_relocations(solution, context, &mut cache)
+			{
+				// Open a nested transaction for the move to enable clean rollback
+				solution.begin_transaction();
+				if Self::apply_relocation(solution, context, visit_id, target_voyage)
+					&& solution.cost_with_context(context) < baseline_cost
+				{
+					solution.commit_transaction();
+					applied_move = Some((visit_id, origin_voyage, target_voyage, delta));
+					break;
+				}
+				debug!(
+					target: "operator::improvement",
+					"[DeepRelocation] Relocation of visit {} to voyage {} is infeasible or does not lower the cost; restoring iteration state",
+					visit_id,
+					target_voyage
+				);
+				solution.rollback_transaction();
+			}
+			let Some((visit_id, origin_voyage, target_voyage, delta)) = applied_move else {
 				info!(
 					target: "operator::improvement",
 					"[DeepRelocation] No improving relocation found"
 				);
 				break;
 			};
+			cache.invalidate(origin_voyage);
+			cache.invalidate(target_voyage);
 
 			info!(
 				target: "operator::improvement",
@@ -106,30 +206,6 @@ impl ImprovementOperator for DeepRelocation {
 				target_voyage,
 				delta
 			);
-
-			solution.unassign_visits(&[visit_id]);
-			solution.ensure_schedule_is_updated();
-			if !solution.visit_insertion_is_possible(context, visit_id, target_voyage) {
-				debug!(
-					target: "operator::improvement",
-					"[DeepRelocation] Insertion of visit {} into voyage {} deemed infeasible; restoring iteration state",
-					visit_id,
-					target_voyage
-				);
-				*solution = iteration_start_solution;
-				break;
-			}
-			if let Err(err) = solution.greedy_insert_visit(visit_id, target_voyage, context) {
-				debug!(
-					target: "operator::improvement",
-					"[DeepRelocation] Failed to apply relocation: {}; restoring iteration state",
-					err
-				);
-				*solution = iteration_start_solution;
-				break;
-			}
-
-			solution.ensure_consistency_updated(context);
 			let updated_cost = solution.cost_with_context(context);
 			debug!(
 				target: "operator::improvement",
@@ -137,6 +213,13 @@ impl ImprovementOperator for DeepRelocation {
 				updated_cost
 			);
 		}
+		let (cache_hits, cache_misses) = cache.stats();
+		debug!(
+			target: "operator::improvement",
+			"[DeepRelocation] Route cache: {} hits, {} misses",
+			cache_hits,
+			cache_misses
+		);
 
 		solution.ensure_consistency_updated(context);
 		if !solution.is_fully_feasible(context) {
@@ -151,17 +234,17 @@ impl ImprovementOperator for DeepRelocation {
 					"[DeepRelocation] Candidate remained infeasible (input already infeasible); reverting"
 				);
 			}
-			*solution = original_solution;
+			solution.rollback_transaction();
 			solution.ensure_consistency_updated(context);
 
-			let mut reverted_solution = solution.clone();
-			if original_was_feasible && !reverted_solution.is_fully_feasible(context) {
+			if original_was_feasible && !solution.is_fully_feasible(context) {
 				error!(
 					target: "operator::improvement",
 					"[DeepRelocation] Revert failed: restored solution is still infeasible"
 				);
 			}
+		} else {
+			solution.commit_transaction();
 		}
 	}
 }
-
@@ -1,84 +1,227 @@
+use super::move_evaluation::{evaluate_voyage_change, MoveEvaluator, RouteCache, WorkerRouteCache};
 use crate::operators::traits::ImprovementOperator;
-use crate::structs::{context::Context, solution::Solution};
+use crate::structs::context::Context;
+use crate::structs::solution::{Solution, SolutionView};
+use crate::utils::parallel;
 use log::{debug, error, info, warn};
 use rand::RngCore;
 
 /// Swaps pairs of assigned visits greedily while strict improvements exist.
-pub struct DeepSwap;
+#[derive(Debug, Clone, Default)]
+pub struct DeepSwap {
+	/// Pairs of visits whose installations are farther apart are not evaluated.
+	/// `None` evaluates all pairs and finds the same moves as a search over whole solutions.
+	pub max_installation_distance: Option<f64>,
+}
 
 impl DeepSwap {
-	fn find_best_swap(
+	pub fn with_max_installation_distance(max_installation_distance: f64) -> Self {
+		Self {
+			max_installation_distance: Some(max_installation_distance),
+		}
+	}
+
+	/// Improving swaps as (visit a, voyage of a, visit b, voyage of b, Δcost), best first.
+	///
+	/// Pairs are filtered up front by installation, distance, capacity and departure spread, as checked
+	/// after unassigning both visits. The remaining swaps are scored on the two voyages they change with
+	/// cached routes and checked for vessel overlap. Moves with equal Δ keep the order of visit pairs.
+	/// The full feasibility check is left to `apply_swap`.
+	///
+	/// With the `parallel` feature the first visits of the pairs are split between threads; the moves
+	/// found are the same.
+	fn find_improving_swaps(
+		&self,
 		solution: &Solution,
 		context: &Context,
-	) -> Option<(usize, usize, usize, usize, f64)> {
-		let mut working_solution = solution.clone();
-		working_solution.ensure_consistency_updated(context);
-		let current_cost = working_solution.cost_with_context(context);
-		let mut best_move: Option<(usize, usize, usize, usize, f64)> = None;
+		cache: &mut RouteCache,
+	) -> Vec<(usize, usize, usize, usize, f64)> {
+		let shared_cache: &RouteCache = cache;
+		let results = solution.with_view(|view| {
+			let evaluator = MoveEvaluator::new(view, context);
+			// Visit a is paired with all later visits, so early and late visits are alternated to give
+			// the threads a similar number of pairs
+			let count = view.all_visits().len();
+			let order: Vec<usize> = (0..count)
+				.map(|i| if i % 2 == 0 { i / 2 } else { count - 1 - i / 2 })
+				.collect();
+			parallel::map_chunks(&order, context.num_threads(), |indices| {
+				let mut worker_cache = WorkerRouteCache::new(shared_cache);
+				let worker_moves: Vec<_> = indices
+					.iter()
+					.map(|&idx_a| {
+						let mut moves = Vec::new();
+						self.swaps_of_visit(
+							view,
+							context,
+							&evaluator,
+							&mut worker_cache,
+							idx_a,
+							&mut moves,
+						);
+						(idx_a, moves)
+					})
+					.collect();
+				(worker_moves, worker_cache.into_local())
+			})
+		});
+
+		// Restore the order of visits before reducing, so ties are broken as in a serial search
+		let mut moves_by_visit: Vec<(usize, Vec<(usize, usize, usize, usize, f64)>)> = Vec::new();
+		for (worker_moves, worker_cache) in results {
+			moves_by_visit.extend(worker_moves);
+			cache.merge(worker_cache);
+		}
+		moves_by_visit.sort_by_key(|(idx_a, _)| *idx_a);
+		let mut moves: Vec<_> = moves_by_visit
+			.into_iter()
+			.flat_map(|(_, moves)| moves)
+			.collect();
+		// Stable sort: among equal deltas the first move found wins
+		moves.sort_by(|a, b| a.4.partial_cmp(&b.4).unwrap());
+		moves
+	}
 
-		let visits = working_solution.all_visits();
-		for (idx_a, visit_a) in visits.iter().enumerate() {
-			if !visit_a.is_assigned {
+	/// Adds the improving swaps of the visit at `idx_a` with all later visits to `moves`.
+	fn swaps_of_visit(
+		&self,
+		view: &SolutionView,
+		context: &Context,
+		evaluator: &MoveEvaluator,
+		cache: &mut WorkerRouteCache,
+		idx_a: usize,
+		moves: &mut Vec<(usize, usize, usize, usize, f64)>,
+	) {
+		let visits = view.all_visits();
+		let visit_a = &visits[idx_a];
+		if !visit_a.is_assigned {
+			return;
+		}
+		let Some(origin_voyage_a) = visit_a.assigned_voyage_id else {
+			return;
+		};
+		let Some(voyage_a) = view.voyage(origin_voyage_a) else {
+			return;
+		};
+		let Some(vessel_a) = voyage_a.vessel_id else {
+			return;
+		};
+		for visit_b in visits.iter().skip(idx_a + 1) {
+			if !visit_b.is_assigned {
 				continue;
 			}
-			let Some(origin_voyage_a) = visit_a.assigned_voyage_id else {
+			if visit_a.installation_id() == visit_b.installation_id() {
+				continue;
+			}
+			let Some(origin_voyage_b) = visit_b.assigned_voyage_id else {
 				continue;
 			};
-			for visit_b in visits.iter().skip(idx_a + 1) {
-				if !visit_b.is_assigned {
-					continue;
-				}
-				if visit_a.installation_id() == visit_b.installation_id() {
+			if let Some(max_distance) = self.max_installation_distance {
+				let distance = context
+					.problem
+					.distance_manager
+					.distance(visit_a.installation_id(), visit_b.installation_id());
+				if distance > max_distance {
 					continue;
 				}
-				let Some(origin_voyage_b) = visit_b.assigned_voyage_id else {
-					continue;
-				};
-
-				let visit_a_id = visit_a.id();
-				let visit_b_id = visit_b.id();
+			}
+			let Some(voyage_b) = view.voyage(origin_voyage_b) else {
+				continue;
+			};
+			let Some(vessel_b) = voyage_b.vessel_id else {
+				continue;
+			};
 
-				let mut candidate = working_solution.clone();
-				candidate.unassign_visits(&[visit_a_id, visit_b_id]);
-				candidate.ensure_schedule_is_updated();
+			let visit_a_id = visit_a.id();
+			let visit_b_id = visit_b.id();
+			let swapped = [visit_a_id, visit_b_id];
+			if !view.visit_insertion_is_possible_into(context, visit_a_id, voyage_b, &swapped)
+				|| !view.visit_insertion_is_possible_into(context, visit_b_id, voyage_a, &swapped)
+			{
+				continue;
+			}
 
-				if !candidate.visit_insertion_is_possible(context, visit_a_id, origin_voyage_b) {
+			let delta = if origin_voyage_a == origin_voyage_b {
+				// Both visits are reinserted into their own voyage, a first
+				let timing = evaluate_voyage_change(voyage_a, &swapped, &swapped, context);
+				if evaluator.overlaps(&[(origin_voyage_a, vessel_a, Some(timing.end_time))]) {
 					continue;
 				}
-				if !candidate.visit_insertion_is_possible(context, visit_b_id, origin_voyage_a) {
-					continue;
-				}
-				if candidate
-					.greedy_insert_visit(visit_a_id, origin_voyage_b, context)
-					.is_err()
-				{
-					continue;
-				}
-				if candidate
-					.greedy_insert_visit(visit_b_id, origin_voyage_a, context)
-					.is_err()
-				{
-					continue;
-				}
-				candidate.ensure_consistency_updated(context);
-				if !candidate.is_fully_feasible(context) {
+				evaluator.changed_voyage_cost(view, vessel_a, &timing, context)
+					- evaluator.voyage_cost(origin_voyage_a)
+			} else {
+				let timing_b = cache.timing(voyage_b, Some(visit_b_id), Some(visit_a_id), context);
+				let end_b = timing_b.end_time;
+				let cost_b = evaluator.changed_voyage_cost(view, vessel_b, timing_b, context);
+				let timing_a = cache.timing(voyage_a, Some(visit_a_id), Some(visit_b_id), context);
+				let end_a = timing_a.end_time;
+				let cost_a = evaluator.changed_voyage_cost(view, vessel_a, timing_a, context);
+				if evaluator.overlaps(&[
+					(origin_voyage_a, vessel_a, Some(end_a)),
+					(origin_voyage_b, vessel_b, Some(end_b)),
+				]) {
 					continue;
 				}
-
-				let candidate_cost = candidate.cost_with_context(context);
-				let delta = candidate_cost - current_cost;
-				if delta < -f64::EPSILON
-					&& best_move
-						.as_ref()
-						.map(|(_, _, _, _, best_delta)| delta < *best_delta)
-						.unwrap_or(true)
-				{
-					best_move = Some((visit_a_id, origin_voyage_a, visit_b_id, origin_voyage_b, delta));
-				}
+				cost_a + cost_b
+					- evaluator.voyage_cost(origin_voyage_a)
+					- evaluator.voyage_cost(origin_voyage_b)
+			};
+			if delta < -f64::EPSILON {
+				moves.push((
+					visit_a_id,
+					origin_voyage_a,
+					visit_b_id,
+					origin_voyage_b,
+					delta,
+				));
 			}
 		}
+	}
 
-		best_move
+	/// Applies a swap and checks the full feasibility of the result.
+	fn apply_swap(
+		solution: &mut Solution,
+		context: &Context,
+		visit_a: usize,
+		origin_voyage_a: usize,
+		visit_b: usize,
+		origin_voyage_b: usize,
+	) -> bool {
+		solution.unassign_visits(&[visit_a, visit_b]);
+		solution.ensure_schedule_is_updated();
+		if !solution.visit_insertion_is_possible(context, visit_a, origin_voyage_b)
+			|| !solution.visit_insertion_is_possible(context, visit_b, origin_voyage_a)
+		{
+			debug!(
+				target: "operator::improvement",
+				"[DeepSwap] Swap feasibility check failed for visits {} and {}",
+				visit_a,
+				visit_b
+			);
+			return false;
+		}
+		if let Err(err) = solution.greedy_insert_visit(visit_a, origin_voyage_b, context) {
+			debug!(
+				target: "operator::improvement",
+				"[DeepSwap] Failed to insert visit {} into voyage {}: {}",
+				visit_a,
+				origin_voyage_b,
+				err
+			);
+			return false;
+		}
+		if let Err(err) = solution.greedy_insert_visit(visit_b, origin_voyage_a, context) {
+			debug!(
+				target: "operator::improvement",
+				"[DeepSwap] Failed to insert visit {} into voyage {}: {}",
+				visit_b,
+				origin_voyage_a,
+				err
+			);
+			return false;
+		}
+		solution.ensure_consistency_updated(context);
+		solution.is_fully_feasible(context)
 	}
 }
 
@@ -86,14 +229,12 @@ impl ImprovementOperator for DeepSwap {
 	fn apply(&self, solution: &mut Solution, context: &Context, _rng: &mut dyn RngCore) {
 		info!(target: "operator::improvement", "[DeepSwap] Invoked");
 		solution.ensure_consistency_updated(context);
-		let original_solution = solution.clone();
-		let mut original_feasibility_probe = original_solution.clone();
-		let original_was_feasible = original_feasibility_probe.is_fully_feasible(context);
+		let original_was_feasible = solution.is_fully_feasible(context);
+		// Changes of the whole operator call are reverted if it ends up infeasible
+		solution.begin_transaction();
 
+		let mut cache = RouteCache::new();
 		loop {
-			// Save state before attempting move to enable clean rollback
-			let iteration_start_solution = solution.clone();
-			
 			let baseline_cost = solution.cost_with_context(context);
 			debug!(
 				target: "operator::improvement",
@@ -101,14 +242,44 @@ impl ImprovementOperator for DeepSwap {
 				baseline_cost
 			);
 
-			let best_move = Self::find_best_swap(solution, context);
-			let Some((visit_a, origin_voyage_a, visit_b, origin_voyage_b, delta)) = best_move else {
+			// Take the best move that passes the full feasibility check
+			let mut applied_move = None;
+			for &(visit_a, origin_voyage_a, visit_b, origin_voyage_b, delta) in
+				&self.find_improving_swaps(solution, context, &mut cache)
+			{
+				// Open a nested transaction for the move to enable clean rollback
+				solution.begin_transaction();
+				if Self::apply_swap(
+					solution,
+					context,
+					visit_a,
+					origin_voyage_a,
+					visit_b,
+					origin_voyage_b,
+				) {
+					solution.commit_transaction();
+					applied_move =
+						Some((visit_a, origin_voyage_a, visit_b, origin_voyage_b, delta));
+					break;
+				}
+				debug!(
+					target: "operator::improvement",
+					"[DeepSwap] Swap of visits {} and {} is infeasible; restoring iteration state",
+					visit_a,
+					visit_b
+				);
+				solution.rollback_transaction();
+			}
+			let Some((visit_a, origin_voyage_a, visit_b, origin_voyage_b, delta)) = applied_move
+			else {
 				info!(
 					target: "operator::improvement",
 					"[DeepSwap] No improving swap found"
 				);
 				break;
 			};
+			cache.invalidate(origin_voyage_a);
+			cache.invalidate(origin_voyage_b);
 
 			info!(
 				target: "operator::improvement",
@@ -119,45 +290,6 @@ impl ImprovementOperator for DeepSwap {
 				origin_voyage_b,
 				delta
 			);
-
-			solution.unassign_visits(&[visit_a, visit_b]);
-			solution.ensure_schedule_is_updated();
-			if !solution.visit_insertion_is_possible(context, visit_a, origin_voyage_b)
-				|| !solution.visit_insertion_is_possible(context, visit_b, origin_voyage_a)
-			{
-				debug!(
-					target: "operator::improvement",
-					"[DeepSwap] Swap feasibility check failed for visits {} and {}; restoring iteration state",
-					visit_a,
-					visit_b
-				);
-				*solution = iteration_start_solution;
-				break;
-			}
-			if let Err(err) = solution.greedy_insert_visit(visit_a, origin_voyage_b, context) {
-				debug!(
-					target: "operator::improvement",
-					"[DeepSwap] Failed to insert visit {} into voyage {}: {}; restoring iteration state",
-					visit_a,
-					origin_voyage_b,
-					err
-				);
-				*solution = iteration_start_solution;
-				break;
-			}
-			if let Err(err) = solution.greedy_insert_visit(visit_b, origin_voyage_a, context) {
-				debug!(
-					target: "operator::improvement",
-					"[DeepSwap] Failed to insert visit {} into voyage {}: {}; restoring iteration state",
-					visit_b,
-					origin_voyage_a,
-					err
-				);
-				*solution = iteration_start_solution;
-				break;
-			}
-
-			solution.ensure_consistency_updated(context);
 			let updated_cost = solution.cost_with_context(context);
 			debug!(
 				target: "operator::improvement",
@@ -165,6 +297,13 @@ impl ImprovementOperator for DeepSwap {
 				updated_cost
 			);
 		}
+		let (cache_hits, cache_misses) = cache.stats();
+		debug!(
+			target: "operator::improvement",
+			"[DeepSwap] Route cache: {} hits, {} misses",
+			cache_hits,
+			cache_misses
+		);
 
 		solution.ensure_consistency_updated(context);
 		if !solution.is_fully_feasible(context) {
@@ -179,17 +318,17 @@ impl ImprovementOperator for DeepSwap {
 					"[DeepSwap] Candidate remained infeasible (input already infeasible); reverting"
 				);
 			}
-			*solution = original_solution;
+			solution.rollback_transaction();
 			solution.ensure_consistency_updated(context);
 
-			let mut reverted_solution = solution.clone();
-			if original_was_feasible && !reverted_solution.is_fully_feasible(context) {
+			if original_was_feasible && !solution.is_fully_feasible(context) {
 				error!(
 					target: "operator::improvement",
 					"[DeepSwap] Revert failed: restored solution is still infeasible"
 				);
 			}
+		} else {
+			solution.commit_transaction();
 		}
 	}
 }
-
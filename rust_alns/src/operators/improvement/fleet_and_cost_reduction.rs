@@ -1,7 +1,9 @@
 use crate::operators::repair::k_regret_insertion::KRegretInsertion;
 use crate::operators::traits::{ImprovementOperator, RepairOperator};
 use crate::structs::constants::HOURS_IN_PERIOD;
-use crate::structs::{context::Context, solution::Solution};
+use crate::structs::context::Context;
+use crate::structs::solution::{Solution, SolutionView};
+use crate::utils::parallel;
 use crate::utils::serialization::dump_schedule_to_json;
 use log::{info, warn};
 use rand::RngCore;
@@ -90,30 +92,17 @@ impl ImprovementOperator for FleetAndCostReduction {
         );
         let describe_voyage = |sol: &Solution, voyage_id: usize| -> String {
             let schedule = &sol.schedule;
-            let start = schedule
-                .voyage_start_times
-                .get(&voyage_id)
-                .copied()
-                .unwrap_or(f64::NAN);
-            let end = schedule
-                .voyage_end_times
-                .get(&voyage_id)
-                .copied()
-                .unwrap_or(f64::NAN);
+            let start = schedule.voyage_start_time(voyage_id).unwrap_or(f64::NAN);
+            let end = schedule.voyage_end_time(voyage_id).unwrap_or(f64::NAN);
             let visits = sol
-                .voyages
-                .iter()
-                .find_map(|cell| {
+                .voyage_by_id(voyage_id)
+                .map(|cell| {
                     let voyage = cell.borrow();
-                    if voyage.id == voyage_id {
-                        Some((
-                            voyage.vessel_id,
-                            voyage.departure_day,
-                            voyage.visit_ids.clone(),
-                        ))
-                    } else {
-                        None
-                    }
+                    (
+                        voyage.vessel_id,
+                        voyage.departure_day,
+                        voyage.visit_ids.clone(),
+                    )
                 })
                 .unwrap_or((None, None, Vec::new()));
             let installation_ids: Vec<usize> = visits
@@ -126,23 +115,6 @@ impl ImprovementOperator for FleetAndCostReduction {
                 voyage_id, visits.0, visits.1, installation_ids, visits.2, start, end
             )
         };
-        struct OverlapInfo {
-            target_voyage_id: usize,
-            target_start: f64,
-            target_end: f64,
-            target_is_empty: bool,
-            overlap_hours: f64,
-        }
-        struct OverlapRecord {
-            origin_vessel_id: usize,
-            target_vessel_id: usize,
-            voyage_id: usize,
-            voyage_start: f64,
-            voyage_end: f64,
-            voyage_is_empty: bool,
-            overlaps: Vec<OverlapInfo>,
-            total_overlap_hours: f64,
-        }
         let mut iteration = 0usize;
         loop {
             iteration += 1;
@@ -153,10 +125,9 @@ impl ImprovementOperator for FleetAndCostReduction {
             for vessel_id in 0..context.problem.vessels.len() {
                 let assigned_voyages = solution.schedule.get_all_voyages_for_vessel(vessel_id);
                 if assigned_voyages.iter().any(|voyage_id| {
-                    solution.voyages.iter().any(|cell| {
-                        let v = cell.borrow();
-                        v.id == *voyage_id && !v.visit_ids.is_empty()
-                    })
+                    solution
+                        .voyage_by_id(*voyage_id)
+                        .map_or(false, |cell| !cell.borrow().visit_ids.is_empty())
                 }) {
                     used_vessels.push((vessel_id, assigned_voyages));
                 }
@@ -165,96 +136,50 @@ impl ImprovementOperator for FleetAndCostReduction {
             let mut overlap_records: Vec<OverlapRecord> = Vec::new();
             let mut least_overlap_targets: Vec<(usize, Option<(usize, f64)>)> = Vec::new();
             let mut origin_least_overlap_totals: Vec<(usize, f64)> = Vec::new();
+            // The voyages of all used vessels are scanned in parallel and reduced in order
+            let origins: Vec<(usize, usize)> = used_vessels
+                .iter()
+                .flat_map(|(vessel_id, voyages)| {
+                    voyages
+                        .iter()
+                        .map(move |voyage_id| (*vessel_id, *voyage_id))
+                })
+                .collect();
+            let mut scans = solution
+                .with_view(|view| {
+                    parallel::map_chunks(&origins, context.num_threads(), |chunk| {
+                        chunk
+                            .iter()
+                            .map(|&(origin_vessel_id, voyage_id)| {
+                                scan_voyage_overlaps(
+                                    view,
+                                    &used_vessels,
+                                    origin_vessel_id,
+                                    voyage_id,
+                                )
+                            })
+                            .collect::<Vec<_>>()
+                    })
+                })
+                .into_iter()
+                .flatten();
             for (origin_vessel_id, origin_voyages) in &used_vessels {
                 let mut vessel_min_overlap_sum = 0.0;
                 for voyage_id in origin_voyages {
-                    let Some(&voyage_start) = solution.schedule.voyage_start_times.get(voyage_id)
-                    else {
+                    let Some(scan) = scans.next().flatten() else {
                         continue;
                     };
-                    let Some(&voyage_end) = solution.schedule.voyage_end_times.get(voyage_id)
-                    else {
-                        continue;
-                    };
-                    let voyage_is_empty = solution.is_empty_voyage_by_id(*voyage_id);
                     info!(
                         "fleet_and_cost_reduction iteration {}: origin vessel {} considering {}",
                         iteration,
                         origin_vessel_id,
                         describe_voyage(solution, *voyage_id)
                     );
-                    let mut best_target: Option<(usize, f64)> = None;
-                    for (target_vessel_id, target_voyages) in &used_vessels {
-                        if target_vessel_id == origin_vessel_id {
-                            continue;
-                        }
-                        let mut overlaps = Vec::new();
-                        let mut total_overlap_hours = 0.0;
-                        for other_voyage_id in target_voyages {
-                            if other_voyage_id == voyage_id {
-                                continue;
-                            }
-                            let Some(&other_start) =
-                                solution.schedule.voyage_start_times.get(other_voyage_id)
-                            else {
-                                continue;
-                            };
-                            let Some(&other_end) =
-                                solution.schedule.voyage_end_times.get(other_voyage_id)
-                            else {
-                                continue;
-                            };
-                            let overlap_hours = cyclic_overlap_duration(
-                                voyage_start,
-                                voyage_end,
-                                other_start,
-                                other_end,
-                                HOURS_IN_PERIOD as f64,
-                            );
-                            if overlap_hours > f64::EPSILON {
-                                let target_is_empty =
-                                    solution.is_empty_voyage_by_id(*other_voyage_id);
-                                total_overlap_hours += overlap_hours;
-                                overlaps.push(OverlapInfo {
-                                    target_voyage_id: *other_voyage_id,
-                                    target_start: other_start,
-                                    target_end: other_end,
-                                    target_is_empty,
-                                    overlap_hours,
-                                });
-                            }
-                        }
-                        let candidate_target_id = *target_vessel_id;
-                        let candidate_overlap = total_overlap_hours;
-                        let should_replace = match &best_target {
-                            None => true,
-                            Some((best_id, best_overlap)) => {
-                                if candidate_overlap + f64::EPSILON < *best_overlap {
-                                    true
-                                } else {
-                                    let overlap_diff = (candidate_overlap - *best_overlap).abs();
-                                    overlap_diff <= f64::EPSILON && candidate_target_id < *best_id
-                                }
-                            }
-                        };
-                        if should_replace {
-                            best_target = Some((candidate_target_id, candidate_overlap));
-                        }
-                        overlap_records.push(OverlapRecord {
-                            origin_vessel_id: *origin_vessel_id,
-                            target_vessel_id: *target_vessel_id,
-                            voyage_id: *voyage_id,
-                            voyage_start,
-                            voyage_end,
-                            voyage_is_empty,
-                            overlaps,
-                            total_overlap_hours,
-                        });
-                    }
-                    if let Some((_, overlap)) = best_target {
+                    if let Some((_, overlap)) = scan.best_target {
                         vessel_min_overlap_sum += overlap;
                     }
-                    least_overlap_targets.push((*voyage_id, best_target));
+                    least_overlap_targets.push((*voyage_id, scan.best_target));
+                    overlap_records.extend(scan.records);
                 }
                 origin_least_overlap_totals.push((*origin_vessel_id, vessel_min_overlap_sum));
             }
@@ -301,7 +226,8 @@ impl ImprovementOperator for FleetAndCostReduction {
                         }
                         continue;
                     };
-                    let mut candidate_solution = solution.clone();
+                    // The reassignment is applied in place and rolled back unless it reduces the cost
+                    solution.begin_transaction();
                     let mut reassignment_failed = false;
                     info!(
 						"fleet_and_cost_reduction iteration {}: attempting reassignment of vessel {} to {} candidates",
@@ -326,57 +252,29 @@ impl ImprovementOperator for FleetAndCostReduction {
                             reassignment_failed = true;
                             break;
                         };
-                        let Some(voyage_index) = candidate_solution
-                            .voyages
-                            .iter()
-                            .position(|cell| cell.borrow().id == voyage_id)
+                        let Ok(mut displaced_voyage) =
+                            solution.reassign_voyage_vessel(voyage_id, target_vessel_id)
                         else {
                             reassignment_failed = true;
                             break;
                         };
-                        let (previous_vessel, departure_day) = {
-                            let mut voyage = candidate_solution.voyages[voyage_index].borrow_mut();
-                            let prev_vessel = voyage.vessel_id;
-                            let dep_day = voyage.departure_day;
-                            voyage.vessel_id = Some(target_vessel_id);
-                            (prev_vessel, dep_day)
-                        };
-                        let mut displaced_voyage: Option<usize> = None;
-                        if let Some(day) = departure_day {
-                            if let Some(old_vessel) = previous_vessel {
-                                candidate_solution
-                                    .schedule
-                                    .vessel_day_voyages
-                                    .remove(&(old_vessel, day));
+                        let mut start_time = match solution.schedule.voyage_start_time(voyage_id) {
+                            Some(value) => value,
+                            None => {
+                                reassignment_failed = true;
+                                break;
                             }
-                            displaced_voyage = candidate_solution
-                                .schedule
-                                .vessel_day_voyages
-                                .insert((target_vessel_id, day), voyage_id);
-                        }
-                        candidate_solution.schedule.set_need_update(true);
-                        let mut start_time = match candidate_solution
-                            .schedule
-                            .voyage_start_times
-                            .get(&voyage_id)
-                        {
-                            Some(value) => *value,
+                        };
+                        let mut end_time = match solution.schedule.voyage_end_time(voyage_id) {
+                            Some(value) => value,
                             None => {
                                 reassignment_failed = true;
                                 break;
                             }
                         };
-                        let mut end_time =
-                            match candidate_solution.schedule.voyage_end_times.get(&voyage_id) {
-                                Some(value) => *value,
-                                None => {
-                                    reassignment_failed = true;
-                                    break;
-                                }
-                            };
                         if target_overlap > f64::EPSILON {
                             let origin_voyage_after =
-                                describe_voyage(&candidate_solution, voyage_id);
+                                describe_voyage(solution, voyage_id);
                             info!(
                                 "fleet_and_cost_reduction iteration {}: origin {} reassigns to {} and overlaps with target vessel {} (overlap {:.2}h)",
                                 iteration,
@@ -387,27 +285,21 @@ impl ImprovementOperator for FleetAndCostReduction {
                             );
                             loop {
                                 let mut has_overlap =
-                                    candidate_solution.schedule.overlaps_with_other_voyages(
+                                    solution.schedule.overlaps_with_other_voyages(
                                         target_vessel_id,
                                         voyage_id,
                                         start_time,
                                         end_time,
-                                        Some(|id| candidate_solution.is_empty_voyage_by_id(id)),
+                                        Some(|id| solution.is_empty_voyage_by_id(id)),
                                     );
                                 if !has_overlap {
                                     if let Some(displaced) = displaced_voyage {
                                         if displaced != voyage_id
-                                            && !candidate_solution.is_empty_voyage_by_id(displaced)
+                                            && !solution.is_empty_voyage_by_id(displaced)
                                         {
-                                            if let (Some(&other_start), Some(&other_end)) = (
-                                                candidate_solution
-                                                    .schedule
-                                                    .voyage_start_times
-                                                    .get(&displaced),
-                                                candidate_solution
-                                                    .schedule
-                                                    .voyage_end_times
-                                                    .get(&displaced),
+                                            if let (Some(other_start), Some(other_end)) = (
+                                                solution.schedule.voyage_start_time(displaced),
+                                                solution.schedule.voyage_end_time(displaced),
                                             ) {
                                                 if cyclic_overlap_duration(
                                                     start_time,
@@ -426,21 +318,15 @@ impl ImprovementOperator for FleetAndCostReduction {
                                 if !has_overlap {
                                     break;
                                 }
-                                let mut overlapping_voyages: Vec<usize> = candidate_solution
+                                let mut overlapping_voyages: Vec<usize> = solution
                                     .schedule
                                     .get_all_voyages_for_vessel(target_vessel_id)
                                     .into_iter()
                                     .filter(|other_id| *other_id != voyage_id)
                                     .filter(|other_id| {
-                                        if let (Some(&other_start), Some(&other_end)) = (
-                                            candidate_solution
-                                                .schedule
-                                                .voyage_start_times
-                                                .get(other_id),
-                                            candidate_solution
-                                                .schedule
-                                                .voyage_end_times
-                                                .get(other_id),
+                                        if let (Some(other_start), Some(other_end)) = (
+                                            solution.schedule.voyage_start_time(*other_id),
+                                            solution.schedule.voyage_end_time(*other_id),
                                         ) {
                                             cyclic_overlap_duration(
                                                 start_time,
@@ -456,17 +342,11 @@ impl ImprovementOperator for FleetAndCostReduction {
                                     .collect();
                                 if let Some(displaced) = displaced_voyage {
                                     if displaced != voyage_id
-                                        && !candidate_solution.is_empty_voyage_by_id(displaced)
+                                        && !solution.is_empty_voyage_by_id(displaced)
                                     {
-                                        if let (Some(&other_start), Some(&other_end)) = (
-                                            candidate_solution
-                                                .schedule
-                                                .voyage_start_times
-                                                .get(&displaced),
-                                            candidate_solution
-                                                .schedule
-                                                .voyage_end_times
-                                                .get(&displaced),
+                                        if let (Some(other_start), Some(other_end)) = (
+                                            solution.schedule.voyage_start_time(displaced),
+                                            solution.schedule.voyage_end_time(displaced),
                                         ) {
                                             if cyclic_overlap_duration(
                                                 start_time,
@@ -494,27 +374,27 @@ impl ImprovementOperator for FleetAndCostReduction {
                                 }
                                 let overlaps_are_empty = overlapping_voyages
                                     .iter()
-                                    .all(|id| candidate_solution.is_empty_voyage_by_id(*id));
+                                    .all(|id| solution.is_empty_voyage_by_id(*id));
                                 let overlapping_targets: Vec<String> = overlapping_voyages
                                     .iter()
-                                    .map(|id| describe_voyage(&candidate_solution, *id))
+                                    .map(|id| describe_voyage(solution, *id))
                                     .collect();
                                 let origin_voyage_current =
-                                    describe_voyage(&candidate_solution, voyage_id);
+                                    describe_voyage(solution, voyage_id);
                                 for other_id in &overlapping_voyages {
                                     info!(
                                         "fleet_and_cost_reduction iteration {}: overlap between origin {} (was {}) and target {}",
                                         iteration,
                                         origin_voyage_current,
                                         origin_voyage_before,
-                                        describe_voyage(&candidate_solution, *other_id)
+                                        describe_voyage(solution, *other_id)
                                     );
                                 }
                                 let mut start_candidates: Vec<(usize, f64)> = Vec::new();
                                 start_candidates.push((voyage_id, start_time));
                                 for other_id in &overlapping_voyages {
-                                    if let Some(&other_start) =
-                                        candidate_solution.schedule.voyage_start_times.get(other_id)
+                                    if let Some(other_start) =
+                                        solution.schedule.voyage_start_time(*other_id)
                                     {
                                         start_candidates.push((*other_id, other_start));
                                     }
@@ -551,11 +431,7 @@ impl ImprovementOperator for FleetAndCostReduction {
                                     displaced_voyage = None;
                                 }
                                 let mut visits_to_remove = Vec::new();
-                                if let Some(cell) = candidate_solution
-                                    .voyages
-                                    .iter()
-                                    .find(|cell| cell.borrow().id == removal_target)
-                                {
+                                if let Some(cell) = solution.voyage_by_id(removal_target) {
                                     let voyage = cell.borrow();
                                     visits_to_remove.extend(voyage.visit_ids.iter().copied());
                                 }
@@ -575,7 +451,7 @@ impl ImprovementOperator for FleetAndCostReduction {
                                 let mut installation_ids_to_remove: Vec<usize> = visits_to_remove
                                     .iter()
                                     .filter_map(|visit_id| {
-                                        candidate_solution
+                                        solution
                                             .visit(*visit_id)
                                             .map(|visit| visit.installation_id())
                                     })
@@ -589,7 +465,7 @@ impl ImprovementOperator for FleetAndCostReduction {
                                     installation_ids_to_remove
                                 );
                                 for visit in &visits_to_remove {
-                                    let installation = candidate_solution
+                                    let installation = solution
                                         .visit(*visit)
                                         .map(|v| v.installation_id());
                                     info!(
@@ -602,26 +478,18 @@ impl ImprovementOperator for FleetAndCostReduction {
                                 for visit in &visits_to_remove {
                                     removed_visit_ids.insert(*visit);
                                 }
-                                candidate_solution.unassign_visits(&visits_to_remove);
-                                candidate_solution.schedule.set_need_update(true);
-                                candidate_solution.ensure_consistency_updated(context);
-                                if candidate_solution
-                                    .schedule
-                                    .voyage_start_times
-                                    .get(&voyage_id)
-                                    .is_none()
-                                {
+                                solution.unassign_visits(&visits_to_remove);
+                                solution.schedule.set_need_update(true);
+                                solution.ensure_consistency_updated(context);
+                                if solution.schedule.voyage_start_time(voyage_id).is_none() {
                                     break;
                                 }
-                                if candidate_solution.is_empty_voyage_by_id(voyage_id) {
+                                if solution.is_empty_voyage_by_id(voyage_id) {
                                     break;
                                 }
-                                if let (Some(&updated_start), Some(&updated_end)) = (
-                                    candidate_solution
-                                        .schedule
-                                        .voyage_start_times
-                                        .get(&voyage_id),
-                                    candidate_solution.schedule.voyage_end_times.get(&voyage_id),
+                                if let (Some(updated_start), Some(updated_end)) = (
+                                    solution.schedule.voyage_start_time(voyage_id),
+                                    solution.schedule.voyage_end_time(voyage_id),
                                 ) {
                                     start_time = updated_start;
                                     end_time = updated_end;
@@ -645,20 +513,21 @@ impl ImprovementOperator for FleetAndCostReduction {
 								iteration,
 								removed_visit_ids.len()
 							);
-                            candidate_solution.add_idle_vessel_and_add_empty_voyages(context);
+                            solution.add_idle_vessel_and_add_empty_voyages(context);
                             let repair_operator = KRegretInsertion { k: 2 };
-                            repair_operator.apply(&mut candidate_solution, context, rng);
-                            if !candidate_solution.get_unassigned_visits().is_empty() {
+                            repair_operator.apply(solution, context, rng);
+                            if !solution.get_unassigned_visits().is_empty() {
                                 warn!(
 									"fleet_and_cost_reduction iteration {}: repair failed, {} visit(s) remain unassigned",
 									iteration,
-									candidate_solution.get_unassigned_visits().len()
+									solution.get_unassigned_visits().len()
 								);
                                 reassignment_failed = true;
                             }
                         }
                     }
                     if reassignment_failed {
+                        solution.rollback_transaction();
                         info!(
                             "fleet_and_cost_reduction iteration {}: reassignment aborted",
                             iteration
@@ -668,8 +537,8 @@ impl ImprovementOperator for FleetAndCostReduction {
                         }
                         break;
                     }
-                    candidate_solution.ensure_consistency_updated(context);
-                    let candidate_cost = candidate_solution.cost_with_context(context);
+                    solution.ensure_consistency_updated(context);
+                    let candidate_cost = solution.cost_with_context(context);
                     if candidate_cost + f64::EPSILON < previous_cost {
                         info!(
 							"fleet_and_cost_reduction iteration {}: improvement accepted {:.2} -> {:.2}",
@@ -677,13 +546,14 @@ impl ImprovementOperator for FleetAndCostReduction {
 							previous_cost,
 							candidate_cost
 						);
+                        solution.commit_transaction();
                         if let Some(writer) = &debug_writer {
-                            writer.capture(iteration, "after", &candidate_solution, context);
+                            writer.capture(iteration, "after", solution, context);
                         }
-                        *solution = candidate_solution;
                         previous_cost = candidate_cost;
                         continue;
                     }
+                    solution.rollback_transaction();
                     info!(
 						"fleet_and_cost_reduction iteration {}: move rejected (candidate cost {:.2})",
 						iteration,
@@ -722,6 +592,112 @@ impl ImprovementOperator for FleetAndCostReduction {
     }
 }
 
+struct OverlapInfo {
+    target_voyage_id: usize,
+    target_start: f64,
+    target_end: f64,
+    target_is_empty: bool,
+    overlap_hours: f64,
+}
+
+struct OverlapRecord {
+    origin_vessel_id: usize,
+    target_vessel_id: usize,
+    voyage_id: usize,
+    voyage_start: f64,
+    voyage_end: f64,
+    voyage_is_empty: bool,
+    overlaps: Vec<OverlapInfo>,
+    total_overlap_hours: f64,
+}
+
+/// Overlaps of a voyage with the voyages of every other used vessel.
+struct VoyageOverlapScan {
+    records: Vec<OverlapRecord>,
+    /// Vessel with the least total overlap and that overlap, ties go to the lowest vessel id
+    best_target: Option<(usize, f64)>,
+}
+
+/// Scans the overlaps of a voyage of the origin vessel, `None` if the voyage is not scheduled.
+fn scan_voyage_overlaps(
+    view: &SolutionView,
+    used_vessels: &[(usize, Vec<usize>)],
+    origin_vessel_id: usize,
+    voyage_id: usize,
+) -> Option<VoyageOverlapScan> {
+    let voyage_start = view.schedule.voyage_start_time(voyage_id)?;
+    let voyage_end = view.schedule.voyage_end_time(voyage_id)?;
+    let voyage_is_empty = view.is_empty_voyage_by_id(voyage_id);
+    let mut records = Vec::new();
+    let mut best_target: Option<(usize, f64)> = None;
+    for (target_vessel_id, target_voyages) in used_vessels {
+        if *target_vessel_id == origin_vessel_id {
+            continue;
+        }
+        let mut overlaps = Vec::new();
+        let mut total_overlap_hours = 0.0;
+        for other_voyage_id in target_voyages {
+            if *other_voyage_id == voyage_id {
+                continue;
+            }
+            let Some(other_start) = view.schedule.voyage_start_time(*other_voyage_id) else {
+                continue;
+            };
+            let Some(other_end) = view.schedule.voyage_end_time(*other_voyage_id) else {
+                continue;
+            };
+            let overlap_hours = cyclic_overlap_duration(
+                voyage_start,
+                voyage_end,
+                other_start,
+                other_end,
+                HOURS_IN_PERIOD as f64,
+            );
+            if overlap_hours > f64::EPSILON {
+                let target_is_empty = view.is_empty_voyage_by_id(*other_voyage_id);
+                total_overlap_hours += overlap_hours;
+                overlaps.push(OverlapInfo {
+                    target_voyage_id: *other_voyage_id,
+                    target_start: other_start,
+                    target_end: other_end,
+                    target_is_empty,
+                    overlap_hours,
+                });
+            }
+        }
+        let candidate_target_id = *target_vessel_id;
+        let candidate_overlap = total_overlap_hours;
+        let should_replace = match &best_target {
+            None => true,
+            Some((best_id, best_overlap)) => {
+                if candidate_overlap + f64::EPSILON < *best_overlap {
+                    true
+                } else {
+                    let overlap_diff = (candidate_overlap - *best_overlap).abs();
+                    overlap_diff <= f64::EPSILON && candidate_target_id < *best_id
+                }
+            }
+        };
+        if should_replace {
+            best_target = Some((candidate_target_id, candidate_overlap));
+        }
+        records.push(OverlapRecord {
+            origin_vessel_id,
+            target_vessel_id: *target_vessel_id,
+            voyage_id,
+            voyage_start,
+            voyage_end,
+            voyage_is_empty,
+            overlaps,
+            total_overlap_hours,
+        });
+    }
+    Some(VoyageOverlapScan {
+        records,
+        best_target,
+    })
+}
+
 fn cyclic_overlap_duration(
     start1: f64,
     mut end1: f64,
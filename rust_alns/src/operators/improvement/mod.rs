@@ -1,4 +1,5 @@
 pub mod deep_relocation;
 pub mod deep_swap;
 pub mod fleet_and_cost_reduction;
+pub mod move_evaluation;
 pub mod voyage_number_reduction;
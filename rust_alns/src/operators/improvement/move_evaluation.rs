@@ -0,0 +1,336 @@
+use crate::structs::constants::HOURS_IN_PERIOD;
+use crate::structs::{context::Context, solution::SolutionView, voyage::Voyage};
+use crate::utils::tsp_solver::TSPResult;
+use crate::utils::utils::cyclic_intervals_overlap;
+use std::collections::HashMap;
+
+/// Route and timing of a voyage after a move, before it is applied to the solution.
+#[derive(Debug, Clone)]
+pub struct VoyageTiming {
+    pub visit_ids: Vec<usize>,
+    pub sailing_time: f64,
+    pub waiting_time: f64,
+    pub end_time: f64,
+}
+
+impl VoyageTiming {
+    pub fn is_empty(&self) -> bool {
+        self.visit_ids.is_empty()
+    }
+}
+
+impl From<TSPResult> for VoyageTiming {
+    fn from(result: TSPResult) -> Self {
+        Self {
+            visit_ids: result.visit_ids_seq,
+            sailing_time: result.sailing_time,
+            waiting_time: result.waiting_time,
+            end_time: result.end_time,
+        }
+    }
+}
+
+/// Evaluates a voyage with the `removed` visits taken out and the `inserted` visits greedily inserted one by one.
+///
+/// Mirrors what `Solution::unassign_visits`, `Solution::greedy_insert_visit` and
+/// `Solution::ensure_consistency_updated` do to the voyage: without insertions the remaining visits keep
+/// their order and only the timing is recalculated.
+pub fn evaluate_voyage_change(
+    voyage: &Voyage,
+    removed: &[usize],
+    inserted: &[usize],
+    context: &Context,
+) -> VoyageTiming {
+    let mut changed = voyage.clone();
+    changed.visit_ids.retain(|id| !removed.contains(id));
+    if inserted.is_empty() {
+        if changed.visit_ids.is_empty() {
+            // The voyage is dropped from the solution
+            return VoyageTiming {
+                visit_ids: Vec::new(),
+                sailing_time: 0.0,
+                waiting_time: 0.0,
+                end_time: 0.0,
+            };
+        }
+        changed.update_details(&context.tsp_solver);
+        return VoyageTiming {
+            visit_ids: changed.visit_ids,
+            sailing_time: changed.sailing_time.unwrap_or(0.0),
+            waiting_time: changed.waiting_time.unwrap_or(0.0),
+            end_time: changed.end_time_at_base.unwrap_or(0.0),
+        };
+    }
+    let mut result = None;
+    for &visit_id in inserted {
+        let tsp_result = context.evaluate_greedy_insertion(&changed, visit_id);
+        changed.visit_ids = tsp_result.visit_ids_seq.clone();
+        result = Some(tsp_result);
+    }
+    result.map(VoyageTiming::from).unwrap()
+}
+
+/// Voyage timings after moves of single visits, kept between the iterations of an operator call.
+///
+/// Entries are keyed by voyage id and (removed visit, inserted visit). They stay valid until the voyage
+/// itself is changed, which has to be reported with `invalidate`.
+#[derive(Debug, Default)]
+pub struct RouteCache {
+    voyages: HashMap<usize, HashMap<(Option<usize>, Option<usize>), VoyageTiming>>,
+    hits: usize,
+    misses: usize,
+}
+
+impl RouteCache {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Timing of `voyage` with `removed` taken out and `inserted` put in at its cheapest position.
+    pub fn timing(
+        &mut self,
+        voyage: &Voyage,
+        removed: Option<usize>,
+        inserted: Option<usize>,
+        context: &Context,
+    ) -> &VoyageTiming {
+        let entries = self.voyages.entry(voyage.id).or_default();
+        if entries.contains_key(&(removed, inserted)) {
+            self.hits += 1;
+        } else {
+            self.misses += 1;
+        }
+        entries.entry((removed, inserted)).or_insert_with(|| {
+            evaluate_voyage_change(voyage, removed.as_slice(), inserted.as_slice(), context)
+        })
+    }
+
+    /// Adds the entries and statistics collected by a worker, see `WorkerRouteCache`.
+    pub fn merge(&mut self, other: RouteCache) {
+        for (voyage_id, entries) in other.voyages {
+            self.voyages.entry(voyage_id).or_default().extend(entries);
+        }
+        self.hits += other.hits;
+        self.misses += other.misses;
+    }
+
+    /// Drops the entries of a voyage changed by an applied move.
+    pub fn invalidate(&mut self, voyage_id: usize) {
+        self.voyages.remove(&voyage_id);
+    }
+
+    /// Number of cache hits and misses.
+    pub fn stats(&self) -> (usize, usize) {
+        (self.hits, self.misses)
+    }
+}
+
+/// Route cache of a thread evaluating a share of the candidate moves.
+///
+/// Reads the cache shared by all threads and keeps its own misses, which are merged into the shared
+/// cache with `RouteCache::merge` once the threads are joined.
+pub struct WorkerRouteCache<'a> {
+    shared: &'a RouteCache,
+    local: RouteCache,
+}
+
+impl<'a> WorkerRouteCache<'a> {
+    pub fn new(shared: &'a RouteCache) -> Self {
+        Self {
+            shared,
+            local: RouteCache::new(),
+        }
+    }
+
+    /// See `RouteCache::timing`.
+    pub fn timing(
+        &mut self,
+        voyage: &Voyage,
+        removed: Option<usize>,
+        inserted: Option<usize>,
+        context: &Context,
+    ) -> &VoyageTiming {
+        let shared = self.shared;
+        if let Some(timing) = shared
+            .voyages
+            .get(&voyage.id)
+            .and_then(|entries| entries.get(&(removed, inserted)))
+        {
+            self.local.hits += 1;
+            return timing;
+        }
+        self.local.timing(voyage, removed, inserted, context)
+    }
+
+    /// Entries computed by this worker.
+    pub fn into_local(self) -> RouteCache {
+        self.local
+    }
+}
+
+/// Vessel timetables and voyage costs of a consistent solution.
+///
+/// Used to evaluate moves changing a few voyages: cost deltas and vessel overlaps are checked for the
+/// changed voyages only. Constraints not touched by the move are not checked, so a chosen move still has
+/// to pass `Solution::is_fully_feasible`.
+pub struct MoveEvaluator {
+    /// voyage id → fuel cost of the voyage
+    voyage_costs: HashMap<usize, f64>,
+    /// vessel id → (voyage id, start time, end time) of its voyages
+    vessel_voyages: HashMap<usize, Vec<(usize, f64, Option<f64>)>>,
+    /// vessel id → number of its non-empty voyages
+    vessel_usage: HashMap<usize, usize>,
+}
+
+impl MoveEvaluator {
+    pub fn new(view: &SolutionView, context: &Context) -> Self {
+        let mut voyage_costs = HashMap::with_capacity(view.voyages.len());
+        let mut vessel_voyages: HashMap<usize, Vec<(usize, f64, Option<f64>)>> = HashMap::new();
+        let mut vessel_usage: HashMap<usize, usize> = HashMap::new();
+        for voyage in &view.voyages {
+            let Some(vessel_id) = voyage.vessel_id else {
+                continue;
+            };
+            if !voyage.is_empty() {
+                *vessel_usage.entry(vessel_id).or_insert(0) += 1;
+                voyage_costs.insert(
+                    voyage.id,
+                    view.voyage_variable_cost(
+                        vessel_id,
+                        &voyage.visit_ids,
+                        voyage.sailing_time.unwrap_or(0.0),
+                        voyage.waiting_time.unwrap_or(0.0),
+                        context,
+                    ),
+                );
+            }
+            if let Some(start) = voyage.start_time() {
+                vessel_voyages.entry(vessel_id).or_default().push((
+                    voyage.id,
+                    start,
+                    voyage.end_time(),
+                ));
+            }
+        }
+        Self {
+            voyage_costs,
+            vessel_voyages,
+            vessel_usage,
+        }
+    }
+
+    /// Fuel cost of a voyage in the evaluated solution.
+    pub fn voyage_cost(&self, voyage_id: usize) -> f64 {
+        self.voyage_costs.get(&voyage_id).copied().unwrap_or(0.0)
+    }
+
+    /// Fuel cost of a changed voyage of the given vessel, zero if the voyage becomes empty.
+    pub fn changed_voyage_cost(
+        &self,
+        view: &SolutionView,
+        vessel_id: usize,
+        timing: &VoyageTiming,
+        context: &Context,
+    ) -> f64 {
+        if timing.is_empty() {
+            return 0.0;
+        }
+        view.voyage_variable_cost(
+            vessel_id,
+            &timing.visit_ids,
+            timing.sailing_time,
+            timing.waiting_time,
+            context,
+        )
+    }
+
+    /// Change of the fixed cost if the given voyages (voyage id, vessel id) become empty.
+    pub fn fixed_cost_change(&self, emptied: &[(usize, usize)], context: &Context) -> f64 {
+        let usage_changes: Vec<(usize, isize)> = emptied
+            .iter()
+            .map(|&(_, vessel_id)| (vessel_id, -1))
+            .collect();
+        self.usage_cost_change(&usage_changes, context)
+    }
+
+    /// Change of the fixed cost if the number of non-empty voyages of vessels changes by the given
+    /// (vessel id, change) amounts. A vessel costs its fixed cost while it sails any voyage.
+    pub fn usage_cost_change(&self, usage_changes: &[(usize, isize)], context: &Context) -> f64 {
+        let mut change = 0.0;
+        for (i, &(vessel_id, _)) in usage_changes.iter().enumerate() {
+            if usage_changes[..i]
+                .iter()
+                .any(|&(other, _)| other == vessel_id)
+            {
+                continue;
+            }
+            let usage_change: isize = usage_changes
+                .iter()
+                .filter(|&&(v, _)| v == vessel_id)
+                .map(|&(_, c)| c)
+                .sum();
+            let usage = self.vessel_usage.get(&vessel_id).copied().unwrap_or(0) as isize;
+            let (used_before, used_after) = (usage > 0, usage + usage_change > 0);
+            if used_before == used_after {
+                continue;
+            }
+            if let Some(vessel) = context.problem.vessels.get(vessel_id) {
+                change += if used_after {
+                    vessel.cost
+                } else {
+                    -vessel.cost
+                };
+            }
+        }
+        change
+    }
+
+    /// True if a changed voyage overlaps another voyage of its vessel.
+    ///
+    /// `changes` holds (voyage id, vessel id, new end time); voyages that become empty are passed with `None`
+    /// and are ignored, as they are dropped from the solution. Start times do not change with a move.
+    pub fn overlaps(&self, changes: &[(usize, usize, Option<f64>)]) -> bool {
+        let period = HOURS_IN_PERIOD as f64;
+        for (i, &(voyage_id, vessel_id, end)) in changes.iter().enumerate() {
+            let Some(end) = end else {
+                continue;
+            };
+            let Some(voyages) = self.vessel_voyages.get(&vessel_id) else {
+                continue;
+            };
+            let Some(&(_, start, _)) = voyages.iter().find(|(id, _, _)| *id == voyage_id) else {
+                continue;
+            };
+            for &(other_id, other_start, other_end) in voyages {
+                let Some(other_end) = other_end else {
+                    continue;
+                };
+                if changes
+                    .iter()
+                    .any(|&(changed_id, _, _)| changed_id == other_id)
+                {
+                    continue;
+                }
+                if cyclic_intervals_overlap(start, end, other_start, other_end, period) {
+                    return true;
+                }
+            }
+            for &(other_id, other_vessel, other_end) in &changes[i + 1..] {
+                let Some(other_end) = other_end else {
+                    continue;
+                };
+                if other_vessel != vessel_id {
+                    continue;
+                }
+                let Some(&(_, other_start, _)) = voyages.iter().find(|(id, _, _)| *id == other_id)
+                else {
+                    continue;
+                };
+                if cyclic_intervals_overlap(start, end, other_start, other_end, period) {
+                    return true;
+                }
+            }
+        }
+        false
+    }
+}
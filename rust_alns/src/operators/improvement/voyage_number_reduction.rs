@@ -3,87 +3,254 @@
 
 use crate::operators::traits::ImprovementOperator;
 use crate::structs::{context::Context, solution::Solution};
+use crate::utils::parallel;
+use log::debug;
 use rand::RngCore;
+use std::cmp::Ordering;
 
-pub struct VoyageNumberReduction;
+/// Removes voyages whose visits can all be relocated to other non-empty voyages.
+#[derive(Debug, Clone)]
+pub struct VoyageNumberReduction {
+    /// Number of voyages, lowest estimate first, tried with a full reinsertion before checking whether
+    /// an improving removal was found. `usize::MAX` tries every removable voyage.
+    pub screen_size: usize,
+}
 
-impl ImprovementOperator for VoyageNumberReduction {
-    fn apply(&self, solution: &mut Solution, context: &Context, _rng: &mut dyn RngCore) {
-        // Ensure schedule is up-to-date
-        solution.ensure_schedule_is_updated();
-        loop {
-            // 1. For each voyage, try to relocate all its visits to other voyages using deep greedy insertion
-            let mut best_voyage: Option<(usize, f64, Vec<(usize, usize)>)> = None; // (voyage_id, cost_increase, relocations)
-            let mut any_found = false;
+impl Default for VoyageNumberReduction {
+    fn default() -> Self {
+        Self { screen_size: 8 }
+    }
+}
+
+/// Voyage whose visits all have another voyage to go to, with its estimated cost increase.
+#[derive(Debug, Clone)]
+struct Candidate {
+    /// Position of the voyage in the solution, breaks ties between equal cost increases
+    position: usize,
+    voyage_id: usize,
+    visit_ids: Vec<usize>,
+    estimate: f64,
+}
+
+impl VoyageNumberReduction {
+    pub fn with_screen_size(screen_size: usize) -> Self {
+        Self { screen_size }
+    }
+
+    /// Non-empty voyages that may be removable, lowest estimated cost increase first.
+    ///
+    /// The estimate is the cost delta of dropping the voyage plus, for each of its visits, the cheapest
+    /// insertion delta into another non-empty voyage of the current solution. Insertions are evaluated
+    /// independently of each other, so the estimate can be above or below the real cost increase: it
+    /// only orders the full reinsertion checks. A visit without a voyage that can take it does make the
+    /// voyage unremovable, as inserting the other visits only adds constraints. Voyages with equal
+    /// estimates keep the solution order.
+    fn screen_voyages(&self, solution: &Solution, context: &Context) -> Vec<Candidate> {
+        let voyages: Vec<(usize, Vec<usize>)> = solution
+            .voyages
+            .iter()
+            .map(|voyage_cell| voyage_cell.borrow())
+            .filter(|voyage| !voyage.visit_ids.is_empty())
+            .map(|voyage| (voyage.id, voyage.visit_ids.clone()))
+            .collect();
+        let mut candidates: Vec<Candidate> = voyages
+            .iter()
+            .enumerate()
+            .filter_map(|(position, (voyage_id, visit_ids))| {
+                let mut estimate = solution.emptied_voyage_cost_delta(*voyage_id, context);
+                for &visit_id in visit_ids {
+                    estimate += Self::cheapest_insertion_delta(
+                        solution, context, visit_id, *voyage_id, visit_ids,
+                    )?;
+                }
+                Some(Candidate {
+                    position,
+                    voyage_id: *voyage_id,
+                    visit_ids: visit_ids.clone(),
+                    estimate,
+                })
+            })
+            .collect();
+        candidates.sort_by(|a, b| {
+            a.estimate
+                .partial_cmp(&b.estimate)
+                .unwrap_or(Ordering::Equal)
+        });
+        candidates
+    }
+
+    /// Cheapest insertion delta of a visit into a non-empty voyage other than its own, with the visits of
+    /// its own voyage treated as unassigned.
+    fn cheapest_insertion_delta(
+        solution: &Solution,
+        context: &Context,
+        visit_id: usize,
+        voyage_id: usize,
+        unassigned: &[usize],
+    ) -> Option<f64> {
+        solution
+            .voyages
+            .iter()
+            .map(|voyage_cell| voyage_cell.borrow())
+            .filter(|voyage| voyage.id != voyage_id && !voyage.visit_ids.is_empty())
+            .filter(|voyage| {
+                solution.visit_insertion_is_possible_into(context, visit_id, voyage, unassigned)
+            })
+            .map(|voyage| solution.insertion_cost_delta(visit_id, &voyage, context))
+            .min_by(|a, b| a.partial_cmp(b).unwrap_or(Ordering::Equal))
+    }
+
+    /// Tries to relocate all visits of a voyage to other non-empty voyages, reverting the changes afterwards.
+    ///
+    /// Returns the cost increase and the relocations (visit, target voyage), or `None` if a visit can't
+    /// be relocated.
+    fn try_remove_voyage(
+        solution: &mut Solution,
+        context: &Context,
+        candidate: &Candidate,
+        current_cost: f64,
+    ) -> Option<(f64, Vec<(usize, usize)>)> {
+        solution.begin_transaction();
+        let result = Self::relocate_visits(solution, context, candidate, current_cost);
+        solution.rollback_transaction();
+        result
+    }
+
+    fn relocate_visits(
+        solution: &mut Solution,
+        context: &Context,
+        candidate: &Candidate,
+        current_cost: f64,
+    ) -> Option<(f64, Vec<(usize, usize)>)> {
+        let mut relocations = Vec::new();
+        solution.unassign_visits(&candidate.visit_ids);
+        for &visit_id in &candidate.visit_ids {
+            // Ensure schedule is up-to-date before each insertion cost calculation
+            solution.ensure_schedule_is_updated();
+            // Find the cheapest feasible insertion into the remaining voyages
+            let mut best_insertion: Option<(usize, f64)> = None;
             for voyage_cell in &solution.voyages {
                 let voyage = voyage_cell.borrow();
-                if voyage.visit_ids.is_empty() {
+                if voyage.id == candidate.voyage_id || voyage.visit_ids.is_empty() {
                     continue;
                 }
-                let voyage_id = voyage.id;
-                let visit_ids = voyage.visit_ids.clone();
-                drop(voyage);
-                // Try to relocate all visits
-                let mut temp_solution = solution.clone();
-                let mut relocations = Vec::new();
-                let mut feasible = true;
-                temp_solution.unassign_visits(&visit_ids);
-                temp_solution.ensure_schedule_is_updated(); // <-- Fix: update schedule after unassign
-                for &visit_id in &visit_ids {
-                    // Ensure schedule is up-to-date before each insertion cost calculation
-                    temp_solution.ensure_schedule_is_updated();
-                    // Find best feasible insertion using deep greedy insertion logic
-                    let mut best_insertion: Option<(usize, f64)> = None;
-                    for voyage_cell2 in &temp_solution.voyages {
-                        let v2 = voyage_cell2.borrow();
-                        let v2_id = v2.id;
-                        if v2_id == voyage_id {
-                            continue;
-                        }
-                        if temp_solution.visit_insertion_is_possible(context, visit_id, v2_id) {
-                            let costs =
-                                temp_solution.top_k_visit_insertion_costs(context, visit_id, 1);
-                            if let Some((_, cost)) = costs.first() {
-                                if best_insertion.is_none()
-                                    || *cost < best_insertion.as_ref().unwrap().1
-                                {
-                                    best_insertion = Some((v2_id, *cost));
-                                }
-                            }
-                        }
-                    }
-                    if let Some((target_voyage, _)) = best_insertion {
-                        // Insert visit into target voyage
-                        if temp_solution
-                            .greedy_insert_visit(visit_id, target_voyage, context)
-                            .is_ok()
-                        {
-                            relocations.push((visit_id, target_voyage));
-                        } else {
-                            feasible = false;
-                            break;
-                        }
-                    } else {
-                        feasible = false;
-                        break;
+                if let Some(cost) = solution.visit_insertion_cost(context, visit_id, &voyage) {
+                    if best_insertion.map_or(true, |(_, best_cost)| cost < best_cost) {
+                        best_insertion = Some((voyage.id, cost));
                     }
                 }
-                if feasible {
-                    any_found = true;
-                    temp_solution.ensure_consistency_updated(context);
-                    let cost_increase = temp_solution.cost_with_context(context)
-                        - solution.cost_with_context(context);
-                    if best_voyage.is_none() || cost_increase < best_voyage.as_ref().unwrap().1 {
-                        best_voyage = Some((voyage_id, cost_increase, relocations));
-                    }
+            }
+            let (target_voyage, _) = best_insertion?;
+            solution
+                .greedy_insert_visit(visit_id, target_voyage, context)
+                .ok()?;
+            relocations.push((visit_id, target_voyage));
+        }
+        solution.ensure_consistency_updated(context);
+        let cost_increase = solution.cost_with_context(context) - current_cost;
+        Some((cost_increase, relocations))
+    }
+
+    /// Full reinsertion results of a batch of candidates, in batch order.
+    ///
+    /// A single thread works on `solution` itself; with more threads each chunk gets its own copy.
+    fn try_batch(
+        solution: &mut Solution,
+        context: &Context,
+        batch: &[Candidate],
+        current_cost: f64,
+    ) -> Vec<Option<(f64, Vec<(usize, usize)>)>> {
+        if batch.len() <= 1 {
+            return batch
+                .iter()
+                .map(|candidate| {
+                    Self::try_remove_voyage(solution, context, candidate, current_cost)
+                })
+                .collect();
+        }
+        parallel::map_chunks_with(
+            batch,
+            context.num_threads(),
+            || solution.clone(),
+            |mut base, chunk| {
+                chunk
+                    .iter()
+                    .map(|candidate| {
+                        Self::try_remove_voyage(&mut base, context, candidate, current_cost)
+                    })
+                    .collect::<Vec<_>>()
+            },
+        )
+        .into_iter()
+        .flatten()
+        .collect()
+    }
+
+    /// Best removal among the screened voyages, tried `screen_size` at a time in screening order.
+    ///
+    /// Stops after the first screen with a removal that lowers the cost. Otherwise every voyage is
+    /// tried, so the result is the removal with the lowest cost increase, as in an unscreened search.
+    /// Among equal cost increases the voyage first in the solution wins. The outcome does not depend
+    /// on the thread count.
+    fn best_removal(
+        &self,
+        solution: &mut Solution,
+        context: &Context,
+        candidates: &[Candidate],
+        current_cost: f64,
+    ) -> Option<(f64, Vec<(usize, usize)>)> {
+        let mut best: Option<(f64, usize, Vec<(usize, usize)>)> = None;
+        for screen in candidates.chunks(self.screen_size.max(1)) {
+            let trials = Self::try_batch(solution, context, screen, current_cost);
+            for (candidate, trial) in screen.iter().zip(trials) {
+                let Some((cost_increase, relocations)) = trial else {
+                    continue;
+                };
+                if best.as_ref().map_or(true, |(best_increase, position, _)| {
+                    (cost_increase, candidate.position) < (*best_increase, *position)
+                }) {
+                    best = Some((cost_increase, candidate.position, relocations));
                 }
             }
-            // 2. If no voyage can be removed, break
-            if !any_found || best_voyage.is_none() {
+            if best
+                .as_ref()
+                .map_or(false, |(best_increase, _, _)| *best_increase < 0.0)
+            {
                 break;
             }
-            // 3. Apply the best relocation to the real solution
-            let (_voyage_id, _cost_increase, relocations) = best_voyage.unwrap();
+        }
+        best.map(|(cost_increase, _, relocations)| (cost_increase, relocations))
+    }
+
+    /// Removal `apply` would make next: the cost increase and the relocations (visit, target voyage),
+    /// or `None` if no voyage can be removed. `solution` is left unchanged.
+    pub fn next_removal(
+        &self,
+        solution: &mut Solution,
+        context: &Context,
+    ) -> Option<(f64, Vec<(usize, usize)>)> {
+        solution.ensure_schedule_is_updated();
+        let candidates = self.screen_voyages(solution, context);
+        let current_cost = solution.cost_with_context(context);
+        self.best_removal(solution, context, &candidates, current_cost)
+    }
+}
+
+impl ImprovementOperator for VoyageNumberReduction {
+    fn apply(&self, solution: &mut Solution, context: &Context, _rng: &mut dyn RngCore) {
+        loop {
+            // 1. Order the voyages by estimated removal cost and relocate their visits screen by
+            //    screen; if no voyage can be removed, break
+            let Some((cost_increase, relocations)) = self.next_removal(solution, context) else {
+                break;
+            };
+            debug!(
+                target: "operator::improvement",
+                "[VoyageNumberReduction] Removing a voyage with {} visits (Δ={:.2})",
+                relocations.len(),
+                cost_increase
+            );
+            // 2. Apply the best relocation to the real solution
             // Remove all visits from the voyage
             let visit_ids: Vec<usize> = relocations.iter().map(|(visit_id, _)| *visit_id).collect();
             solution.unassign_visits(&visit_ids);
@@ -1,3 +1,4 @@
+use crate::operators::repair::insertion_table::{InsertionCostTable, Selection, SelectionRule};
 use crate::operators::traits::RepairOperator;
 use crate::structs::{context::Context, solution::Solution};
 use core::panic;
@@ -20,23 +21,12 @@ impl RepairOperator for DeepGreedyInsertion {
             .collect();
         let mut iteration = 0;
         debug!(target: "operator::repair", "[DeepGreedyInsertion] Starting with {} uninserted visits", uninserted_visits.len());
+        let mut table =
+            InsertionCostTable::new(solution, context, &uninserted_visits, SelectionRule::Cheapest);
         while !uninserted_visits.is_empty() {
-            let mut best_insertion: Option<(usize, usize, f64)> = None;
-            for &visit_id in &uninserted_visits {
-                // top_k_visit_insertion_costs already ensures the visit is not in the voyage
-                let costs = solution.top_k_visit_insertion_costs(context, visit_id, 3); // log top 3 for more info
-                if let Some((voyage_id, cost)) = costs.iter().cloned().next() {
-                    if best_insertion.is_none() || cost < best_insertion.as_ref().unwrap().2 {
-                        best_insertion = Some((visit_id, voyage_id, cost));
-                    }
-                }
-            }
-
-            if let Some((visit_id, voyage_id, cost)) = best_insertion {
+            if let Some(Selection { visit_id, voyage_id, score: cost }) = table.select() {
                 debug!(target: "operator::repair", "[DeepGreedyInsertion] Iteration {}: Chosen insertion: visit_id={}, voyage_id={}, cost={}", iteration, visit_id, voyage_id, cost);
-                if let Some(voyage_cell) =
-                    solution.voyages.iter().find(|v| v.borrow().id == voyage_id)
-                {
+                if let Some(voyage_cell) = solution.voyage_by_id(voyage_id) {
                     let voyage = voyage_cell.borrow();
                     debug!(target: "operator::repair", "  Target voyage: id={}, vessel_id={:?}, start_time={:?}, end_time={:?}, visit_ids={:?}",
                         voyage.id, voyage.vessel_id, voyage.start_time(), voyage.end_time(), voyage.visit_ids);
@@ -47,8 +37,9 @@ impl RepairOperator for DeepGreedyInsertion {
                     .greedy_insert_visit(visit_id, voyage_id, context)
                     .is_ok()
                 {
-                    // TODO: Instead of fully rebuilding the schedule, we could just update the affected voyage
-                    solution.ensure_schedule_is_updated(); // Ensure schedule is up-to-date before next iteration
+                    // Only the changed voyage is reassigned in the schedule and evaluated again
+                    solution.update_schedule_for_voyage(voyage_id);
+                    table.record_insertion(solution, context, visit_id, voyage_id);
                     uninserted_visits.retain(|&v_id| v_id != visit_id);
                 } else {
                     error!(target: "operator::repair", "Failed to insert visit {} into voyage {}", visit_id, voyage_id);
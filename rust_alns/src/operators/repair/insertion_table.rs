@@ -0,0 +1,243 @@
+use crate::structs::{context::Context, solution::Solution};
+use std::cmp::Ordering;
+use std::collections::{BTreeMap, BinaryHeap, HashMap};
+
+/// How the next visit to insert is chosen from its cheapest insertions.
+#[derive(Debug, Clone, Copy)]
+pub enum SelectionRule {
+    /// The visit with the cheapest insertion.
+    Cheapest,
+    /// The visit with the largest difference between its k-th cheapest and cheapest insertion.
+    /// Visits with fewer than k feasible insertions are not selected.
+    Regret(usize),
+}
+
+/// Visit chosen by `InsertionCostTable::select`.
+#[derive(Debug, Clone)]
+pub struct Selection {
+    pub visit_id: usize,
+    /// Voyage of the cheapest insertion
+    pub voyage_id: usize,
+    /// Cost of the cheapest insertion for `SelectionRule::Cheapest`, the regret for `SelectionRule::Regret`
+    pub score: f64,
+}
+
+/// Heap entry, the entry of the selected visit is on top. Ties go to the lowest visit id.
+#[derive(Debug)]
+struct Candidate {
+    /// Larger is better: the negated cost or the regret
+    priority: f64,
+    visit_id: usize,
+    stamp: u64,
+}
+
+impl PartialEq for Candidate {
+    fn eq(&self, other: &Self) -> bool {
+        self.cmp(other) == Ordering::Equal
+    }
+}
+
+impl Eq for Candidate {}
+
+impl PartialOrd for Candidate {
+    fn partial_cmp(&self, other: &Self) -> Option<Ordering> {
+        Some(self.cmp(other))
+    }
+}
+
+impl Ord for Candidate {
+    fn cmp(&self, other: &Self) -> Ordering {
+        self.priority
+            .partial_cmp(&other.priority)
+            .unwrap_or(Ordering::Equal)
+            .then_with(|| other.visit_id.cmp(&self.visit_id))
+    }
+}
+
+/// Insertion costs of the uninserted visits into every voyage, kept during a repair operator call.
+///
+/// The table is built once with `Solution::visit_insertion_cost` and updated with
+/// `record_insertion` after each insertion. An insertion into a voyage changes the route of that
+/// voyage, the overlap checks of the other voyages of its vessel and the departure spread of its
+/// installation; all other entries stay valid. The next visit is selected from a heap whose stale
+/// entries are skipped when popped. Selections and tie-breaking are the same as calling
+/// `Solution::top_k_visit_insertion_costs` for every visit in the order of visit ids.
+pub struct InsertionCostTable {
+    rule: SelectionRule,
+    /// Voyage ids in the order of `Solution::voyages`
+    voyage_ids: Vec<usize>,
+    /// visit id → insertion cost into each voyage of `voyage_ids`, `None` if infeasible
+    rows: BTreeMap<usize, Vec<Option<f64>>>,
+    /// visit id → (stamp, selection) of its valid heap entry
+    selections: HashMap<usize, (u64, Selection)>,
+    heap: BinaryHeap<Candidate>,
+    next_stamp: u64,
+}
+
+impl InsertionCostTable {
+    /// Evaluates all insertions of the given visits; the schedule must be up to date.
+    pub fn new(
+        solution: &Solution,
+        context: &Context,
+        visit_ids: &[usize],
+        rule: SelectionRule,
+    ) -> Self {
+        let voyage_ids: Vec<usize> = solution.voyages.iter().map(|v| v.borrow().id).collect();
+        let mut table = Self {
+            rule,
+            voyage_ids,
+            rows: BTreeMap::new(),
+            selections: HashMap::new(),
+            heap: BinaryHeap::new(),
+            next_stamp: 0,
+        };
+        for &visit_id in visit_ids {
+            let row = solution
+                .voyages
+                .iter()
+                .map(|voyage| solution.visit_insertion_cost(context, visit_id, &voyage.borrow()))
+                .collect();
+            table.rows.insert(visit_id, row);
+            table.refresh_selection(visit_id);
+        }
+        table
+    }
+
+    /// Cheapest feasible insertions of a visit as (voyage id, cost), at most `k`.
+    pub fn top_k(&self, visit_id: usize, k: usize) -> Vec<(usize, f64)> {
+        let Some(row) = self.rows.get(&visit_id) else {
+            return Vec::new();
+        };
+        let mut costs: Vec<(usize, f64)> = row
+            .iter()
+            .zip(&self.voyage_ids)
+            .filter_map(|(cost, &voyage_id)| cost.map(|cost| (voyage_id, cost)))
+            .collect();
+        // Stable sort: among equal costs the earlier voyage wins
+        costs.sort_by(|a, b| a.1.partial_cmp(&b.1).unwrap());
+        costs.truncate(k);
+        costs
+    }
+
+    /// The visit to insert next, `None` if no uninserted visit can be selected.
+    pub fn select(&mut self) -> Option<Selection> {
+        while let Some(candidate) = self.heap.pop() {
+            match self.selections.get(&candidate.visit_id) {
+                Some((stamp, selection)) if *stamp == candidate.stamp => {
+                    return Some(selection.clone());
+                }
+                _ => continue,
+            }
+        }
+        None
+    }
+
+    /// Updates the table after `visit_id` was inserted into `voyage_id` and the schedule was updated.
+    pub fn record_insertion(
+        &mut self,
+        solution: &Solution,
+        context: &Context,
+        visit_id: usize,
+        voyage_id: usize,
+    ) {
+        self.rows.remove(&visit_id);
+        self.selections.remove(&visit_id);
+        let vessel_id = solution
+            .voyage_by_id(voyage_id)
+            .and_then(|voyage| voyage.borrow().vessel_id);
+        let installation_id = solution
+            .visit(visit_id)
+            .map(|visit| visit.installation_id());
+
+        // The changed voyage and the voyages it may now overlap are evaluated again
+        let affected: Vec<usize> = self
+            .voyage_ids
+            .iter()
+            .enumerate()
+            .filter(|&(_, &id)| {
+                id == voyage_id
+                    || solution.voyage_by_id(id).map_or(false, |voyage| {
+                        vessel_id.is_some() && voyage.borrow().vessel_id == vessel_id
+                    })
+            })
+            .map(|(position, _)| position)
+            .collect();
+
+        let visit_ids: Vec<usize> = self.rows.keys().copied().collect();
+        for other_visit in visit_ids {
+            let same_installation = installation_id.is_some()
+                && solution
+                    .visit(other_visit)
+                    .map(|visit| visit.installation_id())
+                    == installation_id;
+            let row = self
+                .rows
+                .get_mut(&other_visit)
+                .expect("row of uninserted visit");
+            for (position, cost) in row.iter_mut().enumerate() {
+                let Some(voyage) = solution.voyage_by_id(self.voyage_ids[position]) else {
+                    *cost = None;
+                    continue;
+                };
+                if affected.contains(&position) {
+                    *cost = solution.visit_insertion_cost(context, other_visit, &voyage.borrow());
+                } else if same_installation && cost.is_some() {
+                    // The departure spread only gets tighter, the route and overlaps are unchanged
+                    if !solution.visit_insertion_is_possible_into(
+                        context,
+                        other_visit,
+                        &voyage.borrow(),
+                        &[],
+                    ) {
+                        *cost = None;
+                    }
+                }
+            }
+            self.refresh_selection(other_visit);
+        }
+    }
+
+    /// Pushes a new heap entry for a visit whose selection changed.
+    fn refresh_selection(&mut self, visit_id: usize) {
+        let selection = match self.rule {
+            SelectionRule::Cheapest => {
+                self.top_k(visit_id, 1)
+                    .first()
+                    .map(|&(voyage_id, cost)| Selection {
+                        visit_id,
+                        voyage_id,
+                        score: cost,
+                    })
+            }
+            SelectionRule::Regret(k) => {
+                let costs = self.top_k(visit_id, k.max(1));
+                (costs.len() >= k.max(1)).then(|| Selection {
+                    visit_id,
+                    voyage_id: costs[0].0,
+                    score: costs[costs.len() - 1].1 - costs[0].1,
+                })
+            }
+        };
+        let Some(selection) = selection else {
+            self.selections.remove(&visit_id);
+            return;
+        };
+        if let Some((_, current)) = self.selections.get(&visit_id) {
+            if current.voyage_id == selection.voyage_id && current.score == selection.score {
+                return;
+            }
+        }
+        let priority = match self.rule {
+            SelectionRule::Cheapest => -selection.score,
+            SelectionRule::Regret(_) => selection.score,
+        };
+        let stamp = self.next_stamp;
+        self.next_stamp += 1;
+        self.heap.push(Candidate {
+            priority,
+            visit_id,
+            stamp,
+        });
+        self.selections.insert(visit_id, (stamp, selection));
+    }
+}
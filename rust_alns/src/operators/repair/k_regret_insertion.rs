@@ -1,3 +1,4 @@
+use crate::operators::repair::insertion_table::{InsertionCostTable, Selection, SelectionRule};
 use crate::operators::traits::RepairOperator;
 use crate::structs::{context::Context, solution::Solution};
 use log::{debug, error, info, warn};
@@ -20,28 +21,12 @@ impl RepairOperator for KRegretInsertion {
             .collect();
         let mut iteration = 0;
         debug!(target: "operator::repair", "[KRegretInsertion] Starting with {} uninserted visits", uninserted_visits.len());
+        let mut table =
+            InsertionCostTable::new(solution, context, &uninserted_visits, SelectionRule::Regret(self.k));
         while !uninserted_visits.is_empty() {
-            let mut best_visit: Option<usize> = None;
-            let mut best_voyage: Option<usize> = None;
-            let mut max_regret = f64::NEG_INFINITY;
-
-            for &visit_id in &uninserted_visits {
-                let costs = solution.top_k_visit_insertion_costs(context, visit_id, self.k);
-                if costs.len() < self.k {
-                    continue;
-                }
-                let regret = costs[self.k - 1].1 - costs[0].1;
-                if regret > max_regret {
-                    max_regret = regret;
-                    best_visit = Some(visit_id);
-                    best_voyage = Some(costs[0].0);
-                }
-            }
-            if let (Some(visit_id), Some(voyage_id)) = (best_visit, best_voyage) {
+            if let Some(Selection { visit_id, voyage_id, score: max_regret }) = table.select() {
                 debug!(target: "operator::repair", "[KRegretInsertion] Iteration {}: Chosen insertion: visit_id={}, voyage_id={}, regret={:.2}", iteration, visit_id, voyage_id, max_regret);
-                if let Some(voyage_cell) =
-                    solution.voyages.iter().find(|v| v.borrow().id == voyage_id)
-                {
+                if let Some(voyage_cell) = solution.voyage_by_id(voyage_id) {
                     let voyage = voyage_cell.borrow();
                     debug!(target: "operator::repair", "  Target voyage: id={}, vessel_id={:?}, start_time={:?}, end_time={:?}, visit_ids={:?}",
                         voyage.id, voyage.vessel_id, voyage.start_time(), voyage.end_time(), voyage.visit_ids);
@@ -52,7 +37,8 @@ impl RepairOperator for KRegretInsertion {
                     .greedy_insert_visit(visit_id, voyage_id, context)
                     .is_ok()
                 {
-                    solution.ensure_schedule_is_updated();
+                    solution.update_schedule_for_voyage(voyage_id);
+                    table.record_insertion(solution, context, visit_id, voyage_id);
                     uninserted_visits.retain(|&v| v != visit_id);
                 } else {
                     log::error!(target: "operator::repair", "Failed to insert visit {} into voyage {}", visit_id, voyage_id);
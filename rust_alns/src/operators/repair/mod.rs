@@ -1,2 +1,3 @@
 pub mod deep_greedy_insertion;
+pub mod insertion_table;
 pub mod k_regret_insertion;
@@ -2,12 +2,14 @@ use crate::alns::engine::{
     compute_solution_structure_metrics, ALNSEngine, ALNSEngineSnapshot,
     ALNSRunWithRestartsResult, ALNSMetrics,
 };
+use crate::utils::route_cache::RouteEvaluationCache;
 use crate::utils::serialization::dump_schedule_to_json;
 use pyo3::exceptions::{PyRuntimeError, PyValueError};
 use pyo3::prelude::*;
 use pyo3::types::{PyDict, PyList};
 use std::path::Path;
 use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::Arc;
 
 // Global flag to track if logging has been initialized for Python interface
 static PYTHON_LOGGING_INITIALIZED: AtomicBool = AtomicBool::new(false);
@@ -263,13 +265,18 @@ impl RustALNSSnapshot {
 #[pyclass(unsendable)]
 pub struct RustALNSInterface {
     engine: Option<ALNSEngine>,
+    /// Route cache of the last initialized instance, reused when it is initialized again
+    route_cache: Option<(String, Arc<RouteEvaluationCache>)>,
 }
 
 #[pymethods]
 impl RustALNSInterface {
     #[new]
     fn new() -> Self {
-        Self { engine: None }
+        Self {
+            engine: None,
+            route_cache: None,
+        }
     }
 
     #[pyo3(signature = (
@@ -279,7 +286,9 @@ impl RustALNSInterface {
         theta=None,
         weight_update_interval=None,
         aggressive_search_factor=None,
-        algorithm_mode=None
+        algorithm_mode=None,
+        num_threads=None,
+        route_cache_capacity=None
     ))]
     fn initialize_alns(
         &mut self,
@@ -291,6 +300,8 @@ impl RustALNSInterface {
         weight_update_interval: Option<usize>,
         aggressive_search_factor: Option<f64>,
         algorithm_mode: Option<&str>,
+        num_threads: Option<usize>,
+        route_cache_capacity: Option<usize>,
     ) -> PyResult<PyObject> {
         // Initialize logging for Python interface (only if not already initialized)
         if !PYTHON_LOGGING_INITIALIZED.load(Ordering::Relaxed) {
@@ -322,7 +333,7 @@ impl RustALNSInterface {
             })
             .transpose()?;
 
-        let engine = ALNSEngine::new_from_instance(
+        let mut engine = ALNSEngine::new_from_instance(
             problem_instance,
             seed,
             temperature,
@@ -333,6 +344,27 @@ impl RustALNSInterface {
             algorithm_mode.unwrap_or(crate::alns::engine::ALNSAlgorithmMode::Baseline),
         )
         .map_err(|e| PyRuntimeError::new_err(e))?;
+        // Routes solved in earlier runs on the same instance stay valid
+        let previous_cache = self
+            .route_cache
+            .as_ref()
+            .filter(|(instance, _)| instance == problem_instance)
+            .map(|(_, cache)| Arc::clone(cache));
+        match previous_cache {
+            Some(cache) => Arc::make_mut(&mut engine.context).route_cache = cache,
+            None => {
+                self.route_cache = Some((
+                    problem_instance.to_string(),
+                    Arc::clone(&engine.context.route_cache),
+                ))
+            }
+        }
+        if let Some(capacity) = route_cache_capacity {
+            engine.context.route_cache.set_capacity(capacity);
+        }
+        if let Some(threads) = num_threads {
+            Arc::make_mut(&mut engine.context).threads = threads;
+        }
         self.engine = Some(engine);
         self.extract_solution_metrics(py)
     }
@@ -516,14 +548,22 @@ impl RustALNSInterface {
         metrics_to_pydict(py, &metrics)
     }
 
-    #[pyo3(signature = (restarts=1))]
-    fn run_with_restarts(&mut self, py: Python, restarts: usize) -> PyResult<PyObject> {
+    /// Runs `restarts` full ALNS passes; `threads` of them run at a time, 0 uses all cores.
+    ///
+    /// The result and the engine state afterwards do not depend on `threads`.
+    #[pyo3(signature = (restarts=1, threads=1))]
+    fn run_with_restarts(
+        &mut self,
+        py: Python,
+        restarts: usize,
+        threads: usize,
+    ) -> PyResult<PyObject> {
         let engine = self
             .engine
             .as_mut()
             .ok_or_else(|| PyRuntimeError::new_err("ALNS not initialized"))?;
 
-        let result = engine.run_with_restarts(restarts);
+        let result = engine.run_with_restarts_on_threads(restarts, threads);
         run_with_restarts_result_to_pydict(py, &result)
     }
 
@@ -535,7 +575,6 @@ impl RustALNSInterface {
 
         // Get metrics from the current solution
         let current_solution = &engine.current_solution;
-        let best_solution = &engine.best_solution;
         let mut temp_solution = current_solution.clone();
         let is_feasible = temp_solution.is_fully_feasible(&engine.context);
         let is_complete = current_solution.is_complete_solution();
@@ -615,7 +654,7 @@ impl RustALNSInterface {
         dict.set_item("iteration", engine.iteration)?;
         dict.set_item("temperature", engine.temperature)?;
         dict.set_item("stagnation_count", engine.stagnation_count)?;
-        dict.set_item("best_cost", best_solution.total_cost)?;
+        dict.set_item("best_cost", engine.best_cost())?;
         dict.set_item("initial_cost", engine.initial_cost)?;
         dict.set_item(
             "destroy_success_rates",
@@ -652,6 +691,64 @@ impl RustALNSInterface {
         Ok(())
     }
 
+    /// Statistics of the route cache shared by all runs on the current instance
+    fn route_cache_stats(&self, py: Python) -> PyResult<PyObject> {
+        let engine = self
+            .engine
+            .as_ref()
+            .ok_or_else(|| PyRuntimeError::new_err("ALNS not initialized"))?;
+        let stats = engine.context.route_cache.stats();
+        let dict = PyDict::new(py);
+        dict.set_item("hits", stats.hits)?;
+        dict.set_item("misses", stats.misses)?;
+        dict.set_item("hit_rate", stats.hit_rate())?;
+        dict.set_item("size", stats.size)?;
+        dict.set_item("capacity", stats.capacity)?;
+        dict.set_item("evictions", stats.evictions)?;
+        Ok(dict.into())
+    }
+
+    /// Set the maximum number of cached routes (0 disables the cache)
+    fn set_route_cache_capacity(&self, capacity: usize) -> PyResult<()> {
+        let engine = self
+            .engine
+            .as_ref()
+            .ok_or_else(|| PyRuntimeError::new_err("ALNS not initialized"))?;
+        engine.context.route_cache.set_capacity(capacity);
+        Ok(())
+    }
+
+    /// Drop all cached routes and reset the route cache statistics
+    fn clear_route_cache(&self) -> PyResult<()> {
+        let engine = self
+            .engine
+            .as_ref()
+            .ok_or_else(|| PyRuntimeError::new_err("ALNS not initialized"))?;
+        engine.context.route_cache.clear();
+        Ok(())
+    }
+
+    /// Set the number of threads used by the improvement operators of this engine to evaluate
+    /// candidate moves (0 uses all cores). Only has an effect if the module is built with the
+    /// `parallel` feature.
+    fn set_num_threads(&mut self, threads: usize) -> PyResult<()> {
+        let engine = self
+            .engine
+            .as_mut()
+            .ok_or_else(|| PyRuntimeError::new_err("ALNS not initialized"))?;
+        Arc::make_mut(&mut engine.context).threads = threads;
+        Ok(())
+    }
+
+    /// Number of threads used by the improvement operators of this engine to evaluate candidate moves
+    fn num_threads(&self) -> PyResult<usize> {
+        let engine = self
+            .engine
+            .as_ref()
+            .ok_or_else(|| PyRuntimeError::new_err("ALNS not initialized"))?;
+        Ok(engine.context.num_threads())
+    }
+
     /// Enable file logging for ALNS operations
     #[staticmethod]
     fn enable_file_logging(log_path: &str) -> PyResult<()> {
@@ -1,17 +1,48 @@
-use crate::{structs::problem_data::ProblemData, utils::tsp_solver::TSPSolver};
+use crate::structs::{problem_data::ProblemData, voyage::Voyage};
+use crate::utils::parallel;
+use crate::utils::relatedness::InstallationRelatedness;
+use crate::utils::route_cache::RouteEvaluationCache;
+use crate::utils::tsp_solver::{TSPResult, TSPSolver};
+use std::sync::Arc;
 
 #[derive(Clone)]
 pub struct Context {
     pub problem: ProblemData,
     pub tsp_solver: TSPSolver,
+    /// Routes computed by `tsp_solver`, shared by the clones of the context
+    pub route_cache: Arc<RouteEvaluationCache>,
+    /// Installation-pair terms of the Shaw relatedness, computed once per instance
+    pub relatedness: Arc<InstallationRelatedness>,
+    /// Threads the operators use to evaluate candidate moves, 0 uses all available cores
+    pub threads: usize,
     // maybe: distance_manager, cost_evaluator, logger, ...
 }
 
 impl Context {
     pub fn new(problem: ProblemData, tsp_solver: TSPSolver) -> Self {
+        let relatedness = Arc::new(InstallationRelatedness::new(&problem));
         Self {
             problem,
             tsp_solver,
+            route_cache: Arc::new(RouteEvaluationCache::default()),
+            relatedness,
+            threads: 0,
         }
     }
+
+    /// Number of threads the operators use, always 1 without the `parallel` feature.
+    pub fn num_threads(&self) -> usize {
+        parallel::threads_for(self.threads)
+    }
+
+    /// `TSPSolver::solve_for_voyage` through the route cache.
+    pub fn solve_for_voyage(&self, voyage: &Voyage) -> TSPResult {
+        self.route_cache.solve_for_voyage(&self.tsp_solver, voyage)
+    }
+
+    /// `TSPSolver::evaluate_greedy_insertion` through the route cache.
+    pub fn evaluate_greedy_insertion(&self, voyage: &Voyage, extra_visit: usize) -> TSPResult {
+        self.route_cache
+            .evaluate_greedy_insertion(&self.tsp_solver, voyage, extra_visit)
+    }
 }
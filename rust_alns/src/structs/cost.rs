@@ -0,0 +1,226 @@
+use crate::structs::{context::Context, visit::Visit, voyage::Voyage};
+use std::cell::RefCell;
+use std::collections::{HashMap, HashSet};
+
+/// Fuel cost of a route sailed by the given vessel, without the fixed vessel cost.
+///
+/// variable cost = sailing_time * fcs * fuel_cost + (wait_time + service_time) * fcw * fuel_cost
+pub(crate) fn variable_cost(
+    visits: &[Visit],
+    vessel_id: usize,
+    visit_ids: &[usize],
+    sailing_time: f64,
+    waiting_time: f64,
+    context: &Context,
+) -> f64 {
+    let vessel = match context.problem.vessels.get(vessel_id) {
+        Some(v) => v,
+        None => return 0.0,
+    };
+    // Service time: sum of service times for all visits in this voyage
+    let service_time: f64 = visit_ids
+        .iter()
+        .filter_map(|&vid| visits.get(vid))
+        .map(|v| {
+            context
+                .problem
+                .installations
+                .get(v.installation_id())
+                .map(|inst| inst.get_service_time())
+                .unwrap_or(0.0)
+        })
+        .sum();
+    let sailing_fuel = sailing_time * vessel.fcs;
+    let idle_fuel = (waiting_time + service_time) * vessel.fcw;
+    (sailing_fuel + idle_fuel) * context.problem.lng_cost()
+}
+
+/// Vessel and variable cost of a voyage, `None` for voyages that cost nothing (empty or without vessel).
+pub(crate) fn voyage_cost(
+    voyage: &Voyage,
+    visits: &[Visit],
+    context: &Context,
+) -> Option<(usize, f64)> {
+    if voyage.visit_ids.is_empty() {
+        return None;
+    }
+    let vessel_id = voyage.vessel_id?;
+    let cost = variable_cost(
+        visits,
+        vessel_id,
+        &voyage.visit_ids,
+        voyage.sailing_time.unwrap_or(0.0),
+        voyage.waiting_time.unwrap_or(0.0),
+        context,
+    );
+    Some((vessel_id, cost))
+}
+
+/// Cost of a solution, kept per voyage and updated for the changed voyages only.
+///
+/// `Solution` reports every voyage it changes with `voyage_changed`; `refresh` then recomputes the
+/// variable cost of those voyages and the number of voyages of their vessels, which decides whether
+/// the fixed vessel cost is paid.
+#[derive(Debug, Clone)]
+pub(crate) struct CostTracker {
+    /// voyage id → (vessel id, variable cost) of the voyages that cost something
+    voyage_costs: HashMap<usize, (usize, f64)>,
+    /// vessel id → number of its voyages in `voyage_costs`
+    vessel_usage: HashMap<usize, usize>,
+    fixed_cost: f64,
+    variable_cost: f64,
+    dirty_voyages: HashSet<usize>,
+    needs_rebuild: bool,
+}
+
+impl CostTracker {
+    /// Tracker that is built from scratch at the first `refresh`.
+    pub(crate) fn new() -> Self {
+        Self {
+            voyage_costs: HashMap::new(),
+            vessel_usage: HashMap::new(),
+            fixed_cost: 0.0,
+            variable_cost: 0.0,
+            dirty_voyages: HashSet::new(),
+            needs_rebuild: true,
+        }
+    }
+
+    pub(crate) fn voyage_changed(&mut self, voyage_id: usize) {
+        self.dirty_voyages.insert(voyage_id);
+    }
+
+    /// Recomputes the cost of every voyage at the next `refresh`.
+    pub(crate) fn invalidate(&mut self) {
+        self.needs_rebuild = true;
+    }
+
+    /// Brings the costs up to date with the voyages changed since the last call.
+    ///
+    /// The totals are summed again in voyage order and vessel id order, so they do not depend on
+    /// the order in which the voyages changed and match `Solution::cost_from_scratch` exactly.
+    pub(crate) fn refresh(
+        &mut self,
+        voyages: &[RefCell<Voyage>],
+        positions: &HashMap<usize, usize>,
+        visits: &[Visit],
+        context: &Context,
+    ) {
+        if self.needs_rebuild {
+            *self = Self {
+                needs_rebuild: false,
+                ..Self::new()
+            };
+            for voyage_cell in voyages {
+                let voyage = voyage_cell.borrow();
+                if let Some((vessel_id, cost)) = voyage_cost(&voyage, visits, context) {
+                    self.add(voyage.id, vessel_id, cost);
+                }
+            }
+        } else if !self.dirty_voyages.is_empty() {
+            for voyage_id in std::mem::take(&mut self.dirty_voyages) {
+                let current = positions
+                    .get(&voyage_id)
+                    .and_then(|&index| voyage_cost(&voyages[index].borrow(), visits, context));
+                let previous = self.voyage_costs.get(&voyage_id).copied();
+                if previous == current {
+                    continue;
+                }
+                if let Some((vessel_id, _)) = previous {
+                    self.remove(voyage_id, vessel_id);
+                }
+                if let Some((vessel_id, cost)) = current {
+                    self.add(voyage_id, vessel_id, cost);
+                }
+            }
+        } else {
+            return;
+        }
+        self.variable_cost = voyages
+            .iter()
+            .filter_map(|voyage_cell| self.voyage_costs.get(&voyage_cell.borrow().id))
+            .map(|&(_, cost)| cost)
+            .sum();
+        let mut used_vessels: Vec<usize> = self.vessel_usage.keys().copied().collect();
+        used_vessels.sort_unstable();
+        self.fixed_cost = used_vessels
+            .into_iter()
+            .map(|vessel_id| vessel_fixed_cost(vessel_id, context))
+            .sum();
+    }
+
+    pub(crate) fn total(&self) -> f64 {
+        self.fixed_cost + self.variable_cost
+    }
+
+    pub(crate) fn fixed_cost(&self) -> f64 {
+        self.fixed_cost
+    }
+
+    pub(crate) fn variable_cost(&self) -> f64 {
+        self.variable_cost
+    }
+
+    /// Cached (vessel id, variable cost) of a voyage, `None` if it costs nothing.
+    pub(crate) fn voyage_cost(&self, voyage_id: usize) -> Option<(usize, f64)> {
+        self.voyage_costs.get(&voyage_id).copied()
+    }
+
+    /// Number of non-empty voyages sailed by the vessel.
+    pub(crate) fn vessel_usage(&self, vessel_id: usize) -> usize {
+        self.vessel_usage.get(&vessel_id).copied().unwrap_or(0)
+    }
+
+    /// Change of the total cost if `voyage` were replaced by `changed`.
+    ///
+    /// `voyage` must be in the state the tracker was last refreshed with.
+    pub(crate) fn replacement_delta(
+        &self,
+        voyage: &Voyage,
+        changed: &Voyage,
+        visits: &[Visit],
+        context: &Context,
+    ) -> f64 {
+        let before = self.voyage_cost(voyage.id);
+        let after = voyage_cost(changed, visits, context);
+        let mut delta = after.map_or(0.0, |(_, cost)| cost) - before.map_or(0.0, |(_, cost)| cost);
+        let before_vessel = before.map(|(vessel_id, _)| vessel_id);
+        let after_vessel = after.map(|(vessel_id, _)| vessel_id);
+        if before_vessel != after_vessel {
+            if let Some(vessel_id) = before_vessel {
+                if self.vessel_usage(vessel_id) == 1 {
+                    delta -= vessel_fixed_cost(vessel_id, context);
+                }
+            }
+            if let Some(vessel_id) = after_vessel {
+                if self.vessel_usage(vessel_id) == 0 {
+                    delta += vessel_fixed_cost(vessel_id, context);
+                }
+            }
+        }
+        delta
+    }
+
+    fn add(&mut self, voyage_id: usize, vessel_id: usize, cost: f64) {
+        self.voyage_costs.insert(voyage_id, (vessel_id, cost));
+        *self.vessel_usage.entry(vessel_id).or_insert(0) += 1;
+    }
+
+    fn remove(&mut self, voyage_id: usize, vessel_id: usize) {
+        self.voyage_costs.remove(&voyage_id);
+        if let Some(usage) = self.vessel_usage.get_mut(&vessel_id) {
+            *usage -= 1;
+            if *usage == 0 {
+                self.vessel_usage.remove(&vessel_id);
+            }
+        }
+    }
+}
+
+pub(crate) fn vessel_fixed_cost(vessel_id: usize, context: &Context) -> f64 {
+    context
+        .problem
+        .vessels
+        .get(vessel_id)
+        .map_or(0.0, |vessel| vessel.cost)
+}
@@ -0,0 +1,281 @@
+use crate::structs::constants::{DAYS_IN_PERIOD, HOURS_IN_PERIOD};
+use crate::structs::{context::Context, visit::Visit, voyage::Voyage};
+use crate::utils::utils::cyclic_intervals_overlap;
+use std::cell::RefCell;
+use std::collections::{HashMap, HashSet};
+
+/// Number of violations of each constraint checked by `Solution::is_fully_feasible`.
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+pub struct FeasibilityViolations {
+    /// Pairs of voyages of the same vessel whose periods overlap
+    pub overlapping_voyages: usize,
+    /// Pairs of voyages of the same vessel departing on the same day
+    pub vessel_day_conflicts: usize,
+    /// Visits assigned to a voyage that doesn't contain them
+    pub broken_links: usize,
+    /// Pairs of visits to the same installation departing closer than its departure spread
+    pub spread_violations: usize,
+}
+
+impl FeasibilityViolations {
+    pub fn total(&self) -> usize {
+        self.overlapping_voyages
+            + self.vessel_day_conflicts
+            + self.broken_links
+            + self.spread_violations
+    }
+
+    pub fn is_feasible(&self) -> bool {
+        self.total() == 0
+    }
+}
+
+/// What the constraints see of a non-empty voyage.
+#[derive(Debug, Clone, PartialEq)]
+struct VoyageFootprint {
+    vessel_id: Option<usize>,
+    departure_day: Option<usize>,
+    /// (start, end) of the voyage, if known
+    period: Option<(f64, f64)>,
+    /// (visit id, installation id, departure day of the visit)
+    visits: Vec<(usize, usize, Option<usize>)>,
+}
+
+impl VoyageFootprint {
+    fn of(voyage: &Voyage, visits: &[Visit]) -> Option<Self> {
+        if voyage.visit_ids.is_empty() {
+            // Empty voyages are not part of the schedule
+            return None;
+        }
+        let period = match (voyage.departure_day, voyage.end_time()) {
+            (Some(_), Some(end)) => voyage.start_time().map(|start| (start, end)),
+            _ => None,
+        };
+        Some(Self {
+            vessel_id: voyage.vessel_id,
+            departure_day: voyage.departure_day,
+            period,
+            visits: voyage
+                .visit_ids
+                .iter()
+                .filter_map(|&visit_id| visits.get(visit_id))
+                .map(|visit| (visit.id(), visit.installation_id(), visit.departure_day))
+                .collect(),
+        })
+    }
+
+    fn overlaps(&self, other: &Self) -> bool {
+        match (self.period, other.period) {
+            (Some((a_start, a_end)), Some((b_start, b_end))) => {
+                cyclic_intervals_overlap(a_start, a_end, b_start, b_end, HOURS_IN_PERIOD as f64)
+            }
+            _ => false,
+        }
+    }
+
+    fn same_day(&self, other: &Self) -> bool {
+        self.departure_day.is_some() && self.departure_day == other.departure_day
+    }
+
+    fn contains(&self, visit_id: usize) -> bool {
+        self.visits.iter().any(|&(id, _, _)| id == visit_id)
+    }
+}
+
+/// Violation counters of a solution, updated voyage by voyage instead of checking all pairs again.
+///
+/// `Solution` reports every voyage and visit it changes with `voyage_changed` and `visit_changed`;
+/// `refresh` then only updates the counters for the pairs involving them.
+#[derive(Debug, Clone)]
+pub(crate) struct FeasibilityTracker {
+    footprints: HashMap<usize, VoyageFootprint>,
+    /// vessel id → ids of its voyages
+    vessel_voyages: HashMap<usize, Vec<usize>>,
+    /// installation id → visit id → (departure day, number of voyages containing the visit)
+    installation_visits: HashMap<usize, HashMap<usize, (Option<usize>, usize)>>,
+    broken_links: HashSet<usize>,
+    dirty_voyages: HashSet<usize>,
+    dirty_visits: HashSet<usize>,
+    needs_rebuild: bool,
+    violations: FeasibilityViolations,
+}
+
+impl FeasibilityTracker {
+    /// Tracker that is built from scratch at the first `refresh`.
+    pub(crate) fn new() -> Self {
+        Self {
+            footprints: HashMap::new(),
+            vessel_voyages: HashMap::new(),
+            installation_visits: HashMap::new(),
+            broken_links: HashSet::new(),
+            dirty_voyages: HashSet::new(),
+            dirty_visits: HashSet::new(),
+            needs_rebuild: true,
+            violations: FeasibilityViolations::default(),
+        }
+    }
+
+    pub(crate) fn voyage_changed(&mut self, voyage_id: usize) {
+        self.dirty_voyages.insert(voyage_id);
+    }
+
+    pub(crate) fn visit_changed(&mut self, visit_id: usize) {
+        self.dirty_visits.insert(visit_id);
+    }
+
+    /// Visits may have been changed in any way, e.g. through `Solution::all_visits_mut`.
+    pub(crate) fn invalidate(&mut self) {
+        self.needs_rebuild = true;
+    }
+
+    /// Brings the counters up to date with the changes reported since the last call.
+    pub(crate) fn refresh(
+        &mut self,
+        voyages: &[RefCell<Voyage>],
+        positions: &HashMap<usize, usize>,
+        visits: &[Visit],
+        context: &Context,
+    ) -> FeasibilityViolations {
+        if self.needs_rebuild {
+            *self = Self {
+                needs_rebuild: false,
+                ..Self::new()
+            };
+            self.dirty_voyages = voyages.iter().map(|v| v.borrow().id).collect();
+            self.dirty_visits = (0..visits.len()).collect();
+        }
+        // A changed visit may have a new departure day inside its voyage
+        for &visit_id in &self.dirty_visits {
+            if let Some(voyage_id) = visits.get(visit_id).and_then(|v| v.assigned_voyage_id) {
+                self.dirty_voyages.insert(voyage_id);
+            }
+        }
+        for voyage_id in std::mem::take(&mut self.dirty_voyages) {
+            let current = positions
+                .get(&voyage_id)
+                .and_then(|&index| VoyageFootprint::of(&voyages[index].borrow(), visits));
+            if self.footprints.get(&voyage_id) == current.as_ref() {
+                continue;
+            }
+            if let Some(previous) = self.footprints.remove(&voyage_id) {
+                self.dirty_visits
+                    .extend(previous.visits.iter().map(|&(id, _, _)| id));
+                self.remove_footprint(voyage_id, &previous, context);
+            }
+            if let Some(current) = current {
+                self.dirty_visits
+                    .extend(current.visits.iter().map(|&(id, _, _)| id));
+                self.add_footprint(voyage_id, &current, context);
+                self.footprints.insert(voyage_id, current);
+            }
+        }
+        for visit_id in std::mem::take(&mut self.dirty_visits) {
+            let linked = visits
+                .get(visit_id)
+                .and_then(|visit| visit.assigned_voyage_id)
+                .map_or(true, |voyage_id| {
+                    self.footprints
+                        .get(&voyage_id)
+                        .map_or(false, |footprint| footprint.contains(visit_id))
+                });
+            if linked {
+                self.broken_links.remove(&visit_id);
+            } else {
+                self.broken_links.insert(visit_id);
+            }
+        }
+        self.violations.broken_links = self.broken_links.len();
+        self.violations
+    }
+
+    /// Adds the pairs between a voyage, which is not tracked yet, and the tracked voyages.
+    fn add_footprint(&mut self, voyage_id: usize, footprint: &VoyageFootprint, context: &Context) {
+        if let Some(vessel_id) = footprint.vessel_id {
+            let (overlaps, conflicts) = self.vessel_pairs(vessel_id, footprint);
+            self.violations.overlapping_voyages += overlaps;
+            self.violations.vessel_day_conflicts += conflicts;
+            self.vessel_voyages
+                .entry(vessel_id)
+                .or_default()
+                .push(voyage_id);
+        }
+        for &(visit_id, installation_id, day) in &footprint.visits {
+            let spread = Self::departure_spread(context, installation_id);
+            let departures = self.installation_visits.entry(installation_id).or_default();
+            if let Some((_, count)) = departures.get_mut(&visit_id) {
+                *count += 1;
+                continue;
+            }
+            self.violations.spread_violations += departures
+                .values()
+                .filter(|(other_day, _)| Self::violates_spread(day, *other_day, spread))
+                .count();
+            departures.insert(visit_id, (day, 1));
+        }
+    }
+
+    /// Removes the pairs between a tracked voyage and the other tracked voyages.
+    fn remove_footprint(
+        &mut self,
+        voyage_id: usize,
+        footprint: &VoyageFootprint,
+        context: &Context,
+    ) {
+        if let Some(vessel_id) = footprint.vessel_id {
+            if let Some(ids) = self.vessel_voyages.get_mut(&vessel_id) {
+                ids.retain(|&id| id != voyage_id);
+            }
+            let (overlaps, conflicts) = self.vessel_pairs(vessel_id, footprint);
+            self.violations.overlapping_voyages -= overlaps;
+            self.violations.vessel_day_conflicts -= conflicts;
+        }
+        for &(visit_id, installation_id, _) in &footprint.visits {
+            let spread = Self::departure_spread(context, installation_id);
+            let Some(departures) = self.installation_visits.get_mut(&installation_id) else {
+                continue;
+            };
+            let Some((day, count)) = departures.get_mut(&visit_id) else {
+                continue;
+            };
+            *count -= 1;
+            if *count > 0 {
+                continue;
+            }
+            let day = *day;
+            departures.remove(&visit_id);
+            self.violations.spread_violations -= departures
+                .values()
+                .filter(|(other_day, _)| Self::violates_spread(day, *other_day, spread))
+                .count();
+        }
+    }
+
+    /// Overlapping and same-day pairs of the footprint with the tracked voyages of a vessel.
+    fn vessel_pairs(&self, vessel_id: usize, footprint: &VoyageFootprint) -> (usize, usize) {
+        let mut overlaps = 0;
+        let mut conflicts = 0;
+        for other_id in self.vessel_voyages.get(&vessel_id).into_iter().flatten() {
+            let other = &self.footprints[other_id];
+            overlaps += footprint.overlaps(other) as usize;
+            conflicts += footprint.same_day(other) as usize;
+        }
+        (overlaps, conflicts)
+    }
+
+    fn departure_spread(context: &Context, installation_id: usize) -> i32 {
+        context
+            .problem
+            .get_installation_by_id(installation_id)
+            .map_or(0, |installation| installation.departure_spread as i32)
+    }
+
+    /// Same cyclic day difference as the spread check of `Solution::is_fully_feasible`.
+    fn violates_spread(day_a: Option<usize>, day_b: Option<usize>, spread: i32) -> bool {
+        let (Some(day_a), Some(day_b)) = (day_a, day_b) else {
+            return false;
+        };
+        let period = DAYS_IN_PERIOD as i32;
+        let diff = (day_a as i32 - day_b as i32).abs();
+        diff.min(period - diff) < spread
+    }
+}
@@ -1,9 +1,11 @@
 // structs/mod.rs
 pub mod constants;
 pub mod context;
+pub mod cost;
 pub mod csv_reader;
 pub mod data_loader;
 pub mod distance_manager;
+pub mod feasibility;
 pub mod modification;
 pub mod node;
 pub mod problem_data;
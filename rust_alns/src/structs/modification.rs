@@ -32,6 +32,22 @@ pub trait SolutionModification {
         context: &crate::structs::context::Context,
     ) -> Result<(), String>;
     fn cost(&self) -> f64;
+
+    /// Applies the modification inside a transaction, the solution is left unchanged if it fails.
+    fn apply_transactional(
+        &self,
+        solution: &mut crate::structs::solution::Solution,
+        context: &crate::structs::context::Context,
+    ) -> Result<(), String> {
+        solution.begin_transaction();
+        let result = self.apply(solution, context);
+        if result.is_ok() {
+            solution.commit_transaction();
+        } else {
+            solution.rollback_transaction();
+        }
+        result
+    }
 }
 
 impl SolutionModification for GreedyInsertion {
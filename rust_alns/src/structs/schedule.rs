@@ -9,22 +9,80 @@ use crate::structs::vessel::Vessel;
 use crate::structs::visit::Visit;
 use crate::structs::voyage::Voyage;
 use crate::utils::utils::cyclic_intervals_overlap;
-use std::collections::{BTreeSet, HashMap};
+use std::collections::HashMap;
 use std::rc::Rc;
 
 use super::vessel;
 
+const DAYS: usize = DAYS_IN_PERIOD as usize;
+const HOURS: usize = HOURS_IN_PERIOD as usize;
+
+/// Hours of the period, bit `h` covers the hour [h, h + 1).
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+struct HourMask([u64; (HOURS + 63) / 64]);
+
+impl HourMask {
+    /// Hours touched by the cyclic interval, `None` if the interval can't be screened by hours.
+    ///
+    /// An interval is split at the end of the period like in `cyclic_intervals_overlap`, so two
+    /// intervals overlapping there always share a marked hour.
+    fn of_period(start: f64, end: f64) -> Option<Self> {
+        let period = HOURS as f64;
+        let (first, wrapped) = if end > period {
+            ((start, period), Some((0.0, end - period)))
+        } else {
+            ((start, end), None)
+        };
+        let mut mask = Self::default();
+        for (from, to) in std::iter::once(first).chain(wrapped) {
+            if !(0.0 <= from && from < to && to <= period) {
+                return None;
+            }
+            for hour in (from.floor() as usize)..(to.ceil() as usize) {
+                mask.0[hour / 64] |= 1 << (hour % 64);
+            }
+        }
+        Some(mask)
+    }
+
+    fn union(&mut self, other: &Self) {
+        for (word, other) in self.0.iter_mut().zip(other.0) {
+            *word |= other;
+        }
+    }
+
+    fn intersects(&self, other: &Self) -> bool {
+        self.0
+            .iter()
+            .zip(other.0)
+            .any(|(word, other)| word & other != 0)
+    }
+}
+
+/// Timing of a scheduled voyage.
+#[derive(Debug, Clone, Copy)]
+struct VoyageSlot {
+    start_time: f64,
+    end_time: f64,
+}
+
+/// Voyages of the vessels by day, their timing and the departures of each installation.
+///
+/// Stored in flat vectors indexed by vessel, day and installation, so a schedule is cloned
+/// without rehashing. Every vessel keeps the hours its voyages occupy over the cyclic period,
+/// which answers most availability queries without looking at the voyages.
 #[derive(Debug, Clone)]
 pub struct Schedule {
-    /// voyage_id → departure time
-    pub voyage_start_times: HashMap<usize, f64>,
-    /// voyage_id → end time
-    pub voyage_end_times: HashMap<usize, f64>,
-    /// (vessel_id, day) → voyage_id (only one voyage per vessel per day)
-    pub vessel_day_voyages: HashMap<(usize, usize), usize>,
-
-    /// installation_id → set of visit_ids
-    pub departures_by_installation: HashMap<usize, BTreeSet<usize>>,
+    /// [vessel_id * DAYS_IN_PERIOD + day] → voyage_id (only one voyage per vessel per day)
+    vessel_days: Vec<Option<usize>>,
+    /// [vessel_id] → hours occupied by the voyages in `vessel_days`
+    vessel_hours: Vec<HourMask>,
+    /// Departure and end times of the scheduled voyages
+    voyage_slots: Vec<VoyageSlot>,
+    /// voyage_id → position in `voyage_slots`
+    slot_of_voyage: HashMap<usize, usize>,
+    /// [installation_id] → sorted visit_ids
+    departures: Vec<Vec<usize>>,
 
     /// Indicates if the schedule needs an update
     need_update: bool, // Made private
@@ -33,28 +91,110 @@ pub struct Schedule {
 impl Schedule {
     pub fn empty() -> Self {
         Schedule {
-            voyage_start_times: HashMap::new(),
-            voyage_end_times: HashMap::new(),
-            vessel_day_voyages: HashMap::new(),
-            departures_by_installation: HashMap::new(),
+            vessel_days: Vec::new(),
+            vessel_hours: Vec::new(),
+            voyage_slots: Vec::new(),
+            slot_of_voyage: HashMap::new(),
+            departures: Vec::new(),
             need_update: false,
         }
     }
     pub fn assign_voyage(&mut self, voyage: &Voyage, visits: &[Visit]) {
-        self.voyage_start_times
-            .insert(voyage.id, voyage.start_time().unwrap());
-        self.voyage_end_times
-            .insert(voyage.id, voyage.end_time().unwrap());
-        self.vessel_day_voyages.insert(
-            (voyage.vessel_id.unwrap(), voyage.departure_day.unwrap()),
+        let slot = VoyageSlot {
+            start_time: voyage.start_time().unwrap(),
+            end_time: voyage.end_time().unwrap(),
+        };
+        match self.slot_of_voyage.get(&voyage.id) {
+            Some(&position) => self.voyage_slots[position] = slot,
+            None => {
+                self.slot_of_voyage
+                    .insert(voyage.id, self.voyage_slots.len());
+                self.voyage_slots.push(slot);
+            }
+        }
+        self.set_voyage_on(
+            voyage.vessel_id.unwrap(),
+            voyage.departure_day.unwrap(),
             voyage.id,
         );
+        // The voyage may also be referenced by days of other vessels
+        for vessel_id in 0..self.vessel_hours.len() {
+            if self.vessel_row(vessel_id).contains(&Some(voyage.id)) {
+                self.update_vessel_hours(vessel_id);
+            }
+        }
         for visit_id in &voyage.visit_ids {
-            self.departures_by_installation
-                .entry(visits[*visit_id].installation_id())
-                .or_insert_with(BTreeSet::new)
-                .insert(*visit_id);
+            let installation_id = visits[*visit_id].installation_id();
+            if self.departures.len() <= installation_id {
+                self.departures.resize_with(installation_id + 1, Vec::new);
+            }
+            let departures = &mut self.departures[installation_id];
+            if let Err(position) = departures.binary_search(visit_id) {
+                departures.insert(position, *visit_id);
+            }
+        }
+    }
+
+    /// Departure time of a scheduled voyage.
+    pub fn voyage_start_time(&self, voyage_id: usize) -> Option<f64> {
+        self.slot(voyage_id).map(|slot| slot.start_time)
+    }
+
+    /// End time (back at the base) of a scheduled voyage.
+    pub fn voyage_end_time(&self, voyage_id: usize) -> Option<f64> {
+        self.slot(voyage_id).map(|slot| slot.end_time)
+    }
+
+    /// Number of voyages with known times.
+    pub fn scheduled_voyage_count(&self) -> usize {
+        self.voyage_slots.len()
+    }
+
+    /// Voyage departing with the vessel on the day.
+    pub fn voyage_on(&self, vessel_id: usize, day: usize) -> Option<usize> {
+        self.vessel_days
+            .get(vessel_id * DAYS + day)
+            .copied()
+            .flatten()
+    }
+
+    /// Schedules the voyage for the vessel on the day, returning the voyage it replaces.
+    pub fn set_voyage_on(
+        &mut self,
+        vessel_id: usize,
+        day: usize,
+        voyage_id: usize,
+    ) -> Option<usize> {
+        if self.vessel_hours.len() <= vessel_id {
+            self.vessel_days.resize((vessel_id + 1) * DAYS, None);
+            self.vessel_hours.resize(vessel_id + 1, HourMask::default());
         }
+        let previous = self.vessel_days[vessel_id * DAYS + day].replace(voyage_id);
+        self.update_vessel_hours(vessel_id);
+        previous
+    }
+
+    /// Frees the day of the vessel, returning the voyage scheduled on it.
+    pub fn clear_voyage_on(&mut self, vessel_id: usize, day: usize) -> Option<usize> {
+        let previous = self.vessel_days.get_mut(vessel_id * DAYS + day)?.take();
+        self.update_vessel_hours(vessel_id);
+        previous
+    }
+
+    /// Visits departing to the installation, sorted by id.
+    pub fn departures_to(&self, installation_id: usize) -> &[usize] {
+        self.departures
+            .get(installation_id)
+            .map_or(&[], |departures| departures.as_slice())
+    }
+
+    /// Installations with at least one departure, with their departures.
+    pub fn departures_by_installation(&self) -> impl Iterator<Item = (usize, &[usize])> {
+        self.departures
+            .iter()
+            .enumerate()
+            .filter(|(_, departures)| !departures.is_empty())
+            .map(|(installation_id, departures)| (installation_id, departures.as_slice()))
     }
 
     /// Getter for need_update
@@ -73,24 +213,7 @@ impl Schedule {
         start_time: f64,
         end_time: f64,
     ) -> bool {
-        let vessel_voyages = self.get_all_voyages_for_vessel(vessel_id);
-        for voyage_id in vessel_voyages {
-            if let (Some(start), Some(end)) = (
-                self.voyage_start_times.get(&voyage_id),
-                self.voyage_end_times.get(&voyage_id),
-            ) {
-                if cyclic_intervals_overlap(
-                    *start,
-                    *end,
-                    start_time,
-                    end_time,
-                    HOURS_IN_PERIOD as f64,
-                ) {
-                    return false;
-                }
-            }
-        }
-        true
+        !self.vessel_overlaps(vessel_id, start_time, end_time, |_| false)
     }
     pub fn is_vessel_available_for_voyage(&mut self, vessel_id: usize, voyage: &Voyage) -> bool {
         if let (Some(start), Some(end)) = (voyage.start_time(), voyage.end_time()) {
@@ -100,13 +223,11 @@ impl Schedule {
         }
     }
     pub fn get_all_voyages_for_vessel(&self, vessel_id: usize) -> Vec<usize> {
-        let mut voyages = Vec::new();
-        for day in 0..DAYS_IN_PERIOD {
-            if let Some(&voyage_id) = self.vessel_day_voyages.get(&(vessel_id, day as usize)) {
-                voyages.push(voyage_id);
-            }
-        }
-        voyages
+        self.vessel_row(vessel_id)
+            .iter()
+            .flatten()
+            .copied()
+            .collect()
     }
     /// Checks for overlaps, skipping empty voyages if a closure is provided.
     pub fn overlaps_with_other_voyages<F>(
@@ -120,30 +241,120 @@ impl Schedule {
     where
         F: Fn(usize) -> bool,
     {
-        let voyage_ids = self.get_all_voyages_for_vessel(vessel_id);
-        for id in voyage_ids {
-            if id != voyage_id {
-                if let Some(ref is_empty_fn) = is_empty {
-                    if is_empty_fn(id) {
-                        continue;
-                    }
-                }
-                if let (Some(start), Some(end)) = (
-                    self.voyage_start_times.get(&id),
-                    self.voyage_end_times.get(&id),
-                ) {
-                    if cyclic_intervals_overlap(
-                        *start,
-                        *end,
-                        start_time,
-                        end_time,
-                        HOURS_IN_PERIOD as f64,
-                    ) {
-                        return true;
-                    }
-                }
+        self.vessel_overlaps(vessel_id, start_time, end_time, |id| {
+            id == voyage_id
+                || is_empty
+                    .as_ref()
+                    .map_or(false, |is_empty_fn| is_empty_fn(id))
+        })
+    }
+
+    /// True if a voyage of the vessel, other than the skipped ones, overlaps the period.
+    fn vessel_overlaps(
+        &self,
+        vessel_id: usize,
+        start_time: f64,
+        end_time: f64,
+        skip: impl Fn(usize) -> bool,
+    ) -> bool {
+        let Some(occupied) = self.vessel_hours.get(vessel_id) else {
+            return false;
+        };
+        if HourMask::of_period(start_time, end_time)
+            .map_or(false, |hours| !hours.intersects(occupied))
+        {
+            return false;
+        }
+        self.vessel_row(vessel_id)
+            .iter()
+            .flatten()
+            .filter(|&&id| !skip(id))
+            .filter_map(|&id| self.slot(id))
+            .any(|slot| {
+                cyclic_intervals_overlap(
+                    slot.start_time,
+                    slot.end_time,
+                    start_time,
+                    end_time,
+                    HOURS_IN_PERIOD as f64,
+                )
+            })
+    }
+
+    fn slot(&self, voyage_id: usize) -> Option<&VoyageSlot> {
+        self.slot_of_voyage
+            .get(&voyage_id)
+            .map(|&position| &self.voyage_slots[position])
+    }
+
+    fn vessel_row(&self, vessel_id: usize) -> &[Option<usize>] {
+        self.vessel_days
+            .get(vessel_id * DAYS..(vessel_id + 1) * DAYS)
+            .unwrap_or(&[])
+    }
+
+    /// Recomputes the hours occupied by the voyages of the vessel (at most one per day).
+    fn update_vessel_hours(&mut self, vessel_id: usize) {
+        let mut occupied = HourMask::default();
+        for &voyage_id in self.vessel_row(vessel_id).iter().flatten() {
+            let Some(slot) = self.slot(voyage_id) else {
+                continue;
+            };
+            match HourMask::of_period(slot.start_time, slot.end_time) {
+                Some(hours) => occupied.union(&hours),
+                // Can't be screened, every query has to look at the voyages
+                None => occupied = HourMask([u64::MAX; (HOURS + 63) / 64]),
             }
         }
-        false
+        self.vessel_hours[vessel_id] = occupied;
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn hour_masks_screen_like_cyclic_overlap() {
+        let periods = [
+            (16.0, 30.5),
+            (30.5, 40.0),
+            (40.0, 40.25),
+            (150.0, 175.0),
+            (160.0, 168.0),
+            (0.0, 6.5),
+            (6.0, 7.0),
+            (7.0, 8.0),
+        ];
+        for &(a_start, a_end) in &periods {
+            for &(b_start, b_end) in &periods {
+                let overlap =
+                    cyclic_intervals_overlap(a_start, a_end, b_start, b_end, HOURS as f64);
+                let a = HourMask::of_period(a_start, a_end).unwrap();
+                let b = HourMask::of_period(b_start, b_end).unwrap();
+                // The screen may report false overlaps, never miss one
+                assert!(!overlap || a.intersects(&b));
+            }
+        }
+    }
+
+    #[test]
+    fn vessel_days_follow_assignments() {
+        let mut schedule = Schedule::empty();
+        schedule.slot_of_voyage.insert(4, 0);
+        schedule.voyage_slots.push(VoyageSlot {
+            start_time: 40.0,
+            end_time: 60.0,
+        });
+        assert_eq!(schedule.set_voyage_on(2, 1, 4), None);
+        assert_eq!(schedule.voyage_on(2, 1), Some(4));
+        assert_eq!(schedule.get_all_voyages_for_vessel(2), vec![4]);
+        assert!(schedule.get_all_voyages_for_vessel(0).is_empty());
+        assert!(!schedule.is_vessel_available_for_period(2, 50.0, 70.0));
+        assert!(schedule.is_vessel_available_for_period(2, 60.0, 80.0));
+        assert!(schedule.is_vessel_available_for_period(1, 50.0, 70.0));
+        assert!(!schedule.overlaps_with_other_voyages(2, 4, 50.0, 70.0, None::<fn(usize) -> bool>));
+        assert_eq!(schedule.clear_voyage_on(2, 1), Some(4));
+        assert!(schedule.is_vessel_available_for_period(2, 50.0, 70.0));
     }
 }
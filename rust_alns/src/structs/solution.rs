@@ -1,13 +1,42 @@
+use crate::structs::cost::{self, CostTracker};
+use crate::structs::feasibility::{FeasibilityTracker, FeasibilityViolations};
+use crate::structs::transaction::{Transaction, TransactionLog};
 use crate::structs::{context::Context, schedule::Schedule, visit::Visit, voyage::Voyage};
-use std::cell::RefCell;
+use std::cell::{Ref, RefCell};
+use std::collections::HashMap;
 
-#[derive(Clone)]
+/// Inside a transaction (see `begin_transaction`) voyages, visits and the schedule must be changed
+/// through the methods of `Solution` only, so that the changes are recorded in the undo log.
+/// Voyages changed directly through `voyages` are only seen by the cached costs after the next
+/// `ensure_consistency_updated`.
 pub struct Solution {
     pub voyages: Vec<RefCell<Voyage>>, // All voyages, assigned to vesels
+    voyage_positions: HashMap<usize, usize>, // Voyage id → position in `voyages` (private)
     _visits: Vec<Visit>,               // All visits, including unserved ones (private)
     pub schedule: Schedule,            // Informational class on how voyages are assigned to vessels
     pub total_cost: f64,
     pub is_feasible: bool,
+    journal: TransactionLog, // Undo log of open transactions (private)
+    feasibility: FeasibilityTracker, // Constraint violations, updated with the changed voyages (private)
+    costs: RefCell<CostTracker>, // Cost per voyage and vessel usage, updated with the changed voyages (private)
+}
+
+impl Clone for Solution {
+    /// The copy starts with an empty undo log: transactions open on the original can't be
+    /// committed or rolled back on the copy.
+    fn clone(&self) -> Self {
+        Self {
+            voyages: self.voyages.clone(),
+            voyage_positions: self.voyage_positions.clone(),
+            _visits: self._visits.clone(),
+            schedule: self.schedule.clone(),
+            total_cost: self.total_cost,
+            is_feasible: self.is_feasible,
+            journal: TransactionLog::default(),
+            feasibility: self.feasibility.clone(),
+            costs: RefCell::new(self.costs.borrow().clone()),
+        }
+    }
 }
 
 impl Solution {
@@ -15,22 +44,120 @@ impl Solution {
     pub fn new(visits: Vec<Visit>) -> Self {
         Self {
             voyages: Vec::new(),
+            voyage_positions: HashMap::new(),
             _visits: visits,
             schedule: Schedule::empty(),
             total_cost: 0.0,
             is_feasible: false,
+            journal: TransactionLog::default(),
+            feasibility: FeasibilityTracker::new(),
+            costs: RefCell::new(CostTracker::new()),
         }
     }
+
+    /// Opens a transaction. Until it is committed or rolled back, changes made through the methods
+    /// of `Solution` are recorded in the undo log. Transactions can be nested.
+    pub fn begin_transaction(&mut self) {
+        self.journal
+            .begin(self.total_cost, self.is_feasible, self.schedule.needs_update());
+    }
+
+    /// Keeps the changes of the innermost transaction without copying the solution.
+    ///
+    /// Returns the undo entries of a top-level transaction, which revert the solution to its state
+    /// at `begin_transaction` (see `SolutionDelta`). Nested transactions return no entries.
+    pub fn commit_transaction(&mut self) -> Vec<Transaction> {
+        self.journal.commit()
+    }
+
+    /// Reverts all changes made since the innermost transaction was opened.
+    pub fn rollback_transaction(&mut self) {
+        let delta = self.journal.rollback();
+        delta.revert(self);
+    }
+
+    pub fn in_transaction(&self) -> bool {
+        self.journal.is_active()
+    }
+
+    /// Saves the schedule into the undo log before its first change since the last savepoint.
+    fn backup_schedule(&mut self) {
+        if self.journal.needs_schedule_backup() {
+            self.journal.record_schedule(self.schedule.clone());
+        }
+    }
+
     // Assumed that voyage is feasible and insertion is valid
     pub fn add_voyage(&mut self, voyage: Voyage) {
+        self.backup_schedule();
         self.schedule.assign_voyage(&voyage, &self._visits);
         for visit_id in &voyage.visit_ids {
             let visit = self._visits.get_mut(*visit_id).expect("Invalid visit_id");
+            self.journal.record_with(|| Transaction::ChangeVisit {
+                previous: visit.clone(),
+            });
             visit.assign_to_voyage(voyage.id());
+            self.feasibility.visit_changed(*visit_id);
         }
-        self.voyages.push(RefCell::new(voyage));
+        self.push_voyage(voyage);
         self.schedule.set_need_update(true);
     }
+
+    /// Appends a voyage to `voyages` and to the id index.
+    fn push_voyage(&mut self, voyage: Voyage) {
+        let voyage_id = voyage.id;
+        self.voyage_positions.insert(voyage_id, self.voyages.len());
+        self.voyages.push(RefCell::new(voyage));
+        self.feasibility.voyage_changed(voyage_id);
+        self.costs.get_mut().voyage_changed(voyage_id);
+        self.journal
+            .record_with(|| Transaction::AddVoyage { voyage_id });
+    }
+
+    /// Removes the last voyage, used to revert `Transaction::AddVoyage`.
+    pub(crate) fn pop_voyage(&mut self) -> Option<Voyage> {
+        let voyage = self.voyages.pop()?.into_inner();
+        self.voyage_positions.remove(&voyage.id);
+        self.feasibility.voyage_changed(voyage.id);
+        self.costs.get_mut().voyage_changed(voyage.id);
+        Some(voyage)
+    }
+
+    /// Puts a voyage back at its position, used to revert `Transaction::RemoveVoyage`.
+    pub(crate) fn insert_voyage(&mut self, index: usize, voyage: Voyage) {
+        self.feasibility.voyage_changed(voyage.id);
+        self.costs.get_mut().voyage_changed(voyage.id);
+        self.voyages.insert(index, RefCell::new(voyage));
+        for (position, voyage_cell) in self.voyages.iter().enumerate().skip(index) {
+            self.voyage_positions
+                .insert(voyage_cell.borrow().id, position);
+        }
+    }
+
+    /// Puts back an earlier state of the voyage at `index`, used to revert `Transaction::ChangeVoyage`.
+    pub(crate) fn replace_voyage(&mut self, index: usize, previous: Voyage) {
+        self.feasibility.voyage_changed(previous.id);
+        self.costs.get_mut().voyage_changed(previous.id);
+        *self.voyages[index].borrow_mut() = previous;
+    }
+
+    /// Position of a voyage in `voyages`, looked up by id in constant time.
+    pub fn voyage_position(&self, voyage_id: usize) -> Option<usize> {
+        let index = *self.voyage_positions.get(&voyage_id)?;
+        debug_assert!(
+            self.voyages[index]
+                .try_borrow()
+                .map_or(true, |voyage| voyage.id == voyage_id),
+            "Voyage index out of sync, voyages must be added and removed through Solution"
+        );
+        Some(index)
+    }
+
+    /// Voyage with the given id, looked up in constant time.
+    pub fn voyage_by_id(&self, voyage_id: usize) -> Option<&RefCell<Voyage>> {
+        self.voyage_position(voyage_id)
+            .map(|index| &self.voyages[index])
+    }
     pub fn construct_initial_solution(&mut self, _context: &Context) {
         // Initialize the solution with a greedy or random approach
         // This is a placeholder for the actual implementation
@@ -41,12 +168,25 @@ impl Solution {
     pub fn unassign_visits(&mut self, visit_ids: &[usize]) {
         for visit_index in visit_ids {
             if let Some(visit) = self._visits.get_mut(*visit_index) {
+                self.journal.record_with(|| Transaction::ChangeVisit {
+                    previous: visit.clone(),
+                });
                 visit.unassign();
+                self.feasibility.visit_changed(*visit_index);
             }
         }
-        for voyage_cell in &self.voyages {
+        for (index, voyage_cell) in self.voyages.iter().enumerate() {
             let mut voyage = voyage_cell.borrow_mut();
+            if !voyage.visit_ids.iter().any(|id| visit_ids.contains(id)) {
+                continue;
+            }
+            self.journal.record_with(|| Transaction::ChangeVoyage {
+                index,
+                previous: voyage.clone(),
+            });
             let removed = voyage.remove_visits(visit_ids);
+            self.feasibility.voyage_changed(voyage.id);
+            self.costs.get_mut().voyage_changed(voyage.id);
             if removed > 0 {
                 voyage.route_dirty = true;
                 voyage.state_dirty = true;
@@ -56,7 +196,7 @@ impl Solution {
     }
 
     pub fn optimize_voyage_route(&mut self, voyage: &mut Voyage, context: &Context) {
-        let result = context.tsp_solver.solve_for_voyage(voyage);
+        let result = context.solve_for_voyage(voyage);
         voyage.apply_tsp_result(result);
     }
 
@@ -78,7 +218,38 @@ impl Solution {
     }
 
     /// Checks if the solution meets all the constraints. Might be incomplete.
+    ///
+    /// Uses the violation counters of `feasibility_violations`, which only look at what changed
+    /// since the last check. Debug builds verify them against `check_feasibility_from_scratch`.
     pub fn is_fully_feasible(&mut self, context: &Context) -> bool {
+        let violations = self.feasibility_violations(context);
+        if !violations.is_feasible() {
+            log::debug!("Infeasible: {:?}", violations);
+        }
+        debug_assert_eq!(
+            violations.is_feasible(),
+            self.check_feasibility_from_scratch(context),
+            "Feasibility counters {:?} disagree with the full check",
+            violations
+        );
+        violations.is_feasible()
+    }
+
+    /// Number of violations of each constraint, updated for the voyages and visits changed
+    /// since the last call.
+    pub fn feasibility_violations(&mut self, context: &Context) -> FeasibilityViolations {
+        self.ensure_consistency_updated(context);
+        self.feasibility.refresh(
+            &self.voyages,
+            &self.voyage_positions,
+            &self._visits,
+            context,
+        )
+    }
+
+    /// Checks all constraints on the whole solution, logging the first violation found.
+    /// Slow, meant to verify the incremental check of `is_fully_feasible`.
+    pub fn check_feasibility_from_scratch(&mut self, context: &Context) -> bool {
         self.ensure_consistency_updated(context);
         use crate::structs::constants::HOURS_IN_PERIOD;
         use crate::utils::utils::cyclic_intervals_overlap;
@@ -121,10 +292,10 @@ impl Solution {
         // All visits must be linked back correctly
         for visit in &self._visits {
             if let Some(voyage_id) = visit.assigned_voyage_id {
-                if !self.voyages.iter().any(|v| {
-                    let v = v.borrow();
-                    v.id == voyage_id && v.visit_ids.contains(&visit.id())
-                }) {
+                if !self
+                    .voyage_by_id(voyage_id)
+                    .map_or(false, |v| v.borrow().visit_ids.contains(&visit.id()))
+                {
                     log::warn!("Infeasible: Visit {} assigned to voyage {} but not found in voyage's visit_ids", visit.id(), voyage_id);
                     return false;
                 }
@@ -134,31 +305,31 @@ impl Solution {
         for voyage_cell in &self.voyages {
             let voyage = voyage_cell.borrow();
             let voyage_id = voyage.id;
-            if !self.schedule.voyage_start_times.contains_key(&voyage_id) {
+            if self.schedule.voyage_start_time(voyage_id).is_none() {
                 log::warn!(
-                    "Infeasible: Voyage {} missing from schedule.voyage_start_times",
+                    "Infeasible: Voyage {} has no start time in the schedule",
                     voyage_id
                 );
                 return false;
             }
-            if !self.schedule.voyage_end_times.contains_key(&voyage_id) {
+            if self.schedule.voyage_end_time(voyage_id).is_none() {
                 log::warn!(
-                    "Infeasible: Voyage {} missing from schedule.voyage_end_times",
+                    "Infeasible: Voyage {} has no end time in the schedule",
                     voyage_id
                 );
                 return false;
             }
-            let vessel_day_key = (voyage.vessel_id.unwrap(), voyage.departure_day.unwrap());
-            if let Some(&scheduled_voyage_id) =
-                self.schedule.vessel_day_voyages.get(&vessel_day_key)
+            if let Some(scheduled_voyage_id) = self
+                .schedule
+                .voyage_on(voyage.vessel_id.unwrap(), voyage.departure_day.unwrap())
             {
                 if scheduled_voyage_id != voyage_id {
-                    log::warn!("Infeasible: Schedule vessel_day_voyages for vessel {:?} day {:?} points to voyage {} but expected {}", voyage.vessel_id, voyage.departure_day, scheduled_voyage_id, voyage_id);
+                    log::warn!("Infeasible: Schedule for vessel {:?} day {:?} points to voyage {} but expected {}", voyage.vessel_id, voyage.departure_day, scheduled_voyage_id, voyage_id);
                     return false;
                 }
             } else {
                 log::warn!(
-                    "Infeasible: No entry in schedule.vessel_day_voyages for vessel {:?} day {:?}",
+                    "Infeasible: No voyage scheduled for vessel {:?} day {:?}",
                     voyage.vessel_id,
                     voyage.departure_day
                 );
@@ -166,13 +337,17 @@ impl Solution {
             }
             for visit_id in &voyage.visit_ids {
                 let inst_id = self._visits[*visit_id].installation_id();
-                if let Some(set) = self.schedule.departures_by_installation.get(&inst_id) {
-                    if !set.contains(visit_id) {
-                        log::warn!("Infeasible: Visit {} (installation {}) not found in schedule.departures_by_installation", visit_id, inst_id);
-                        return false;
-                    }
-                } else {
-                    log::warn!("Infeasible: No entry in schedule.departures_by_installation for installation {}", inst_id);
+                if self
+                    .schedule
+                    .departures_to(inst_id)
+                    .binary_search(visit_id)
+                    .is_err()
+                {
+                    log::warn!(
+                        "Infeasible: Visit {} (installation {}) not found in schedule departures",
+                        visit_id,
+                        inst_id
+                    );
                     return false;
                 }
             }
@@ -180,8 +355,8 @@ impl Solution {
 
         // Check spread of departures constraint
         use crate::structs::constants::DAYS_IN_PERIOD;
-        for (installation_id, departures) in &self.schedule.departures_by_installation {
-            let installation = match context.problem.get_installation_by_id(*installation_id) {
+        for (installation_id, departures) in self.schedule.departures_by_installation() {
+            let installation = match context.problem.get_installation_by_id(installation_id) {
                 Some(inst) => inst,
                 None => continue,
             };
@@ -244,15 +419,32 @@ impl Solution {
     }
 
     pub fn ensure_consistency_updated(&mut self, context: &Context) {
+        // Voyages may have been changed directly, without telling the cost tracker
+        self.costs.get_mut().invalidate();
         // Remove all empty voyages before any updates
         let before = self.voyages.len();
-        self.voyages.retain(|voyage_cell| {
-            let voyage = voyage_cell.borrow();
-            !voyage.is_empty()
-        });
+        let voyages = std::mem::replace(&mut self.voyages, Vec::with_capacity(before));
+        for voyage_cell in voyages {
+            if voyage_cell.borrow().is_empty() {
+                self.feasibility.voyage_changed(voyage_cell.borrow().id);
+                let index = self.voyages.len();
+                self.journal.record_with(|| Transaction::RemoveVoyage {
+                    index,
+                    voyage: voyage_cell.into_inner(),
+                });
+            } else {
+                self.voyages.push(voyage_cell);
+            }
+        }
         let after = self.voyages.len();
         let removed = before - after;
         if removed > 0 {
+            self.voyage_positions = self
+                .voyages
+                .iter()
+                .enumerate()
+                .map(|(index, voyage_cell)| (voyage_cell.borrow().id, index))
+                .collect();
             log::debug!(
                 "Removed {} empty voyages from solution ({} -> {})",
                 removed,
@@ -264,8 +456,15 @@ impl Solution {
         }
         let mut route_updates = 0;
         let mut state_updates = 0;
-        for voyage_cell in &self.voyages {
+        for (index, voyage_cell) in self.voyages.iter().enumerate() {
             let mut voyage = voyage_cell.borrow_mut();
+            if voyage.route_dirty || voyage.state_dirty {
+                self.journal.record_with(|| Transaction::ChangeVoyage {
+                    index,
+                    previous: voyage.clone(),
+                });
+                self.feasibility.voyage_changed(voyage.id);
+            }
             // Only update route/timing if route_dirty is set (do NOT re-optimize route if not needed)
             if voyage.route_dirty {
                 // Update timing and metadata using the current visit_ids order, do not solve TSP
@@ -299,7 +498,10 @@ impl Solution {
     pub fn ensure_schedule_is_updated(&mut self) {
         if !self.is_schedule_up_to_date() {
             // Rebuild the schedule from current voyages and visits
-            self.schedule = Schedule::empty();
+            let previous = std::mem::replace(&mut self.schedule, Schedule::empty());
+            if self.journal.needs_schedule_backup() {
+                self.journal.record_schedule(previous);
+            }
             for voyage_cell in &self.voyages {
                 let voyage = voyage_cell.borrow();
                 // Skip empty voyages (idle voyages)
@@ -312,6 +514,23 @@ impl Solution {
         }
     }
 
+    /// Brings the schedule up to date after visits were inserted into a single voyage.
+    ///
+    /// Gives the same schedule as `ensure_schedule_is_updated` if the schedule was up to date before
+    /// the insertions and nothing else changed since, but only the changed voyage is processed.
+    pub fn update_schedule_for_voyage(&mut self, voyage_id: usize) {
+        let Some(index) = self.voyage_position(voyage_id) else {
+            self.ensure_schedule_is_updated();
+            return;
+        };
+        self.backup_schedule();
+        let voyage = self.voyages[index].borrow();
+        if !voyage.is_empty() {
+            self.schedule.assign_voyage(&voyage, &self._visits);
+        }
+        self.schedule.set_need_update(false);
+    }
+
     pub fn is_schedule_up_to_date(&self) -> bool {
         !self.schedule.needs_update()
     }
@@ -339,31 +558,38 @@ impl Solution {
         let mut costs = Vec::new();
         for voyage_cell in self.voyages.iter() {
             let voyage = voyage_cell.borrow();
-            if !self.visit_insertion_is_possible(context, visit, voyage.id) {
-                continue;
-            }
-            let tsp_result = context
-                .tsp_solver
-                .evaluate_greedy_insertion(&*voyage, visit);
-            let new_start = voyage.start_time().unwrap_or(0.0);
-            let new_end = tsp_result.end_time;
-            let vessel_id = match voyage.vessel_id {
-                Some(id) => id,
-                None => continue,
-            };
-
-            if self.overlaps_with_real_voyages(vessel_id, voyage.id, new_start, new_end) {
-                continue;
+            if let Some(cost) = self.visit_insertion_cost(context, visit, &voyage) {
+                costs.push((voyage.id(), cost));
             }
-
-            let cost = voyage.added_cost_from_result(&tsp_result, context);
-            costs.push((voyage.id(), cost));
         }
         costs.sort_by(|a, b| a.1.partial_cmp(&b.1).unwrap());
         costs.truncate(k);
         costs
     }
 
+    /// Cost of inserting a visit into a voyage at its cheapest position.
+    ///
+    /// Returns `None` if the insertion is not possible or the changed voyage would overlap another
+    /// voyage of its vessel. Like `top_k_visit_insertion_costs`, it needs an up-to-date schedule.
+    pub fn visit_insertion_cost(
+        &self,
+        context: &Context,
+        visit: usize,
+        voyage: &Voyage,
+    ) -> Option<f64> {
+        if !self.visit_insertion_is_possible_into(context, visit, voyage, &[]) {
+            return None;
+        }
+        let tsp_result = context.evaluate_greedy_insertion(voyage, visit);
+        let new_start = voyage.start_time().unwrap_or(0.0);
+        let new_end = tsp_result.end_time;
+        let vessel_id = voyage.vessel_id?;
+        if self.overlaps_with_real_voyages(vessel_id, voyage.id, new_start, new_end) {
+            return None;
+        }
+        Some(voyage.added_cost_from_result(&tsp_result, context))
+    }
+
     // Same installation not visited on the same day, spread of departures not violated.
     pub fn visit_insertion_is_possible(
         &self,
@@ -371,85 +597,32 @@ impl Solution {
         visit_id: usize,
         voyage_id: usize,
     ) -> bool {
-        let visit = match self.visit(visit_id) {
-            Some(v) => v,
+        let voyage = match self.voyage_by_id(voyage_id) {
+            Some(v) => v.borrow(),
             None => return false,
         };
-        let voyage = match self.voyages.iter().find_map(|v| {
-            let v = v.borrow();
-            if v.id == voyage_id {
-                Some(v)
-            } else {
-                None
-            }
-        }) {
-            Some(v) => v,
-            None => return false,
-        };
-        let installation_id = visit.installation_id();
-        let departure_day = match visit.departure_day {
-            Some(day) => day,
-            None => return false, // Can't check spread if no departure day
-        };
-        if voyage
-            .visit_ids
-            .iter()
-            .any(|&vid| self._visits[vid].installation_id() == installation_id)
-        {
-            return false;
-        }
-        // Get the installation to check spread
-        let installation = match context.problem.get_installation_by_id(installation_id) {
-            Some(inst) => inst,
-            None => return false,
-        };
-        let spread = installation.departure_spread as i32;
-        let period = crate::structs::constants::DAYS_IN_PERIOD as i32;
-        // Check all other visits to this installation
-        if let Some(departures) = self
-            .schedule
-            .departures_by_installation
-            .get(&installation_id)
-        {
-            for &other_visit_id in departures {
-                if other_visit_id == visit_id {
-                    continue;
-                }
-                if let Some(other_visit) = self.visit(other_visit_id) {
-                    if let Some(other_day) = other_visit.departure_day {
-                        // Cyclic difference
-                        let diff = (departure_day as i32 - other_day as i32)
-                            .abs()
-                            .min(period - (departure_day as i32 - other_day as i32).abs());
-                        if diff < spread {
-                            return false;
-                        }
-                    }
-                }
-            }
-        }
-        // Prevent inserting the same installation twice in the voyage
-        // Check vessel capacity
-        let vessel_id = match voyage.vessel_id {
-            Some(id) => id,
-            None => return false,
-        };
-        let vessel = match context.problem.vessels.get(vessel_id) {
-            Some(v) => v,
-            None => return false,
-        };
-        // TODO: Voyage's load is calculated from scratch, not from the current state. It prevents problems, but it is not the place to do.
-        // I might change it to first check if it is updated, and if not, calculate it.
-        let current_load: u32 = voyage
-            .visit_ids
-            .iter()
-            .map(|vid| self._visits[*vid].demand())
-            .sum();
-        let visit_demand = visit.demand();
-        if (current_load + visit_demand) as f64 > vessel.deck_capacity {
-            return false;
-        }
-        true
+        self.visit_insertion_is_possible_into(context, visit_id, &voyage, &[])
+    }
+
+    /// Same as `visit_insertion_is_possible` for a voyage the caller has already looked up.
+    ///
+    /// Visits in `unassigned` are treated as if they had been unassigned already: they are ignored in
+    /// the voyage and in the departures of their installations. Used to evaluate moves without applying them.
+    pub fn visit_insertion_is_possible_into(
+        &self,
+        context: &Context,
+        visit_id: usize,
+        voyage: &Voyage,
+        unassigned: &[usize],
+    ) -> bool {
+        insertion_is_possible(
+            &self._visits,
+            &self.schedule,
+            context,
+            visit_id,
+            voyage,
+            unassigned,
+        )
     }
 
     pub fn greedy_insert_visit(
@@ -458,29 +631,70 @@ impl Solution {
         voyage_id: usize,
         context: &Context,
     ) -> Result<(), String> {
-        let voyage_cell = self
-            .voyages
-            .iter()
-            .find(|v| v.borrow().id == voyage_id)
+        let index = self
+            .voyage_position(voyage_id)
             .ok_or_else(|| format!("Voyage {} not found", voyage_id))?;
 
         {
-            let mut voyage = voyage_cell.borrow_mut();
-            let result = context
-                .tsp_solver
-                .evaluate_greedy_insertion(&*voyage, visit_id);
+            let mut voyage = self.voyages[index].borrow_mut();
+            let result = context.evaluate_greedy_insertion(&*voyage, visit_id);
+            self.journal.record_with(|| Transaction::ChangeVoyage {
+                index,
+                previous: voyage.clone(),
+            });
             voyage.apply_tsp_result(result);
             // Update the voyage load after insertion
             self.update_voyage_load(&mut voyage);
         }
+        self.feasibility.voyage_changed(voyage_id);
+        self.costs.get_mut().voyage_changed(voyage_id);
         let visit = self
-            .visit_mut(visit_id)
+            ._visits
+            .get_mut(visit_id)
             .ok_or_else(|| format!("Visit {} not found", visit_id))?;
+        self.journal.record_with(|| Transaction::ChangeVisit {
+            previous: visit.clone(),
+        });
         visit.assign_to_voyage(voyage_id);
+        self.feasibility.visit_changed(visit_id);
         self.schedule.set_need_update(true);
         Ok(())
     }
 
+    /// Moves a voyage to another vessel keeping its departure day and route.
+    /// Returns the voyage previously scheduled for the new vessel on that day, if any.
+    pub fn reassign_voyage_vessel(
+        &mut self,
+        voyage_id: usize,
+        vessel_id: usize,
+    ) -> Result<Option<usize>, String> {
+        let index = self
+            .voyage_position(voyage_id)
+            .ok_or_else(|| format!("Voyage {} not found", voyage_id))?;
+        let (previous_vessel, departure_day) = {
+            let mut voyage = self.voyages[index].borrow_mut();
+            self.journal.record_with(|| Transaction::ChangeVoyage {
+                index,
+                previous: voyage.clone(),
+            });
+            let previous_vessel = voyage.vessel_id;
+            voyage.vessel_id = Some(vessel_id);
+            (previous_vessel, voyage.departure_day)
+        };
+        self.feasibility.voyage_changed(voyage_id);
+        self.costs.get_mut().voyage_changed(voyage_id);
+        let mut displaced_voyage = None;
+        if let Some(day) = departure_day {
+            self.backup_schedule();
+            if let Some(old_vessel) = previous_vessel {
+                self.schedule.clear_voyage_on(old_vessel, day);
+            }
+            displaced_voyage = self.schedule.set_voyage_on(vessel_id, day, voyage_id);
+        }
+        self.schedule.set_need_update(true);
+        Ok(displaced_voyage)
+    }
+
     pub fn optimal_insert_visit(
         &mut self,
         _visit_id: usize,
@@ -524,6 +738,7 @@ impl Solution {
 
     /// Returns a mutable reference to the visit at the given id (index).
     pub fn visit_mut(&mut self, id: usize) -> Option<&mut Visit> {
+        self.feasibility.visit_changed(id);
         self._visits.get_mut(id)
     }
 
@@ -534,9 +749,22 @@ impl Solution {
 
     /// Returns a mutable slice of all visits.
     pub fn all_visits_mut(&mut self) -> &mut [Visit] {
+        self.feasibility.invalidate();
         &mut self._visits
     }
 
+    /// Runs `f` on a read-only view of the solution that can be shared between threads.
+    pub fn with_view<R>(&self, f: impl FnOnce(&SolutionView) -> R) -> R {
+        let voyages: Vec<Ref<Voyage>> = self.voyages.iter().map(|v| v.borrow()).collect();
+        let view = SolutionView {
+            voyages: voyages.iter().map(|v| &**v).collect(),
+            schedule: &self.schedule,
+            visits: &self._visits,
+            positions: &self.voyage_positions,
+        };
+        f(&view)
+    }
+
     // Ensure schedule is up-to-date before output/visualization
     pub fn get_schedule(&mut self, context: &Context) -> &Schedule {
         self.ensure_consistency_updated(context);
@@ -572,8 +800,9 @@ impl Solution {
                 voyage.arrival_time = Some(start_time);
                 voyage.end_time_at_base = Some(start_time);
                 voyage.load = Some(0);
+                self.backup_schedule();
                 self.schedule.assign_voyage(&voyage, &self._visits);
-                self.voyages.push(std::cell::RefCell::new(voyage));
+                self.push_voyage(voyage);
             }
             vessel_has_voyage[idle_vessel_id] = true;
         }
@@ -585,12 +814,7 @@ impl Solution {
             let mut assigned_days = std::collections::HashSet::new();
             for day in 0..DAYS_IN_PERIOD {
                 let day_usize = day as usize;
-                if self
-                    .schedule
-                    .vessel_day_voyages
-                    .get(&(vessel_id, day_usize))
-                    .is_some()
-                {
+                if self.schedule.voyage_on(vessel_id, day_usize).is_some() {
                     assigned_days.insert(day_usize);
                 }
             }
@@ -611,8 +835,9 @@ impl Solution {
                 voyage.arrival_time = Some(start_time);
                 voyage.end_time_at_base = Some(start_time);
                 voyage.load = Some(0);
+                self.backup_schedule();
                 self.schedule.assign_voyage(&voyage, &self._visits);
-                self.voyages.push(std::cell::RefCell::new(voyage));
+                self.push_voyage(voyage);
             }
         }
         // It is redundant since we just filled the schedule, but it indicates that the schedule has empty voyages now.
@@ -626,18 +851,8 @@ impl Solution {
 
     /// Returns true if the voyage with the given id is empty (no visits).
     pub fn is_empty_voyage_by_id(&self, voyage_id: usize) -> bool {
-        // Try to find the voyage in the current solution
-        if let Some(voyage) = self.voyages.iter().find_map(|v| {
-            let v = v.borrow();
-            if v.id == voyage_id {
-                Some(v)
-            } else {
-                None
-            }
-        }) {
-            return Self::is_empty_voyage(&voyage);
-        }
-        false
+        self.voyage_by_id(voyage_id)
+            .map_or(false, |voyage| Self::is_empty_voyage(&voyage.borrow()))
     }
 
     /// Checks for overlaps with real (non-empty) voyages only.
@@ -690,8 +905,9 @@ impl Solution {
                 voyage.arrival_time = Some(start_time);
                 voyage.end_time_at_base = Some(start_time);
                 voyage.load = Some(0);
+                self.backup_schedule();
                 self.schedule.assign_voyage(&voyage, &self._visits);
-                self.voyages.push(std::cell::RefCell::new(voyage));
+                self.push_voyage(voyage);
             }
             vessel_has_voyage[idle_vessel_id] = true;
         }
@@ -703,12 +919,7 @@ impl Solution {
             let mut assigned_days = std::collections::HashSet::new();
             for day in 0..DAYS_IN_PERIOD {
                 let day_usize = day as usize;
-                if self
-                    .schedule
-                    .vessel_day_voyages
-                    .get(&(vessel_id, day_usize))
-                    .is_some()
-                {
+                if self.schedule.voyage_on(vessel_id, day_usize).is_some() {
                     assigned_days.insert(day_usize);
                 }
             }
@@ -729,8 +940,9 @@ impl Solution {
                 voyage.arrival_time = Some(start_time);
                 voyage.end_time_at_base = Some(start_time);
                 voyage.load = Some(0);
+                self.backup_schedule();
                 self.schedule.assign_voyage(&voyage, &self._visits);
-                self.voyages.push(std::cell::RefCell::new(voyage));
+                self.push_voyage(voyage);
             }
         }
         self.schedule.set_need_update(true);
@@ -740,155 +952,185 @@ impl Solution {
     ///
     /// fixed cost = number of vessels used * vessel cost
     /// variable cost = sailing_time * fcs * fuel_cost + (wait_time + service_time) * fcw * fuel_cost
+    ///
+    /// The cost of each voyage is cached and only recomputed for voyages changed since the last call,
+    /// or for all voyages after `ensure_consistency_updated`.
+    /// Debug builds verify the total against `cost_from_scratch`.
     pub fn cost_with_context(&self, context: &Context) -> f64 {
-        use std::collections::HashSet;
-        let mut vessels_used = HashSet::new();
-        let mut fixed_cost = 0.0;
-        let mut variable_cost = 0.0;
-        let fuel_cost = context.problem.lng_cost();
-        for voyage_cell in &self.voyages {
-            let voyage = voyage_cell.borrow();
-            // Only count non-empty voyages
-            if voyage.visit_ids.is_empty() {
-                continue;
-            }
-            let vessel_id = match voyage.vessel_id {
-                Some(id) => id,
-                None => continue,
-            };
-            vessels_used.insert(vessel_id);
-            let vessel = match context.problem.vessels.get(vessel_id) {
-                Some(v) => v,
-                None => continue,
-            };
-            let sailing_time = voyage.sailing_time.unwrap_or(0.0);
-            let waiting_time = voyage.waiting_time.unwrap_or(0.0);
-            // Service time: sum of service times for all visits in this voyage
-            let service_time: f64 = voyage
-                .visit_ids
-                .iter()
-                .filter_map(|&vid| self._visits.get(vid))
-                .map(|v| {
-                    context
-                        .problem
-                        .installations
-                        .get(v.installation_id())
-                        .map(|inst| inst.get_service_time())
-                        .unwrap_or(0.0)
-                })
-                .sum();
-            let sailing_fuel = sailing_time * vessel.fcs;
-            let idle_fuel = (waiting_time + service_time) * vessel.fcw;
-            variable_cost += (sailing_fuel + idle_fuel) * fuel_cost;
-        }
-        for &vessel_id in &vessels_used {
-            if let Some(vessel) = context.problem.vessels.get(vessel_id) {
-                fixed_cost += vessel.cost;
-            }
-        }
+        let costs = self.refreshed_costs(context);
         log::debug!(
             "Cost calculation: fixed_cost = {:.2}, variable_cost = {:.2}, total = {:.2}",
-            fixed_cost,
-            variable_cost,
-            fixed_cost + variable_cost
+            costs.fixed_cost(),
+            costs.variable_cost(),
+            costs.total()
         );
-        fixed_cost + variable_cost
+        debug_assert!(
+            {
+                let expected = self.cost_from_scratch(context);
+                (costs.total() - expected).abs() <= 1e-6 * expected.abs().max(1.0)
+            },
+            "Cached cost {} disagrees with the full computation",
+            costs.total()
+        );
+        costs.total()
     }
 
-    /// Returns the cost of the solution if the given visit were unassigned (removal cost).
-    /// This version uses the same cost logic as cost_with_context.
-    /// Fast removal cost: calculates cost difference by removing the visit from the voyage, but does not update the full solution or re-solve TSP.
-    /// Not checked for correctness! Only a quick estimate, does not update all state.
-    pub fn cost_without_visit_fast(&self, visit_id: usize, context: &Context) -> f64 {
-        use std::collections::HashMap;
+    /// Computes the total cost from all voyages, ignoring the cached voyage costs.
+    pub fn cost_from_scratch(&self, context: &Context) -> f64 {
+        let mut vessels_used = std::collections::BTreeSet::new();
         let mut fixed_cost = 0.0;
         let mut variable_cost = 0.0;
-        let fuel_cost = context.problem.lng_cost();
-        let mut vessel_usage: HashMap<usize, usize> = HashMap::new();
         for voyage_cell in &self.voyages {
-            let voyage = voyage_cell.borrow();
-            if voyage.visit_ids.contains(&visit_id) {
-                let mut new_voyage = voyage.clone();
-                new_voyage.visit_ids.retain(|&id| id != visit_id);
-                if new_voyage.visit_ids.is_empty() {
-                    continue;
-                }
-                let vessel_id = match new_voyage.vessel_id {
-                    Some(id) => id,
-                    None => continue,
-                };
-                *vessel_usage.entry(vessel_id).or_insert(0) += 1;
-                let vessel = match context.problem.vessels.get(vessel_id) {
-                    Some(v) => v,
-                    None => continue,
-                };
-                let sailing_time = new_voyage.sailing_time.unwrap_or(0.0);
-                let waiting_time = new_voyage.waiting_time.unwrap_or(0.0);
-                let service_time: f64 = new_voyage
-                    .visit_ids
-                    .iter()
-                    .filter_map(|&vid| self._visits.get(vid))
-                    .map(|v| {
-                        context
-                            .problem
-                            .installations
-                            .get(v.installation_id())
-                            .map(|inst| inst.get_service_time())
-                            .unwrap_or(0.0)
-                    })
-                    .sum();
-                let sailing_fuel = sailing_time * vessel.fcs;
-                let idle_fuel = (waiting_time + service_time) * vessel.fcw;
-                variable_cost += (sailing_fuel + idle_fuel) * fuel_cost;
-            } else if !voyage.visit_ids.is_empty() {
-                let vessel_id = match voyage.vessel_id {
-                    Some(id) => id,
-                    None => continue,
-                };
-                *vessel_usage.entry(vessel_id).or_insert(0) += 1;
-                let vessel = match context.problem.vessels.get(vessel_id) {
-                    Some(v) => v,
-                    None => continue,
-                };
-                let sailing_time = voyage.sailing_time.unwrap_or(0.0);
-                let waiting_time = voyage.waiting_time.unwrap_or(0.0);
-                let service_time: f64 = voyage
-                    .visit_ids
-                    .iter()
-                    .filter_map(|&vid| self._visits.get(vid))
-                    .map(|v| {
-                        context
-                            .problem
-                            .installations
-                            .get(v.installation_id())
-                            .map(|inst| inst.get_service_time())
-                            .unwrap_or(0.0)
-                    })
-                    .sum();
-                let sailing_fuel = sailing_time * vessel.fcs;
-                let idle_fuel = (waiting_time + service_time) * vessel.fcw;
-                variable_cost += (sailing_fuel + idle_fuel) * fuel_cost;
+            if let Some((vessel_id, cost)) =
+                cost::voyage_cost(&voyage_cell.borrow(), &self._visits, context)
+            {
+                vessels_used.insert(vessel_id);
+                variable_cost += cost;
             }
         }
-        for (&vessel_id, &count) in &vessel_usage {
-            if count > 0 {
-                if let Some(vessel) = context.problem.vessels.get(vessel_id) {
-                    fixed_cost += vessel.cost;
-                }
-            }
+        for &vessel_id in &vessels_used {
+            fixed_cost += cost::vessel_fixed_cost(vessel_id, context);
         }
         fixed_cost + variable_cost
     }
 
-    /// Accurate removal cost: clones the solution, unassigns the visit, updates the affected voyage, and computes the cost.
+    /// Cost tracker brought up to date with the changed voyages.
+    fn refreshed_costs(&self, context: &Context) -> std::cell::RefMut<'_, CostTracker> {
+        let mut costs = self.costs.borrow_mut();
+        costs.refresh(
+            &self.voyages,
+            &self.voyage_positions,
+            &self._visits,
+            context,
+        );
+        costs
+    }
+
+    /// Number of non-empty voyages sailed by the vessel.
+    pub fn vessel_usage(&self, vessel_id: usize, context: &Context) -> usize {
+        self.refreshed_costs(context).vessel_usage(vessel_id)
+    }
+
+    /// Returns the fuel cost of a voyage sailed by the given vessel, without the fixed vessel cost.
+    ///
+    /// The route and its timing are passed explicitly, so routes that are not applied yet can be evaluated.
+    pub fn voyage_variable_cost(
+        &self,
+        vessel_id: usize,
+        visit_ids: &[usize],
+        sailing_time: f64,
+        waiting_time: f64,
+        context: &Context,
+    ) -> f64 {
+        cost::variable_cost(
+            &self._visits,
+            vessel_id,
+            visit_ids,
+            sailing_time,
+            waiting_time,
+            context,
+        )
+    }
+
+    /// Change of the total cost if the visit were removed from its voyage.
+    ///
+    /// Only the voyage of the visit is evaluated. With `update_route` the timing of the remaining
+    /// route is recomputed (as `ensure_consistency_updated` would), otherwise the current sailing and
+    /// waiting times are kept. Returns 0 for visits that are not in a voyage.
+    pub fn removal_cost_delta(
+        &self,
+        visit_id: usize,
+        context: &Context,
+        update_route: bool,
+    ) -> f64 {
+        let Some(voyage_cell) = self
+            .visit(visit_id)
+            .and_then(|visit| visit.assigned_voyage_id)
+            .and_then(|voyage_id| self.voyage_by_id(voyage_id))
+        else {
+            return 0.0;
+        };
+        let voyage = voyage_cell.borrow();
+        if !voyage.visit_ids.contains(&visit_id) {
+            return 0.0;
+        }
+        let mut changed = voyage.clone();
+        changed.visit_ids.retain(|&id| id != visit_id);
+        if update_route && !changed.is_empty() {
+            changed.update_details(&context.tsp_solver);
+        }
+        self.voyage_change_delta(&voyage, &changed, context)
+    }
+
+    /// Change of the total cost if the visit were inserted into the voyage at its cheapest position.
+    ///
+    /// Only the voyage is evaluated; whether the insertion is possible is not checked.
+    pub fn insertion_cost_delta(&self, visit_id: usize, voyage: &Voyage, context: &Context) -> f64 {
+        let mut changed = voyage.clone();
+        changed.apply_tsp_result(context.evaluate_greedy_insertion(voyage, visit_id));
+        self.voyage_change_delta(voyage, &changed, context)
+    }
+
+    /// Change of the total cost if `voyage` were replaced by `changed`, from the cached voyage costs.
+    fn voyage_change_delta(&self, voyage: &Voyage, changed: &Voyage, context: &Context) -> f64 {
+        self.refreshed_costs(context)
+            .replacement_delta(voyage, changed, &self._visits, context)
+    }
+
+    /// Change of the total cost if all visits of the voyage were removed, dropping the voyage.
+    pub fn emptied_voyage_cost_delta(&self, voyage_id: usize, context: &Context) -> f64 {
+        let Some(voyage_cell) = self.voyage_by_id(voyage_id) else {
+            return 0.0;
+        };
+        let voyage = voyage_cell.borrow();
+        let mut changed = voyage.clone();
+        changed.visit_ids.clear();
+        self.voyage_change_delta(&voyage, &changed, context)
+    }
+
+    /// `removal_cost_delta` with the route timing updated, for every visit of a voyage in route order.
+    ///
+    /// Evaluated in one pass over the voyage against its cached cost.
+    pub fn voyage_removal_cost_deltas(
+        &self,
+        voyage_id: usize,
+        context: &Context,
+    ) -> Vec<(usize, f64)> {
+        let Some(voyage_cell) = self.voyage_by_id(voyage_id) else {
+            return Vec::new();
+        };
+        let voyage = voyage_cell.borrow();
+        let costs = self.refreshed_costs(context);
+        let mut changed = voyage.clone();
+        voyage
+            .visit_ids
+            .iter()
+            .map(|&visit_id| {
+                changed.visit_ids.clear();
+                changed
+                    .visit_ids
+                    .extend(voyage.visit_ids.iter().filter(|&&id| id != visit_id));
+                if !changed.is_empty() {
+                    changed.update_details(&context.tsp_solver);
+                }
+                let delta = costs.replacement_delta(&voyage, &changed, &self._visits, context);
+                (visit_id, delta)
+            })
+            .collect()
+    }
+
+    /// Returns the cost of the solution if the given visit were unassigned (removal cost).
+    /// Fast removal cost: removes the visit from its voyage keeping the voyage's timing, does not re-solve TSP.
+    /// Only a quick estimate, see `removal_cost_delta`.
+    pub fn cost_without_visit_fast(&self, visit_id: usize, context: &Context) -> f64 {
+        self.cost_with_context(context) + self.removal_cost_delta(visit_id, context, false)
+    }
+
+    /// Accurate removal cost: removes the visit from its voyage and recomputes the timing of the remaining route.
     /// For best accuracy, the route should be re-optimized (TSP), but here we just remove the visit and update details.
+    /// Only the affected voyage is evaluated, pending route updates of other voyages are not applied.
     pub fn cost_without_visit_full(&self, visit_id: usize, context: &Context) -> f64 {
-        let mut cloned = self.clone();
-        // Unassign the visit
-        cloned.unassign_visits(&[visit_id]);
-        // Ensure consistency is updated after unassignment (recalculates voyage details and schedule)
-        cloned.ensure_consistency_updated(context);
-        cloned.cost_with_context(context)
+        self.cost_with_context(context) + self.removal_cost_delta(visit_id, context, true)
     }
 
     /// Updates the total_cost field using the current state and context.
@@ -896,3 +1138,291 @@ impl Solution {
         self.total_cost = self.cost_with_context(context);
     }
 }
+
+/// Read-only view of a solution, with its voyages borrowed up front.
+///
+/// Unlike `Solution`, whose voyages sit in `RefCell`s, the view can be shared between threads
+/// evaluating candidate moves. It is created with `Solution::with_view`.
+pub struct SolutionView<'a> {
+    pub voyages: Vec<&'a Voyage>,
+    pub schedule: &'a Schedule,
+    visits: &'a [Visit],
+    positions: &'a HashMap<usize, usize>,
+}
+
+impl<'a> SolutionView<'a> {
+    pub fn visit(&self, id: usize) -> Option<&'a Visit> {
+        self.visits.get(id)
+    }
+
+    pub fn all_visits(&self) -> &'a [Visit] {
+        self.visits
+    }
+
+    pub fn voyage(&self, voyage_id: usize) -> Option<&'a Voyage> {
+        self.positions
+            .get(&voyage_id)
+            .map(|&index| self.voyages[index])
+    }
+
+    /// Returns true if the voyage with the given id is empty (no visits).
+    pub fn is_empty_voyage_by_id(&self, voyage_id: usize) -> bool {
+        self.voyage(voyage_id)
+            .map_or(false, |voyage| voyage.visit_ids.is_empty())
+    }
+
+    /// See `Solution::visit_insertion_is_possible_into`.
+    pub fn visit_insertion_is_possible_into(
+        &self,
+        context: &Context,
+        visit_id: usize,
+        voyage: &Voyage,
+        unassigned: &[usize],
+    ) -> bool {
+        insertion_is_possible(
+            self.visits,
+            self.schedule,
+            context,
+            visit_id,
+            voyage,
+            unassigned,
+        )
+    }
+
+    /// See `Solution::voyage_variable_cost`.
+    pub fn voyage_variable_cost(
+        &self,
+        vessel_id: usize,
+        visit_ids: &[usize],
+        sailing_time: f64,
+        waiting_time: f64,
+        context: &Context,
+    ) -> f64 {
+        cost::variable_cost(
+            self.visits,
+            vessel_id,
+            visit_ids,
+            sailing_time,
+            waiting_time,
+            context,
+        )
+    }
+}
+
+fn insertion_is_possible(
+    visits: &[Visit],
+    schedule: &Schedule,
+    context: &Context,
+    visit_id: usize,
+    voyage: &Voyage,
+    unassigned: &[usize],
+) -> bool {
+    let visit = match visits.get(visit_id) {
+        Some(v) => v,
+        None => return false,
+    };
+    let installation_id = visit.installation_id();
+    let departure_day = match visit.departure_day {
+        Some(day) => day,
+        None => return false, // Can't check spread if no departure day
+    };
+    if voyage
+        .visit_ids
+        .iter()
+        .filter(|vid| !unassigned.contains(vid))
+        .any(|&vid| visits[vid].installation_id() == installation_id)
+    {
+        return false;
+    }
+    // Get the installation to check spread
+    let installation = match context.problem.get_installation_by_id(installation_id) {
+        Some(inst) => inst,
+        None => return false,
+    };
+    let spread = installation.departure_spread as i32;
+    let period = crate::structs::constants::DAYS_IN_PERIOD as i32;
+    // Check all other visits to this installation
+    for &other_visit_id in schedule.departures_to(installation_id) {
+        if other_visit_id == visit_id || unassigned.contains(&other_visit_id) {
+            continue;
+        }
+        if let Some(other_visit) = visits.get(other_visit_id) {
+            if let Some(other_day) = other_visit.departure_day {
+                // Cyclic difference
+                let diff = (departure_day as i32 - other_day as i32)
+                    .abs()
+                    .min(period - (departure_day as i32 - other_day as i32).abs());
+                if diff < spread {
+                    return false;
+                }
+            }
+        }
+    }
+    // Prevent inserting the same installation twice in the voyage
+    // Check vessel capacity
+    let vessel_id = match voyage.vessel_id {
+        Some(id) => id,
+        None => return false,
+    };
+    let vessel = match context.problem.vessels.get(vessel_id) {
+        Some(v) => v,
+        None => return false,
+    };
+    // TODO: Voyage's load is calculated from scratch, not from the current state. It prevents problems, but it is not the place to do.
+    // I might change it to first check if it is updated, and if not, calculate it.
+    let current_load: u32 = voyage
+        .visit_ids
+        .iter()
+        .filter(|vid| !unassigned.contains(vid))
+        .map(|vid| visits[*vid].demand())
+        .sum();
+    let visit_demand = visit.demand();
+    if (current_load + visit_demand) as f64 > vessel.deck_capacity {
+        return false;
+    }
+    true
+}
+
+#[cfg(test)]
+pub(crate) mod tests {
+    use super::*;
+    use crate::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+    use crate::operators::destroy::random_visit_removal_in_voyages::RandomVisitRemovalInVoyages;
+    use crate::operators::improvement::deep_relocation::DeepRelocation;
+    use crate::operators::repair::deep_greedy_insertion::DeepGreedyInsertion;
+    use crate::operators::traits::{DestroyOperator, ImprovementOperator, RepairOperator};
+    use crate::structs::transaction::SolutionDelta;
+    use rand::rngs::StdRng;
+    use rand::SeedableRng;
+
+    pub(crate) fn small_instance() -> (Context, Solution) {
+        let engine = ALNSEngine::new_from_instance(
+            "SMALL_1",
+            7,
+            100.0,
+            0.9,
+            10,
+            0.85,
+            1,
+            ALNSAlgorithmMode::Baseline,
+        )
+        .expect("Failed to initialize engine");
+        let context = (*engine.context).clone();
+        let mut solution = engine.current_solution.clone();
+        solution.ensure_consistency_updated(&context);
+        (context, solution)
+    }
+
+    /// Asserts that the voyages, visits, schedule, voyage index and cached totals are the same.
+    pub(crate) fn assert_same_state(actual: &Solution, expected: &Solution) {
+        let voyages = |solution: &Solution| -> Vec<String> {
+            solution
+                .voyages
+                .iter()
+                .map(|voyage| format!("{:?}", voyage.borrow()))
+                .collect()
+        };
+        assert_eq!(voyages(actual), voyages(expected));
+        assert_eq!(
+            format!("{:?}", actual._visits),
+            format!("{:?}", expected._visits)
+        );
+        assert_eq!(
+            format!("{:?}", actual.schedule),
+            format!("{:?}", expected.schedule)
+        );
+        assert_eq!(actual.voyage_positions, expected.voyage_positions);
+        assert_eq!(actual.total_cost.to_bits(), expected.total_cost.to_bits());
+        assert_eq!(actual.is_feasible, expected.is_feasible);
+    }
+
+    /// Destroy step of an ALNS iteration, checked to leave visits unassigned.
+    pub(crate) fn destroy(solution: &mut Solution, context: &Context, rng: &mut StdRng) {
+        RandomVisitRemovalInVoyages {
+            xi_min: 0.2,
+            xi_max: 0.4,
+        }
+        .apply(solution, context, rng);
+        solution.ensure_consistency_updated(context);
+        assert!(!solution.get_unassigned_visits().is_empty());
+    }
+
+    /// Repair and improvement steps of an ALNS iteration.
+    pub(crate) fn repair_and_improve(solution: &mut Solution, context: &Context, rng: &mut StdRng) {
+        DeepGreedyInsertion.apply(solution, context, rng);
+        solution.ensure_consistency_updated(context);
+        DeepRelocation.apply(solution, context, rng);
+        solution.ensure_consistency_updated(context);
+    }
+
+    fn assert_cached_cost_is_fresh(solution: &Solution, context: &Context) {
+        let cost = solution.cost_with_context(context);
+        let fresh = solution.cost_from_scratch(context);
+        assert!((cost - fresh).abs() <= 1e-6 * fresh.abs().max(1.0));
+    }
+
+    #[test]
+    fn rollback_restores_solution_after_destroy_repair_and_improvement() {
+        let (context, mut solution) = small_instance();
+        for seed in 0..5 {
+            let before = solution.clone();
+            let mut rng = StdRng::seed_from_u64(seed);
+            solution.begin_transaction();
+            destroy(&mut solution, &context, &mut rng);
+            repair_and_improve(&mut solution, &context, &mut rng);
+            solution.rollback_transaction();
+
+            assert!(!solution.in_transaction());
+            assert_same_state(&solution, &before);
+            assert_cached_cost_is_fresh(&solution, &context);
+        }
+    }
+
+    #[test]
+    fn nested_rollback_inside_committed_transaction() {
+        let (context, mut solution) = small_instance();
+        let before = solution.clone();
+        let mut rng = StdRng::seed_from_u64(1);
+
+        solution.begin_transaction();
+        destroy(&mut solution, &context, &mut rng);
+        let destroyed = solution.clone();
+        solution.begin_transaction();
+        repair_and_improve(&mut solution, &context, &mut rng);
+        solution.rollback_transaction();
+        assert!(solution.in_transaction());
+        assert_same_state(&solution, &destroyed);
+
+        // The outer transaction keeps its own changes and can still revert them
+        repair_and_improve(&mut solution, &context, &mut rng);
+        let repaired = solution.clone();
+        let committed = solution.commit_transaction();
+        assert!(!solution.in_transaction());
+        assert!(!committed.is_empty());
+        assert_same_state(&solution, &repaired);
+        assert_cached_cost_is_fresh(&solution, &context);
+
+        let mut delta = SolutionDelta::new(&before);
+        delta.extend(committed);
+        delta.revert(&mut solution);
+        assert_same_state(&solution, &before);
+        assert_cached_cost_is_fresh(&solution, &context);
+    }
+
+    #[test]
+    fn nested_commit_is_reverted_by_outer_rollback() {
+        let (context, mut solution) = small_instance();
+        let before = solution.clone();
+        let mut rng = StdRng::seed_from_u64(2);
+
+        solution.begin_transaction();
+        destroy(&mut solution, &context, &mut rng);
+        solution.begin_transaction();
+        repair_and_improve(&mut solution, &context, &mut rng);
+        assert!(solution.commit_transaction().is_empty());
+        solution.rollback_transaction();
+
+        assert_same_state(&solution, &before);
+        assert_cached_cost_is_fresh(&solution, &context);
+    }
+}
@@ -1,58 +1,192 @@
 use crate::structs::schedule::Schedule;
-use crate::structs::vessel::Vessel;
+use crate::structs::solution::Solution;
 use crate::structs::visit::Visit;
 use crate::structs::voyage::Voyage;
 
-/// Enum to represent different types of transactions within the scheduling system.
+/// Undo entry of a single change made to a solution inside a transaction.
+///
+/// Entries are recorded by the mutating methods of `Solution` before they change anything
+/// and are reverted newest first, so every entry is reverted on exactly the state it was recorded on.
 #[derive(Debug, Clone)]
 pub enum Transaction {
-    /// Removes a visit from a voyage.
-    RemoveVisitFromVoyage { visit_id: u32, voyage_id: u32 },
-    /// Adds a visit to a voyage.
-    AddVisitToVoyage { visit_id: u32, voyage_id: u32 },
-    /// Changes the route sequence within a voyage.
-    ChangeRouteSequence {
-        voyage_id: u32,
-        old_sequence: Vec<u32>, // Sequence of visit IDs
-        new_sequence: Vec<u32>,
-    },
-    /// Assigns a new vessel to a voyage.
-    AssignVesselToVoyage {
-        voyage_id: u32,
-        old_vessel_id: Option<u32>,
-        new_vessel_id: Option<u32>,
-    },
+    /// A voyage was pushed to the end of `Solution::voyages`.
+    AddVoyage { voyage_id: usize },
+    /// A voyage was removed from position `index` of `Solution::voyages`.
+    RemoveVoyage { index: usize, voyage: Voyage },
+    /// The voyage at position `index` was changed (route, timing, load or vessel).
+    ChangeVoyage { index: usize, previous: Voyage },
+    /// A visit was assigned to or unassigned from a voyage.
+    ChangeVisit { previous: Visit },
+    /// The schedule was changed for the first time since the last savepoint.
+    /// Later schedule changes are not recorded, reverting this entry restores them all.
+    ReplaceSchedule { previous: Schedule },
 }
+
 impl Transaction {
     /// Revert the transaction.
-    pub fn revert(self, schedule: &mut Schedule) {
+    pub fn revert(self, solution: &mut Solution) {
         match self {
-            Transaction::RemoveVisitFromVoyage {
-                visit_id,
-                voyage_id,
-            } => {
-                // Placeholder for removing a visit from a voyage
+            Transaction::AddVoyage { voyage_id } => {
+                let voyage = solution.pop_voyage();
+                debug_assert!(
+                    voyage.map_or(false, |v| v.id == voyage_id),
+                    "Reverted AddVoyage does not match the last voyage"
+                );
+            }
+            Transaction::RemoveVoyage { index, voyage } => {
+                solution.insert_voyage(index, voyage);
             }
-            Transaction::AddVisitToVoyage {
-                visit_id,
-                voyage_id,
-            } => {
-                // Placeholder for adding a visit to a voyage
+            Transaction::ChangeVoyage { index, previous } => {
+                debug_assert_eq!(solution.voyages[index].borrow().id, previous.id);
+                solution.replace_voyage(index, previous);
             }
-            Transaction::ChangeRouteSequence {
-                voyage_id,
-                old_sequence,
-                ..
-            } => {
-                // Placeholder for changing the route sequence within a voyage
+            Transaction::ChangeVisit { previous } => {
+                if let Some(visit) = solution.visit_mut(previous.id()) {
+                    *visit = previous;
+                }
             }
-            Transaction::AssignVesselToVoyage {
-                voyage_id,
-                old_vessel_id,
-                ..
-            } => {
-                // Placeholder for assigning a new vessel to a voyage
+            Transaction::ReplaceSchedule { previous } => {
+                solution.schedule = previous;
             }
         }
     }
 }
+
+/// Undo entries taking a solution back to an earlier state, together with the scalar fields of that state.
+#[derive(Debug, Clone)]
+pub struct SolutionDelta {
+    transactions: Vec<Transaction>,
+    total_cost: f64,
+    is_feasible: bool,
+    schedule_needs_update: bool,
+}
+
+impl SolutionDelta {
+    /// Creates an empty delta pointing at the current state of the solution.
+    pub fn new(solution: &Solution) -> Self {
+        Self {
+            transactions: Vec::new(),
+            total_cost: solution.total_cost,
+            is_feasible: solution.is_feasible,
+            schedule_needs_update: solution.schedule.needs_update(),
+        }
+    }
+
+    /// Appends undo entries of a later change (e.g. a committed transaction) to the delta.
+    pub fn extend(&mut self, transactions: Vec<Transaction>) {
+        self.transactions.extend(transactions);
+    }
+
+    pub fn len(&self) -> usize {
+        self.transactions.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.transactions.is_empty()
+    }
+
+    /// Cost of the solution the delta leads to.
+    pub fn total_cost(&self) -> f64 {
+        self.total_cost
+    }
+
+    /// Reverts all entries, newest first, and restores the scalar fields.
+    pub fn revert(self, solution: &mut Solution) {
+        for transaction in self.transactions.into_iter().rev() {
+            transaction.revert(solution);
+        }
+        solution.total_cost = self.total_cost;
+        solution.is_feasible = self.is_feasible;
+        solution.schedule.set_need_update(self.schedule_needs_update);
+    }
+}
+
+#[derive(Debug, Clone)]
+struct Savepoint {
+    position: usize,
+    total_cost: f64,
+    is_feasible: bool,
+    schedule_needs_update: bool,
+    schedule_saved: bool,
+}
+
+/// Undo log of a solution. Transactions can be nested, entries are recorded only while at least one is open.
+#[derive(Debug, Clone, Default)]
+pub struct TransactionLog {
+    transactions: Vec<Transaction>,
+    savepoints: Vec<Savepoint>,
+}
+
+impl TransactionLog {
+    pub fn is_active(&self) -> bool {
+        !self.savepoints.is_empty()
+    }
+
+    /// Opens a transaction; the arguments are the scalar fields of the solution restored by its rollback.
+    pub fn begin(&mut self, total_cost: f64, is_feasible: bool, schedule_needs_update: bool) {
+        self.savepoints.push(Savepoint {
+            position: self.transactions.len(),
+            total_cost,
+            is_feasible,
+            schedule_needs_update,
+            schedule_saved: false,
+        });
+    }
+
+    /// Records an entry built by `make`; the entry is not built if no transaction is open.
+    pub fn record_with<F>(&mut self, make: F)
+    where
+        F: FnOnce() -> Transaction,
+    {
+        if self.is_active() {
+            self.transactions.push(make());
+        }
+    }
+
+    /// True if the schedule has to be saved before it is changed, i.e. it was not saved since the last savepoint.
+    pub fn needs_schedule_backup(&self) -> bool {
+        self.savepoints
+            .last()
+            .map_or(false, |savepoint| !savepoint.schedule_saved)
+    }
+
+    pub fn record_schedule(&mut self, previous: Schedule) {
+        if let Some(savepoint) = self.savepoints.last_mut() {
+            savepoint.schedule_saved = true;
+            self.transactions
+                .push(Transaction::ReplaceSchedule { previous });
+        }
+    }
+
+    /// Closes the innermost transaction keeping its changes.
+    ///
+    /// Returns the undo entries of a top-level transaction. Entries of a nested transaction
+    /// stay in the log, as the enclosing transaction can still be rolled back.
+    pub fn commit(&mut self) -> Vec<Transaction> {
+        let savepoint = self
+            .savepoints
+            .pop()
+            .expect("commit called outside of a transaction");
+        match self.savepoints.last_mut() {
+            Some(outer) => {
+                outer.schedule_saved |= savepoint.schedule_saved;
+                Vec::new()
+            }
+            None => std::mem::take(&mut self.transactions),
+        }
+    }
+
+    /// Closes the innermost transaction, returning the delta that reverts its changes.
+    pub fn rollback(&mut self) -> SolutionDelta {
+        let savepoint = self
+            .savepoints
+            .pop()
+            .expect("rollback called outside of a transaction");
+        SolutionDelta {
+            transactions: self.transactions.split_off(savepoint.position),
+            total_cost: savepoint.total_cost,
+            is_feasible: savepoint.is_feasible,
+            schedule_needs_update: savepoint.schedule_needs_update,
+        }
+    }
+}
@@ -1,4 +1,7 @@
 pub mod assignment;
+pub mod parallel;
+pub mod relatedness;
+pub mod route_cache;
 pub mod serialization;
 pub mod tsp_solver; // Declares the tsp_solver module, shared across the project
 pub mod utils;
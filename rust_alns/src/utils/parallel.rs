@@ -0,0 +1,90 @@
+//! Splitting of independent candidate evaluations across threads.
+//!
+//! The number of threads operators use is set per instance in `Context::threads` and resolved with
+//! `Context::num_threads`. Without the `parallel` feature it is always 1 and every function here
+//! runs on the calling thread, so operators can use them unconditionally.
+
+/// Number of threads the operators use for a requested count, 0 uses all available cores.
+///
+/// Always 1 without the `parallel` feature.
+pub fn threads_for(requested: usize) -> usize {
+    if !cfg!(feature = "parallel") {
+        return 1;
+    }
+    resolve_threads(requested)
+}
+
+/// Number of threads for a requested count, 0 uses all available cores.
+///
+/// Not limited by the `parallel` feature; used for restarts, which need no shared candidate data.
+pub fn resolve_threads(requested: usize) -> usize {
+    match requested {
+        0 => std::thread::available_parallelism()
+            .map(|n| n.get())
+            .unwrap_or(1),
+        threads => threads,
+    }
+}
+
+/// Maps contiguous chunks of `items`, one chunk per thread on up to `threads` threads, and returns
+/// the results in chunk order.
+///
+/// Results can be concatenated to get the same order as a serial loop over `items`, which keeps
+/// the reduction to the best move deterministic for any number of threads.
+pub fn map_chunks<T, R, F>(items: &[T], threads: usize, f: F) -> Vec<R>
+where
+    T: Sync,
+    R: Send,
+    F: Fn(&[T]) -> R + Sync,
+{
+    map_chunks_with(items, threads, || (), |_, chunk| f(chunk))
+}
+
+/// Same as `map_chunks`, with a state created by `init` on the calling thread for every chunk.
+///
+/// Used to hand each thread its own copy of data that can't be shared, e.g. a cloned `Solution`.
+pub fn map_chunks_with<T, S, R, I, F>(items: &[T], threads: usize, mut init: I, f: F) -> Vec<R>
+where
+    T: Sync,
+    S: Send,
+    R: Send,
+    I: FnMut() -> S,
+    F: Fn(S, &[T]) -> R + Sync,
+{
+    let threads = threads.min(items.len());
+    if threads <= 1 {
+        return vec![f(init(), items)];
+    }
+    let chunk_size = (items.len() + threads - 1) / threads;
+    let f = &f;
+    std::thread::scope(|scope| {
+        let workers: Vec<_> = items
+            .chunks(chunk_size)
+            .map(|chunk| {
+                let state = init();
+                scope.spawn(move || f(state, chunk))
+            })
+            .collect();
+        workers
+            .into_iter()
+            .map(|worker| worker.join().expect("candidate evaluation thread panicked"))
+            .collect()
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn chunks_preserve_item_order() {
+        let items: Vec<usize> = (0..101).collect();
+        for threads in [1, 3, 8, 200] {
+            let mapped: Vec<usize> = map_chunks(&items, threads, |chunk| chunk.to_vec())
+                .into_iter()
+                .flatten()
+                .collect();
+            assert_eq!(mapped, items);
+        }
+    }
+}
@@ -0,0 +1,52 @@
+//! Instance-level terms of the Shaw relatedness between visits.
+//!
+//! The relatedness of two visits is `alpha * travel + beta * |day difference| + phi * |load difference|`.
+//! Travel and load only depend on the installations of the visits, so they are computed once per
+//! instance for every installation pair; the weights are applied by the operator.
+
+use crate::structs::problem_data::ProblemData;
+
+/// Travel and load terms of every pair of nodes, indexed by installation id (0 is the base).
+#[derive(Debug, Clone)]
+pub struct InstallationRelatedness {
+    nodes: usize,
+    /// [a * nodes + b] → distance between the nodes
+    travel: Vec<f64>,
+    /// [a * nodes + b] → absolute difference of the deck demands of the nodes
+    load: Vec<f64>,
+}
+
+impl InstallationRelatedness {
+    pub fn new(problem: &ProblemData) -> Self {
+        let distances = problem.distance_manager.distances();
+        let nodes = distances.len();
+        let demand = |node: usize| {
+            problem
+                .get_installation_by_id(node)
+                .map_or(0.0, |installation| installation.deck_demand as f64)
+        };
+        let mut travel = Vec::with_capacity(nodes * nodes);
+        let mut load = Vec::with_capacity(nodes * nodes);
+        for a in 0..nodes {
+            for b in 0..nodes {
+                travel.push(distances[a][b]);
+                load.push((demand(a) - demand(b)).abs());
+            }
+        }
+        Self {
+            nodes,
+            travel,
+            load,
+        }
+    }
+
+    /// Distance between two installations.
+    pub fn travel(&self, a: usize, b: usize) -> f64 {
+        self.travel[a * self.nodes + b]
+    }
+
+    /// Absolute difference of the deck demands of two installations.
+    pub fn load(&self, a: usize, b: usize) -> f64 {
+        self.load[a * self.nodes + b]
+    }
+}
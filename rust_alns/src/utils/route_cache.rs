@@ -0,0 +1,329 @@
+//! Route evaluations of an instance, shared by all solutions, threads and restarts.
+//!
+//! The same voyages are solved over and over: every iteration, restart and episode on an instance
+//! evaluates the same sets of installations at the same vessel speeds and departure times. Routes
+//! only depend on the installations, the speed and the start time, so they are cached under those.
+
+use crate::structs::voyage::Voyage;
+use crate::utils::tsp_solver::{TSPResult, TSPSolver};
+use std::collections::{HashMap, VecDeque};
+use std::sync::Mutex;
+
+/// Default maximum number of cached routes.
+pub const DEFAULT_ROUTE_CACHE_CAPACITY: usize = 100_000;
+
+/// Installations of a route, bit `i` is set for installation `i`.
+#[derive(Debug, Clone, PartialEq, Eq, Hash)]
+struct InstallationSet(Box<[u64]>);
+
+impl InstallationSet {
+    fn new(installations: &[usize]) -> Self {
+        let words = installations.iter().max().map_or(0, |&max| max / 64 + 1);
+        let mut bits = vec![0u64; words];
+        for &installation in installations {
+            bits[installation / 64] |= 1 << (installation % 64);
+        }
+        Self(bits.into_boxed_slice())
+    }
+}
+
+#[derive(Debug, Clone, PartialEq, Eq, Hash)]
+enum RouteKey {
+    /// Best route through the installations, see `TSPSolver::solve_for_voyage`
+    Solve {
+        installations: InstallationSet,
+        speed: u64,
+        start_time: u64,
+    },
+    /// Best insertion of `extra` into the installation sequence, see
+    /// `TSPSolver::evaluate_greedy_insertion`
+    Insertion {
+        sequence: Box<[usize]>,
+        extra: usize,
+        speed: u64,
+        start_time: u64,
+    },
+}
+
+/// Cached result, the route is a sequence of installations.
+#[derive(Debug, Clone)]
+struct CachedRoute {
+    installations: Box<[usize]>,
+    sailing_time: f64,
+    waiting_time: f64,
+    arrival_time: f64,
+    end_time: f64,
+}
+
+/// Counters of a `RouteEvaluationCache`.
+#[derive(Debug, Clone, Copy, Default)]
+pub struct RouteCacheStats {
+    pub hits: usize,
+    pub misses: usize,
+    pub evictions: usize,
+    pub size: usize,
+    pub capacity: usize,
+}
+
+impl RouteCacheStats {
+    /// Share of lookups answered from the cache, 0 before the first lookup.
+    pub fn hit_rate(&self) -> f64 {
+        let lookups = self.hits + self.misses;
+        if lookups == 0 {
+            0.0
+        } else {
+            self.hits as f64 / lookups as f64
+        }
+    }
+}
+
+#[derive(Debug, Default)]
+struct CacheState {
+    routes: HashMap<RouteKey, CachedRoute>,
+    /// Keys in insertion order, the oldest route is evicted first
+    order: VecDeque<RouteKey>,
+    capacity: usize,
+    hits: usize,
+    misses: usize,
+    evictions: usize,
+}
+
+impl CacheState {
+    fn insert(&mut self, key: RouteKey, route: CachedRoute) {
+        if self.capacity == 0 || self.routes.contains_key(&key) {
+            return;
+        }
+        while self.routes.len() >= self.capacity {
+            let Some(oldest) = self.order.pop_front() else {
+                break;
+            };
+            self.routes.remove(&oldest);
+            self.evictions += 1;
+        }
+        self.order.push_back(key.clone());
+        self.routes.insert(key, route);
+    }
+}
+
+/// Bounded, thread-safe cache of the routes computed by the `TSPSolver` of an instance.
+///
+/// Owned by the instance `Context` behind an `Arc`, so clones of the context and the threads
+/// evaluating moves share it. The solver is only called on a miss, outside of the lock. Results
+/// are the same with or without the cache.
+#[derive(Debug)]
+pub struct RouteEvaluationCache {
+    state: Mutex<CacheState>,
+}
+
+impl Default for RouteEvaluationCache {
+    fn default() -> Self {
+        Self::new(DEFAULT_ROUTE_CACHE_CAPACITY)
+    }
+}
+
+impl RouteEvaluationCache {
+    /// Cache holding at most `capacity` routes, 0 disables caching.
+    pub fn new(capacity: usize) -> Self {
+        Self {
+            state: Mutex::new(CacheState {
+                capacity,
+                ..CacheState::default()
+            }),
+        }
+    }
+
+    /// Cached `TSPSolver::solve_for_voyage`.
+    pub fn solve_for_voyage(&self, tsp_solver: &TSPSolver, voyage: &Voyage) -> TSPResult {
+        let (Some(speed), Some(start_time), Some(installations)) = (
+            voyage.speed(),
+            voyage.start_time(),
+            Self::installations(tsp_solver, &voyage.visit_ids),
+        ) else {
+            return tsp_solver.solve_for_voyage(voyage);
+        };
+        let key = RouteKey::Solve {
+            installations: InstallationSet::new(&installations),
+            speed: speed.to_bits(),
+            start_time: start_time.to_bits(),
+        };
+        self.get_or_insert_with(tsp_solver, key, &voyage.visit_ids, || {
+            tsp_solver.solve_for_voyage(voyage)
+        })
+    }
+
+    /// Cached `TSPSolver::evaluate_greedy_insertion`.
+    pub fn evaluate_greedy_insertion(
+        &self,
+        tsp_solver: &TSPSolver,
+        voyage: &Voyage,
+        extra_visit: usize,
+    ) -> TSPResult {
+        let mut visit_ids = voyage.visit_ids.clone();
+        visit_ids.push(extra_visit);
+        let (Some(speed), Some(start_time), Some(installations)) = (
+            voyage.speed(),
+            voyage.start_time(),
+            Self::installations(tsp_solver, &visit_ids),
+        ) else {
+            return tsp_solver.evaluate_greedy_insertion(voyage, extra_visit);
+        };
+        let (&extra, sequence) = installations.split_last().unwrap();
+        let key = RouteKey::Insertion {
+            sequence: sequence.into(),
+            extra,
+            speed: speed.to_bits(),
+            start_time: start_time.to_bits(),
+        };
+        self.get_or_insert_with(tsp_solver, key, &visit_ids, || {
+            tsp_solver.evaluate_greedy_insertion(voyage, extra_visit)
+        })
+    }
+
+    /// Current counters.
+    pub fn stats(&self) -> RouteCacheStats {
+        let state = self.state.lock().unwrap();
+        RouteCacheStats {
+            hits: state.hits,
+            misses: state.misses,
+            evictions: state.evictions,
+            size: state.routes.len(),
+            capacity: state.capacity,
+        }
+    }
+
+    /// Changes the maximum number of cached routes, evicting the oldest routes above it.
+    pub fn set_capacity(&self, capacity: usize) {
+        let mut state = self.state.lock().unwrap();
+        state.capacity = capacity;
+        while state.routes.len() > capacity {
+            let Some(oldest) = state.order.pop_front() else {
+                break;
+            };
+            state.routes.remove(&oldest);
+            state.evictions += 1;
+        }
+    }
+
+    /// Drops all routes and resets the counters, e.g. after changing the solver's exact cutoff.
+    pub fn clear(&self) {
+        let mut state = self.state.lock().unwrap();
+        let capacity = state.capacity;
+        *state = CacheState {
+            capacity,
+            ..CacheState::default()
+        };
+    }
+
+    /// Installations of the visits, `None` if one is unknown or visited twice.
+    fn installations(tsp_solver: &TSPSolver, visit_ids: &[usize]) -> Option<Vec<usize>> {
+        let installations: Vec<usize> = visit_ids
+            .iter()
+            .map(|visit_id| tsp_solver.visit_to_installation.get(visit_id).copied())
+            .collect::<Option<_>>()?;
+        let mut unique = installations.clone();
+        unique.sort_unstable();
+        unique.dedup();
+        (unique.len() == installations.len()).then_some(installations)
+    }
+
+    fn get_or_insert_with(
+        &self,
+        tsp_solver: &TSPSolver,
+        key: RouteKey,
+        visit_ids: &[usize],
+        solve: impl FnOnce() -> TSPResult,
+    ) -> TSPResult {
+        let cached = {
+            let mut state = self.state.lock().unwrap();
+            let cached = state.routes.get(&key).cloned();
+            if cached.is_some() {
+                state.hits += 1;
+            } else {
+                state.misses += 1;
+            }
+            cached
+        };
+        if let Some(route) = cached {
+            // Each installation is visited by exactly one of the visits
+            let visit_ids_seq = route
+                .installations
+                .iter()
+                .filter_map(|installation| {
+                    visit_ids.iter().copied().find(|visit_id| {
+                        tsp_solver.visit_to_installation.get(visit_id) == Some(installation)
+                    })
+                })
+                .collect();
+            return TSPResult {
+                visit_ids_seq,
+                sailing_time: route.sailing_time,
+                waiting_time: route.waiting_time,
+                arrival_time: route.arrival_time,
+                end_time: route.end_time,
+            };
+        }
+
+        let result = solve();
+        let route = CachedRoute {
+            installations: tsp_solver
+                .visit_ids_to_installation_ids_sequence_public(&result.visit_ids_seq)
+                .into_boxed_slice(),
+            sailing_time: result.sailing_time,
+            waiting_time: result.waiting_time,
+            arrival_time: result.arrival_time,
+            end_time: result.end_time,
+        };
+        self.state.lock().unwrap().insert(key, route);
+        result
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn oldest_routes_are_evicted_first() {
+        let cache = RouteEvaluationCache::new(2);
+        let route = CachedRoute {
+            installations: Box::new([]),
+            sailing_time: 0.0,
+            waiting_time: 0.0,
+            arrival_time: 0.0,
+            end_time: 0.0,
+        };
+        let key = |installation: usize| RouteKey::Solve {
+            installations: InstallationSet::new(&[installation]),
+            speed: 0,
+            start_time: 0,
+        };
+        {
+            let mut state = cache.state.lock().unwrap();
+            for installation in 1..=3 {
+                state.insert(key(installation), route.clone());
+            }
+            assert!(!state.routes.contains_key(&key(1)));
+            assert!(state.routes.contains_key(&key(3)));
+        }
+        let stats = cache.stats();
+        assert_eq!((stats.size, stats.evictions), (2, 1));
+
+        cache.set_capacity(1);
+        assert_eq!(cache.stats().size, 1);
+        cache.clear();
+        assert_eq!(cache.stats().size, 0);
+        assert_eq!(cache.stats().capacity, 1);
+    }
+
+    #[test]
+    fn installation_sets_ignore_order() {
+        assert_eq!(
+            InstallationSet::new(&[3, 70, 1]),
+            InstallationSet::new(&[70, 1, 3])
+        );
+        assert_ne!(
+            InstallationSet::new(&[3, 70]),
+            InstallationSet::new(&[3, 71])
+        );
+    }
+}
@@ -1,5 +1,5 @@
 use crate::structs::{
-    constants::{DAYS_IN_PERIOD, HOURS_IN_DAY, HOURS_IN_PERIOD},
+    constants::{DAYS_IN_PERIOD, HOURS_IN_DAY, HOURS_IN_PERIOD, MAX_EXACT_TSP_NODES},
     problem_data::ProblemData,
     time_window::TimeWindow,
     visit::Visit,
@@ -39,6 +39,8 @@ pub struct TSPSolver {
     service_times: Vec<f64>,
     num_nodes: usize,
     pub visit_to_installation: HashMap<usize, usize>,
+    /// Routes with more installations are solved with `solve_tsp_insertion_heuristic`
+    max_exact_nodes: usize,
 }
 
 impl TSPSolver {
@@ -55,8 +57,21 @@ impl TSPSolver {
             service_times,
             num_nodes,
             visit_to_installation,
+            max_exact_nodes: MAX_EXACT_TSP_NODES,
         }
     }
+
+    /// Sets the number of installations up to which routes are solved exactly.
+    ///
+    /// The exact solver needs memory and time exponential in this number, beyond it routes are
+    /// built by insertion and improved by relocating single installations.
+    pub fn set_max_exact_nodes(&mut self, max_exact_nodes: usize) {
+        self.max_exact_nodes = max_exact_nodes;
+    }
+
+    pub fn max_exact_nodes(&self) -> usize {
+        self.max_exact_nodes
+    }
     pub fn new_from_problem_data(problem_data: &ProblemData) -> Self {
         let distances = problem_data.distance_manager.distances().clone();
 
@@ -164,11 +179,12 @@ impl TSPSolver {
     // 5. Store visit_ids in voyage and route as sequence of installation ids. Probably right solution.
     // Fixed (?), still n2 though.
     fn solve_internal(&self, visit_ids: Vec<usize>, speed: f64, start_time: f64) -> TSPResult {
-        // Convert visit IDs to installation IDs
-        let inst_ids: Vec<usize> = self.visit_ids_to_installation_ids_sequence(&visit_ids);
+        // Convert visit IDs to installation IDs, sorted so that the route doesn't depend on the
+        // order of the visits (see RouteEvaluationCache)
+        let mut inst_ids: Vec<usize> = self.visit_ids_to_installation_ids_sequence(&visit_ids);
+        inst_ids.sort_unstable();
         // Solve TSP using installation IDs
-        let (best_route, _) =
-            self.solve_tsp_branch_and_bound(inst_ids.clone(), Some(speed), Some(start_time));
+        let (best_route, _) = self.solve_tsp(inst_ids.clone(), Some(speed), Some(start_time));
         let (sailing_time, waiting_time, arrival_time, end_time) =
             self.calculate_voyage_details(&best_route, speed, start_time);
 
@@ -476,6 +492,177 @@ impl TSPSolver {
         }
     }
 
+    /// Solves the route exactly up to `max_exact_nodes` installations and heuristically beyond.
+    ///
+    /// Returns the route starting and ending at the depot and its duration until the arrival at the
+    /// depot, like the other solvers.
+    pub fn solve_tsp(
+        &self,
+        inst_indices: Vec<usize>,
+        vessel_speed: Option<f64>,
+        start_time: Option<f64>,
+    ) -> (Vec<usize>, f64) {
+        if inst_indices.len() <= self.max_exact_nodes {
+            self.solve_tsp_dynamic_programming(inst_indices, vessel_speed, start_time)
+        } else {
+            self.solve_tsp_insertion_heuristic(inst_indices, vessel_speed, start_time)
+        }
+    }
+
+    /// Held-Karp dynamic program over (visited installations, last installation).
+    ///
+    /// Waiting for a time window never makes an earlier arrival finish later, so among partial routes
+    /// with the same visited set and last installation only the one finishing service earliest has to
+    /// be kept. This gives the optimal route in O(2^n * n^2) time instead of O(n!).
+    pub fn solve_tsp_dynamic_programming(
+        &self,
+        inst_indices: Vec<usize>,
+        vessel_speed: Option<f64>,
+        start_time: Option<f64>,
+    ) -> (Vec<usize>, f64) {
+        if Self::has_duplicate_nodes(&inst_indices) {
+            return (vec![], f64::INFINITY);
+        }
+        let speed = vessel_speed.unwrap_or(12.0);
+        let init_time = start_time.unwrap_or(16.0);
+        let nodes: Vec<usize> = inst_indices.into_iter().filter(|&id| id != 0).collect();
+        let n = nodes.len();
+
+        // finish[mask * n + last]: earliest end of service at nodes[last] after visiting `mask`
+        let states = 1usize << n;
+        let mut finish = vec![f64::INFINITY; states * n];
+        let mut previous = vec![usize::MAX; states * n];
+        for (last, &node) in nodes.iter().enumerate() {
+            finish[(1 << last) * n + last] = self.service_end_time(0, node, init_time, speed);
+        }
+        // Every extension sets a bit, so all predecessors of a mask come before it
+        for mask in 1..states {
+            for last in 0..n {
+                let time = finish[mask * n + last];
+                if mask & (1 << last) == 0 || !time.is_finite() {
+                    continue;
+                }
+                for next in 0..n {
+                    if mask & (1 << next) != 0 {
+                        continue;
+                    }
+                    let state = (mask | (1 << next)) * n + next;
+                    let end = self.service_end_time(nodes[last], nodes[next], time, speed);
+                    if end < finish[state] {
+                        finish[state] = end;
+                        previous[state] = last;
+                    }
+                }
+            }
+        }
+
+        let mut route = vec![0];
+        let mut arrival = init_time + self.distances[0][0] / speed;
+        if n > 0 {
+            let full = states - 1;
+            let mut best_last = 0;
+            arrival = f64::INFINITY;
+            for last in 0..n {
+                let time = finish[full * n + last] + self.distances[nodes[last]][0] / speed;
+                if time < arrival {
+                    arrival = time;
+                    best_last = last;
+                }
+            }
+            let mut sequence = Vec::with_capacity(n);
+            let (mut mask, mut last) = (full, best_last);
+            while last != usize::MAX {
+                sequence.push(nodes[last]);
+                let before = previous[mask * n + last];
+                mask &= !(1 << last);
+                last = before;
+            }
+            route.extend(sequence.iter().rev());
+        }
+        route.push(0);
+        (route, arrival - init_time)
+    }
+
+    /// Builds the route by cheapest insertion and relocates single installations while it improves.
+    ///
+    /// Used for routes too long for `solve_tsp_dynamic_programming`; the route is not guaranteed to
+    /// be optimal.
+    pub fn solve_tsp_insertion_heuristic(
+        &self,
+        inst_indices: Vec<usize>,
+        vessel_speed: Option<f64>,
+        start_time: Option<f64>,
+    ) -> (Vec<usize>, f64) {
+        if Self::has_duplicate_nodes(&inst_indices) {
+            return (vec![], f64::INFINITY);
+        }
+        let speed = vessel_speed.unwrap_or(12.0);
+        let init_time = start_time.unwrap_or(16.0);
+        let arrival_time = |sequence: &Vec<usize>| {
+            self.calculate_voyage_end_time(&self.inst_sequence_to_route(sequence), speed, init_time)
+        };
+
+        let mut sequence: Vec<usize> = Vec::with_capacity(inst_indices.len());
+        for node in inst_indices.into_iter().filter(|&id| id != 0) {
+            let mut best: Option<(usize, f64)> = None;
+            for position in 0..=sequence.len() {
+                sequence.insert(position, node);
+                let arrival = arrival_time(&sequence);
+                sequence.remove(position);
+                if best.map_or(true, |(_, best_arrival)| arrival < best_arrival) {
+                    best = Some((position, arrival));
+                }
+            }
+            sequence.insert(best.map_or(0, |(position, _)| position), node);
+        }
+
+        let mut best_arrival = arrival_time(&sequence);
+        let mut improved = true;
+        while improved {
+            improved = false;
+            for from in 0..sequence.len() {
+                for to in 0..sequence.len() {
+                    if from == to {
+                        continue;
+                    }
+                    let mut candidate = sequence.clone();
+                    let node = candidate.remove(from);
+                    candidate.insert(to, node);
+                    let arrival = arrival_time(&candidate);
+                    if arrival < best_arrival - 1e-9 {
+                        sequence = candidate;
+                        best_arrival = arrival;
+                        improved = true;
+                    }
+                }
+            }
+        }
+        (
+            self.inst_sequence_to_route(&sequence),
+            best_arrival - init_time,
+        )
+    }
+
+    /// Time at which service at `to` ends when leaving `from` at `departure_time`.
+    fn service_end_time(&self, from: usize, to: usize, departure_time: f64, speed: f64) -> f64 {
+        // Same order of operations as calculate_voyage_details
+        let arrival_time = departure_time + self.distances[from][to] / speed;
+        let wait_time = self.compute_wait_time(to, arrival_time).unwrap_or(0.0);
+        arrival_time + wait_time + self.service_times[to]
+    }
+
+    fn has_duplicate_nodes(inst_indices: &[usize]) -> bool {
+        use std::collections::HashSet;
+        let duplicates = inst_indices.iter().collect::<HashSet<_>>().len() != inst_indices.len();
+        if duplicates {
+            eprintln!(
+                "[ERROR] Duplicate installation IDs detected in TSP input: {:?}",
+                inst_indices
+            );
+        }
+        duplicates
+    }
+
     pub fn compute_wait_time(&self, node: usize, arrival_time: f64) -> Option<f64> {
         let local_hour = arrival_time % (HOURS_IN_DAY as f64);
         let tw = &self.daily_time_windows[node];
@@ -776,4 +963,108 @@ mod tests {
         println!("Case 8: wait = {:?}", wait);
         assert_eq!(wait, Some(0.0));
     }
+
+    /// Solver over `n` installations with random distances, service times and daily time windows.
+    fn random_solver(n: usize, seed: u64) -> TSPSolver {
+        use rand::rngs::StdRng;
+        use rand::{Rng, SeedableRng};
+        let mut rng = StdRng::seed_from_u64(seed);
+        let coordinates: Vec<(f64, f64)> = (0..=n)
+            .map(|_| (rng.gen_range(0.0..100.0), rng.gen_range(0.0..100.0)))
+            .collect();
+        let distances = coordinates
+            .iter()
+            .map(|a| {
+                coordinates
+                    .iter()
+                    .map(|b| ((a.0 - b.0).powi(2) + (a.1 - b.1).powi(2)).sqrt())
+                    .collect()
+            })
+            .collect();
+        let mut daily_time_windows = vec![TimeWindow::new(Some(8.0), Some(8.0)).unwrap()];
+        let mut service_times = vec![8.0];
+        for _ in 0..n {
+            let earliest: f64 = rng.gen_range(0.0..16.0);
+            let latest = earliest + rng.gen_range(2.0..8.0);
+            daily_time_windows.push(TimeWindow::new(Some(earliest), Some(latest)).unwrap());
+            service_times.push(rng.gen_range(1.0..4.0));
+        }
+        let visit_to_installation = (1..=n).map(|i| (i, i)).collect();
+        TSPSolver::new(
+            distances,
+            daily_time_windows,
+            service_times,
+            visit_to_installation,
+        )
+    }
+
+    #[test]
+    fn dynamic_programming_matches_full_enumeration() {
+        for n in 1..=7 {
+            for seed in 0..10 {
+                let solver = random_solver(n, seed);
+                let nodes: Vec<usize> = (1..=n).collect();
+                let (_, expected) = solver.solve_tsp_full_enumeration(nodes.clone(), None, None);
+                let (route, duration) =
+                    solver.solve_tsp_dynamic_programming(nodes.clone(), None, None);
+                assert!(
+                    (duration - expected).abs() < 1e-9,
+                    "n = {}, seed = {}: {} != {}",
+                    n,
+                    seed,
+                    duration,
+                    expected
+                );
+                // The duration is the one of the returned route
+                let mut sorted = route[1..route.len() - 1].to_vec();
+                sorted.sort();
+                assert_eq!(sorted, nodes);
+                let arrival = solver.calculate_voyage_end_time(&route, 12.0, 16.0);
+                assert!((arrival - 16.0 - duration).abs() < 1e-9);
+            }
+        }
+    }
+
+    #[test]
+    fn heuristic_is_used_beyond_the_exact_cutoff() {
+        let mut solver = random_solver(7, 3);
+        let nodes: Vec<usize> = (1..=7).collect();
+        let (_, optimum) = solver.solve_tsp_dynamic_programming(nodes.clone(), None, None);
+        let (route, duration) = solver.solve_tsp_insertion_heuristic(nodes.clone(), None, None);
+        let mut sorted = route[1..route.len() - 1].to_vec();
+        sorted.sort();
+        assert_eq!(sorted, nodes);
+        assert!(duration >= optimum - 1e-9);
+
+        solver.set_max_exact_nodes(6);
+        assert_eq!(
+            solver.solve_tsp(nodes.clone(), None, None),
+            (route, duration)
+        );
+        solver.set_max_exact_nodes(7);
+        assert!((solver.solve_tsp(nodes, None, None).1 - optimum).abs() < 1e-9);
+    }
+
+    #[test]
+    fn twelve_installations_are_solved_exactly() {
+        let solver = random_solver(12, 1);
+        let nodes: Vec<usize> = (1..=12).collect();
+        let (route, duration) = solver.solve_tsp(nodes.clone(), None, None);
+        let (_, heuristic) = solver.solve_tsp_insertion_heuristic(nodes, None, None);
+        assert_eq!(route.len(), 14);
+        assert!(duration <= heuristic + 1e-9);
+    }
+
+    #[test]
+    fn empty_route_stays_at_the_depot() {
+        let solver = random_solver(3, 0);
+        assert_eq!(
+            solver.solve_tsp_dynamic_programming(vec![], None, None),
+            (vec![0, 0], 0.0)
+        );
+        assert_eq!(
+            solver.solve_tsp_insertion_heuristic(vec![], None, None),
+            (vec![0, 0], 0.0)
+        );
+    }
 }
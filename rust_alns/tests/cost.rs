@@ -0,0 +1,106 @@
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+use rust_alns_py::structs::context::Context;
+use rust_alns_py::structs::solution::Solution;
+
+fn assert_close(a: f64, b: f64) {
+    assert!((a - b).abs() <= 1e-6 * b.abs().max(1.0), "{} != {}", a, b);
+}
+
+fn initial_solution() -> (Solution, Context) {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let context = (*engine.context).clone();
+    let mut solution = engine.current_solution.clone();
+    solution.ensure_consistency_updated(&context);
+    (solution, context)
+}
+
+#[test]
+fn cached_cost_follows_changes_and_rollbacks() {
+    let (mut solution, context) = initial_solution();
+    let initial = solution.cost_with_context(&context);
+    assert_close(initial, solution.cost_from_scratch(&context));
+
+    solution.begin_transaction();
+    let removed: Vec<usize> = solution
+        .all_visits()
+        .iter()
+        .filter(|visit| visit.is_assigned)
+        .map(|visit| visit.id())
+        .step_by(2)
+        .collect();
+    solution.unassign_visits(&removed);
+    assert_close(
+        solution.cost_with_context(&context),
+        solution.cost_from_scratch(&context),
+    );
+    solution.ensure_consistency_updated(&context);
+    assert_close(
+        solution.cost_with_context(&context),
+        solution.cost_from_scratch(&context),
+    );
+
+    let vessel_id = solution.voyages[0].borrow().vessel_id.unwrap();
+    let voyage_id = solution.voyages.last().unwrap().borrow().id;
+    solution
+        .reassign_voyage_vessel(voyage_id, vessel_id)
+        .expect("Reassignment failed");
+    assert_close(
+        solution.cost_with_context(&context),
+        solution.cost_from_scratch(&context),
+    );
+
+    solution.rollback_transaction();
+    assert_close(solution.cost_with_context(&context), initial);
+}
+
+#[test]
+fn cost_deltas_match_applied_changes() {
+    let (mut solution, context) = initial_solution();
+    let cost = solution.cost_with_context(&context);
+    let assigned: Vec<usize> = solution
+        .all_visits()
+        .iter()
+        .filter(|visit| visit.is_assigned)
+        .map(|visit| visit.id())
+        .collect();
+    for &visit_id in &assigned {
+        let mut changed = solution.clone();
+        changed.unassign_visits(&[visit_id]);
+        changed.ensure_consistency_updated(&context);
+        assert_close(
+            solution.cost_without_visit_full(visit_id, &context),
+            changed.cost_from_scratch(&context),
+        );
+        assert_close(
+            cost + solution.removal_cost_delta(visit_id, &context, true),
+            changed.cost_from_scratch(&context),
+        );
+    }
+
+    let visit_id = assigned[0];
+    solution.unassign_visits(&[visit_id]);
+    solution.ensure_consistency_updated(&context);
+    let cost = solution.cost_with_context(&context);
+    let voyage_ids: Vec<usize> = solution.voyages.iter().map(|v| v.borrow().id).collect();
+    for voyage_id in voyage_ids {
+        let delta = {
+            let voyage = solution.voyage_by_id(voyage_id).unwrap().borrow();
+            solution.insertion_cost_delta(visit_id, &voyage, &context)
+        };
+        let mut changed = solution.clone();
+        changed
+            .greedy_insert_visit(visit_id, voyage_id, &context)
+            .expect("Insertion failed");
+        assert_close(cost + delta, changed.cost_from_scratch(&context));
+    }
+}
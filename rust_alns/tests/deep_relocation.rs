@@ -1,8 +1,10 @@
 use rand::rngs::StdRng;
 use rand::SeedableRng;
 use rust_alns_py::alns::engine::{ALNSEngine, ALNSAlgorithmMode};
+use rust_alns_py::operators::destroy::random_visit_removal_in_voyages::RandomVisitRemovalInVoyages;
 use rust_alns_py::operators::improvement::deep_relocation::DeepRelocation;
-use rust_alns_py::operators::traits::ImprovementOperator;
+use rust_alns_py::operators::repair::deep_greedy_insertion::DeepGreedyInsertion;
+use rust_alns_py::operators::traits::{DestroyOperator, ImprovementOperator, RepairOperator};
 use rust_alns_py::structs::solution::Solution;
 
 fn introduce_worse_relocation(solution: &Solution, context: &rust_alns_py::structs::context::Context) -> Solution {
@@ -91,3 +93,119 @@ fn deep_relocation_improves_cost() {
         "improved solution must remain feasible"
     );
 }
+
+/// Clone-based search for the best feasible relocation, evaluated on whole solutions.
+fn reference_best_relocation(
+    solution: &Solution,
+    context: &rust_alns_py::structs::context::Context,
+) -> Option<Solution> {
+    let current_cost = solution.cost_with_context(context);
+    let mut best: Option<(f64, Solution)> = None;
+    for visit in solution.all_visits() {
+        let Some(origin_voyage) = visit.assigned_voyage_id else {
+            continue;
+        };
+        for target_cell in &solution.voyages {
+            let target_id = target_cell.borrow().id;
+            if target_id == origin_voyage {
+                continue;
+            }
+            let mut candidate = solution.clone();
+            candidate.unassign_visits(&[visit.id()]);
+            candidate.ensure_schedule_is_updated();
+            if !candidate.visit_insertion_is_possible(context, visit.id(), target_id)
+                || candidate
+                    .greedy_insert_visit(visit.id(), target_id, context)
+                    .is_err()
+            {
+                continue;
+            }
+            candidate.ensure_consistency_updated(context);
+            if !candidate.is_fully_feasible(context) {
+                continue;
+            }
+            let delta = candidate.cost_with_context(context) - current_cost;
+            if delta < -f64::EPSILON && best.as_ref().map_or(true, |(d, _)| delta < *d) {
+                best = Some((delta, candidate));
+            }
+        }
+    }
+    best.map(|(_, candidate)| candidate)
+}
+
+#[test]
+fn deep_relocation_matches_clone_based_search() {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+        .expect("failed to construct deterministic engine");
+    let context = engine.context.clone();
+    let worse_solution = introduce_worse_relocation(&engine.current_solution, &context);
+
+    let mut expected = worse_solution.clone();
+    expected.ensure_consistency_updated(&context);
+    while let Some(next) = reference_best_relocation(&expected, &context) {
+        expected = next;
+    }
+
+    let mut improved = worse_solution.clone();
+    let mut rng = StdRng::seed_from_u64(42);
+    DeepRelocation.apply(&mut improved, &context, &mut rng);
+    improved.ensure_consistency_updated(&context);
+
+    assert!(
+        (improved.cost_with_context(&context) - expected.cost_with_context(&context)).abs() < 1e-6,
+        "delta-evaluated relocation must reach the same cost as the clone-based search"
+    );
+}
+
+#[test]
+fn deep_relocation_never_raises_cost() {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("failed to construct deterministic engine");
+    let context = engine.context.clone();
+    let destroy = RandomVisitRemovalInVoyages {
+        xi_min: 0.3,
+        xi_max: 0.5,
+    };
+
+    // Destroyed and repaired solutions have vessels with a single voyage and idle voyages, where
+    // moving a visit changes the fixed cost of the vessels
+    for seed in 0..10 {
+        let mut rng = StdRng::seed_from_u64(seed);
+        let mut solution = engine.current_solution.clone();
+        destroy.apply(&mut solution, &context, &mut rng);
+        solution.ensure_consistency_updated(&context);
+        DeepGreedyInsertion.apply(&mut solution, &context, &mut rng);
+        solution.ensure_consistency_updated(&context);
+        let cost_before = solution.cost_with_context(&context);
+
+        DeepRelocation.apply(&mut solution, &context, &mut rng);
+        solution.ensure_consistency_updated(&context);
+        let cost_after = solution.cost_with_context(&context);
+        assert!(
+            cost_after <= cost_before + 1e-6,
+            "seed {}: cost rose from {} to {}",
+            seed,
+            cost_before,
+            cost_after
+        );
+        assert!((cost_after - solution.cost_from_scratch(&context)).abs() < 1e-6);
+    }
+}
@@ -93,7 +93,7 @@ fn deep_swap_improves_cost() {
 
     let mut improved = worse_solution.clone();
     let mut rng = StdRng::seed_from_u64(42);
-    DeepSwap.apply(&mut improved, &context, &mut rng);
+    DeepSwap::default().apply(&mut improved, &context, &mut rng);
     improved.ensure_consistency_updated(&context);
     let improved_cost = improved.cost_with_context(&context);
 
@@ -106,3 +106,125 @@ fn deep_swap_improves_cost() {
         "improved solution must remain feasible"
     );
 }
+
+/// Clone-based search for the best feasible swap, evaluated on whole solutions.
+fn reference_best_swap(
+    solution: &Solution,
+    context: &rust_alns_py::structs::context::Context,
+) -> Option<Solution> {
+    let current_cost = solution.cost_with_context(context);
+    let mut best: Option<(f64, Solution)> = None;
+    let visits = solution.all_visits();
+    for (idx_a, visit_a) in visits.iter().enumerate() {
+        let Some(origin_voyage_a) = visit_a.assigned_voyage_id else {
+            continue;
+        };
+        for visit_b in visits.iter().skip(idx_a + 1) {
+            let Some(origin_voyage_b) = visit_b.assigned_voyage_id else {
+                continue;
+            };
+            if visit_a.installation_id() == visit_b.installation_id() {
+                continue;
+            }
+            let mut candidate = solution.clone();
+            candidate.unassign_visits(&[visit_a.id(), visit_b.id()]);
+            candidate.ensure_schedule_is_updated();
+            if !candidate.visit_insertion_is_possible(context, visit_a.id(), origin_voyage_b)
+                || !candidate.visit_insertion_is_possible(context, visit_b.id(), origin_voyage_a)
+                || candidate
+                    .greedy_insert_visit(visit_a.id(), origin_voyage_b, context)
+                    .is_err()
+                || candidate
+                    .greedy_insert_visit(visit_b.id(), origin_voyage_a, context)
+                    .is_err()
+            {
+                continue;
+            }
+            candidate.ensure_consistency_updated(context);
+            if !candidate.is_fully_feasible(context) {
+                continue;
+            }
+            let delta = candidate.cost_with_context(context) - current_cost;
+            if delta < -f64::EPSILON && best.as_ref().map_or(true, |(d, _)| delta < *d) {
+                best = Some((delta, candidate));
+            }
+        }
+    }
+    best.map(|(_, candidate)| candidate)
+}
+
+fn routes(solution: &Solution) -> Vec<(usize, Vec<usize>)> {
+    let mut routes: Vec<_> = solution
+        .voyages
+        .iter()
+        .map(|voyage| {
+            let voyage = voyage.borrow();
+            (voyage.id, voyage.visit_ids.clone())
+        })
+        .collect();
+    routes.sort();
+    routes
+}
+
+#[test]
+fn deep_swap_matches_clone_based_search() {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let context = engine.context.clone();
+    let worse_solution = introduce_worse_swap(&engine.current_solution, &context);
+
+    let mut expected = worse_solution.clone();
+    expected.ensure_consistency_updated(&context);
+    while let Some(next) = reference_best_swap(&expected, &context) {
+        expected = next;
+    }
+
+    let mut improved = worse_solution.clone();
+    let mut rng = StdRng::seed_from_u64(42);
+    DeepSwap::default().apply(&mut improved, &context, &mut rng);
+    improved.ensure_consistency_updated(&context);
+
+    assert_eq!(routes(&improved), routes(&expected));
+    assert!(
+        (improved.cost_with_context(&context) - expected.cost_with_context(&context)).abs() < 1e-6
+    );
+}
+
+#[cfg(feature = "parallel")]
+#[test]
+fn deep_swap_moves_do_not_depend_on_thread_count() {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let worse_solution = introduce_worse_swap(&engine.current_solution, &engine.context);
+
+    let mut results = Vec::new();
+    for threads in [1, 4] {
+        let mut context = (*engine.context).clone();
+        context.threads = threads;
+        let mut improved = worse_solution.clone();
+        let mut rng = StdRng::seed_from_u64(42);
+        DeepSwap::default().apply(&mut improved, &context, &mut rng);
+        improved.ensure_consistency_updated(&context);
+        results.push(routes(&improved));
+    }
+
+    assert_eq!(results[0], results[1]);
+}
@@ -0,0 +1,97 @@
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+use rust_alns_py::structs::context::Context;
+use rust_alns_py::structs::feasibility::FeasibilityViolations;
+use rust_alns_py::structs::solution::Solution;
+
+fn checked_violations(solution: &mut Solution, context: &Context) -> FeasibilityViolations {
+    let violations = solution.feasibility_violations(context);
+    assert_eq!(
+        violations.is_feasible(),
+        solution.check_feasibility_from_scratch(context),
+        "{:?}",
+        violations
+    );
+    // A fresh tracker must arrive at the same counters
+    let mut rebuilt = solution.clone();
+    rebuilt.all_visits_mut();
+    assert_eq!(rebuilt.feasibility_violations(context), violations);
+    violations
+}
+
+#[test]
+fn feasibility_counters_follow_changes_and_rollbacks() {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let context = engine.context.clone();
+    let mut solution = engine.current_solution.clone();
+    let initial = checked_violations(&mut solution, &context);
+
+    solution.begin_transaction();
+    let removed: Vec<usize> = solution
+        .all_visits()
+        .iter()
+        .filter(|visit| visit.is_assigned)
+        .map(|visit| visit.id())
+        .step_by(2)
+        .collect();
+    solution.unassign_visits(&removed);
+    checked_violations(&mut solution, &context);
+
+    solution.add_idle_vessel_and_add_empty_voyages(&context);
+    let voyage_ids: Vec<usize> = solution.voyages.iter().map(|v| v.borrow().id).collect();
+    for (&visit_id, &voyage_id) in removed.iter().zip(voyage_ids.iter().cycle()) {
+        solution
+            .greedy_insert_visit(visit_id, voyage_id, &context)
+            .expect("Insertion failed");
+    }
+    // The check removes the voyages left empty, so the remaining ones are collected afterwards
+    checked_violations(&mut solution, &context);
+    assert!(removed
+        .iter()
+        .all(|&visit_id| solution.all_visits()[visit_id].is_assigned));
+    assert!(solution.voyages.iter().all(|v| !v.borrow().is_empty()));
+    let voyage_ids: Vec<usize> = solution.voyages.iter().map(|v| v.borrow().id).collect();
+
+    // Moving every voyage to the first vessel makes the voyages of a day conflict
+    let vessel_id = solution.voyages[0].borrow().vessel_id.unwrap();
+    for &voyage_id in &voyage_ids {
+        solution
+            .reassign_voyage_vessel(voyage_id, vessel_id)
+            .expect("Reassignment failed");
+    }
+    let violations = checked_violations(&mut solution, &context);
+    assert!(violations.vessel_day_conflicts > 0 || violations.overlapping_voyages > 0);
+
+    solution.rollback_transaction();
+    assert_eq!(checked_violations(&mut solution, &context), initial);
+
+    // Two visits to the same installation on the same day break its departure spread
+    let pair = solution.all_visits().iter().find_map(|a| {
+        let spread = context
+            .problem
+            .get_installation_by_id(a.installation_id())?
+            .departure_spread;
+        let b = solution.all_visits().iter().find(|b| {
+            b.id() != a.id() && b.installation_id() == a.installation_id() && b.is_assigned
+        })?;
+        (a.is_assigned && spread > 0).then(|| (a.id(), b.departure_day))
+    });
+    let (visit_id, day) = pair.expect("No installation with two visits");
+    let previous_day = std::mem::replace(
+        &mut solution.visit_mut(visit_id).unwrap().departure_day,
+        day,
+    );
+    let violations = checked_violations(&mut solution, &context);
+    assert!(violations.spread_violations > 0);
+    solution.visit_mut(visit_id).unwrap().departure_day = previous_day;
+    assert_eq!(checked_violations(&mut solution, &context), initial);
+}
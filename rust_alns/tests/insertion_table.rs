@@ -0,0 +1,118 @@
+use rand::rngs::StdRng;
+use rand::SeedableRng;
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+use rust_alns_py::operators::repair::deep_greedy_insertion::DeepGreedyInsertion;
+use rust_alns_py::operators::repair::k_regret_insertion::KRegretInsertion;
+use rust_alns_py::operators::traits::RepairOperator;
+use rust_alns_py::structs::context::Context;
+use rust_alns_py::structs::solution::Solution;
+
+/// Initial solution with every third assigned visit removed, ready for repair.
+fn destroyed_solution() -> (Solution, Context) {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let context = (*engine.context).clone();
+    let mut solution = engine.current_solution.clone();
+    solution.ensure_consistency_updated(&context);
+    let removed: Vec<usize> = solution
+        .all_visits()
+        .iter()
+        .filter(|visit| visit.is_assigned)
+        .map(|visit| visit.id())
+        .step_by(3)
+        .collect();
+    assert!(!removed.is_empty());
+    solution.unassign_visits(&removed);
+    solution.ensure_consistency_updated(&context);
+    solution.add_idle_vessel_and_add_empty_voyages(&context);
+    solution.ensure_schedule_is_updated();
+    (solution, context)
+}
+
+/// Repair that evaluates every insertion again after each step and rebuilds the schedule.
+fn reference_repair(solution: &mut Solution, context: &Context, regret_k: Option<usize>) {
+    loop {
+        let mut best: Option<(usize, usize, f64)> = None;
+        for visit in solution.get_unassigned_visits() {
+            let k = regret_k.unwrap_or(1);
+            let costs = solution.top_k_visit_insertion_costs(context, visit.id(), k);
+            if costs.len() < k {
+                continue;
+            }
+            let score = match regret_k {
+                Some(k) => costs[0].1 - costs[k - 1].1,
+                None => costs[0].1,
+            };
+            if best.map_or(true, |(_, _, best_score)| score < best_score) {
+                best = Some((visit.id(), costs[0].0, score));
+            }
+        }
+        let Some((visit_id, voyage_id, _)) = best else {
+            break;
+        };
+        solution
+            .greedy_insert_visit(visit_id, voyage_id, context)
+            .expect("selected insertion is feasible");
+        solution.ensure_schedule_is_updated();
+    }
+}
+
+fn routes(solution: &Solution) -> Vec<(usize, Vec<usize>)> {
+    solution
+        .voyages
+        .iter()
+        .map(|voyage| {
+            let voyage = voyage.borrow();
+            (voyage.id, voyage.visit_ids.clone())
+        })
+        .collect()
+}
+
+#[test]
+fn cached_insertion_costs_give_the_same_repairs() {
+    let (destroyed, context) = destroyed_solution();
+    let mut rng = StdRng::seed_from_u64(7);
+
+    let operators: [(Box<dyn RepairOperator>, Option<usize>); 3] = [
+        (Box::new(DeepGreedyInsertion), None),
+        (Box::new(KRegretInsertion { k: 2 }), Some(2)),
+        (Box::new(KRegretInsertion { k: 3 }), Some(3)),
+    ];
+    for (operator, regret_k) in operators {
+        let mut expected = destroyed.clone();
+        reference_repair(&mut expected, &context, regret_k);
+
+        let mut repaired = destroyed.clone();
+        operator.apply(&mut repaired, &context, &mut rng);
+        assert!(repaired.is_schedule_up_to_date());
+        assert_eq!(
+            routes(&repaired),
+            routes(&expected),
+            "regret k = {:?}",
+            regret_k
+        );
+
+        // The incrementally updated schedule agrees with a full rebuild
+        let mut rebuilt = repaired.clone();
+        rebuilt.schedule.set_need_update(true);
+        rebuilt.ensure_schedule_is_updated();
+        for voyage in &repaired.voyages {
+            let voyage = voyage.borrow();
+            if let Some(vessel_id) = voyage.vessel_id {
+                assert_eq!(
+                    repaired.schedule.get_all_voyages_for_vessel(vessel_id),
+                    rebuilt.schedule.get_all_voyages_for_vessel(vessel_id)
+                );
+            }
+        }
+    }
+}
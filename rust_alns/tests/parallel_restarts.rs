@@ -0,0 +1,101 @@
+use rand::RngCore;
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine, ALNSRunWithRestartsResult};
+
+fn assert_close(a: f64, b: f64) {
+    assert!((a - b).abs() <= 1e-6 * b.abs().max(1.0), "{} != {}", a, b);
+}
+
+fn run(restarts: usize, threads: usize) -> (ALNSEngine, ALNSRunWithRestartsResult) {
+    let mut engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        5,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let result = engine.run_with_restarts_on_threads(restarts, threads);
+    assert_close(engine.best_cost(), result.global_metrics.best_cost);
+    (engine, result)
+}
+
+#[test]
+fn parallel_restarts_match_serial_restarts() {
+    let (mut serial_engine, serial) = run(4, 1);
+    let serial_next_random = serial_engine.rng.next_u64();
+    // Runs with the same seeds start from the same solutions
+    let (_, repeated) = run(4, 1);
+    for (expected, summary) in serial
+        .restart_summaries
+        .iter()
+        .zip(&repeated.restart_summaries)
+    {
+        assert_close(summary.initial_cost, expected.initial_cost);
+        assert_close(summary.best_cost, expected.best_cost);
+    }
+    // Runs on several threads without the `parallel` feature as well
+    for threads in [2, 3] {
+        let (mut engine, parallel) = run(4, threads);
+        assert_eq!(
+            parallel.restart_summaries.len(),
+            serial.restart_summaries.len()
+        );
+        for (expected, summary) in serial
+            .restart_summaries
+            .iter()
+            .zip(&parallel.restart_summaries)
+        {
+            assert_eq!(summary.restart_index, expected.restart_index);
+            assert_eq!(summary.seed, expected.seed);
+            assert_close(summary.initial_cost, expected.initial_cost);
+            assert_close(summary.best_cost, expected.best_cost);
+            assert_close(summary.final_cost, expected.final_cost);
+            assert_eq!(summary.iterations_completed, expected.iterations_completed);
+        }
+        assert_close(
+            parallel.global_metrics.best_cost,
+            serial.global_metrics.best_cost,
+        );
+        assert_eq!(
+            parallel.global_metrics.iteration,
+            serial.global_metrics.iteration
+        );
+
+        // The engine is left in the state of the last restart on both paths
+        assert_close(engine.initial_cost, serial_engine.initial_cost);
+        assert_eq!(engine.iteration, serial_engine.iteration);
+        assert_eq!(engine.temperature, serial_engine.temperature);
+        assert_eq!(
+            engine.alns_context.destroy_operator_weights,
+            serial_engine.alns_context.destroy_operator_weights
+        );
+        assert_eq!(
+            engine.alns_context.repair_operator_weights,
+            serial_engine.alns_context.repair_operator_weights
+        );
+        assert_eq!(
+            engine.alns_context.cost_history.len(),
+            serial_engine.alns_context.cost_history.len()
+        );
+        for (&cost, &expected) in engine
+            .alns_context
+            .cost_history
+            .iter()
+            .zip(&serial_engine.alns_context.cost_history)
+        {
+            assert_close(cost, expected);
+        }
+        assert_eq!(engine.rng.next_u64(), serial_next_random);
+        assert_close(
+            engine.current_solution.cost_with_context(&engine.context),
+            serial_engine
+                .current_solution
+                .cost_with_context(&serial_engine.context),
+        );
+        // Worker operators run single-threaded, the engine keeps its own setting
+        assert_eq!(engine.context.threads, serial_engine.context.threads);
+    }
+}
@@ -0,0 +1,66 @@
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+use rust_alns_py::utils::tsp_solver::TSPResult;
+
+fn assert_same_result(cached: &TSPResult, solved: &TSPResult) {
+    assert_eq!(cached.visit_ids_seq, solved.visit_ids_seq);
+    assert_eq!(cached.sailing_time, solved.sailing_time);
+    assert_eq!(cached.waiting_time, solved.waiting_time);
+    assert_eq!(cached.arrival_time, solved.arrival_time);
+    assert_eq!(cached.end_time, solved.end_time);
+}
+
+#[test]
+fn cached_routes_match_the_solver() {
+    let mut engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let context = engine.context.clone();
+    context.route_cache.clear();
+
+    let solution = engine.current_solution.clone();
+    let visit_ids: Vec<usize> = solution.all_visits().iter().map(|v| v.id()).collect();
+    for voyage in &solution.voyages {
+        let voyage = voyage.borrow();
+        if voyage.is_empty() {
+            continue;
+        }
+        let solved = context.tsp_solver.solve_for_voyage(&voyage);
+        for _ in 0..2 {
+            assert_same_result(&context.solve_for_voyage(&voyage), &solved);
+        }
+        // A voyage with the same visits in another order is the same cache entry
+        let mut reversed = voyage.clone();
+        reversed.visit_ids.reverse();
+        assert_same_result(&context.solve_for_voyage(&reversed), &solved);
+
+        for &visit_id in visit_ids.iter().filter(|id| !voyage.visit_ids.contains(id)) {
+            let solved = context
+                .tsp_solver
+                .evaluate_greedy_insertion(&voyage, visit_id);
+            for _ in 0..2 {
+                assert_same_result(
+                    &context.evaluate_greedy_insertion(&voyage, visit_id),
+                    &solved,
+                );
+            }
+        }
+    }
+    let stats = context.route_cache.stats();
+    assert!(stats.hits >= stats.misses);
+    assert_eq!(stats.size, stats.misses);
+
+    // Restarts share the context and its cache
+    let misses_before = stats.misses;
+    engine.run_with_restarts(2);
+    let stats = engine.context.route_cache.stats();
+    assert!(stats.misses > misses_before);
+    assert!(stats.hits > 0);
+}
@@ -0,0 +1,103 @@
+use rand::rngs::StdRng;
+use rand::{Rng, SeedableRng};
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+use rust_alns_py::operators::destroy::shaw_removal::ShawRemoval;
+use rust_alns_py::operators::traits::DestroyOperator;
+use rust_alns_py::structs::context::Context;
+use rust_alns_py::structs::solution::Solution;
+
+/// Visits removed by the operator: recomputes the relatedness to all removed visits and sorts
+/// the candidates on every step.
+fn reference_removal(
+    operator: &ShawRemoval,
+    solution: &Solution,
+    context: &Context,
+    rng: &mut StdRng,
+) -> Vec<usize> {
+    let relatedness = |i: usize, j: usize| {
+        let visit_i = solution.visit(i).unwrap();
+        let visit_j = solution.visit(j).unwrap();
+        let t_ij = context
+            .problem
+            .distance_manager
+            .distance(visit_i.installation_id(), visit_j.installation_id());
+        let t_i = visit_i.departure_day.unwrap_or(0) as f64;
+        let t_j = visit_j.departure_day.unwrap_or(0) as f64;
+        let q_i = visit_i.demand() as f64;
+        let q_j = visit_j.demand() as f64;
+        operator.alpha * t_ij + operator.beta * (t_i - t_j).abs() + operator.phi * (q_i - q_j).abs()
+    };
+    let mut candidates: Vec<usize> = solution
+        .voyages
+        .iter()
+        .flat_map(|voyage| voyage.borrow().visit_ids.clone())
+        .collect();
+    let n_visits = candidates.len();
+    let frac = operator.xi_min + rng.gen_range(0.0..1.0) * (operator.xi_max - operator.xi_min);
+    let to_remove = ((frac * n_visits as f64).round() as usize).min(n_visits);
+    let seed_idx = rng.gen_range(0..candidates.len());
+    let mut removed = vec![candidates.remove(seed_idx)];
+    while removed.len() < to_remove && !candidates.is_empty() {
+        let mut scored: Vec<(usize, f64)> = candidates
+            .iter()
+            .map(|&j| {
+                let r = removed
+                    .iter()
+                    .map(|&i| relatedness(i, j))
+                    .fold(f64::INFINITY, f64::min);
+                (j, r)
+            })
+            .collect();
+        scored.sort_by(|a, b| a.1.partial_cmp(&b.1).unwrap());
+        let r: f64 = rng.gen_range(0.0..1.0);
+        let idx = ((r.powf(operator.p)) * (scored.len() as f64)).floor() as usize;
+        let (selected, _) = scored[idx.min(scored.len() - 1)];
+        candidates.retain(|&id| id != selected);
+        removed.push(selected);
+    }
+    removed.sort_unstable();
+    removed
+}
+
+#[test]
+fn shaw_removal_matches_reference_selection() {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let context = engine.context.clone();
+    let solution = engine.current_solution.clone();
+    for (p, seed) in [(1.0, 1), (3.0, 2), (6.0, 3), (3.0, 4)] {
+        let operator = ShawRemoval {
+            xi_min: 0.2,
+            xi_max: 0.6,
+            p,
+            alpha: 1.0,
+            beta: 5.0,
+            phi: 0.5,
+        };
+        let expected = reference_removal(
+            &operator,
+            &solution,
+            &context,
+            &mut StdRng::seed_from_u64(seed),
+        );
+        let mut destroyed = solution.clone();
+        operator.apply(&mut destroyed, &context, &mut StdRng::seed_from_u64(seed));
+        let removed: Vec<usize> = destroyed
+            .all_visits()
+            .iter()
+            .filter(|visit| !visit.is_assigned)
+            .map(|visit| visit.id())
+            .filter(|id| solution.visit(*id).unwrap().is_assigned)
+            .collect();
+        assert_eq!(removed, expected, "p = {}, seed = {}", p, seed);
+    }
+}
@@ -0,0 +1,46 @@
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+use rust_alns_py::structs::solution::Solution;
+
+fn assert_index_matches(solution: &Solution) {
+    for (position, voyage_cell) in solution.voyages.iter().enumerate() {
+        let voyage_id = voyage_cell.borrow().id;
+        assert_eq!(solution.voyage_position(voyage_id), Some(position));
+    }
+}
+
+#[test]
+fn voyage_index_follows_additions_removals_and_rollbacks() {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let context = engine.context.clone();
+    let mut solution = engine.current_solution.clone();
+    solution.ensure_consistency_updated(&context);
+    assert_index_matches(&solution);
+    let voyages_before: Vec<usize> = solution.voyages.iter().map(|v| v.borrow().id).collect();
+
+    solution.begin_transaction();
+    solution.add_idle_vessel_and_add_empty_voyages(&context);
+    assert!(solution.voyages.len() > voyages_before.len());
+    assert_index_matches(&solution);
+
+    // Emptying a voyage in the middle makes the compaction shift the voyages after it
+    let emptied = solution.voyages[0].borrow().clone();
+    solution.unassign_visits(&emptied.visit_ids);
+    solution.ensure_consistency_updated(&context);
+    assert!(solution.voyage_by_id(emptied.id).is_none());
+    assert_index_matches(&solution);
+
+    solution.rollback_transaction();
+    let voyages_after: Vec<usize> = solution.voyages.iter().map(|v| v.borrow().id).collect();
+    assert_eq!(voyages_after, voyages_before);
+    assert_index_matches(&solution);
+}
@@ -0,0 +1,155 @@
+use rand::rngs::StdRng;
+use rand::SeedableRng;
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+use rust_alns_py::operators::improvement::voyage_number_reduction::VoyageNumberReduction;
+use rust_alns_py::operators::traits::ImprovementOperator;
+use rust_alns_py::structs::context::Context;
+use rust_alns_py::structs::solution::Solution;
+
+fn non_empty_voyages(solution: &Solution) -> usize {
+    solution
+        .voyages
+        .iter()
+        .filter(|voyage| !voyage.borrow().visit_ids.is_empty())
+        .count()
+}
+
+fn small_instance() -> (Context, Solution) {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let context = (*engine.context).clone();
+    let mut solution = engine.current_solution.clone();
+    solution.ensure_consistency_updated(&context);
+    (context, solution)
+}
+
+/// Lowest cost increase of removing a voyage, trying every non-empty voyage on its own copy of the
+/// solution without any screening, and the visits of that voyage.
+fn unscreened_removal(solution: &Solution, context: &Context) -> Option<(f64, Vec<usize>)> {
+    let current_cost = solution.cost_with_context(context);
+    let voyages: Vec<(usize, Vec<usize>)> = solution
+        .voyages
+        .iter()
+        .map(|voyage| voyage.borrow())
+        .filter(|voyage| !voyage.visit_ids.is_empty())
+        .map(|voyage| (voyage.id, voyage.visit_ids.clone()))
+        .collect();
+    let mut best: Option<(f64, Vec<usize>)> = None;
+    'voyages: for (voyage_id, visit_ids) in voyages {
+        let mut trial = solution.clone();
+        trial.unassign_visits(&visit_ids);
+        for &visit_id in &visit_ids {
+            trial.ensure_schedule_is_updated();
+            let target = trial
+                .voyages
+                .iter()
+                .map(|voyage| voyage.borrow())
+                .filter(|voyage| voyage.id != voyage_id && !voyage.visit_ids.is_empty())
+                .filter_map(|voyage| {
+                    trial
+                        .visit_insertion_cost(context, visit_id, &voyage)
+                        .map(|cost| (voyage.id, cost))
+                })
+                .fold(None, |best: Option<(usize, f64)>, (id, cost)| match best {
+                    Some((_, best_cost)) if best_cost <= cost => best,
+                    _ => Some((id, cost)),
+                });
+            let Some((target, _)) = target else {
+                continue 'voyages;
+            };
+            if trial
+                .greedy_insert_visit(visit_id, target, context)
+                .is_err()
+            {
+                continue 'voyages;
+            }
+        }
+        trial.ensure_consistency_updated(context);
+        let cost_increase = trial.cost_with_context(context) - current_cost;
+        if best
+            .as_ref()
+            .map_or(true, |(best_increase, _)| cost_increase < *best_increase)
+        {
+            best = Some((cost_increase, visit_ids));
+        }
+    }
+    best
+}
+
+fn assert_close(actual: f64, expected: f64) {
+    assert!(
+        (actual - expected).abs() <= 1e-6 * expected.abs().max(1.0),
+        "{} != {}",
+        actual,
+        expected
+    );
+}
+
+#[test]
+fn screened_removal_matches_unscreened_search() {
+    let (context, solution) = small_instance();
+    let expected = unscreened_removal(&solution, &context);
+
+    for screen_size in [1, 2, 8, usize::MAX] {
+        let mut screened = solution.clone();
+        let removal = VoyageNumberReduction::with_screen_size(screen_size)
+            .next_removal(&mut screened, &context);
+        assert_eq!(
+            removal.is_some(),
+            expected.is_some(),
+            "screen size {}",
+            screen_size
+        );
+        let (Some((cost_increase, relocations)), Some((expected_increase, expected_visits))) =
+            (&removal, &expected)
+        else {
+            continue;
+        };
+        if *expected_increase < 0.0 && screen_size != usize::MAX {
+            // A screen may stop at an improving removal that is not the cheapest one
+            assert!(*cost_increase < 0.0, "screen size {}", screen_size);
+            continue;
+        }
+        // Without an improving removal, or with every voyage in one screen, all voyages are tried
+        assert_close(*cost_increase, *expected_increase);
+        let visits: Vec<usize> = relocations.iter().map(|(visit_id, _)| *visit_id).collect();
+        assert_eq!(&visits, expected_visits, "screen size {}", screen_size);
+    }
+}
+
+#[test]
+fn screened_reduction_keeps_visits_assigned() {
+    let (context, solution) = small_instance();
+    let voyages_before = non_empty_voyages(&solution);
+
+    for screen_size in [0, 1, 8, usize::MAX] {
+        let mut reduced = solution.clone();
+        VoyageNumberReduction::with_screen_size(screen_size).apply(
+            &mut reduced,
+            &context,
+            &mut StdRng::seed_from_u64(0),
+        );
+        assert!(
+            reduced.is_complete_solution(),
+            "screen size {}",
+            screen_size
+        );
+        assert!(
+            non_empty_voyages(&reduced) <= voyages_before,
+            "screen size {}",
+            screen_size
+        );
+        // Trial removals are rolled back: the cached cost matches a fresh evaluation
+        let cost = reduced.cost_with_context(&context);
+        assert_close(cost, reduced.cost_from_scratch(&context));
+    }
+}
@@ -0,0 +1,89 @@
+use rand::rngs::StdRng;
+use rand::{Rng, SeedableRng};
+use rust_alns_py::alns::engine::{ALNSAlgorithmMode, ALNSEngine};
+use rust_alns_py::operators::destroy::worst_visit_removal_in_voyages::WorstVisitRemovalInVoyages;
+use rust_alns_py::operators::traits::DestroyOperator;
+use rust_alns_py::structs::context::Context;
+use rust_alns_py::structs::solution::Solution;
+
+/// Visits removed by the operator: evaluates the removal of every visit again after each step.
+fn reference_removal(
+    operator: &WorstVisitRemovalInVoyages,
+    solution: &mut Solution,
+    context: &Context,
+    rng: &mut StdRng,
+) -> Vec<usize> {
+    let n_visits: usize = solution
+        .voyages
+        .iter()
+        .map(|v| v.borrow().visit_ids.len())
+        .sum();
+    let frac = operator.xi_min + rng.gen_range(0.0..1.0) * (operator.xi_max - operator.xi_min);
+    let to_remove = ((frac * n_visits as f64).round() as usize).min(n_visits);
+    let mut removed = Vec::new();
+    for _ in 0..to_remove {
+        let mut savings = Vec::new();
+        for voyage in &solution.voyages {
+            for &visit_id in &voyage.borrow().visit_ids {
+                let saving = -solution.removal_cost_delta(visit_id, context, true);
+                savings.push((visit_id, saving));
+            }
+        }
+        savings.sort_by(|a, b| b.1.partial_cmp(&a.1).unwrap());
+        let r: f64 = rng.gen_range(0.0..1.0);
+        let idx = ((r.powf(operator.p)) * (savings.len() as f64)).floor() as usize;
+        let (visit_id, _) = savings[idx.min(savings.len() - 1)];
+        solution.unassign_visits(&[visit_id]);
+        removed.push(visit_id);
+    }
+    removed
+}
+
+#[test]
+fn worst_removal_matches_full_reevaluation() {
+    let engine = ALNSEngine::new_from_instance(
+        "SMALL_1",
+        7,
+        100.0,
+        0.9,
+        10,
+        0.85,
+        1,
+        ALNSAlgorithmMode::Baseline,
+    )
+    .expect("Failed to initialize engine");
+    let context = engine.context.clone();
+    let mut solution = engine.current_solution.clone();
+    solution.ensure_consistency_updated(&context);
+    for (p, seed) in [(1.0, 1), (3.0, 2), (10.0, 3)] {
+        let operator = WorstVisitRemovalInVoyages {
+            xi_min: 0.3,
+            xi_max: 0.8,
+            p,
+        };
+        let mut expected = solution.clone();
+        let expected_removed = reference_removal(
+            &operator,
+            &mut expected,
+            &context,
+            &mut StdRng::seed_from_u64(seed),
+        );
+        let mut destroyed = solution.clone();
+        operator.apply(&mut destroyed, &context, &mut StdRng::seed_from_u64(seed));
+        let assigned = |solution: &Solution| -> Vec<bool> {
+            solution
+                .all_visits()
+                .iter()
+                .map(|v| v.is_assigned)
+                .collect()
+        };
+        assert!(!expected_removed.is_empty());
+        assert_eq!(
+            assigned(&destroyed),
+            assigned(&expected),
+            "p = {}, seed = {}",
+            p,
+            seed
+        );
+    }
+}
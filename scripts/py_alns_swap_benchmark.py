@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark serial vs process-pool swap evaluation of the Python ALNS deep_greedy_swap_plain operator."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np
+
+from py_alns.Beans.schedule import Schedule
+from py_alns.alns.improve_operator import deep_greedy_swap_plain
+from py_alns.alns.mutation_service import plain_swap_candidates
+from py_alns.alns.parallel_swap import shutdown_pool
+from py_alns.utils.utils import generate_data
+
+
+DEFAULT_SIZES = ["SMALL_TRAIN_1", "MEDIUM_TRAIN_1", "LARGE_TRAIN_1"]
+DEFAULT_WORKERS = [2, 4]
+RESULTS_PATH = REPO_ROOT / "output" / "py_alns_swap_benchmark.json"
+
+
+def timed_swap(schedule: Schedule, workers: int) -> tuple[Schedule, float]:
+    start_time = time.perf_counter()
+    improved = deep_greedy_swap_plain(schedule, workers=workers)
+    return improved, time.perf_counter() - start_time
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark parallel swap evaluation in the Python ALNS")
+    parser.add_argument(
+        "--sizes",
+        nargs="*",
+        default=DEFAULT_SIZES,
+        help=f"Generation configs to benchmark (default: {', '.join(DEFAULT_SIZES)})",
+    )
+    parser.add_argument(
+        "--workers",
+        nargs="*",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Worker counts to compare with the serial path (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument("--seeds", type=int, default=2, help="Instances per size (default: %(default)s)")
+    parser.add_argument(
+        "--results-path",
+        type=Path,
+        default=RESULTS_PATH,
+        help="Destination JSON file for per-run results",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    results: List[Dict[str, Any]] = []
+
+    for size in args.sizes:
+        for seed in range(args.seeds):
+            random.seed(seed)
+            np.random.seed(seed)
+            insts, vessels, base = generate_data(size, f"swap_benchmark_{seed}", save=False)
+            schedule = Schedule(vessels, insts, base)
+            candidates = len(plain_swap_candidates(schedule))
+
+            serial, serial_time = timed_swap(schedule, workers=1)
+            print(f"{size:<16} seed={seed} candidates={candidates:<6} serial: {serial_time:7.2f}s")
+            for workers in args.workers:
+                # First call starts the pool, it is not counted
+                deep_greedy_swap_plain(schedule, workers=workers)
+                parallel, parallel_time = timed_swap(schedule, workers=workers)
+                if parallel.snapshot() != serial.snapshot():
+                    raise RuntimeError(f"Parallel swap result differs from serial for {size}, seed {seed}")
+                speedup = serial_time / parallel_time if parallel_time > 0 else float("nan")
+                print(f"{'':<16} {'':<6} workers={workers:<3} parallel: {parallel_time:7.2f}s speedup: {speedup:5.2f}x")
+                results.append(
+                    {
+                        "size": size,
+                        "seed": seed,
+                        "workers": workers,
+                        "candidates": candidates,
+                        "serial_seconds": serial_time,
+                        "parallel_seconds": parallel_time,
+                        "speedup": speedup,
+                        "final_cost": float(serial.total_cost),
+                    }
+                )
+                shutdown_pool()
+
+    args.results_path.parent.mkdir(parents=True, exist_ok=True)
+    with args.results_path.open("w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2)
+
+    print("=" * 44)
+    print(f"{'Size':<16} {'Workers':>7} {'Mean speedup':>14}")
+    print("=" * 44)
+    for size in args.sizes:
+        for workers in args.workers:
+            speedups = [r["speedup"] for r in results if r["size"] == size and r["workers"] == workers]
+            if speedups:
+                print(f"{size:<16} {workers:>7} {statistics.mean(speedups):>13.2f}x")
+    print(f"Results written to {args.results_path}")
+
+
+if __name__ == "__main__":
+    main()
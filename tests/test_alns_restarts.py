@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Checks that restarts run in a process pool give the same results as sequential restarts with the same seeds.
+"""
+
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+from py_alns.utils.utils import generate_data
+from py_alns.alns.alns import ALNS
+
+
+@pytest.fixture
+def alns(tmp_path, monkeypatch):
+    random.seed(0)
+    np.random.seed(0)
+    insts, vessels, base = generate_data('SMALL_TRAIN_1', 'restarts', save=False)
+    # ALNS writes its log to logs/ of the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    alns = ALNS(insts, base, vessels, seed=11)
+    alns.num_restarts = 3
+    alns.num_iterations = 20
+    alns.cooling_rate = 1 - alns.cooling_parameter / alns.num_iterations
+    return alns
+
+
+def test_restart_seeds_are_deterministic(alns):
+    assert alns.restart_seeds() == [11, 12, 13]
+
+
+def test_parallel_restarts_match_sequential(alns):
+    sequential_best, sequential_summaries = alns.run_with_restarts(workers=1)
+    parallel_best, parallel_summaries = alns.run_with_restarts(workers=2)
+
+    assert parallel_best.snapshot() == sequential_best.snapshot()
+    assert parallel_best.total_cost == sequential_best.total_cost
+    ignored = {'time'}
+    assert [{k: v for k, v in s.items() if k not in ignored} for s in parallel_summaries] == \
+           [{k: v for k, v in s.items() if k not in ignored} for s in sequential_summaries]
+    assert [s['restart'] for s in parallel_summaries] == [0, 1, 2]
+    assert sequential_best.total_cost == min(s['best_cost'] for s in sequential_summaries)
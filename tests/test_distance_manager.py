@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Checks that the process-wide distance managers are not shared between instances with different node data.
+"""
+
+import sys
+
+import pytest
+
+sys.path.append('.')
+from py_alns.Beans.node import Base, Installation
+from py_alns.utils.distance_manager import DistanceManager
+
+
+def make_instance(deck_demand, time_window):
+    base = Base('base', 8, [8, 16], 5.0, 60.0)
+    insts = [Installation(1, 'inst_1', 'type', deck_demand, 2, 5.5, 60.5, 1, 1.0, time_window),
+             Installation(2, 'inst_2', 'type', 20, 2, 6.0, 61.0, 1, 1.0, [0, 24])]
+    return base, insts
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_managers():
+    DistanceManager.clear_shared()
+    yield
+    DistanceManager.clear_shared()
+
+
+def test_instances_with_other_node_data_get_own_arrays():
+    first = DistanceManager.for_instance(*make_instance(10, [7, 19]))
+    tw_start, tw_end, service_times = first.time_window_arrays()
+    assert (tw_start[1], tw_end[1], service_times[1]) == (7, 9, 10)
+
+    second = DistanceManager.for_instance(*make_instance(40, [0, 24]))
+    assert second is not first
+    tw_start, tw_end, service_times = second.time_window_arrays()
+    assert (tw_start[1], tw_end[1], service_times[1]) == (0, 24, 40)
+
+    assert DistanceManager.for_instance(*make_instance(10, [7, 19])) is first
+
+
+def test_shared_managers_are_bounded():
+    first = DistanceManager.for_instance(*make_instance(1, [0, 24]))
+    for demand in range(2, DistanceManager.MAX_SHARED_INSTANCES + 2):
+        DistanceManager.for_instance(*make_instance(demand, [0, 24]))
+    assert len(DistanceManager._shared) == DistanceManager.MAX_SHARED_INSTANCES
+    assert DistanceManager.for_instance(*make_instance(1, [0, 24])) is not first
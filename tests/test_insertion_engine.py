@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Checks that the insertion cost engine selects the same insertions as a full recalculation of the added cost matrix.
+"""
+
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+from py_alns.utils.utils import generate_data
+from py_alns.Beans.schedule import Schedule
+from py_alns.alns.destroy_operator import random_removal, worst_removal
+from py_alns.alns.insertion_engine import InsertionCostEngine
+from py_alns.alns.mutation_service import (added_costs_for_visits_insertion, insertion_added_cost,
+                                           is_insertion_feasible, min_insertion_added_cost_index,
+                                           min_kregret_insertion_added_cost_index)
+
+
+@pytest.fixture
+def schedule():
+    random.seed(0)
+    np.random.seed(0)
+    insts, vessels, base = generate_data('SMALL_TRAIN_1', 'insertion_engine', save=False)
+    return Schedule(vessels, insts, base)
+
+
+def expected_insertion(engine, k):
+    """
+    :return: tuple (pending position, added cost) chosen from the full added cost matrix, or None
+    """
+    pending_insts = [engine.insts[entry] for entry in engine.pending]
+    added_costs = added_costs_for_visits_insertion(pending_insts, engine.sch)
+    if k is None:
+        index = min_insertion_added_cost_index(added_costs)
+    else:
+        index = min_kregret_insertion_added_cost_index(added_costs, k)
+    if index == -1:
+        return None
+    return index, added_costs[index][1][0][1]
+
+
+@pytest.mark.parametrize('destroy_operator', [worst_removal, random_removal])
+@pytest.mark.parametrize('k', [None, 2, 3])
+def test_selection_matches_full_added_cost_matrix(schedule, destroy_operator, k):
+    sch = schedule.shallow_copy()
+    inst_pool = destroy_operator(sch)
+    sch.insert_idle_vessel_and_add_empty_voyages()
+    engine = InsertionCostEngine(inst_pool, sch)
+    while engine.pending:
+        expected = expected_insertion(engine, k)
+        best = engine.best_insertion() if k is None else engine.regret_insertion(k)
+        if expected is None:
+            assert best is None
+            break
+        entry, voyage_pos, added_cost = best
+        index, expected_cost = expected
+        assert engine.pending.index(entry) == index
+        assert added_cost == expected_cost
+        # The chosen voyage has the least added cost, possibly tied with others
+        inst, voyage = engine.insts[entry], engine.voyages[voyage_pos]
+        assert is_insertion_feasible(sch, inst, voyage)
+        assert insertion_added_cost(sch, inst, voyage) == expected_cost
+        engine.insert(entry, voyage_pos)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Checks that the relocation cost table kept between relocations matches a full recalculation of relocation costs.
+"""
+
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+from py_alns.utils.utils import generate_data
+from py_alns.Beans.schedule import Schedule
+from py_alns.alns.mutation_service import added_costs_for_visits_relocation
+from py_alns.alns.relocation_table import RelocationCostTable
+
+
+@pytest.fixture
+def schedule():
+    random.seed(0)
+    np.random.seed(0)
+    insts, vessels, base = generate_data('SMALL_TRAIN_1', 'relocation_table', save=False)
+    return Schedule(vessels, insts, base)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_relocation_costs_match_full_recalculation_after_each_move(schedule, seed):
+    rng = random.Random(seed)
+    sch = schedule.shallow_copy()
+    # Empty voyages and an idle vessel make moves that change vessel usage and overlaps
+    sch.insert_idle_vessel_and_add_empty_voyages()
+    table = RelocationCostTable(sch)
+    assert table.relocation_costs() == added_costs_for_visits_relocation(sch)
+    for _ in range(8):
+        moves = [move for move in table.relocation_costs() if move[3] < np.inf]
+        if not moves:
+            break
+        inst, origin, target, _ = rng.choice(moves)
+        sch = sch.shallow_copy()
+        sch.relocate_visit(inst, origin, target)
+        table.update(sch, inst, origin, target)
+        assert table.relocation_costs() == added_costs_for_visits_relocation(sch)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Checks that incremental Schedule.update and voyage indexes match full recalculation of cost, feasibility and lookups.
+"""
+
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+from py_alns.utils.utils import generate_data
+from py_alns.Beans.schedule import Schedule
+from py_alns.alns.destroy_operator import worst_removal, random_removal
+from py_alns.alns.repair_operator import deep_greedy_insertion, k_regret_insertion
+from py_alns.alns.improve_operator import (deep_greedy_relocation, deep_greedy_swap_plain,
+                                           fleet_size_and_cost_reduction)
+
+
+def assert_matches_full_recalculation(sch):
+    assert_indexes_match_scan(sch)
+    sch.update()
+    assert sch.total_cost == pytest.approx(sch.calc_total_cost(), abs=1e-6)
+    assert sch.feasible == sch._check_feasibility()
+
+
+def assert_indexes_match_scan(sch):
+    for inst in sch.installations:
+        expected = [voyage for voyages in sch.schedule.values() for voyage in voyages if inst in voyage.route]
+        assert sorted(map(id, sch.find_voyages_containing_visit(inst))) == sorted(map(id, expected))
+    for vessel, voyages in sch.schedule.items():
+        for day in range(7):
+            expected = next((voyage for voyage in voyages if voyage.start_day == day), None)
+            assert sch.find_voyage_on_day(vessel, day) is expected
+        for voyage in voyages:
+            assert sch.find_voyage(voyage.__deepcopy__()) is voyages[voyages.index(voyage)]
+
+
+@pytest.fixture
+def schedule():
+    random.seed(0)
+    np.random.seed(0)
+    insts, vessels, base = generate_data('SMALL_TRAIN_1', 'incremental_update', save=False)
+    return Schedule(vessels, insts, base)
+
+
+def test_initial_schedule_matches_full_recalculation(schedule):
+    assert schedule.total_cost == pytest.approx(schedule.calc_total_cost(), abs=1e-6)
+    assert_matches_full_recalculation(schedule)
+
+
+def test_copy_is_tracked_independently(schedule):
+    sch = schedule.shallow_copy()
+    inst_pool = worst_removal(sch, 2)
+    assert_matches_full_recalculation(sch)
+    assert not sch.feasible
+    assert_matches_full_recalculation(schedule)
+    assert schedule.feasible
+    sch.insert_idle_vessel_and_add_empty_voyages()
+    assert deep_greedy_insertion(inst_pool, sch)
+    sch.drop_empty_voyages()
+    assert_matches_full_recalculation(sch)
+
+
+@pytest.mark.parametrize('destroy_operator, repair_operator', [(worst_removal, deep_greedy_insertion),
+                                                              (random_removal, k_regret_insertion)])
+def test_operators_keep_tracking_consistent(schedule, destroy_operator, repair_operator):
+    sch = schedule.shallow_copy()
+    inst_pool = destroy_operator(sch)
+    assert_matches_full_recalculation(sch)
+    sch.insert_idle_vessel_and_add_empty_voyages()
+    assert_matches_full_recalculation(sch)
+    pool_empty = repair_operator(inst_pool, sch)
+    sch.drop_empty_voyages()
+    assert_matches_full_recalculation(sch)
+    if pool_empty and sch.feasible:
+        for improve_operator in [deep_greedy_relocation, fleet_size_and_cost_reduction, deep_greedy_swap_plain]:
+            sch = improve_operator(sch)
+            assert_matches_full_recalculation(sch)
+
+
+def test_indexes_follow_schedule_mutations(schedule):
+    sch = schedule.shallow_copy()
+    visit1, visit2 = sch.visits_list_plain()[0], sch.visits_list_plain()[-1]
+    sch.swap_visits_tuple_repr(visit1, visit2)
+    assert_indexes_match_scan(sch)
+    voyages = sch.flattened_voyages()
+    origin, target = voyages[0], voyages[-1]
+    inst = next(inst for inst in origin.route if not target.is_on_the_route(inst))
+    sch.relocate_visit(inst, origin, target)
+    assert_indexes_match_scan(sch)
+    sch.force_reassign_voyages(target.vessel, next(v for v in sch.vessels if not sch.schedule[v]))
+    assert_indexes_match_scan(sch)
+    assert_indexes_match_scan(schedule)
+
+
+def test_lookups_and_copies_leave_no_pending_work(schedule):
+    sch = schedule.shallow_copy()
+    visit1, visit2 = sch.visits_list_plain()[0], sch.visits_list_plain()[-1]
+    sch.swap_visits_tuple_repr(visit1, visit2)
+    assert sch._index_dirty_voyages and sch._dirty_voyages
+    sch.find_voyages_containing_visit(visit1[0])
+    # The index is up to date until the next change, the costs are still recalculated by the next update
+    assert not sch._index_dirty_voyages
+    assert sch._dirty_voyages
+    copied = sch.shallow_copy()
+    assert not (sch._dirty_voyages or copied._dirty_voyages or copied._index_dirty_voyages)
+    assert_matches_full_recalculation(copied)
+    assert_matches_full_recalculation(sch)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Checks tracing of the ALNS loop: statistics and dumps of Tracer, and that tracing does not change the search.
+"""
+
+import csv
+import json
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append('.')
+from py_alns.utils.utils import generate_data
+from py_alns.utils.tracer import Tracer, NullTracer
+from py_alns.alns.alns import ALNS
+
+
+def test_ring_buffer_keeps_last_events_and_all_totals():
+    tracer = Tracer(capacity=3)
+    for i in range(5):
+        tracer.set_iteration(0, i)
+        tracer.record('improve', 'op', tracer.clock(), cost_delta=-1)
+    assert len(tracer) == 3
+    assert [event[1] for event in tracer.events] == [2, 3, 4]
+    stats = tracer.summary()['improve/op']
+    assert stats['count'] == 5
+    assert stats['total_cost_delta'] == -5
+    assert stats['p50_time'] is not None
+
+
+def test_dumps(tmp_path):
+    tracer = Tracer()
+    tracer.record('destroy', 'worst_removal', tracer.clock(), 10.0)
+    tracer.record('repair', 'k_regret_insertion', tracer.clock(), -12.5)
+    tracer.dump_json(tmp_path / 'trace.json')
+    tracer.dump_csv(tmp_path / 'trace.csv')
+    dumped = json.loads((tmp_path / 'trace.json').read_text())
+    assert set(dumped['stages']) == {'destroy', 'repair'}
+    assert dumped['operators']['repair/k_regret_insertion']['total_cost_delta'] == -12.5
+    with open(tmp_path / 'trace.csv', newline='') as fh:
+        rows = list(csv.DictReader(fh))
+    assert [row['operator'] for row in rows] == ['worst_removal', 'k_regret_insertion']
+
+
+def make_alns(tracer):
+    random.seed(0)
+    np.random.seed(0)
+    insts, vessels, base = generate_data('SMALL_TRAIN_1', 'tracer', save=False)
+    alns = ALNS(insts, base, vessels, seed=5, tracer=tracer)
+    alns.num_restarts = 2
+    alns.num_iterations = 20
+    alns.cooling_rate = 1 - alns.cooling_parameter / alns.num_iterations
+    return alns
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_tracing_does_not_change_results(tmp_path, monkeypatch, workers):
+    # ALNS writes its log to logs/ of the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    untraced_best, _ = make_alns(NullTracer()).run_with_restarts(workers=1)
+    alns = make_alns(Tracer())
+    traced_best, _ = alns.run_with_restarts(workers=workers)
+    assert traced_best.snapshot() == untraced_best.snapshot()
+    stages = alns.tracer.stage_summary()
+    assert stages['destroy']['count'] == stages['repair']['count'] == 40
+    assert {event[0] for event in alns.tracer.events} == {0, 1}